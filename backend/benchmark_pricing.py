@@ -0,0 +1,254 @@
+"""
+Benchmark the pricing hot paths in-process, across dataset sizes.
+Times feature preparation, demand prediction, demand curves, profit optimization,
+price simulation and the DataService lookups against the historical data tiled to
+larger sizes (older copies of every segment's history, so lookups return the same
+rows). Results are written as JSON and compared against a saved baseline; the run
+fails when any case is slower than the baseline by more than the allowed regression.
+
+    python benchmark_pricing.py                      # run, compare with the baseline
+    python benchmark_pricing.py --save-baseline      # run and make this the baseline
+    python benchmark_pricing.py --sizes 1,8 --cases predict_demand,data.get_product_data
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from models.schemas import DemandPredictionInput
+from services.ai_service import XGBoostAIService
+from services.data_service import DataService
+from services.elasticity_service import ElasticityService
+from services.logging_service import LoggingService
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_results')
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'latest.json')
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+SEGMENT = dict(
+    product_name="NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", category="Hot Beverages",
+    emirate="Dubai", store_type="Hypermarket", month=12, day_of_week=2, day_of_month=10
+)
+PRICE = 25.0  # USD, the data currency
+
+
+def scale_dataset(df: pd.DataFrame, factor: int) -> pd.DataFrame:
+    """The dataset with factor - 1 older copies of its history prepended"""
+    if factor <= 1:
+        return df
+    span = df['period_normalized_date'].max() - df['period_normalized_date'].min() + pd.Timedelta(days=1)
+    copies = []
+    for k in range(factor - 1, 0, -1):
+        copy = df.copy()
+        copy['period_normalized_date'] = copy['period_normalized_date'] - span * k
+        copies.append(copy)
+    return pd.concat(copies + [df], ignore_index=True)
+
+
+def build_cases() -> Dict[str, Callable]:
+    """Benchmark cases over the currently loaded dataset"""
+    rolling = DataService.get_rolling_averages(SEGMENT['product_name'], SEGMENT['emirate'], SEGMENT['store_type'])
+    prediction_input = DemandPredictionInput(price_per_sales_unit=PRICE, **SEGMENT, **rolling)
+    current_demand = XGBoostAIService.predict_demand(prediction_input)
+    location = dict(product_name=SEGMENT['product_name'], emirate=SEGMENT['emirate'], store_type=SEGMENT['store_type'])
+
+    def segment_snapshot():
+        DataService.segments_cache = None  # Cold: the snapshot is cached after its first build
+        return DataService.get_segment_snapshot()
+
+    return {
+        'prepare_features': lambda: XGBoostAIService.prepare_features(prediction_input),
+        'predict_demand': lambda: XGBoostAIService.predict_demand(prediction_input),
+        'generate_demand_curve': lambda: XGBoostAIService.generate_demand_curve(current_price=PRICE, **SEGMENT),
+        'optimize_price_for_profit': lambda: ElasticityService.optimize_price_for_profit(
+            current_price=PRICE, current_demand=current_demand, month=SEGMENT['month'],
+            day_of_week=SEGMENT['day_of_week'], **location
+        ),
+        'simulate_price_scenario': lambda: XGBoostAIService.simulate_price_scenario(price=PRICE * 1.05, **SEGMENT),
+        'data.get_product_data': lambda: DataService.get_product_data(SEGMENT['product_name']),
+        'data.get_rolling_averages': lambda: DataService.get_rolling_averages(**location),
+        'data.get_segment_snapshot': segment_snapshot,
+        'data.get_product_stats': lambda: DataService.get_product_stats(SEGMENT['product_name'])
+    }
+
+
+def time_case(fn: Callable, repeats: int, warmup: int) -> Dict:
+    """Timing summary of repeated calls, in microseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        'repeats': repeats,
+        'median_us': round(statistics.median(samples), 2),
+        'mean_us': round(statistics.fmean(samples), 2),
+        'p95_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        'min_us': round(samples[0], 2)
+    }
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    import xgboost
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'xgboost': xgboost.__version__
+    }
+
+
+def run(sizes: List[int], repeats: int, warmup: int, cases: Optional[List[str]] = None, seed: int = 0) -> Dict:
+    """Run every case at every dataset size; keys are '<case>@<size>x'"""
+    if not XGBoostAIService.load_model():
+        raise RuntimeError("XGBoost model not available")
+    original = DataService.load_data()
+    if original.empty:
+        raise RuntimeError("Historical data not available")
+
+    results = {}
+    try:
+        for size in sizes:
+            DataService.set_data(scale_dataset(original, size))
+            available = build_cases()
+            unknown = set(cases or []) - set(available)
+            if unknown:
+                raise ValueError(f"Unknown cases: {', '.join(sorted(unknown))}")
+            for name, fn in available.items():
+                if cases and name not in cases:
+                    continue
+                np.random.seed(seed)  # Category elasticities and Monte Carlo draws are random
+                results[f'{name}@{size}x'] = {
+                    'case': name, 'dataset_size': size, 'rows': len(DataService.data_cache),
+                    **time_case(fn, repeats, warmup)
+                }
+    finally:
+        DataService.set_data(original)
+    return {'environment': environment(), 'repeats': repeats, 'sizes': sizes, 'results': results}
+
+
+def compare(current: Dict, baseline: Dict, max_regression: float, case_limits: Dict[str, float],
+            min_delta_us: float) -> List[Dict]:
+    """
+    Per-result comparison of medians. A result regresses when it is slower than the
+    baseline by more than its allowed fraction and by more than min_delta_us (noise floor)
+    """
+    rows = []
+    for key, result in current['results'].items():
+        before = baseline.get('results', {}).get(key)
+        if before is None:
+            continue
+        limit = case_limits.get(result['case'], max_regression)
+        ratio = result['median_us'] / before['median_us'] if before['median_us'] else float('inf')
+        delta = result['median_us'] - before['median_us']
+        rows.append({
+            'key': key,
+            'baseline_us': before['median_us'],
+            'current_us': result['median_us'],
+            'ratio': round(ratio, 3),
+            'allowed_ratio': round(1 + limit, 3),
+            'regressed': ratio > 1 + limit and delta > min_delta_us
+        })
+    return rows
+
+
+def parse_case_limits(values: List[str]) -> Dict[str, float]:
+    limits = {}
+    for value in values:
+        name, _, fraction = value.partition('=')
+        if not fraction:
+            raise argparse.ArgumentTypeError(f"--case-limit expects NAME=FRACTION, got {value!r}")
+        limits[name] = float(fraction)
+    return limits
+
+
+def save(path: str, payload: Dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+
+
+def print_report(report: Dict, comparison: Optional[List[Dict]]):
+    print("\n" + "=" * 80)
+    print(f"PRICING HOT PATHS (median of {report['repeats']}, commit {report['environment']['commit']})")
+    print("=" * 80)
+    by_key = {row['key']: row for row in comparison or []}
+    for key, result in report['results'].items():
+        line = f"  {key:<36} {result['median_us']:11.1f} µs  (p95 {result['p95_us']:.1f}, {result['rows']} rows)"
+        row = by_key.get(key)
+        if row:
+            marker = 'REGRESSED' if row['regressed'] else 'ok'
+            line += f"  {row['ratio']:5.2f}x baseline {marker}"
+        print(line)
+    print("=" * 80)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,4,16', help='Dataset sizes as multiples of the historical data')
+    parser.add_argument('--repeats', type=int, default=50, help='Timed calls per case and size')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed calls before timing')
+    parser.add_argument('--cases', help='Comma-separated subset of cases')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Where to write this run')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the baseline')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Allowed slowdown vs. the baseline median, as a fraction (0.25 = 25%%)')
+    parser.add_argument('--case-limit', action='append', default=[], metavar='NAME=FRACTION',
+                        help='Per-case allowed slowdown, overriding --max-regression')
+    parser.add_argument('--min-delta-us', type=float, default=20.0,
+                        help='Slowdowns smaller than this are treated as noise')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    cases = args.cases.split(',') if args.cases else None
+    report = run(sizes, args.repeats, args.warmup, cases, args.seed)
+
+    comparison = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparison = compare(report, baseline, args.max_regression, parse_case_limits(args.case_limit), args.min_delta_us)
+        report['comparison'] = {'baseline': args.baseline, 'results': comparison}
+
+    save(args.output, report)
+    if args.save_baseline:
+        save(args.baseline, report)
+    print_report(report, comparison)
+
+    regressed = [row['key'] for row in comparison or [] if row['regressed']]
+    if regressed:
+        print(f"\n✗ {len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    if comparison is None:
+        print(f"\n✓ Results written to {args.output} (no baseline compared)")
+    else:
+        print(f"\n✓ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    LoggingService.get_logger('benchmark').parent.setLevel('WARNING')  # Keep load messages out of the report
+    sys.exit(main())
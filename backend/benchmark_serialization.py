@@ -0,0 +1,84 @@
+"""
+Benchmark response serialization for optimize-price and simulate.
+Compares the previous pipeline (dump the model, convert to AED, re-validate into the
+response model, FastAPI's response validation + jsonable_encoder + json.dumps) with
+the single-pass path (dump once, convert, encode to bytes) on real results.
+Reports the median time per request for each stage.
+"""
+import argparse
+import json
+import statistics
+import time
+from fastapi.encoders import jsonable_encoder
+from models.schemas import OptimizationResponse, SimulationResponse
+from routes.common import optimization_to_currency, simulation_to_currency
+from services.ai_service import XGBoostAIService
+from services.serialization_service import SerializationService, orjson
+
+PRODUCT = dict(
+    product_name="NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", category="Hot Beverages",
+    emirate="Dubai", store_type="Hypermarket", month=12, day_of_week=2, day_of_month=10
+)
+
+
+def legacy_optimize(result):
+    response = OptimizationResponse(**optimization_to_currency(result))
+    validated = OptimizationResponse.model_validate(response.model_dump())  # FastAPI response_model check
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_optimize(result):
+    return SerializationService.dumps(optimization_to_currency(result))
+
+
+def legacy_simulate(result):
+    response = SimulationResponse(**simulation_to_currency(result))
+    validated = SimulationResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_simulate(result):
+    return SerializationService.dumps(simulation_to_currency(result))
+
+
+def time_per_call(fn, arg, repeats):
+    fn(arg)  # Warm up
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6
+
+
+def run(repeats):
+    XGBoostAIService.load_model()
+    optimization = XGBoostAIService.optimize_price(current_price=6.33, **PRODUCT)
+    simulation = XGBoostAIService.simulate_price_scenario(price=6.0, **PRODUCT)
+
+    assert json.loads(legacy_optimize(optimization)) == json.loads(fast_optimize(optimization))
+    assert json.loads(legacy_simulate(simulation)) == json.loads(fast_simulate(simulation))
+
+    print("\n" + "=" * 80)
+    print(f"SERIALIZATION PER REQUEST (median of {repeats}, encoder: {'orjson' if orjson else 'json'})")
+    print("=" * 80)
+    rows = []
+    for name, legacy, fast, result in (
+        ('optimize-price', legacy_optimize, fast_optimize, optimization),
+        ('simulate', legacy_simulate, fast_simulate, simulation)
+    ):
+        before = time_per_call(legacy, result, repeats)
+        after = time_per_call(fast, result, repeats)
+        size = len(fast(result))
+        rows.append((name, before, after))
+        print(f"  {name:<16} {before:9.1f} µs -> {after:8.1f} µs  ({before / after:5.1f}x, {size} bytes)")
+    print("=" * 80)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeats', type=int, default=2000, help='Timed calls per pipeline')
+    args = parser.parse_args()
+    run(args.repeats)
+    print("\n✓ Serialization benchmark complete!")
@@ -0,0 +1,80 @@
+"""
+Script to precompute the demand cube served by /api/simulate and demand curves.
+Scores the XGBoost model for every segment over every calendar context and relative price
+level (DEMAND_CUBE_* settings) and writes a memory-mapped cube to DEMAND_CUBE_DIR.
+Run after retraining the model or refreshing the data; with DEMAND_CUBE_ENABLED the
+server also rebuilds a stale cube in the background.
+"""
+import argparse
+import time
+import numpy as np
+from services.ai_service import XGBoostAIService
+from services.data_service import DataService
+from services.demand_cube_service import DemandCubeService
+
+
+def check_sample(meta, n=200, seed=0):
+    """Compare interpolated lookups at random off-level prices with exact model predictions"""
+    rng = np.random.default_rng(seed)
+    DemandCubeService.ENABLED = True
+    DemandCubeService.load()
+    errors = []
+    lookup_seconds = []
+    for _ in range(n):
+        segment = meta['segments'][rng.integers(len(meta['segments']))]
+        day_of_week = int(rng.integers(7))
+        context = {
+            'product_name': segment['product_name'], 'category': segment['category'],
+            'emirate': segment['emirate'], 'store_type': segment['store_type'],
+            'month': int(rng.integers(1, 13)), 'day_of_month': int(rng.integers(1, 29)),
+            'day_of_week': day_of_week, 'is_weekend': meta['weekend_by_dow'][day_of_week],
+            'is_holiday': int(rng.integers(2)),
+            'rolling_data': dict(zip(meta['rolling_features'], segment['rolling']))
+        }
+        price = segment['reference_price'] * rng.uniform(meta['price_ratios'][0], meta['price_ratios'][-1])
+        start = time.perf_counter()
+        cubed = DemandCubeService.lookup(context, price)
+        lookup_seconds.append(time.perf_counter() - start)
+        exact = XGBoostAIService.predict_segment_demand(
+            context['product_name'], context['category'], context['emirate'], context['store_type'], price,
+            context['month'], day_of_week, context['day_of_month'], context['is_weekend'], context['is_holiday']
+        )
+        errors.append(abs(cubed - exact) / max(exact, 1.0))
+    return {
+        'samples': n,
+        'median_relative_error': float(np.median(errors)),
+        'p95_relative_error': float(np.percentile(errors, 95)),
+        'median_lookup_us': float(np.median(lookup_seconds) * 1e6)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default=DataService.DATA_PATH, help='Historical sales CSV')
+    parser.add_argument('--output-dir', default=DemandCubeService.CUBE_DIR, help='Directory for the cube files')
+    parser.add_argument('--price-levels', type=int, default=DemandCubeService.PRICE_LEVELS)
+    parser.add_argument('--check', type=int, default=200, help='Random lookups compared with the model (0 to skip)')
+    args = parser.parse_args()
+
+    DataService.DATA_PATH = args.data
+    DemandCubeService.CUBE_DIR = args.output_dir
+    DemandCubeService.PRICE_LEVELS = args.price_levels
+    if not XGBoostAIService.load_model():
+        raise SystemExit("Model not loaded")
+
+    print("Building demand cube...")
+    print("-" * 80)
+
+    def progress(done, total):
+        if done == total or done % 10 == 0:
+            print(f"  {done}/{total} segments")
+
+    meta = DemandCubeService.build(progress=progress)
+    size_mb = np.prod(meta['shape']) * 4 / (1024 * 1024)
+    print(f"\n  Shape {tuple(meta['shape'])}, {size_mb:.1f} MB, built in {meta['build_seconds']:.1f}s")
+    if args.check:
+        check = check_sample(meta, args.check)
+        print(f"  Interpolation vs model over {check['samples']} random queries: "
+              f"median error {check['median_relative_error']:.2%}, p95 {check['p95_relative_error']:.2%}, "
+              f"median lookup {check['median_lookup_us']:.1f} µs")
+    print("\n✓ Demand cube written to", args.output_dir)
@@ -0,0 +1,53 @@
+"""
+Script to distill smooth per-segment price-response curves from the demand cube.
+Fits log(1 + demand) as a polynomial in log price (DISTILLED_CURVE_DEGREE) for every
+segment and calendar context, builds the cube first when it is missing or stale, and
+reports the distillation error per segment: contexts above DISTILLED_CURVE_MAX_ERROR are
+served by the full model.
+"""
+import argparse
+import pandas as pd
+from services.ai_service import XGBoostAIService
+from services.data_service import DataService
+from services.demand_cube_service import DemandCubeService
+from services.distilled_curve_service import DistilledCurveService
+
+
+def print_report(meta, n=10):
+    """Print the overall error and the segments distilled worst"""
+    segments = pd.DataFrame([{'segment': f"{s['product_name']} | {s['emirate']} | {s['store_type']}", **s['error']}
+                             for s in meta['segments']]).set_index('segment')
+    print("\n" + "="*80)
+    print(f"DISTILLATION ERROR (degree {meta['degree']}, max served error {DistilledCurveService.MAX_ERROR:.0%})")
+    print("="*80)
+    print(f"  Segments: {len(segments)}, median of medians {segments['median_error'].median():.2%}, "
+          f"worst p95 {segments['p95_error'].max():.2%}")
+    print(f"  Contexts falling back to the model: {segments['fallback_share'].mean():.1%}")
+    print("\n" + "="*80)
+    print(f"WORST {n} SEGMENTS BY P95 ERROR")
+    print("="*80)
+    print(segments.sort_values('p95_error', ascending=False).head(n).to_string())
+    print("="*80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default=DataService.DATA_PATH, help='Historical sales CSV')
+    parser.add_argument('--output-dir', default=DemandCubeService.CUBE_DIR, help='Directory of the cube and curve files')
+    parser.add_argument('--degree', type=int, default=DistilledCurveService.DEGREE)
+    parser.add_argument('--max-error', type=float, default=DistilledCurveService.MAX_ERROR)
+    parser.add_argument('--top', type=int, default=10, help='Worst segments listed')
+    args = parser.parse_args()
+
+    DataService.DATA_PATH = args.data
+    DemandCubeService.CUBE_DIR = args.output_dir
+    DistilledCurveService.DEGREE = args.degree
+    DistilledCurveService.MAX_ERROR = args.max_error
+    if not XGBoostAIService.load_model():
+        raise SystemExit("Model not loaded")
+
+    print("Distilling demand curves (the demand cube is built first if needed)...")
+    print("-" * 80)
+    meta = DistilledCurveService.distill()
+    print_report(meta, args.top)
+    print(f"\n✓ Distilled curves written to {args.output_dir} in {meta['build_seconds']:.1f}s")
@@ -0,0 +1,46 @@
+"""
+Script to estimate per-segment price elasticities from historical data.
+Fits a log-log regression for every (product, emirate, store_type) segment and
+shrinks noisy segments toward their category mean (category priors from
+ElasticityService.CATEGORY_ELASTICITIES). Run after the data is refreshed.
+"""
+import argparse
+import pandas as pd
+from services.data_service import DataService
+from services.elasticity_service import ElasticityService
+
+
+def print_summary(table, n=5):
+    """Print category estimates and a sample of segments"""
+    print("\n" + "="*80)
+    print("CATEGORY ELASTICITIES")
+    print("="*80)
+    for category, data in table['categories'].items():
+        print(f"  {category}: {data['elasticity']:.3f} ± {data['std_error']:.3f} "
+              f"(prior {data['prior']:.2f}, between-segment sd {data['between_segment_sd']:.3f}, "
+              f"{data['segments']} segments)")
+    
+    segments = pd.DataFrame(table['segments']).T
+    identified = segments['raw_elasticity'].notna().sum()
+    print(f"\n  Segments with an identifiable price slope: {identified}/{len(segments)}")
+    print("\n" + "="*80)
+    print("SAMPLE SEGMENTS")
+    print("="*80)
+    print(segments.head(n).to_string())
+    print("="*80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data', default=DataService.DATA_PATH, help='Historical sales CSV')
+    parser.add_argument('--output', default=ElasticityService.ELASTICITY_TABLE_PATH, help='Output JSON table')
+    args = parser.parse_args()
+    
+    DataService.DATA_PATH = args.data
+    ElasticityService.ELASTICITY_TABLE_PATH = args.output
+    
+    print("Estimating segment elasticities from historical data...")
+    print("-" * 80)
+    table = ElasticityService.rebuild_elasticity_table(save=True)
+    print_summary(table)
+    print("\n✓ Elasticity estimation complete!")
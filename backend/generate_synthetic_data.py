@@ -0,0 +1,339 @@
+"""
+Generate synthetic sales data with the historical CSV's schema, for scale testing.
+Every (product, emirate, store_type) segment gets a daily series with the demand
+structure of the shipped data: store / emirate volume tiers, weekend and holiday
+lifts, autocorrelated noise and category price elasticities, plus price changes and
+promotions. Rolling features are computed from each segment's previous days, as in
+the historical data, after a burn-in so the first rows have full windows.
+
+Segments are generated and written in chunks, so memory depends on --chunk-rows,
+not on the output size.
+
+    python generate_synthetic_data.py --products 500 --days 365 --output synthetic.csv
+    python generate_synthetic_data.py --products 2000 --days 730 --output synthetic.csv.gz
+    python generate_synthetic_data.py --products 2000 --output synthetic.parquet  # needs pyarrow
+
+Load the output with DATA_PATH=<file> (CSV) to run the API on it.
+"""
+import argparse
+import gzip
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from services.elasticity_service import ElasticityService
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = pq = None
+
+COLUMNS = [
+    'period_normalized_date', 'category', 'brand', 'product_name', 'sub_segment', 'promotion', 'uom',
+    'item_code', 'sales_units', 'price_per_sales_unit', 'price_per_sales_per_uom', 'sales_value',
+    'sales_per_uom', 'emirate', 'store_type', 'is_weekend', 'is_holiday', 'month', 'day_of_week',
+    'day_of_month', 'rolling_3day_mean', 'rolling_7day_mean', 'rolling_30day_mean', 'rolling_3day_std',
+    'rolling_7day_std', 'rolling_30day_std'
+]
+ROLLING_WINDOWS = (3, 7, 30)
+BURN_IN_DAYS = max(ROLLING_WINDOWS)
+
+# Calibrated on the historical data: mean daily units, price (USD), pack size for the
+# per-UOM columns, sales value / (units * price) and the product's non-promotion label
+BASE_PRODUCTS = [
+    dict(product_name="NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", category="TOTAL COFFEE", brand="NESCAFE",
+         sub_segment="INSTANT MIXES", uom="KGS-LTRS", item_code=2000040000000.0, label="NO PROMO",
+         units=66.6, price=6.32, pack_size=0.48, value_factor=1.449),
+    dict(product_name="NESCAFE LATTE 240ML TIN", category="ICE COFFEE", brand="NESCAFE",
+         sub_segment="LATTE", uom="Ltr/KG/PC", item_code=2000060000000.0, label="NO PROMO",
+         units=5.0, price=1.58, pack_size=0.24, value_factor=1.401),
+    dict(product_name="NESTLE CHOCAPIC C/B 25GR (C) WRP", category="MUESLI / CEREAL & NUTRITIONAL BAR",
+         brand="NESTLE", sub_segment="BABIES/CHILDREN", uom="KGS-LTRS", item_code=2000040000000.0, label=None,
+         units=14.1, price=0.60, pack_size=0.025, value_factor=1.415),
+    dict(product_name="NESTLE NESQUIK 330GR(C) BOX", category="BREAKFAST CEREAL", brand="NESTLE",
+         sub_segment="CHILDREN", uom="KGS/LTRS", item_code=2000090000000.0, label="NON-PROMOTION",
+         units=33.0, price=3.69, pack_size=0.33, value_factor=1.438),
+    dict(product_name="PURINA FRISK.CHICKEN IN GRAVY JUNI.85G S", category="PET CARE", brand="PURINA FRISKIES",
+         sub_segment="CAT", uom="KGS-LTRS", item_code=2000060000000.0, label="NO PROMO",
+         units=72.4, price=0.56, pack_size=0.085, value_factor=1.256)
+]
+
+# Relative volume per location (historical means); normalized to average 1 below
+EMIRATES = [('Dubai', 1.0), ('Abu Dhabi', 0.82), ('Sharjah', 0.46), ('Ajman', 0.135),
+            ('Ras Al Khaimah', 0.089), ('Fujairah', 0.069), ('Umm Al Quwain', 0.042)]
+# (name, relative volume, shelf price index)
+STORE_TYPES = [('Hypermarket', 1.0, 0.97), ('Supermarket', 0.80, 1.0), ('Mini Market', 0.39, 1.03),
+               ('Convenience Store', 0.26, 1.08), ('Traditional', 0.15, 1.05), ('Online', 0.092, 0.98)]
+
+WEEKEND_DAYS = (4, 5)  # Friday and Saturday, as flagged in the historical data
+HOLIDAYS = {(1, 1), (12, 1), (12, 2), (12, 3), (12, 25)}  # (month, day)
+WEEKEND_LIFT = 1.27
+HOLIDAY_LIFT = 1.43
+NOISE_SD = 0.27  # Log-scale sd of daily demand noise
+NOISE_AUTOCORRELATION = 0.55
+PRICE_CHANGE_DAYS = 45  # Mean days between shelf price changes
+PRICE_CHANGE_SD = 0.04
+PROMO_LIFT = 1.15  # Display / feature effect on top of the price effect
+PROMO_DEPTH = (0.10, 0.30)
+PROMO_DAYS = (3, 10)
+
+
+def build_products(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """The historical products first, then variants of them with their own price and volume"""
+    rows = [dict(p) for p in BASE_PRODUCTS[:n]]
+    for i in range(len(rows), n):
+        template = BASE_PRODUCTS[i % len(BASE_PRODUCTS)]
+        size_factor = float(rng.choice([0.5, 1.0, 2.0, 4.0]))
+        rows.append({
+            **template,
+            'product_name': f"{template['brand']} {template['sub_segment']} SYN{i:06d} {size_factor:g}X",
+            'item_code': 2000100000000.0 + i,
+            'units': template['units'] * float(rng.lognormal(0, 0.6)) / size_factor ** 0.5,
+            'price': round(template['price'] * size_factor * float(rng.lognormal(0, 0.15)), 2),
+            'pack_size': template['pack_size'] * size_factor
+        })
+    products = pd.DataFrame(rows)
+    products['elasticity'] = products['category'].map(
+        lambda c: ElasticityService.CATEGORY_ELASTICITIES.get(c, ElasticityService.CATEGORY_ELASTICITIES['DEFAULT'])
+    )
+    return products
+
+
+def build_locations(base: list, n: int, rng: np.random.Generator, prefix: str) -> list:
+    """The first n historical locations; extra ones get a synthetic name and a small-market volume"""
+    locations = list(base[:n])
+    for i in range(len(locations), n):
+        template = base[-1 - i % 3]
+        locations.append((f"{prefix} {i + 1}", template[1] * float(rng.lognormal(0, 0.3)), *template[2:]))
+    mean_volume = np.mean([location[1] for location in locations])
+    return sorted((location[0], location[1] / mean_volume, *location[2:]) for location in locations)
+
+
+def calendar(start: pd.Timestamp, days: int) -> pd.DataFrame:
+    dates = pd.date_range(start - pd.Timedelta(days=BURN_IN_DAYS), periods=days + BURN_IN_DAYS, freq='D')
+    return pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d'),
+        'month': dates.month,
+        'day_of_week': dates.dayofweek,
+        'day_of_month': dates.day,
+        'is_weekend': dates.dayofweek.isin(WEEKEND_DAYS).astype(int),
+        'is_holiday': [int((d.month, d.day) in HOLIDAYS) for d in dates]
+    })
+
+
+def simulate_segments(segments: pd.DataFrame, cal: pd.DataFrame, rng: np.random.Generator) -> dict:
+    """Daily price, promotion and units for a block of segments, shape (segments, days incl. burn-in)"""
+    n, t_total = len(segments), len(cal)
+    calendar_lift = (WEEKEND_LIFT ** cal['is_weekend'].to_numpy()) * (HOLIDAY_LIFT ** cal['is_holiday'].to_numpy())
+    calendar_lift /= calendar_lift.mean()  # Lifts redistribute volume across days; product volumes stay calibrated
+    regular_price = segments['price'].to_numpy()
+    elasticity = segments['elasticity'].to_numpy()
+    base_units = segments['units'].to_numpy()
+
+    price = np.empty((n, t_total))
+    promo = np.zeros((n, t_total), dtype=bool)
+    noise = np.empty((n, t_total))
+    level = np.ones(n)
+    promo_left = np.zeros(n, dtype=int)
+    depth = np.zeros(n)
+    shock = rng.normal(0, NOISE_SD, n)
+    innovation_sd = NOISE_SD * np.sqrt(1 - NOISE_AUTOCORRELATION ** 2)
+    promo_start_p = segments['promo_rate'].to_numpy() / np.mean(PROMO_DAYS)
+    for t in range(t_total):
+        # Occasional permanent shelf price changes
+        changes = rng.random(n) < 1 / PRICE_CHANGE_DAYS
+        level = np.where(changes, level * np.exp(rng.normal(0, PRICE_CHANGE_SD, n)), level)
+        # Promotion episodes of PROMO_DAYS with a fixed discount
+        starting = (promo_left == 0) & (rng.random(n) < promo_start_p)
+        promo_left = np.where(starting, rng.integers(PROMO_DAYS[0], PROMO_DAYS[1] + 1, n), promo_left)
+        depth = np.where(starting, rng.uniform(*PROMO_DEPTH, n), depth)
+        promo[:, t] = promo_left > 0
+        price[:, t] = regular_price * level * np.where(promo[:, t], 1 - depth, 1.0)
+        promo_left = np.maximum(promo_left - 1, 0)
+        # AR(1) demand noise
+        shock = NOISE_AUTOCORRELATION * shock + rng.normal(0, innovation_sd, n)
+        noise[:, t] = shock
+
+    units = (
+        base_units[:, None] * calendar_lift[None, :]
+        * (price / regular_price[:, None]) ** elasticity[:, None]
+        * np.where(promo, PROMO_LIFT, 1.0)
+        * np.exp(noise - NOISE_SD ** 2 / 2)
+    )
+    return {'price': price, 'promo': promo, 'units': units}
+
+
+def rolling_features(units: np.ndarray) -> dict:
+    """Mean / sd of the previous w days for every column past the burn-in"""
+    sums = np.zeros((units.shape[0], units.shape[1] + 1))
+    squares = np.zeros_like(sums)
+    np.cumsum(units, axis=1, out=sums[:, 1:])
+    np.cumsum(units ** 2, axis=1, out=squares[:, 1:])
+    t = np.arange(BURN_IN_DAYS, units.shape[1])
+    features = {}
+    for w in ROLLING_WINDOWS:
+        total = sums[:, t] - sums[:, t - w]
+        total_sq = squares[:, t] - squares[:, t - w]
+        features[f'rolling_{w}day_mean'] = total / w
+        features[f'rolling_{w}day_std'] = np.sqrt(np.maximum(total_sq - total ** 2 / w, 0) / (w - 1))
+    return features
+
+
+def generate_chunk(segments: pd.DataFrame, cal: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Rows for a block of segments, segment by segment in date order"""
+    series = simulate_segments(segments, cal, rng)
+    rolling = rolling_features(series['units'])
+    days = len(cal) - BURN_IN_DAYS
+    emitted = slice(BURN_IN_DAYS, None)
+    units = series['units'][:, emitted].ravel()
+    price = series['price'][:, emitted].ravel()
+    promo = series['promo'][:, emitted].ravel()
+
+    per_row = segments.loc[segments.index.repeat(days)].reset_index(drop=True)
+    value_noise = 1 + rng.normal(0, 0.003, len(units))
+    chunk = pd.DataFrame({
+        'period_normalized_date': np.tile(cal['date'].to_numpy()[emitted], len(segments)),
+        'category': per_row['category'],
+        'brand': per_row['brand'],
+        'product_name': per_row['product_name'],
+        'sub_segment': per_row['sub_segment'],
+        'promotion': np.where(promo, 'PROMO', per_row['label'].to_numpy(dtype=object)),
+        'uom': per_row['uom'],
+        'item_code': per_row['item_code'],
+        'sales_units': units,
+        'price_per_sales_unit': price,
+        'price_per_sales_per_uom': price / per_row['pack_size'].to_numpy(),
+        'sales_value': units * price * per_row['value_factor'].to_numpy() * value_noise,
+        'sales_per_uom': units * per_row['pack_size'].to_numpy(),
+        'emirate': per_row['emirate'],
+        'store_type': per_row['store_type']
+    })
+    for column in ('is_weekend', 'is_holiday', 'month', 'day_of_week', 'day_of_month'):
+        chunk[column] = np.tile(cal[column].to_numpy()[emitted], len(segments))
+    for column, values in rolling.items():
+        chunk[column] = values.ravel()
+    return chunk[COLUMNS]
+
+
+def build_segments(args, rng: np.random.Generator) -> pd.DataFrame:
+    products = build_products(args.products, rng)
+    emirates = build_locations(EMIRATES, args.emirates, rng, 'Emirate')
+    store_types = build_locations(STORE_TYPES, args.store_types, rng, 'Store Type')
+    segments = pd.DataFrame(
+        [(p, e, e_volume, s, s_volume, s_price)
+         for p in range(len(products)) for e, e_volume in emirates for s, s_volume, s_price in store_types],
+        columns=['product', 'emirate', 'emirate_volume', 'store_type', 'store_volume', 'price_index']
+    )
+    segments = segments.join(products, on='product')
+    # Segment-level variation around the product: volume, shelf price, elasticity, promo frequency
+    n = len(segments)
+    segments['units'] *= segments['emirate_volume'] * segments['store_volume'] * rng.lognormal(-0.02, 0.2, n)  # Mean 1
+    segments['price'] = segments['price'] * segments['price_index'] * rng.lognormal(0, 0.02, n)
+    segments['elasticity'] *= rng.normal(1, 0.15, n).clip(0.5, 1.5)
+    segments['promo_rate'] = args.promo_rate * rng.uniform(0.5, 1.5, n)
+    return segments.sort_values(['product_name', 'emirate', 'store_type']).reset_index(drop=True)
+
+
+# Per-process generation state, set by init_worker (in the parent too when running serially)
+worker_state = {}
+
+
+def init_worker(segments: pd.DataFrame, cal: pd.DataFrame, per_chunk: int, fmt: str, compress: bool):
+    worker_state.update(segments=segments, cal=cal, per_chunk=per_chunk, format=fmt, compress=compress)
+
+
+def render_chunk(task):
+    """
+    One chunk, ready to append: encoded CSV text (a gzip member when compressing;
+    concatenated members are a valid gzip file) or a DataFrame for the Parquet writer
+    """
+    index, seed = task
+    per_chunk = worker_state['per_chunk']
+    block = worker_state['segments'].iloc[index * per_chunk:(index + 1) * per_chunk]
+    chunk = generate_chunk(block, worker_state['cal'], np.random.default_rng(seed))
+    if worker_state['format'] == 'parquet':
+        return len(chunk), chunk
+    data = chunk.to_csv(header=index == 0, index=False).encode()
+    return len(chunk), gzip.compress(data, compresslevel=6) if worker_state['compress'] else data
+
+
+def generate(args) -> int:
+    """Write the dataset chunk by chunk; returns the number of rows"""
+    rng = np.random.default_rng(args.seed)
+    segments = build_segments(args, rng)
+    cal = calendar(pd.Timestamp(args.start), args.days)
+    per_chunk = max(1, args.chunk_rows // args.days)
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    if fmt == 'parquet' and pq is None:
+        raise SystemExit("Parquet output requires pyarrow (pip install pyarrow)")
+    total_rows = len(segments) * args.days
+    print(f"Generating {total_rows:,} rows: {args.products} products x {args.emirates} emirates x "
+          f"{args.store_types} store types x {args.days} days ({fmt}, {per_chunk} segments per chunk, "
+          f"{args.workers} worker(s))")
+
+    # Chunk seeds depend only on --seed and the chunk index, so output is independent of --workers
+    n_chunks = (len(segments) + per_chunk - 1) // per_chunk
+    tasks = list(enumerate(np.random.SeedSequence(args.seed).spawn(n_chunks)))
+    state = (segments, cal, per_chunk, fmt, args.output.endswith('.gz'))
+    pool = None
+    if args.workers > 1:
+        pool = multiprocessing.Pool(args.workers, initializer=init_worker, initargs=state)
+        chunks = pool.imap(render_chunk, tasks)  # In order, rendered ahead by the workers
+    else:
+        init_worker(*state)
+        chunks = map(render_chunk, tasks)
+
+    started, written = time.perf_counter(), 0
+    parquet = None
+    try:
+        with open(args.output, 'wb') as f:
+            for rows, chunk in chunks:
+                if fmt == 'parquet':
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    parquet = parquet or pq.ParquetWriter(f, table.schema)
+                    parquet.write_table(table)
+                else:
+                    f.write(chunk)
+                written += rows
+                elapsed = time.perf_counter() - started
+                print(f"  {written:,}/{total_rows:,} rows ({written / elapsed:,.0f} rows/s)", end='\r', flush=True)
+            if parquet is not None:
+                parquet.close()
+    finally:
+        if pool is not None:
+            pool.terminate()
+    print()
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--emirates', type=int, default=len(EMIRATES))
+    parser.add_argument('--store-types', type=int, default=len(STORE_TYPES))
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--start', default='2024-01-01', help='First date written (a burn-in precedes it)')
+    parser.add_argument('--promo-rate', type=float, default=0.08, help='Share of days on promotion')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=200_000, help='Rows generated and written at a time')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Processes generating and encoding chunks in parallel')
+    parser.add_argument('--format', choices=['csv', 'parquet'], help='Default: from the output extension')
+    parser.add_argument('--output', default='synthetic_sales.csv', help='.csv, .csv.gz or .parquet')
+    args = parser.parse_args(argv)
+    for name in ('products', 'emirates', 'store_types', 'days', 'chunk_rows', 'workers'):
+        if getattr(args, name) < 1:
+            parser.error(f"--{name.replace('_', '-')} must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started = time.perf_counter()
+    rows = generate(args)
+    size = os.path.getsize(args.output) / 1e6
+    print(f"\n✓ {rows:,} rows written to {args.output} ({size:,.1f} MB) in {time.perf_counter() - started:.1f}s")
+    sys.exit(0)
@@ -0,0 +1,259 @@
+"""
+Load-test the pricing API with a realistic request mix at a target concurrency.
+Virtual users replay a weighted mix of /api/products, /api/optimize-price and
+/api/simulate over a pool of segment scenarios built from the API's own product and
+location lists, and the run reports throughput and p50 / p95 / p99 latency per endpoint.
+
+Modes (reports carry the mode, worker count and concurrency so runs are comparable):
+  asgi     the app in this process through httpx's ASGI transport (no network)
+  uvicorn  a local uvicorn started with --workers N on a free port, stopped afterwards
+  http     an already running server at --url
+
+    python load_test.py --mode asgi --concurrency 8 --duration 20
+    python load_test.py --mode uvicorn --workers 2 --concurrency 16 --output results/uvicorn-2.json
+    python load_test.py --mode http --url http://localhost:8000 --mix products=1,optimize=1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+import httpx
+import numpy as np
+from benchmark_pricing import environment
+
+DEFAULT_MIX = {'products': 5, 'optimize': 3, 'simulate': 2}
+ENDPOINTS = {
+    'products': ('GET', '/api/products'),
+    'optimize': ('POST', '/api/optimize-price'),
+    'simulate': ('POST', '/api/simulate')
+}
+WEEKEND_DAYS = (4, 5)  # Friday and Saturday, as in the historical data
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'products=5,optimize=3' -> weights per endpoint"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS or not weight:
+            raise argparse.ArgumentTypeError(f"mix entries are NAME=WEIGHT with NAME in {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+async def build_scenarios(client: httpx.AsyncClient, count: int, rng: random.Random) -> List[Dict]:
+    """Segment scenarios from the API's catalog: product, location, a date within 60 days, a price near current"""
+    products = (await client.get('/api/products')).json()
+    locations = (await client.get('/api/valid-values')).json()
+    scenarios = []
+    for _ in range(count):
+        product = rng.choice(products)
+        day = date.today() + timedelta(days=rng.randrange(60))
+        segment = {
+            'product_name': product['name'], 'category': product['category'],
+            'emirate': rng.choice(locations['emirates']), 'store_type': rng.choice(locations['store_types']),
+            'month': day.month, 'day_of_week': day.weekday(), 'day_of_month': day.day,
+            'is_weekend': int(day.weekday() in WEEKEND_DAYS)
+        }
+        price = round(product['current_price'] * rng.uniform(0.85, 1.15), 2)
+        scenarios.append({
+            'optimize': {**segment, 'product_id': product['id'], 'current_price': product['current_price']},
+            'simulate': {**segment, 'price': price}
+        })
+    return scenarios
+
+
+async def virtual_user(client: httpx.AsyncClient, scenarios: List[Dict], mix: Dict[str, float], deadline: float,
+                       samples: Dict[str, List], rng: random.Random, record_after: float):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path = ENDPOINTS[name]
+        payload = rng.choice(scenarios)[name] if method == 'POST' else None
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=payload)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        finished = time.perf_counter()
+        if started >= record_after:  # Warm-up requests are not recorded
+            samples[name].append((finished - started, status))
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict:
+    if not latencies:
+        return {'requests': 0, 'errors': errors, 'throughput_rps': 0.0}
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / seconds, 2),
+        'mean_ms': round(float(ms.mean()), 2),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(ms.max()), 2)
+    }
+
+
+async def run_load(client: httpx.AsyncClient, concurrency: int, duration: float, warmup: float,
+                   mix: Dict[str, float], scenario_count: int, seed: int) -> Dict:
+    rng = random.Random(seed)
+    scenarios = await build_scenarios(client, scenario_count, rng)
+    samples = {name: [] for name in mix}
+    started = time.perf_counter()
+    record_after = started + warmup
+    deadline = record_after + duration
+    await asyncio.gather(*(
+        virtual_user(client, scenarios, mix, deadline, samples, random.Random(seed + i + 1), record_after)
+        for i in range(concurrency)
+    ))
+    measured = time.perf_counter() - record_after
+
+    endpoints = {}
+    all_latencies, all_errors = [], 0
+    for name, rows in samples.items():
+        latencies = [latency for latency, status in rows]
+        errors = sum(1 for _, status in rows if status != 200)
+        endpoints[name] = summarize(latencies, errors, measured)
+        all_latencies += latencies
+        all_errors += errors
+    return {'measured_seconds': round(measured, 2), 'endpoints': endpoints,
+            'overall': summarize(all_latencies, all_errors, measured)}
+
+
+@asynccontextmanager
+async def asgi_client(timeout: float):
+    """In-process client; runs the app's lifespan (model and data loading) first"""
+    from main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://loadtest', timeout=timeout) as client:
+            yield client
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_server(workers: int, startup_timeout: float = 120.0):
+    """A local uvicorn on a free port; yields its base URL once /health answers"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + startup_timeout
+        async with httpx.AsyncClient(base_url=url) as probe:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    if (await probe.get('/health')).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not become healthy in time")
+                await asyncio.sleep(0.25)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run(args) -> Dict:
+    mix = args.mix or DEFAULT_MIX
+    settings = dict(concurrency=args.concurrency, duration=args.duration, warmup=args.warmup,
+                    mix=mix, scenario_count=args.scenarios, seed=args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.mode == 'asgi':
+        async with asgi_client(args.timeout) as client:
+            result = await run_load(client, **settings)
+        workers = 1
+    elif args.mode == 'uvicorn':
+        async with uvicorn_server(args.workers) as url:
+            async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+                result = await run_load(client, **settings)
+        workers = args.workers
+    else:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            result = await run_load(client, **settings)
+        workers = args.workers  # As reported by the caller; the client cannot see the server's workers
+    return {
+        'mode': args.mode,
+        'workers': workers,
+        'concurrency': args.concurrency,
+        'mix': mix,
+        'scenarios': args.scenarios,
+        'seed': args.seed,
+        'environment': environment(),
+        **result
+    }
+
+
+def print_report(report: Dict):
+    print("\n" + "=" * 80)
+    print(f"LOAD TEST: {report['mode']} mode, {report['workers']} worker(s), concurrency {report['concurrency']}, "
+          f"{report['measured_seconds']}s")
+    print("=" * 80)
+    print(f"  {'endpoint':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in [*report['endpoints'].items(), ('overall', report['overall'])]:
+        if not stats['requests']:
+            print(f"  {name:<10} {0:>9} {stats['errors']:>7}")
+            continue
+        print(f"  {name:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>9.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    print("=" * 80)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['asgi', 'uvicorn', 'http'], default='asgi')
+    parser.add_argument('--url', default='http://localhost:8000', help='Server for --mode http')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn workers (--mode uvicorn; recorded for http)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Virtual users with one request in flight each')
+    parser.add_argument('--duration', type=float, default=20.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Unrecorded seconds before measuring')
+    parser.add_argument('--mix', type=parse_mix, help='Endpoint weights, default products=5,optimize=3,simulate=2')
+    parser.add_argument('--scenarios', type=int, default=200, help='Distinct segment scenarios replayed')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds')
+    parser.add_argument('--output', help='Write the report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    report = main()
+    print_report(report)
+    sys.exit(1 if report['overall']['errors'] else 0)
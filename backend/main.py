@@ -1,48 +1,83 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from routes import price_routes
+from routes import price_routes, prediction_routes, job_routes, admin_routes
 from services.ai_service import XGBoostAIService
 from services.elasticity_service import ElasticityService
 from services.data_service import DataService
+from services.online_elasticity_service import OnlineElasticityService
+from services.job_service import JobService
+from services.demand_cube_service import DemandCubeService
+from services.distilled_curve_service import DistilledCurveService
+from services.metrics_service import MetricsService, MetricsMiddleware
+from services.memory_service import MemoryService
+from services.timing_service import ServerTimingMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
+from services.logging_service import get_logger
+
+logger = get_logger('api')
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan event handler for startup/shutdown"""
     # Startup
-    print("="*80)
-    print("Starting Nestle UAE Price Optimization API")
-    print("="*80)
+    logger.info("Starting Nestle UAE Price Optimization API")
+    
+    # Memory budgets (and tracemalloc, with MEMORY_TRACING) before the caches fill
+    MemoryService.start()
     
     # Load XGBoost model
     if XGBoostAIService.load_model():
-        print("✓ XGBoost AI Model loaded successfully")
+        logger.info("XGBoost AI Model loaded successfully")
     else:
-        print("⚠ Warning: XGBoost model not loaded. Some features may not work.")
+        logger.warning("XGBoost model not loaded. Some features may not work.")
     
     # Load EconML Elasticity model
     if ElasticityService.load_elasticity_model():
-        print("✓ EconML Elasticity Model loaded successfully")
+        logger.info("EconML Elasticity Model loaded successfully")
     else:
-        print("⚠ Warning: Elasticity model not loaded. Will use fallback elasticity estimates.")
+        logger.warning("Elasticity model not loaded. Will use fallback elasticity estimates.")
+    
+    # Restore streaming elasticity updates from the last snapshot
+    OnlineElasticityService.restore()
     
     # Load historical data
     try:
         data = DataService.load_data()
         if not data.empty:
-            print(f"✓ Historical data loaded: {len(data)} records")
+            logger.info("Historical data loaded: %s records", len(data))
             products = DataService.get_products_from_data()
-            print(f"✓ Found {len(products)} unique products from data")
+            logger.info("Found %s unique products from data", len(products))
         else:
-            print("⚠ Warning: No historical data loaded. Using fallback data.")
+            logger.warning("No historical data loaded. Using fallback data.")
     except Exception as e:
-        print(f"⚠ Warning: Error loading historical data: {e}")
+        logger.warning("Error loading historical data: %s", e)
+    
+    # Precomputed demand cube (DEMAND_CUBE_ENABLED); rebuilt in the background when stale
+    DemandCubeService.start()
+    DistilledCurveService.start()  # DISTILLED_CURVES_ENABLED; distilled from the cube
+    
+    # Background job workers (resumes queued jobs with the SQLite queue)
+    JobService.start()
+    
+    # Per-worker metric snapshots (multi-worker aggregation, when METRICS_DIR is set)
+    MetricsService.start()
     
-    print("="*80)
     yield
     # Shutdown
-    print("Shutting down API...")
+    JobService.shutdown()
+    DistilledCurveService.shutdown()
+    DemandCubeService.shutdown()
+    MetricsService.shutdown()
+    MemoryService.shutdown()
+    try:
+        if OnlineElasticityService.states:
+            OnlineElasticityService.snapshot()
+            logger.info("Saved online elasticity state")
+    except OSError as e:
+        logger.warning("Could not save online elasticity state: %s", e)
+    logger.info("Shutting down API...")
 
 app = FastAPI(
     title="Nestle UAE Price Optimization API",
@@ -60,8 +95,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latency per route template, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Server-Timing stage breakdown on every response; X-Request-Profile when REQUEST_PROFILING is set
+app.add_middleware(ServerTimingMiddleware)
+
 # Include routers
 app.include_router(price_routes.router, prefix="/api", tags=["pricing"])
+app.include_router(prediction_routes.router, prefix="/api", tags=["prediction"])
+app.include_router(prediction_routes.legacy_router, tags=["prediction"])  # /predict, /model-info, /valid-values
+app.include_router(job_routes.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(admin_routes.router, prefix="/admin", tags=["admin"], include_in_schema=False)
 
 @app.get("/")
 async def root():
@@ -77,10 +122,28 @@ async def root():
             "Historical data-driven predictions"
         ],
         "endpoints": {
-            "/api/products": "GET - List all products",
-            "/api/optimize-price": "POST - Get profit-optimized price recommendation",
-            "/api/simulate": "POST - Simulate price scenario",
+            "/api/products": "GET - List all products (?currency=AED|USD|SAR...)",
+            "/api/currencies": "GET - Supported currencies and rates",
+            "/api/optimize-price": "POST - Get profit-optimized price recommendation (?trace=1 adds the decision trace)",
+            "/api/optimize-batch": "POST - Batch optimization, streamed per segment (?format=ndjson|sse|json)",
+            "/api/simulate": "POST - Simulate price scenario (?trace=1 adds the decision trace)",
+            "/api/ws/simulate": "WebSocket - Live simulation session for one segment (coalesces price updates)",
+            "/api/optimize-catalog": "POST - Catalog-wide optimization under price-index and budget constraints",
+            "/api/price-calendar": "POST - Day-by-day price plan over a horizon",
+            "/api/profit-uncertainty": "POST - Monte Carlo profit distribution for a price recommendation",
+            "/api/pareto-frontier": "POST - Profit / volume / revenue frontier for a segment",
+            "/api/pareto-frontier/catalog": "POST - Catalog-wide profit vs. volume trade-off curve",
+            "/api/sales/ingest": "POST - Stream new sales into online elasticity estimates",
+            "/api/jobs": "POST - Queue a long-running job (optimize_catalog, optimize_batch, rebuild_elasticity_table, build_demand_cube, distill_demand_curves)",
+            "/api/jobs/{id}": "GET - Job status, progress and results / DELETE - Cancel",
+            "/api/jobs/{id}/events": "GET - Server-sent job progress and partial results",
             "/api/valid-values": "GET - Get valid dropdown values",
+            "/api/predict": "POST - Raw demand prediction from model inputs (rolling features default to history)",
+            "/api/predict/batch": "POST - Demand predictions for many model inputs in one model call",
+            "/api/model-info": "GET - Loaded demand model details",
+            "/metrics": "GET - Prometheus text metrics (stage latencies, cache ratios, queue depths, request rates)",
+            "/admin/profile": "GET - Sample this worker's stacks for N seconds (requires PROFILER_ENABLED)",
+            "/admin/memory": "GET - Memory by cache subsystem against budgets / POST /admin/memory/enforce (requires MEMORY_REPORT_ENABLED)",
             "/docs": "Interactive API documentation"
         }
     }
@@ -96,5 +159,10 @@ async def health_check():
         "optimization_ready": demand_model_loaded and elasticity_ready
     }
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of all workers' metrics"""
+    return Response(content=MetricsService.render(), media_type=MetricsService.CONTENT_TYPE)
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,107 @@
+"""
+Memory report of the pricing API by cache subsystem.
+Starts tracemalloc, runs the app's startup (model, data and elasticity loading) in this
+process, optionally drives synthetic traffic through it (see load_test.py), and prints
+each subsystem's estimated and traced bytes against its budget. Budgets come from
+MEMORY_BUDGET_<SUBSYSTEM>_MB, as in the server.
+
+    python memory_report.py                          # after startup
+    python memory_report.py --load-seconds 30        # after 30s of the default request mix
+    python memory_report.py --load-seconds 30 --enforce --output memory.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+import load_test
+from services.memory_service import MemoryService, MB
+from services.logging_service import LoggingService
+
+
+async def collect(args) -> Dict:
+    async with load_test.asgi_client(timeout=60.0) as client:
+        load = None
+        if args.load_seconds > 0:
+            load = await load_test.run_load(
+                client, concurrency=args.concurrency, duration=args.load_seconds, warmup=0,
+                mix=args.mix or load_test.DEFAULT_MIX, scenario_count=args.scenarios, seed=args.seed
+            )
+        # Sized while the app is still up: shutdown does not release the caches, but it
+        # stops the job workers whose results are part of the report
+        report = MemoryService.report(args.top)
+        if args.enforce:
+            report['enforced'] = MemoryService.enforce()
+            report['after_enforce'] = MemoryService.estimates()
+    if load is not None:
+        report['load'] = {'seconds': args.load_seconds, 'concurrency': args.concurrency,
+                          'requests': load['overall']['requests'], 'errors': load['overall']['errors']}
+    return report
+
+
+def print_report(report: Dict):
+    def mb(value):
+        return f"{value / MB:9.2f}" if value is not None else f"{'-':>9}"
+
+    process = report['process']
+    print("\n" + "=" * 80)
+    print(f"MEMORY: pid {process['pid']}, RSS {mb(process['rss_bytes']).strip()} MB, "
+          f"peak {mb(process['peak_rss_bytes']).strip()} MB")
+    if 'load' in report:
+        print(f"After {report['load']['requests']} requests over {report['load']['seconds']}s")
+    print("=" * 80)
+    print(f"  {'subsystem':<18} {'estimated':>9} {'traced':>9} {'budget':>9}   (MB)")
+    for name, subsystem in report['subsystems'].items():
+        flag = '  OVER BUDGET' if subsystem['over_budget'] else ''
+        print(f"  {name:<18} {mb(subsystem['estimated_bytes'])} {mb(subsystem['traced_bytes'])} "
+              f"{mb(subsystem['budget_bytes'])}{flag}")
+    traced = report['traced']
+    if traced:
+        for name in ('app', 'other'):
+            print(f"  {name:<18} {'':>9} {mb(traced['by_subsystem'][name])}")
+        print(f"  {'traced total':<18} {'':>9} {mb(traced['traced_bytes'])}  (peak {mb(traced['traced_peak_bytes']).strip()})")
+        print("\n  Top allocating lines:")
+        for line in traced['top_lines']:
+            print(f"  {mb(line['bytes'])} MB  {line['location']}")
+    for action in report.get('enforced', []):
+        print(f"\n  Enforced {action['subsystem']}: {mb(action['before_bytes']).strip()} -> "
+              f"{mb(action['after_bytes']).strip()} MB (budget {mb(action['budget_bytes']).strip()})")
+    print("=" * 80)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--load-seconds', type=float, default=0.0, help='Synthetic traffic before the report')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--mix', type=load_test.parse_mix, help='Endpoint weights, as in load_test.py')
+    parser.add_argument('--scenarios', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--frames', type=int, default=MemoryService.TRACE_FRAMES, help='Traceback depth traced')
+    parser.add_argument('--no-trace', action='store_true', help='Estimates only (startup is much faster)')
+    parser.add_argument('--top', type=int, default=10, help='Top allocating source lines')
+    parser.add_argument('--enforce', action='store_true', help='Shrink subsystems over budget and report the result')
+    parser.add_argument('--output', help='Write the report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    args = parse_args(argv)
+    if not args.no_trace:
+        # Started after the imports, so module code is not in the breakdown. Unpickling the
+        # model would import xgboost (and scipy) under tracing
+        import xgboost  # noqa: F401
+        MemoryService.start_tracing(args.frames)
+    report = asyncio.run(collect(args))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    LoggingService.get_logger('memory').parent.setLevel('WARNING')  # Keep load messages out of the report
+    report = main()
+    print_report(report)
+    sys.exit(1 if any(s['over_budget'] for s in report['subsystems'].values()) and 'enforced' not in report else 0)
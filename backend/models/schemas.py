@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 
 class Product(BaseModel):
     id: str
@@ -43,6 +43,8 @@ class PriceOptimizationRequest(BaseModel):
     is_holiday: int = 0
     min_price: Optional[float] = None
     max_price: Optional[float] = None
+    use_price_ladder: bool = False  # Restrict to configured shelf-price endings (e.g. x.49/x.95/x.99)
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
 
 class SimulationRequest(BaseModel):
     """Request for price simulation across different scenarios"""
@@ -56,6 +58,21 @@ class SimulationRequest(BaseModel):
     is_weekend: int = 0
     is_holiday: int = 0
     price: float
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
+
+class SimulationSessionRequest(BaseModel):
+    """Opens a live simulation session for one segment (WebSocket 'open' message)"""
+    product_name: str
+    category: str
+    emirate: str
+    store_type: str
+    month: int
+    day_of_week: int
+    day_of_month: int
+    is_weekend: int = 0
+    is_holiday: int = 0
+    price: Optional[float] = None  # Optional first price to simulate right away
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
 
 class DemandPrediction(BaseModel):
     price: float
@@ -86,8 +103,28 @@ class OptimizationResponse(BaseModel):
     recommendation: PriceRecommendation
     elasticity: ElasticityData
     demand_curve: List[DemandPrediction]
+    uncertainty: Optional[dict] = None
+    price_ladder: Optional[dict] = None
+    currency: str = "AED"
     timestamp: str
 
+class BatchOptimizationRequest(BaseModel):
+    """
+    Batch price optimization. Either explicit items, or every historical segment
+    matching the filters for the given date (priced at its latest price)
+    """
+    items: Optional[List[PriceOptimizationRequest]] = None
+    month: Optional[int] = None
+    day_of_week: Optional[int] = None
+    day_of_month: Optional[int] = None
+    is_weekend: int = 0
+    is_holiday: int = 0
+    product_names: Optional[List[str]] = None
+    emirates: Optional[List[str]] = None
+    store_types: Optional[List[str]] = None
+    use_price_ladder: bool = False
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
+
 class SimulationResponse(BaseModel):
     """Response for price simulation"""
     product_name: str
@@ -96,4 +133,303 @@ class SimulationResponse(BaseModel):
     predicted_revenue: float
     elasticity_coefficient: float
     demand_level: Optional[str] = "Normal"
+    currency: str = "AED"
+    timestamp: str
+
+class CatalogOptimizationRequest(BaseModel):
+    """Request for catalog-wide optimization under global constraints"""
+    month: int
+    day_of_week: int
+    day_of_month: int
+    is_weekend: int = 0
+    is_holiday: int = 0
+    product_names: Optional[List[str]] = None
+    emirates: Optional[List[str]] = None
+    store_types: Optional[List[str]] = None
+    max_price_index_increase_pct: Optional[float] = None  # Per category, revenue-weighted
+    max_discount_spend: Optional[Dict[str, float]] = None  # Discount budget per emirate (AED)
+    max_total_discount_spend: Optional[float] = None  # Catalog-wide discount budget (AED)
+    num_price_points: int = Field(50, ge=2, le=500)
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
+
+class CatalogSegmentPrice(BaseModel):
+    product_name: str
+    category: str
+    emirate: str
+    store_type: str
+    current_price: float
+    recommended_price: float
+    price_change_percentage: float
+    expected_demand: float
+    expected_profit: float
+    current_profit: float
+
+class ConstraintShadowPrice(BaseModel):
+    constraint: str
+    group: str
+    limit: float
+    value: float
+    slack: float
+    shadow_price: float  # Profit gained per unit the limit is relaxed
+    binding: bool
+
+class CatalogOptimizationResponse(BaseModel):
+    segments: List[CatalogSegmentPrice]
+    constraints: List[ConstraintShadowPrice]
+    totals: dict
+    solver: dict
+    currency: str = "AED"
+    timestamp: str
+
+class PriceCalendarRequest(BaseModel):
+    """Request for a multi-day price calendar plan"""
+    product_name: str
+    category: str
+    emirate: str
+    store_type: str
+    current_price: float
+    start_date: Optional[date] = None  # Defaults to tomorrow
+    horizon_days: int = Field(30, ge=1, le=366)
+    num_price_levels: int = Field(15, ge=2, le=100)
+    max_price_changes: int = Field(4, ge=0, le=60)
+    min_days_between_changes: int = Field(3, ge=1, le=60)
+    holidays: Optional[List[date]] = None
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
+
+class PriceCalendarDay(BaseModel):
+    date: str
+    day_of_week: int
+    is_weekend: int
+    is_holiday: int
+    price: float
+    expected_demand: float
+    expected_revenue: float
+    expected_profit: float
+    price_changed: bool
+
+class PriceCalendarResponse(BaseModel):
+    product_name: str
+    emirate: str
+    store_type: str
+    current_price: float
+    estimated_cost: float
+    price_levels: List[float]
+    plan: List[PriceCalendarDay]
+    summary: dict
+    currency: str = "AED"
+    timestamp: str
+
+class ProfitUncertaintyRequest(BaseModel):
+    """Request for a Monte Carlo profit distribution around the recommended price"""
+    product_name: str
+    category: str
+    emirate: str
+    store_type: str
+    current_price: float
+    month: int
+    day_of_week: int
+    day_of_month: int
+    is_weekend: int = 0
+    is_holiday: int = 0
+    recommended_price: Optional[float] = None  # Defaults to the profit-optimal price (AED)
+    n_draws: int = Field(10000, ge=100, le=100000)
+    num_price_points: int = Field(200, ge=2, le=1000)
+    elasticity_sd: float = Field(0.15, ge=0)
+    cost_sd_pct: float = Field(0.05, ge=0)
+    seed: Optional[int] = None
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
+
+class ProfitUncertaintyResponse(BaseModel):
+    product_name: str
+    emirate: str
+    store_type: str
+    n_draws: int
+    n_prices: int
+    current_price: float
+    recommended_price: float
+    probability_of_improvement: float
+    probability_not_worse: float
+    probability_alternative_better: float
+    expected_improvement: float
+    confidence_score: float
+    recommended_profit: dict
+    current_profit: dict
+    expected_profit_maximizing_price: float
+    price_bands: dict
+    currency: str = "AED"
     timestamp: str
+
+class ParetoFrontierRequest(BaseModel):
+    """Request for the non-dominated price points of one segment"""
+    product_name: str
+    category: str
+    emirate: str
+    store_type: str
+    current_price: float
+    month: int
+    day_of_week: int
+    day_of_month: int
+    is_weekend: int = 0
+    is_holiday: int = 0
+    objectives: Optional[List[str]] = None  # Subset of profit, demand, revenue (all maximized)
+    num_price_points: int = Field(50, ge=2, le=5000)
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
+
+class ParetoPoint(BaseModel):
+    price: float
+    price_change_percentage: float
+    demand: float
+    revenue: float
+    profit: float
+    is_current_price: bool
+    is_max_profit: bool
+
+class ParetoFrontierResponse(BaseModel):
+    product_name: str
+    emirate: str
+    store_type: str
+    current_price: float
+    estimated_cost: float
+    objectives: List[str]
+    candidates_evaluated: int
+    frontier: List[ParetoPoint]
+    currency: str = "AED"
+    timestamp: str
+
+class CatalogFrontierRequest(BaseModel):
+    """Request for the catalog-wide profit vs. volume frontier"""
+    month: int
+    day_of_week: int
+    day_of_month: int
+    is_weekend: int = 0
+    is_holiday: int = 0
+    product_names: Optional[List[str]] = None
+    emirates: Optional[List[str]] = None
+    store_types: Optional[List[str]] = None
+    num_price_points: int = Field(50, ge=2, le=500)
+    frontier_points: int = Field(25, ge=2, le=200)
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
+
+class CatalogFrontierPoint(BaseModel):
+    volume_weight: Optional[float] = None  # Profit given up per extra unit; None = maximum volume
+    total_profit: float
+    total_demand: float
+    total_revenue: float
+    profit_vs_max_pct: float
+    segments_changed: int
+
+class CatalogFrontierResponse(BaseModel):
+    segments: int
+    candidates_evaluated: int
+    segment_frontier_candidates: int
+    current: dict
+    frontier: List[CatalogFrontierPoint]
+    currency: str = "AED"
+    timestamp: str
+
+class SalesObservation(BaseModel):
+    """One new sales row for online elasticity updates"""
+    product_name: str
+    emirate: str
+    store_type: str
+    price: float  # In the request currency
+    units: float
+    is_weekend: int = 0
+    is_holiday: int = 0
+
+class SalesIngestRequest(BaseModel):
+    observations: List[SalesObservation] = Field(..., min_length=1, max_length=100000)
+    currency: str = "AED"  # ISO code for every money field; see /api/currencies
+
+class OnlineElasticityEstimate(BaseModel):
+    segment_key: str
+    elasticity: float
+    std_error: float
+    prior_elasticity: float
+    n_updates: int
+    updated_at: Optional[str] = None
+
+class SalesIngestResponse(BaseModel):
+    observations_applied: int
+    segments: List[OnlineElasticityEstimate]
+    snapshot_saved: bool
+    timestamp: str
+
+class JobSubmitRequest(BaseModel):
+    """Submit a background job; params are validated against the job type's request model"""
+    job_type: str  # optimize_catalog, optimize_batch, rebuild_elasticity_table, build_demand_cube or distill_demand_curves
+    params: Dict[str, Any] = {}
+
+class JobStatus(BaseModel):
+    id: str
+    job_type: str
+    params: Dict[str, Any]
+    status: str  # queued, running, succeeded, failed or cancelled
+    progress: dict
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    partial_results_count: int = 0
+    partial_results: Optional[List[dict]] = None
+    result: Optional[Any] = None
+
+class DemandPredictionRequest(BaseModel):
+    """
+    Raw model inputs for one demand prediction. Missing rolling features are taken from
+    the segment's latest history, as for optimization and simulation
+    """
+    product_name: str
+    category: str
+    emirate: str
+    store_type: str
+    price_per_sales_unit: float = Field(..., gt=0)
+    is_weekend: int = Field(0, ge=0, le=1)
+    is_holiday: int = Field(0, ge=0, le=1)
+    month: int = Field(..., ge=1, le=12)
+    day_of_week: int = Field(..., ge=0, le=6)
+    day_of_month: int = Field(..., ge=1, le=31)
+    rolling_3day_mean: Optional[float] = None
+    rolling_7day_mean: Optional[float] = None
+    rolling_30day_mean: Optional[float] = None
+    rolling_3day_std: Optional[float] = None
+    rolling_7day_std: Optional[float] = None
+    rolling_30day_std: Optional[float] = None
+    currency: Optional[str] = None  # Currency of price_per_sales_unit; default the data currency (USD)
+
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "product_name": "NESTLE NESQUIK 330GR(C) BOX",
+            "category": "BREAKFAST CEREAL",
+            "emirate": "Dubai",
+            "store_type": "Hypermarket",
+            "price_per_sales_unit": 57.0,
+            "is_weekend": 0,
+            "is_holiday": 0,
+            "month": 10,
+            "day_of_week": 1,
+            "day_of_month": 27,
+            "currency": "AED"
+        }
+    })
+
+class DemandPredictionResponse(BaseModel):
+    predicted_demand: float
+    input_features: dict  # Model inputs as used: price in data currency, rolling features filled
+    model_info: dict
+    currency: str = "USD"
+
+    model_config = ConfigDict(protected_namespaces=())
+
+class BatchDemandPredictionRequest(BaseModel):
+    """Many predictions scored with one model call; every price is in the batch currency"""
+    items: List[DemandPredictionRequest] = Field(..., min_length=1)
+    currency: Optional[str] = None  # Default the data currency (USD), as for single predictions
+
+class BatchDemandPredictionResponse(BaseModel):
+    predicted_demand: List[float]  # Aligned with the request items
+    count: int
+    model_info: dict
+    currency: str = "USD"
+
+    model_config = ConfigDict(protected_namespaces=())
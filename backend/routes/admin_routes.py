@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from services.profiler_service import SamplingProfiler, ProfilerBusy
+from services.memory_service import MemoryService
+from services.serialization_service import FastJSONResponse
+from services.timing_service import run_in_threadpool
+from typing import Optional
+import hmac
+
+router = APIRouter()
+
+
+def require_enabled(enabled: bool, expected_token: Optional[str], token: Optional[str], feature: str):
+    # A disabled admin feature is indistinguishable from a missing route
+    if not enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if expected_token and not hmac.compare_digest(token or '', expected_token):
+        raise HTTPException(status_code=403, detail=f"Invalid {feature} token")
+
+
+def require_profiler(token: Optional[str]):
+    require_enabled(SamplingProfiler.ENABLED, SamplingProfiler.TOKEN, token, "profiler")
+
+
+@router.get("/profile")
+async def sample_profile(
+    seconds: float = Query(10.0, gt=0, description="Sampling duration (capped by PROFILER_MAX_SECONDS)"),
+    interval_ms: float = Query(10.0, ge=1, description="Time between samples"),
+    format: str = Query("collapsed", description="collapsed (flamegraph.pl / speedscope input) or json"),
+    include_idle: bool = Query(False, description="Keep samples of threads parked in waits / select"),
+    top: Optional[int] = Query(None, ge=1, description="json only: the N most frequent stacks"),
+    x_profiler_token: Optional[str] = Header(None)
+):
+    """
+    Sample the stacks of every thread in the worker serving this request.
+    With several uvicorn workers, each request profiles one (arbitrary) worker.
+    """
+    require_profiler(x_profiler_token)
+    if format not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'json'")
+    try:
+        # Sampling blocks its thread; the event loop keeps serving the traffic being profiled
+        result = await run_in_threadpool(SamplingProfiler.profile, seconds, interval_ms / 1000, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "json":
+        return FastJSONResponse(SamplingProfiler.to_json(result, top))
+    return PlainTextResponse(
+        SamplingProfiler.collapsed(result),
+        headers={
+            "X-Profile-Samples": str(result['samples']),
+            "X-Profile-Truncated": str(result['truncated']).lower(),
+            "X-Profile-Pid": str(result['pid'])
+        }
+    )
+
+
+@router.get("/memory")
+async def memory_report(
+    top: int = Query(10, ge=0, le=100, description="Top allocating source lines (with MEMORY_TRACING)"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Resident memory of this worker by cache subsystem, against the configured budgets.
+    traced_bytes are only reported when tracemalloc runs (MEMORY_TRACING=true at startup).
+    """
+    require_enabled(MemoryService.REPORT_ENABLED, MemoryService.TOKEN, x_admin_token, "admin")
+    return FastJSONResponse(await run_in_threadpool(MemoryService.report, top))
+
+
+@router.post("/memory/enforce")
+async def enforce_memory_budgets(x_admin_token: Optional[str] = Header(None)):
+    """Shrink every cache subsystem that is over its budget now, instead of at the next periodic check"""
+    require_enabled(MemoryService.REPORT_ENABLED, MemoryService.TOKEN, x_admin_token, "admin")
+    actions = await run_in_threadpool(MemoryService.enforce)
+    return FastJSONResponse({'actions': actions})
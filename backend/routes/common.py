@@ -0,0 +1,223 @@
+"""
+Helpers shared by the route modules: request currency validation and the request ->
+service -> response-currency glue of optimizations, used by the pricing endpoints,
+prediction endpoints and background jobs alike
+"""
+from fastapi import HTTPException
+from models.schemas import (
+    PriceOptimizationRequest,
+    OptimizationResponse,
+    BatchOptimizationRequest,
+    SimulationResponse,
+    CatalogOptimizationRequest
+)
+from services.ai_service import XGBoostAIService
+from services.batch_optimization_service import BatchOptimizationService
+from services.catalog_optimization_service import CatalogOptimizationService
+from services.currency_service import CurrencyService
+from services.price_ladder_service import PriceLadderService
+from typing import Optional
+
+
+def request_currency(currency: Optional[str]) -> str:
+    """Validated currency code for a request; unknown codes are a 400"""
+    try:
+        return CurrencyService.normalize(currency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def run_price_optimization(request: PriceOptimizationRequest) -> dict:
+    """
+    Run one price optimization and return the response dict in the request currency.
+    Shared by the single and batch optimization endpoints.
+    """
+    # Convert incoming prices to the data currency for the model
+    rate = CurrencyService.rate(request.currency)
+    current_price_usd = request.current_price / rate
+    min_price_usd = request.min_price / rate if request.min_price else None
+    max_price_usd = request.max_price / rate if request.max_price else None
+    
+    # Get optimization results from AI service (in USD)
+    result = XGBoostAIService.optimize_price(
+        product_name=request.product_name,
+        category=request.category,
+        emirate=request.emirate,
+        store_type=request.store_type,
+        current_price=current_price_usd,
+        month=request.month,
+        day_of_week=request.day_of_week,
+        day_of_month=request.day_of_month,
+        is_weekend=request.is_weekend,
+        is_holiday=request.is_holiday,
+        min_price=min_price_usd,
+        max_price=max_price_usd,
+        use_price_ladder=request.use_price_ladder,
+        currency_rate=CurrencyService.rate(PriceLadderService.load_ladders().get('currency', 'AED'))
+    )
+    return optimization_to_currency(result, request.currency)
+
+
+def optimization_to_currency(result: OptimizationResponse, currency: Optional[str] = None) -> dict:
+    """Build the response dict of an optimization directly in the given currency"""
+    code = CurrencyService.normalize(currency)
+    rate = CurrencyService.rate(code)
+
+    def money(value: float) -> float:
+        return round(value * rate, 2)
+
+    recommendation = result.recommendation
+    elasticity = result.elasticity
+    uncertainty = result.uncertainty
+    ladder = result.price_ladder
+    return {
+        'product_name': result.product_name,
+        'category': result.category,
+        'emirate': result.emirate,
+        'store_type': result.store_type,
+        'current_metrics': {
+            key: money(value) if key in ('price', 'revenue', 'profit', 'estimated_cost') else value
+            for key, value in result.current_metrics.items()
+        },
+        'recommendation': {
+            'recommended_price': (
+                # Ladder prices are defined in shelf currency; use the exact shelf price, not a round trip
+                ladder['shelf_price'] if ladder and ladder['currency'] == code
+                else money(recommendation.recommended_price)
+            ),
+            'current_price': money(recommendation.current_price),
+            'price_change_percentage': recommendation.price_change_percentage,
+            'expected_demand': recommendation.expected_demand,
+            'expected_revenue': money(recommendation.expected_revenue),
+            'confidence_score': recommendation.confidence_score,
+            'reasoning': recommendation.reasoning
+        },
+        'elasticity': {
+            'elasticity_coefficient': elasticity.elasticity_coefficient,
+            'elasticity_category': elasticity.elasticity_category,
+            'interpretation': elasticity.interpretation,
+            'price_range': {
+                **elasticity.price_range,
+                'min': money(elasticity.price_range['min']),
+                'max': money(elasticity.price_range['max'])
+            }
+        },
+        'demand_curve': [
+            {'price': money(point.price), 'predicted_demand': point.predicted_demand, 'revenue': money(point.revenue)}
+            for point in result.demand_curve
+        ],
+        # Monte Carlo profit summary
+        'uncertainty': {
+            **uncertainty,
+            'expected_improvement': money(uncertainty['expected_improvement']),
+            'expected_profit': money(uncertainty['expected_profit']),
+            'expected_profit_maximizing_price': money(uncertainty['expected_profit_maximizing_price']),
+            'profit_quantiles': {key: money(value) for key, value in uncertainty['profit_quantiles'].items()}
+        } if uncertainty else uncertainty,
+        'price_ladder': dict(ladder) if ladder else ladder,
+        'currency': code,
+        'timestamp': result.timestamp
+    }
+
+
+def simulation_to_currency(result: SimulationResponse, currency: Optional[str] = None) -> dict:
+    """Convert a simulation response from data currency to the given currency"""
+    code = CurrencyService.normalize(currency)
+    rate = CurrencyService.rate(code)
+    result_dict = result.model_dump()
+    result_dict['currency'] = code
+    result_dict['scenario']['price'] = round(result_dict['scenario']['price'] * rate, 2)
+    result_dict['predicted_revenue'] = round(result_dict['predicted_revenue'] * rate, 2)
+    
+    # Convert baseline metrics if present
+    if 'baseline_price' in result_dict['scenario']:
+        result_dict['scenario']['baseline_price'] = round(result_dict['scenario']['baseline_price'] * rate, 2)
+    
+    return result_dict
+
+
+def iter_batch_requests(request: BatchOptimizationRequest):
+    """
+    Lazily expand a batch request into per-segment optimization requests. Explicit items
+    keep their own currency; generated ones use the batch currency.
+    """
+    if request.items is not None:
+        for item in request.items:
+            yield item
+        return
+    rate = CurrencyService.rate(request.currency)
+    for segment in BatchOptimizationService.iter_segments(
+        request.product_names, request.emirates, request.store_types
+    ):
+        yield PriceOptimizationRequest(
+            product_id=segment['product_name'],
+            product_name=segment['product_name'],
+            category=segment['category'],
+            emirate=segment['emirate'],
+            store_type=segment['store_type'],
+            current_price=round(segment['current_price'] * rate, 2),
+            month=request.month,
+            day_of_week=request.day_of_week,
+            day_of_month=request.day_of_month,
+            is_weekend=request.is_weekend,
+            is_holiday=request.is_holiday,
+            use_price_ladder=request.use_price_ladder,
+            currency=request.currency
+        )
+
+
+def optimize_batch_item(item: PriceOptimizationRequest) -> dict:
+    if item.current_price <= 0:
+        raise ValueError("Price must be a positive number")
+    return run_price_optimization(item)
+
+
+def run_catalog_optimization(request: CatalogOptimizationRequest) -> dict:
+    """
+    Run a catalog optimization and return the result dict in the request currency.
+    Shared by the catalog endpoint and background jobs.
+    """
+    currency = CurrencyService.normalize(request.currency)
+    rate = CurrencyService.rate(currency)
+    # Convert incoming budgets to the data currency for the model
+    discount_budgets_usd = (
+        {emirate: budget / rate for emirate, budget in request.max_discount_spend.items()}
+        if request.max_discount_spend else None
+    )
+    total_budget_usd = (
+        request.max_total_discount_spend / rate
+        if request.max_total_discount_spend is not None else None
+    )
+    
+    result = CatalogOptimizationService.optimize_catalog(
+        month=request.month,
+        day_of_week=request.day_of_week,
+        day_of_month=request.day_of_month,
+        is_weekend=request.is_weekend,
+        is_holiday=request.is_holiday,
+        product_names=request.product_names,
+        emirates=request.emirates,
+        store_types=request.store_types,
+        max_price_index_increase_pct=request.max_price_index_increase_pct,
+        max_discount_spend=discount_budgets_usd,
+        max_total_discount_spend=total_budget_usd,
+        num_points=request.num_price_points
+    )
+    
+    # Convert response from data currency to the request currency
+    result['currency'] = currency
+    for segment in result['segments']:
+        for key in ('current_price', 'recommended_price', 'expected_profit', 'current_profit'):
+            segment[key] = round(segment[key] * rate, 2)
+    for constraint in result['constraints']:
+        if constraint['constraint'].startswith('discount_spend'):
+            # Spend is money: limits convert, shadow price is profit per unit of spend
+            for key in ('limit', 'value', 'slack'):
+                constraint[key] = round(constraint[key] * rate, 2)
+        else:
+            # Index points stay as-is, shadow price is profit per index point
+            constraint['shadow_price'] = round(constraint['shadow_price'] * rate, 4)
+    result['totals'] = {key: round(value * rate, 2) for key, value in result['totals'].items()}
+    result['solver']['dual_bound'] = round(result['solver']['dual_bound'] * rate, 2)
+    
+    return result
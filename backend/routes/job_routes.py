@@ -0,0 +1,168 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from models.schemas import (
+    BatchOptimizationRequest,
+    CatalogOptimizationRequest,
+    JobSubmitRequest,
+    JobStatus
+)
+from routes.common import (
+    run_catalog_optimization,
+    iter_batch_requests,
+    optimize_batch_item
+)
+from services.ai_service import XGBoostAIService
+from services.batch_optimization_service import BatchOptimizationService
+from services.elasticity_service import ElasticityService
+from services.demand_cube_service import DemandCubeService
+from services.distilled_curve_service import DistilledCurveService
+from services.job_service import JobService, JobQueueFull
+from typing import List, Optional
+import asyncio
+import json
+
+router = APIRouter()
+
+# How often the event stream checks a job for changes
+STREAM_POLL_SECONDS = 0.5
+
+
+def require_model():
+    if not XGBoostAIService.load_model():
+        raise RuntimeError("AI model not available. Please ensure the XGBoost model file exists.")
+
+def catalog_job(params: dict, context) -> dict:
+    """Catalog optimization (request currency); a single solve, so cancellation applies once it returns"""
+    require_model()
+    context.progress(0, 1, "Optimizing catalog")
+    result = run_catalog_optimization(CatalogOptimizationRequest(**params))
+    context.progress(1, 1, "Done")
+    return result
+
+def batch_job(params: dict, context) -> dict:
+    """Batch optimization (request currency) publishing every segment as a partial result"""
+    require_model()
+    request = BatchOptimizationRequest(**params)
+    total = len(request.items) if request.items is not None else sum(
+        1 for _ in BatchOptimizationService.iter_segments(request.product_names, request.emirates, request.store_types)
+    )
+    context.progress(0, total)
+    summary = None
+    records = BatchOptimizationService.iter_results(iter_batch_requests(request), optimize_batch_item)
+    for record in records:
+        if record['type'] == 'summary':
+            summary = record
+            break
+        context.add_partial(record)
+        context.progress(record['index'] + 1, total)
+    return {'summary': summary}
+
+def elasticity_table_job(params: dict, context) -> dict:
+    """Re-estimate and save the segment elasticity table"""
+    context.progress(0, 1, "Estimating segment elasticities")
+    table = ElasticityService.rebuild_elasticity_table(save=True)
+    context.progress(1, 1, "Done")
+    return {
+        'generated_at': table.get('generated_at'),
+        'segments': len(table['segments']),
+        'categories': table.get('categories', {})
+    }
+
+def demand_cube_job(params: dict, context) -> dict:
+    """Rebuild the demand cube from the current model and data, and map it in this worker"""
+    require_model()
+    with DemandCubeService.build_lock:
+        meta = DemandCubeService.build(progress=lambda done, total: context.progress(done, total, "Scoring segments"))
+    DemandCubeService.load()
+    return {key: meta[key] for key in ('shape', 'built_at', 'build_seconds', 'model_fingerprint', 'inputs_fingerprint')}
+
+def distilled_curves_job(params: dict, context) -> dict:
+    """Distill per-segment curves from the demand cube (built first if stale); returns the error per segment"""
+    require_model()
+    context.progress(0, 1, "Checking the demand cube")
+    meta = DistilledCurveService.distill(progress=lambda done, total: context.progress(done, total, "Fitting segments"))
+    DistilledCurveService.load()
+    return {
+        'degree': meta['degree'],
+        'built_at': meta['built_at'],
+        'build_seconds': meta['build_seconds'],
+        'segments': DistilledCurveService.error_report()
+    }
+
+JobService.register('optimize_catalog', catalog_job, CatalogOptimizationRequest)
+JobService.register('optimize_batch', batch_job, BatchOptimizationRequest)
+JobService.register('rebuild_elasticity_table', elasticity_table_job)
+JobService.register('build_demand_cube', demand_cube_job)
+JobService.register('distill_demand_curves', distilled_curves_job)
+
+
+@router.post("", response_model=JobStatus, status_code=202)
+async def submit_job(request: JobSubmitRequest):
+    """
+    Queue a long-running job and return immediately with its ID.
+    Poll GET /api/jobs/{id} or stream GET /api/jobs/{id}/events for progress.
+    Job params use the same request models (and currencies) as the synchronous endpoints.
+    """
+    try:
+        return JobService.submit(request.job_type, request.params)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("", response_model=List[JobStatus])
+async def list_jobs(status: Optional[str] = None):
+    """Jobs known to this process, newest first"""
+    return JobService.list_jobs(status)
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, since: int = Query(0, ge=0, description="Skip this many partial results")):
+    """Status, progress, partial results (from offset `since`) and the final result"""
+    job = JobService.get(job_id, since=since)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.delete("/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = JobService.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-sent events for a job: 'progress' on every change, one 'partial' per new
+    partial result and a final 'done' with the finished job.
+    """
+    if JobService.get(job_id, include_results=False) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        sent = 0
+        last_progress = None
+        while True:
+            job = JobService.get(job_id, since=sent)
+            if job is None:
+                return
+            for record in job['partial_results']:
+                yield f"event: partial\nid: {sent}\ndata: {json.dumps(record, default=str)}\n\n"
+                sent += 1
+            progress = (job['status'], job['progress'])
+            if progress != last_progress:
+                last_progress = progress
+                payload = {'status': job['status'], **job['progress']}
+                yield f"event: progress\ndata: {json.dumps(payload)}\n\n"
+            if job['status'] in JobService.TERMINAL_STATUSES:
+                job.pop('partial_results', None)
+                yield f"event: done\ndata: {json.dumps(job, default=str)}\n\n"
+                return
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
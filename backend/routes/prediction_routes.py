@@ -0,0 +1,145 @@
+from fastapi import APIRouter, HTTPException
+from models.schemas import (
+    DemandPredictionRequest,
+    DemandPredictionResponse,
+    BatchDemandPredictionRequest,
+    BatchDemandPredictionResponse
+)
+from services.ai_service import XGBoostAIService
+from services.data_service import DataService
+from services.currency_service import CurrencyService
+from services.serialization_service import FastJSONResponse
+from services.timing_service import run_in_threadpool
+from routes.common import request_currency
+from typing import List, Optional, Tuple
+import os
+import numpy as np
+import pandas as pd
+
+router = APIRouter()
+legacy_router = APIRouter()  # Unprefixed paths of the former standalone prediction API (app.py)
+
+MAX_BATCH_ITEMS = int(os.getenv('PREDICT_BATCH_MAX_ITEMS', '10000'))
+MAX_REPORTED_ERRORS = 10
+MODEL_INPUT_FIELDS = set(DemandPredictionRequest.model_fields) - {'currency'}
+
+
+def model_info() -> dict:
+    return {
+        "model_type": "XGBoost Regressor",
+        "prediction_unit": "sales_units",
+        "features_used": len(XGBoostAIService.get_feature_spec()),
+        "model_version": XGBoostAIService.model_version,
+        "data_version": DataService.data_version
+    }
+
+
+def predict_items(items: List[DemandPredictionRequest], currency: str, batch: bool) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Validate, complete and score prediction inputs with one encoder pass and one model call.
+    Categorical values unknown to the data are a 400 naming the offending items.
+    """
+    frame = pd.DataFrame([item.model_dump(include=MODEL_INPUT_FIELDS) for item in items])
+    invalid = XGBoostAIService.invalid_categorical_inputs(frame)
+    if invalid:
+        valid = DataService.get_categorical_values()
+        messages = [
+            f"{f'items[{position}]: ' if batch else ''}Invalid {column} '{value}'. Must be one of: {sorted(valid[column])}"
+            for position, column, value in invalid[:MAX_REPORTED_ERRORS]
+        ]
+        if len(invalid) > MAX_REPORTED_ERRORS:
+            messages.append(f"... and {len(invalid) - MAX_REPORTED_ERRORS} more")
+        raise HTTPException(status_code=400, detail="; ".join(messages))
+
+    frame['price_per_sales_unit'] = frame['price_per_sales_unit'] / CurrencyService.rate(currency)
+    frame = XGBoostAIService.fill_rolling_features(frame)
+    return frame, XGBoostAIService.predict_demand_batch(frame)
+
+
+def prediction_currency(currency: Optional[str]) -> str:
+    """Currency of raw model-input prices: the data currency unless the request names one"""
+    return request_currency(currency or CurrencyService.data_currency())
+
+
+def require_model():
+    if not XGBoostAIService.load_model():
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+
+@router.post("/predict", response_model=DemandPredictionResponse)
+@legacy_router.post("/predict", response_model=DemandPredictionResponse, include_in_schema=False)
+async def predict_demand(request: DemandPredictionRequest):
+    """
+    Predict sales units for one set of model inputs.
+    The price is in the request currency, by default the data currency (USD) the model
+    was trained on; rolling features left out are taken from the segment's latest history.
+    """
+    require_model()
+    currency = prediction_currency(request.currency)
+    try:
+        frame, predictions = await run_in_threadpool(predict_items, [request], currency, False)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+    input_features = {key: (value.item() if hasattr(value, 'item') else value) for key, value in frame.iloc[0].items()}
+    return FastJSONResponse({
+        "predicted_demand": float(predictions[0]),
+        "input_features": input_features,
+        "model_info": model_info(),
+        "currency": currency
+    })
+
+
+@router.post("/predict/batch", response_model=BatchDemandPredictionResponse)
+async def predict_demand_batch(request: BatchDemandPredictionRequest):
+    """
+    Predict sales units for many sets of model inputs in one model call.
+    Every price is in the batch currency (the items' own currency fields are ignored);
+    predictions are returned in item order.
+    """
+    require_model()
+    currency = prediction_currency(request.currency)
+    if len(request.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+    try:
+        _, predictions = await run_in_threadpool(predict_items, request.items, currency, True)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+    return FastJSONResponse({
+        "predicted_demand": predictions.tolist(),
+        "count": len(predictions),
+        "model_info": model_info(),
+        "currency": currency
+    })
+
+
+@router.get("/model-info")
+@legacy_router.get("/model-info", include_in_schema=False)
+async def get_model_info():
+    """Information about the loaded demand model"""
+    require_model()
+    model = XGBoostAIService.model
+    return FastJSONResponse({
+        "model_type": "XGBoost Regressor",
+        "target_variable": "sales_units",
+        "model_version": XGBoostAIService.model_version,
+        "features_count": len(XGBoostAIService.get_feature_spec()),
+        "model_params": model.get_params() if hasattr(model, 'get_params') else {}
+    })
+
+
+@legacy_router.get("/valid-values", include_in_schema=False)
+async def get_legacy_valid_values():
+    """Categorical values accepted by /predict, from the data"""
+    valid = DataService.get_categorical_values()
+    return {
+        "products": sorted(valid['product_name']),
+        "categories": sorted(valid['category']),
+        "emirates": sorted(valid['emirate']),
+        "store_types": sorted(valid['store_type'])
+    }
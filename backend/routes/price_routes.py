@@ -1,61 +1,102 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
 from models.schemas import (
     PriceOptimizationRequest,
     OptimizationResponse,
+    BatchOptimizationRequest,
     Product,
     SimulationRequest,
-    SimulationResponse
+    SimulationResponse,
+    SimulationSessionRequest,
+    CatalogOptimizationRequest,
+    CatalogOptimizationResponse,
+    PriceCalendarRequest,
+    PriceCalendarResponse,
+    ProfitUncertaintyRequest,
+    ProfitUncertaintyResponse,
+    ParetoFrontierRequest,
+    ParetoFrontierResponse,
+    CatalogFrontierRequest,
+    CatalogFrontierResponse,
+    SalesIngestRequest,
+    SalesIngestResponse,
+    OnlineElasticityEstimate
+)
+from routes.common import (
+    request_currency,
+    run_price_optimization,
+    simulation_to_currency,
+    iter_batch_requests,
+    optimize_batch_item,
+    run_catalog_optimization
 )
 from services.ai_service import XGBoostAIService
 from services.data_service import DataService
-from typing import List
+from services.price_calendar_service import PriceCalendarService
+from services.pareto_service import ParetoService
+from services.elasticity_service import ElasticityService
+from services.online_elasticity_service import OnlineElasticityService
+from services.batch_optimization_service import BatchOptimizationService
+from services.response_cache import ResponseCache
+from services.serialization_service import FastJSONResponse
+from services.currency_service import CurrencyService
+from services.metrics_service import MetricsService
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import json
 import random
+import time
+from services.logging_service import get_logger, DecisionTrace
+from services.timing_service import run_in_threadpool
 
-# Currency conversion rate from USD to AED
-USD_TO_AED = 3.7
-AED_TO_USD = 1 / USD_TO_AED
+logger = get_logger(__name__)
 
 router = APIRouter()
 
-# Load products from actual data on startup
-def get_products_list():
-    """Get products from CSV data"""
-    # Currency conversion rate from USD to AED
-    USD_TO_AED = 3.7
-    
-    products = DataService.get_products_from_data()
-    if not products:
-        # Fallback to hardcoded products if data loading fails (prices in AED)
-        return [
-            {"id": "NES001", "name": "NESTLE NESQUIK 330GR(C) BOX", "category": "Breakfast Cereals", "current_price": 57.35, "unit": "box"},
-            {"id": "NES002", "name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages", "current_price": 92.50, "unit": "box"},
-            {"id": "NES003", "name": "MAGGI BBQ & GRILLS SEASONING 150G TUB", "category": "Culinary", "current_price": 44.40, "unit": "tub"},
-            {"id": "NES004", "name": "NESCAFE LATTE 240ML TIN", "category": "Hot Beverages", "current_price": 31.45, "unit": "tin"},
-            {"id": "NES005", "name": "PURINA FRISK.CHICKEN IN GRAVY JUNI.85G S", "category": "Pet Care", "current_price": 31.45, "unit": "pouch"},
-            {"id": "NES006", "name": "NESTLE CHOCAPIC C/B 25GR (C) WRP", "category": "Breakfast Cereals", "current_price": 12.95, "unit": "wrap"}
-        ]
-    
-    # Convert prices from USD to AED for products loaded from data
-    for product in products:
-        product['current_price'] = round(product['current_price'] * USD_TO_AED, 2)
-        # Convert cost to AED as well
-        if 'cost' in product:
-            product['cost'] = round(product['cost'] * USD_TO_AED, 2)
+# Fallback catalog if data loading fails (prices in AED)
+FALLBACK_PRODUCTS = [
+    {"id": "NES001", "name": "NESTLE NESQUIK 330GR(C) BOX", "category": "Breakfast Cereals", "current_price": 57.35, "unit": "box"},
+    {"id": "NES002", "name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages", "current_price": 92.50, "unit": "box"},
+    {"id": "NES003", "name": "MAGGI BBQ & GRILLS SEASONING 150G TUB", "category": "Culinary", "current_price": 44.40, "unit": "tub"},
+    {"id": "NES004", "name": "NESCAFE LATTE 240ML TIN", "category": "Hot Beverages", "current_price": 31.45, "unit": "tin"},
+    {"id": "NES005", "name": "PURINA FRISK.CHICKEN IN GRAVY JUNI.85G S", "category": "Pet Care", "current_price": 31.45, "unit": "pouch"},
+    {"id": "NES006", "name": "NESTLE CHOCAPIC C/B 25GR (C) WRP", "category": "Breakfast Cereals", "current_price": 12.95, "unit": "wrap"}
+]
+FALLBACK_CURRENCY = "AED"
+
+def get_products_list(currency: Optional[str] = None) -> List[dict]:
+    """
+    Products from the CSV data with prices and costs in the requested currency.
+    Built once per currency and data / rates version; callers must not mutate it.
+    """
+    def build(code: str, rate: float) -> List[dict]:
+        # Copies: the cached product dicts stay in data currency
+        products = [dict(p) for p in DataService.get_products_from_data()]
+        if not products:
+            fallback_rate = rate / CurrencyService.rate(FALLBACK_CURRENCY)
+            return [{**p, "current_price": round(p["current_price"] * fallback_rate, 2)} for p in FALLBACK_PRODUCTS]
+        for product in products:
+            CurrencyService.convert_fields(product, ('current_price', 'cost'), code)
+        return products
     
-    return products
+    return CurrencyService.view('products', currency, build)
 
-PRODUCTS = []
+def current_products(currency: Optional[str] = None) -> List[dict]:
+    return get_products_list(currency)
 
 def get_valid_values():
     """Get valid values from data"""
-    if not PRODUCTS:
+    products = DataService.get_products_from_data()
+    if not products:
         return {
             "emirates": ['Dubai', 'Abu Dhabi', 'Sharjah', 'Ajman', 'Ras Al Khaimah', 'Fujairah', 'Umm Al Quwain'],
             "store_types": ['Hypermarket', 'Supermarket', 'Mini Market', 'Convenience Store', 'Traditional', 'Online']
         }
     
     # Get from first product's data
-    first_product = PRODUCTS[0]['name']
+    first_product = products[0]['name']
     emirates, store_types = DataService.get_available_locations(first_product)
     
     return {
@@ -63,70 +104,110 @@ def get_valid_values():
         "store_types": store_types
     }
 
-VALID_VALUES = {}
+CURRENCY_QUERY = Query(None, description="Response currency (ISO code, default AED); see /api/currencies")
+
+# Read endpoints below change only with the dataset, model or rates; clients may reuse
+# a response for a minute and then revalidate it with If-None-Match
+READ_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+def cache_version() -> str:
+    return f"d{DataService.data_version}.m{XGBoostAIService.model_version}.r{CurrencyService.rates_version}"
+
+async def cached_json_response(request: Request, resource: str, build, threadpool: bool = False) -> Response:
+    """
+    Serve a read-only resource with a strong ETag. A matching If-None-Match gets an
+    empty 304; otherwise the serialized body is reused for as long as the version holds.
+    """
+    version = cache_version()
+    etag = ResponseCache.etag(resource, version)
+    headers = {"ETag": etag, "Cache-Control": READ_CACHE_CONTROL}
+    if ResponseCache.matches(request.headers.get("if-none-match"), etag):
+        ResponseCache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    if threadpool:
+        body = await run_in_threadpool(ResponseCache.get_body, resource, version, build)
+    else:
+        body = ResponseCache.get_body(resource, version, build)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def find_product(product_id: str, currency: Optional[str] = None) -> dict:
+    product = next((p for p in current_products(currency) if p["id"] == product_id), None)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+@router.get("/currencies")
+async def get_currencies():
+    """Supported currencies with their rate per unit of data currency"""
+    rates = CurrencyService.load_rates()
+    return {
+        "version": rates.get('version'),
+        "data_currency": rates['data_currency'],
+        "default_currency": rates['default_currency'],
+        "currencies": CurrencyService.available()
+    }
 
 @router.get("/products", response_model=List[Product])
-async def get_products():
+async def get_products(request: Request, currency: Optional[str] = CURRENCY_QUERY):
     """Get all available products from actual data."""
-    global PRODUCTS
-    if not PRODUCTS:
-        PRODUCTS = get_products_list()
-    return PRODUCTS
+    code = request_currency(currency)
+    return await cached_json_response(
+        request, f"products?currency={code}",
+        lambda: [Product(**p) for p in current_products(code)]
+    )
 
 @router.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: str):
+async def get_product(product_id: str, request: Request, currency: Optional[str] = CURRENCY_QUERY):
     """Get a specific product by ID."""
-    global PRODUCTS
-    if not PRODUCTS:
-        PRODUCTS = get_products_list()
-    
-    product = next((p for p in PRODUCTS if p["id"] == product_id), None)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    code = request_currency(currency)
+    product = find_product(product_id, code)
+    return await cached_json_response(request, f"products/{product_id}?currency={code}", lambda: Product(**product))
 
 @router.get("/valid-values")
-async def get_valid_values_endpoint():
+async def get_valid_values_endpoint(request: Request):
     """Get valid values for dropdowns from actual data"""
-    global PRODUCTS, VALID_VALUES
-    
-    if not PRODUCTS:
-        PRODUCTS = get_products_list()
-    
-    if not VALID_VALUES:
-        VALID_VALUES = get_valid_values()
+    def build():
+        products = current_products()
+        valid_values = get_valid_values()
+        return {
+            "emirates": valid_values["emirates"],
+            "store_types": valid_values["store_types"],
+            "products": [p["name"] for p in products],
+            # Sorted so every worker serializes identical bytes for the same ETag
+            "categories": sorted(set(p["category"] for p in products))
+        }
     
-    return {
-        "emirates": VALID_VALUES["emirates"],
-        "store_types": VALID_VALUES["store_types"],
-        "products": [p["name"] for p in PRODUCTS],
-        "categories": list(set(p["category"] for p in PRODUCTS))
-    }
+    return await cached_json_response(request, "valid-values", build)
 
 @router.get("/product-stats/{product_id}")
-async def get_product_statistics(product_id: str):
-    """Get detailed statistics for a product"""
-    global PRODUCTS
-    if not PRODUCTS:
-        PRODUCTS = get_products_list()
+async def get_product_statistics(product_id: str, request: Request, currency: Optional[str] = CURRENCY_QUERY):
+    """Get detailed statistics for a product (prices in the requested currency)"""
+    code = request_currency(currency)
+    product = find_product(product_id, code)
     
-    product = next((p for p in PRODUCTS if p["id"] == product_id), None)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    def build():
+        # Shallow copy: the stats dict may be shared with concurrent callers
+        statistics = dict(DataService.get_product_stats(product["name"]))
+        if statistics.get("price_stats"):
+            statistics["price_stats"] = CurrencyService.convert_fields(
+                dict(statistics["price_stats"]), ('min', 'max', 'mean', 'current'), code
+            )
+        return {"product": product, "statistics": statistics, "currency": code}
     
-    stats = DataService.get_product_stats(product["name"])
-    return {
-        "product": product,
-        "statistics": stats
-    }
+    # Built off the event loop so identical concurrent requests can share one computation
+    return await cached_json_response(request, f"product-stats/{product_id}?currency={code}", build, threadpool=True)
+
+TRACE_QUERY = Query(False, description="Include the decision trace (elasticity and search steps) in the response")
 
 @router.post("/optimize-price", response_model=OptimizationResponse)
-async def optimize_price(request: PriceOptimizationRequest):
+async def optimize_price(request: PriceOptimizationRequest, trace: bool = TRACE_QUERY):
     """
     Optimize price for a given product using XGBoost AI model.
     Returns optimal price, demand predictions, and elasticity analysis.
-    Backend expects prices in AED and returns results in AED.
+    Prices are in the request currency (default AED), as are the results.
+    With ?trace=1 the response also carries the decisions taken, under 'trace'.
     """
+    request_currency(request.currency)
     try:
         # Load the XGBoost model
         if not XGBoostAIService.load_model():
@@ -142,127 +223,562 @@ async def optimize_price(request: PriceOptimizationRequest):
                 detail="Price must be a positive number"
             )
         
-        # Convert incoming AED price to USD for the model
-        current_price_usd = request.current_price * AED_TO_USD
-        min_price_usd = request.min_price * AED_TO_USD if request.min_price else None
-        max_price_usd = request.max_price * AED_TO_USD if request.max_price else None
+        # Off the event loop so identical concurrent requests can share one computation.
+        # The result is trusted internal data converted once: serialize it directly
+        # instead of re-validating it against OptimizationResponse
+        with DecisionTrace.capture(trace) as decisions:
+            result = await run_in_threadpool(run_price_optimization, request)
+        if decisions is not None:
+            result['trace'] = decisions.to_list()
+        return FastJSONResponse(result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Optimization error: {str(e)}")
+
+@router.post("/optimize-batch")
+def optimize_batch(
+    request: BatchOptimizationRequest,
+    format: str = Query("ndjson", description="json (buffered), ndjson or sse (streamed per segment)")
+):
+    """
+    Optimize prices for many segments in one call.
+    In ndjson / sse mode each segment's result is flushed as soon as it is computed,
+    followed by a summary record; a failing segment yields an error record instead
+    of aborting the batch. Prices are in each item's currency (default AED), as are the results.
+    """
+    request_currency(request.currency)
+    if format not in BatchOptimizationService.FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown format '{format}'. Use one of: {', '.join(BatchOptimizationService.FORMATS)}"
+        )
+    if request.items is None and None in (request.month, request.day_of_week, request.day_of_month):
+        raise HTTPException(
+            status_code=400,
+            detail="Provide items, or month, day_of_week and day_of_month to optimize all matching segments"
+        )
+    if not XGBoostAIService.load_model():
+        raise HTTPException(
+            status_code=503,
+            detail="AI model not available. Please ensure the XGBoost model file exists."
+        )
+    
+    records = BatchOptimizationService.iter_results(iter_batch_requests(request), optimize_batch_item)
+    if format == 'json':
+        return FastJSONResponse(BatchOptimizationService.collect(records))
+    
+    lines = (
+        BatchOptimizationService.ndjson_lines(records) if format == 'ndjson'
+        else BatchOptimizationService.sse_events(records)
+    )
+    # Sync generator: Starlette iterates it in a worker thread and sends each chunk as it is yielded
+    return StreamingResponse(
+        lines,
+        media_type=BatchOptimizationService.MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/simulate", response_model=SimulationResponse)
+async def simulate_price(request: SimulationRequest, trace: bool = TRACE_QUERY):
+    """
+    Simulate a specific price scenario.
+    Returns predicted demand, revenue, and elasticity for given inputs.
+    Prices are in the request currency (default AED), as are the results.
+    With ?trace=1 the response also carries the decisions taken, under 'trace'.
+    """
+    currency = request_currency(request.currency)
+    try:
+        # Load the XGBoost model
+        if not XGBoostAIService.load_model():
+            raise HTTPException(
+                status_code=503,
+                detail="AI model not available. Please ensure the XGBoost model file exists."
+            )
+        
+        # Validate inputs
+        if request.price <= 0:
+            raise HTTPException(
+                status_code=400, 
+                detail="Price must be a positive number"
+            )
+        
+        # Convert incoming price to the data currency for the model
+        price_usd = CurrencyService.to_data(request.price, currency)
+        
+        # Get simulation results (in data currency), off the event loop so identical
+        # concurrent requests can share one computation
+        with DecisionTrace.capture(trace) as decisions:
+            result = await run_in_threadpool(
+                XGBoostAIService.simulate_price_scenario,
+                product_name=request.product_name,
+                category=request.category,
+                emirate=request.emirate,
+                store_type=request.store_type,
+                price=price_usd,
+                month=request.month,
+                day_of_week=request.day_of_week,
+                day_of_month=request.day_of_month,
+                is_weekend=request.is_weekend,
+                is_holiday=request.is_holiday
+            )
+        
+        result = simulation_to_currency(result, currency)
+        if decisions is not None:
+            result['trace'] = decisions.to_list()
+        return FastJSONResponse(result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
+
+@router.websocket("/ws/simulate")
+async def simulate_live(websocket: WebSocket):
+    """
+    Live simulation channel for one segment at a time (prices in the session currency,
+    set by "open"; default AED).
+    Client messages:
+      {"type": "open", <SimulationSessionRequest fields>} -> {"type": "session", ...}
+      {"type": "price", "price": 25.5, "seq": 7}         -> {"type": "simulation", "seq": 7, ...}
+    The segment context (rolling averages, baseline demand, elasticity) is resolved once
+    per "open"; each price update only re-runs the price-dependent part. Updates that
+    arrive while a simulation is running are coalesced: only the latest one is computed
+    and the reply reports how many were dropped.
+    """
+    await websocket.accept()
+    if not XGBoostAIService.load_model():
+        await websocket.send_json({
+            "type": "error",
+            "detail": "AI model not available. Please ensure the XGBoost model file exists."
+        })
+        await websocket.close(code=1011)
+        return
+    
+    pending = {'open': None, 'price': None, 'dropped': 0}
+    wakeup = asyncio.Event()
+    
+    async def open_session(message: dict):
+        request = SimulationSessionRequest(**{k: v for k, v in message.items() if k != 'type'})
+        context = await run_in_threadpool(
+            XGBoostAIService.build_simulation_context,
+            request.product_name, request.category, request.emirate, request.store_type,
+            request.month, request.day_of_week, request.day_of_month,
+            request.is_weekend, request.is_holiday
+        )
+        context = {**context, 'currency': CurrencyService.normalize(request.currency)}
+        rate = CurrencyService.rate(context['currency'])
+        baseline_price = context['current_price']
+        await websocket.send_json({
+            "type": "session",
+            "segment": {
+                "product_name": request.product_name,
+                "emirate": request.emirate,
+                "store_type": request.store_type
+            },
+            "currency": context['currency'],
+            "baseline_price": round(baseline_price * rate, 2) if baseline_price is not None else None,
+            "baseline_demand": round(context['baseline_demand'], 1) if context['baseline_demand'] is not None else None,
+            "base_elasticity": round(context['base_elasticity'], 3) if context['base_elasticity'] is not None else None
+        })
+        if request.price is not None and pending['price'] is None:
+            pending['price'] = {'price': request.price, 'seq': message.get('seq')}
+        return context
+    
+    async def simulate(context: dict, message: dict, dropped: int):
+        price = float(message['price'])
+        if price <= 0:
+            raise ValueError("Price must be a positive number")
+        started = time.perf_counter()
+        result = await run_in_threadpool(
+            XGBoostAIService.simulate_with_context,
+            context,
+            CurrencyService.to_data(price, context['currency'])
+        )
+        await websocket.send_json({
+            "type": "simulation",
+            "seq": message.get('seq'),
+            "dropped": dropped,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "result": simulation_to_currency(result, context['currency'])
+        })
+    
+    async def work():
+        context = None
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            while pending['open'] is not None or pending['price'] is not None:
+                if pending['open'] is not None:
+                    message, pending['open'] = pending['open'], None
+                    handler = open_session(message)
+                else:
+                    message, pending['price'] = pending['price'], None
+                    dropped, pending['dropped'] = pending['dropped'], 0
+                    if context is None:
+                        await websocket.send_json({
+                            "type": "error", "seq": message.get('seq'),
+                            "detail": "Open a session before sending prices"
+                        })
+                        continue
+                    handler = simulate(context, message, dropped)
+                try:
+                    opened = await handler
+                    if opened is not None:
+                        context = opened
+                except (ValidationError, ValueError, KeyError, TypeError) as e:
+                    await websocket.send_json({"type": "error", "seq": message.get('seq'), "detail": str(e)})
+                except Exception as e:
+                    await websocket.send_json({
+                        "type": "error", "seq": message.get('seq'), "detail": f"Simulation error: {str(e)}"
+                    })
+    
+    worker = asyncio.create_task(work())
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                message_type = message.get('type')
+            except (ValueError, AttributeError):
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+            if message_type == 'open':
+                # A new segment supersedes price updates queued for the old one
+                if pending['price'] is not None:
+                    pending['dropped'] += 1
+                pending['open'], pending['price'] = message, None
+            elif message_type == 'price':
+                if pending['price'] is not None:
+                    pending['dropped'] += 1
+                pending['price'] = message
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Unknown message type '{message_type}'"})
+                continue
+            wakeup.set()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        worker.cancel()
+
+@router.post("/optimize-catalog", response_model=CatalogOptimizationResponse)
+async def optimize_catalog(request: CatalogOptimizationRequest):
+    """
+    Jointly optimize prices for all matching segments under global constraints
+    (category price-index caps and discount-spend budgets).
+    Returns per-segment prices plus the shadow price of every constraint.
+    Budgets are in the request currency (default AED), as are the results.
+    """
+    request_currency(request.currency)
+    try:
+        if not XGBoostAIService.load_model():
+            raise HTTPException(
+                status_code=503,
+                detail="AI model not available. Please ensure the XGBoost model file exists."
+            )
+        
+        result = await run_in_threadpool(run_catalog_optimization, request)
+        return CatalogOptimizationResponse(timestamp=datetime.now().isoformat(), **result)
         
-        # Get optimization results from AI service (in USD)
-        result = XGBoostAIService.optimize_price(
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Catalog optimization error: {str(e)}")
+
+@router.post("/price-calendar", response_model=PriceCalendarResponse)
+async def plan_price_calendar(request: PriceCalendarRequest):
+    """
+    Plan day-by-day prices for a segment over a horizon (e.g. the next 30 days),
+    limiting the number of price changes and the minimum days between them.
+    Prices are in the request currency (default AED), as are the results.
+    """
+    currency = request_currency(request.currency)
+    rate = CurrencyService.rate(currency)
+    try:
+        if not XGBoostAIService.load_model():
+            raise HTTPException(
+                status_code=503,
+                detail="AI model not available. Please ensure the XGBoost model file exists."
+            )
+        
+        if request.current_price <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="Price must be a positive number"
+            )
+        
+        # Plan in data currency for the model
+        result = await run_in_threadpool(
+            PriceCalendarService.plan_calendar,
             product_name=request.product_name,
             category=request.category,
             emirate=request.emirate,
             store_type=request.store_type,
-            current_price=current_price_usd,
+            current_price=request.current_price / rate,
+            start_date=request.start_date,
+            horizon_days=request.horizon_days,
+            num_price_levels=request.num_price_levels,
+            max_price_changes=request.max_price_changes,
+            min_days_between_changes=request.min_days_between_changes,
+            holidays=request.holidays
+        )
+        
+        # Convert response from data currency to the request currency
+        result['currency'] = currency
+        result['current_price'] = round(request.current_price, 2)
+        result['estimated_cost'] = round(result['estimated_cost'] * rate, 2)
+        result['price_levels'] = [round(p * rate, 2) for p in result['price_levels']]
+        for day in result['plan']:
+            for key in ('price', 'expected_revenue', 'expected_profit'):
+                day[key] = round(day[key] * rate, 2)
+        for key in ('expected_profit', 'expected_revenue', 'baseline_profit'):
+            result['summary'][key] = round(result['summary'][key] * rate, 2)
+        
+        return PriceCalendarResponse(timestamp=datetime.now().isoformat(), **result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Price calendar error: {str(e)}")
+
+@router.post("/profit-uncertainty", response_model=ProfitUncertaintyResponse)
+async def profit_uncertainty(request: ProfitUncertaintyRequest):
+    """
+    Monte Carlo profit distribution for a recommended price under elasticity and
+    cost uncertainty: probability of improvement, quantiles and per-price bands.
+    Prices are in the request currency (default AED), as are the results.
+    """
+    currency = request_currency(request.currency)
+    rate = CurrencyService.rate(currency)
+    try:
+        if not XGBoostAIService.load_model():
+            raise HTTPException(
+                status_code=503,
+                detail="AI model not available. Please ensure the XGBoost model file exists."
+            )
+        
+        if request.current_price <= 0 or (request.recommended_price is not None and request.recommended_price <= 0):
+            raise HTTPException(
+                status_code=400,
+                detail="Price must be a positive number"
+            )
+        
+        # Simulate in data currency for the model
+        result = await run_in_threadpool(
+            XGBoostAIService.analyze_profit_uncertainty,
+            product_name=request.product_name,
+            category=request.category,
+            emirate=request.emirate,
+            store_type=request.store_type,
+            current_price=request.current_price / rate,
             month=request.month,
             day_of_week=request.day_of_week,
             day_of_month=request.day_of_month,
             is_weekend=request.is_weekend,
             is_holiday=request.is_holiday,
-            min_price=min_price_usd,
-            max_price=max_price_usd
+            recommended_price=request.recommended_price / rate if request.recommended_price else None,
+            n_draws=request.n_draws,
+            num_price_points=request.num_price_points,
+            elasticity_sd=request.elasticity_sd,
+            cost_sd_pct=request.cost_sd_pct,
+            seed=request.seed
         )
         
-        # Convert response from USD to AED
-        result_dict = result.dict()
-        
-        # Convert current_metrics prices and revenue
-        result_dict['current_metrics']['price'] = round(result_dict['current_metrics']['price'] * USD_TO_AED, 2)
-        result_dict['current_metrics']['revenue'] = round(result_dict['current_metrics']['revenue'] * USD_TO_AED, 2)
-        if 'profit' in result_dict['current_metrics']:
-            result_dict['current_metrics']['profit'] = round(result_dict['current_metrics']['profit'] * USD_TO_AED, 2)
-        if 'estimated_cost' in result_dict['current_metrics']:
-            result_dict['current_metrics']['estimated_cost'] = round(result_dict['current_metrics']['estimated_cost'] * USD_TO_AED, 2)
-        
-        # Convert recommendation prices and revenue
-        result_dict['recommendation']['recommended_price'] = round(result_dict['recommendation']['recommended_price'] * USD_TO_AED, 2)
-        result_dict['recommendation']['current_price'] = round(result_dict['recommendation']['current_price'] * USD_TO_AED, 2)
-        result_dict['recommendation']['expected_revenue'] = round(result_dict['recommendation']['expected_revenue'] * USD_TO_AED, 2)
+        # Convert response from data currency to the request currency
+        result['currency'] = currency
+        for key in ('current_price', 'recommended_price', 'expected_improvement', 'expected_profit_maximizing_price'):
+            result[key] = round(result[key] * rate, 2)
+        for distribution in (result['recommended_profit'], result['current_profit']):
+            for key in ('mean', 'std'):
+                distribution[key] = round(distribution[key] * rate, 2)
+        recommended = result['recommended_profit']
+        recommended['quantiles'] = {key: round(value * rate, 2) for key, value in recommended['quantiles'].items()}
+        recommended['histogram']['bin_edges'] = [round(edge * rate, 2) for edge in recommended['histogram']['bin_edges']]
+        for key, values in result['price_bands'].items():
+            if key != 'probability_optimal':
+                result['price_bands'][key] = [round(value * rate, 2) for value in values]
         
-        # Convert demand_curve prices and revenue
-        for point in result_dict['demand_curve']:
-            point['price'] = round(point['price'] * USD_TO_AED, 2)
-            point['revenue'] = round(point['revenue'] * USD_TO_AED, 2)
-        
-        # Convert elasticity price_range
-        result_dict['elasticity']['price_range']['min'] = round(result_dict['elasticity']['price_range']['min'] * USD_TO_AED, 2)
-        result_dict['elasticity']['price_range']['max'] = round(result_dict['elasticity']['price_range']['max'] * USD_TO_AED, 2)
-        
-        return OptimizationResponse(**result_dict)
+        return ProfitUncertaintyResponse(
+            product_name=request.product_name,
+            emirate=request.emirate,
+            store_type=request.store_type,
+            timestamp=datetime.now().isoformat(),
+            **result
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Optimization error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Uncertainty analysis error: {str(e)}")
 
-@router.post("/simulate", response_model=SimulationResponse)
-async def simulate_price(request: SimulationRequest):
+@router.post("/pareto-frontier", response_model=ParetoFrontierResponse)
+async def pareto_frontier(request: ParetoFrontierRequest):
     """
-    Simulate a specific price scenario.
-    Returns predicted demand, revenue, and elasticity for given inputs.
-    Backend expects prices in AED and returns results in AED.
+    Non-dominated (profit, demand, revenue) price points for one segment, so the
+    trade-off between margin and volume can be chosen explicitly.
+    Prices are in the request currency (default AED), as are the results.
     """
+    currency = request_currency(request.currency)
+    rate = CurrencyService.rate(currency)
     try:
-        # Load the XGBoost model
         if not XGBoostAIService.load_model():
             raise HTTPException(
                 status_code=503,
                 detail="AI model not available. Please ensure the XGBoost model file exists."
             )
         
-        # Validate inputs
-        if request.price <= 0:
+        if request.current_price <= 0:
             raise HTTPException(
-                status_code=400, 
+                status_code=400,
                 detail="Price must be a positive number"
             )
         
-        # Convert incoming AED price to USD for the model
-        price_usd = request.price * AED_TO_USD
-        
-        # Get simulation results (in USD)
-        result = XGBoostAIService.simulate_price_scenario(
+        result = await run_in_threadpool(
+            ParetoService.segment_frontier,
             product_name=request.product_name,
             category=request.category,
             emirate=request.emirate,
             store_type=request.store_type,
-            price=price_usd,
+            current_price=request.current_price / rate,
+            month=request.month,
+            day_of_week=request.day_of_week,
+            day_of_month=request.day_of_month,
+            is_weekend=request.is_weekend,
+            is_holiday=request.is_holiday,
+            objectives=request.objectives,
+            num_points=request.num_price_points
+        )
+        
+        # Convert response from data currency to the request currency
+        result['currency'] = currency
+        result['current_price'] = round(request.current_price, 2)
+        result['estimated_cost'] = round(result['estimated_cost'] * rate, 2)
+        for point in result['frontier']:
+            for key in ('price', 'revenue', 'profit'):
+                point[key] = round(point[key] * rate, 2)
+        
+        return ParetoFrontierResponse(timestamp=datetime.now().isoformat(), **result)
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Pareto frontier error: {str(e)}")
+
+@router.post("/pareto-frontier/catalog", response_model=CatalogFrontierResponse)
+async def catalog_pareto_frontier(request: CatalogFrontierRequest):
+    """
+    Catalog-wide profit vs. volume trade-off curve across all matching segments.
+    Returns results in the request currency (default AED).
+    """
+    currency = request_currency(request.currency)
+    rate = CurrencyService.rate(currency)
+    try:
+        if not XGBoostAIService.load_model():
+            raise HTTPException(
+                status_code=503,
+                detail="AI model not available. Please ensure the XGBoost model file exists."
+            )
+        
+        result = await run_in_threadpool(
+            ParetoService.catalog_frontier,
             month=request.month,
             day_of_week=request.day_of_week,
             day_of_month=request.day_of_month,
             is_weekend=request.is_weekend,
-            is_holiday=request.is_holiday
+            is_holiday=request.is_holiday,
+            product_names=request.product_names,
+            emirates=request.emirates,
+            store_types=request.store_types,
+            num_points=request.num_price_points,
+            frontier_points=request.frontier_points
         )
         
-        # Convert response from USD to AED
-        result_dict = result.dict()
-        result_dict['scenario']['price'] = round(result_dict['scenario']['price'] * USD_TO_AED, 2)
-        result_dict['predicted_revenue'] = round(result_dict['predicted_revenue'] * USD_TO_AED, 2)
+        # Convert response from data currency to the request currency
+        result['currency'] = currency
+        for point in [result['current']] + result['frontier']:
+            for key in ('total_profit', 'total_revenue'):
+                point[key] = round(point[key] * rate, 2)
+        for point in result['frontier']:
+            if point['volume_weight'] is not None:
+                point['volume_weight'] = round(point['volume_weight'] * rate, 4)
         
-        # Convert baseline metrics if present
-        if 'baseline_price' in result_dict['scenario']:
-            result_dict['scenario']['baseline_price'] = round(result_dict['scenario']['baseline_price'] * USD_TO_AED, 2)
+        return CatalogFrontierResponse(timestamp=datetime.now().isoformat(), **result)
         
-        return SimulationResponse(**result_dict)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Catalog frontier error: {str(e)}")
+
+@router.post("/sales/ingest", response_model=SalesIngestResponse)
+async def ingest_sales(request: SalesIngestRequest):
+    """
+    Feed new sales rows into the online (recursive least-squares) elasticity estimates.
+    Each observation updates its segment in constant time; state is snapshotted to disk
+    after every batch so it survives restarts.
+    Prices are in the request currency (default AED).
+    """
+    currency = request_currency(request.currency)
+    try:
+        if any(obs.price <= 0 for obs in request.observations):
+            raise HTTPException(
+                status_code=400,
+                detail="Price must be a positive number"
+            )
+        
+        # Elasticity is scale-free in price; convert for consistency with the data currency
+        observations = [
+            {**obs.model_dump(), 'price': CurrencyService.to_data(obs.price, currency)}
+            for obs in request.observations
+        ]
+        MetricsService.observe('pricing_batch_size', len(observations), kind='sales_ingest')
+        updated = await run_in_threadpool(ElasticityService.ingest_sales, observations)
+        
+        try:
+            await run_in_threadpool(OnlineElasticityService.snapshot)
+            snapshot_saved = True
+        except OSError as e:
+            logger.warning("Could not snapshot online elasticity state: %s", e)
+            snapshot_saved = False
+        
+        return SalesIngestResponse(
+            observations_applied=len(observations),
+            segments=[OnlineElasticityEstimate(**estimate) for estimate in updated],
+            snapshot_saved=snapshot_saved,
+            timestamp=datetime.now().isoformat()
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Sales ingestion error: {str(e)}")
+
+@router.get("/elasticity/online", response_model=List[OnlineElasticityEstimate])
+async def get_online_elasticities():
+    """Current online elasticity estimates for every segment that has received sales"""
+    return [OnlineElasticityEstimate(**estimate) for estimate in OnlineElasticityService.get_all_estimates()]
 
 @router.get("/analytics/summary")
-async def get_analytics_summary():
+async def get_analytics_summary(currency: Optional[str] = CURRENCY_QUERY):
     """
     Get overall analytics summary for all products.
-    Returns revenue in AED.
+    Returns revenue in the requested currency (default AED).
     """
-    total_revenue = sum(p["current_price"] * random.uniform(500, 1500) for p in PRODUCTS)
+    code = request_currency(currency)
+    products = current_products(code)
+    total_revenue = sum(p["current_price"] * random.uniform(500, 1500) for p in products)
     
     return {
-        "total_products": len(PRODUCTS),
+        "total_products": len(products),
         "total_revenue_estimate": round(total_revenue, 2),
+        "currency": code,
         "categories": {
-            cat: len([p for p in PRODUCTS if p["category"] == cat])
-            for cat in set(p["category"] for p in PRODUCTS)
+            cat: len([p for p in products if p["category"] == cat])
+            for cat in set(p["category"] for p in products)
         }
     }
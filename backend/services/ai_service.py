@@ -14,7 +14,16 @@ from models.schemas import (
 )
 from services.data_service import DataService
 from services.elasticity_service import ElasticityService
+from services.uncertainty_service import UncertaintyService
+from services.single_flight import single_flight
+from services.metrics_service import MetricsService
+from services.memory_service import MemoryService
+from services.demand_cube_service import DemandCubeService
+from services.distilled_curve_service import DistilledCurveService
 from datetime import datetime
+from services.logging_service import get_logger, DecisionTrace
+
+logger = get_logger(__name__)
 
 class XGBoostAIService:
     """
@@ -23,8 +32,23 @@ class XGBoostAIService:
     """
     
     model = None
+    model_version = 0  # Bumped on every (re)load; part of HTTP cache validators
+    _feature_spec = None
+    _model_size = (None, 0)  # (id of the sized model, its serialized size)
     MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'xgboost_demand_model.pkl')
     
+    NUMERICAL_FEATURES = [
+        'price_per_sales_unit', 'is_weekend', 'is_holiday', 'month', 'day_of_week', 'day_of_month',
+        'rolling_3day_mean', 'rolling_7day_mean', 'rolling_30day_mean',
+        'rolling_3day_std', 'rolling_7day_std', 'rolling_30day_std'
+    ]
+    CATEGORICAL_FEATURES = ['emirate', 'store_type', 'product_name', 'category']
+    ROLLING_FEATURES = [
+        'rolling_3day_mean', 'rolling_7day_mean', 'rolling_30day_mean',
+        'rolling_3day_std', 'rolling_7day_std', 'rolling_30day_std'
+    ]
+    AI_BLEND_WEIGHT = 0.6  # Share of the model prediction when blending with elasticity-adjusted demand
+    
     @classmethod
     def load_model(cls):
         """Load the trained XGBoost model"""
@@ -32,61 +56,74 @@ class XGBoostAIService:
             try:
                 with open(cls.MODEL_PATH, 'rb') as f:
                     cls.model = pickle.load(f)
-                print(f"✓ XGBoost model loaded successfully from {cls.MODEL_PATH}")
+                cls._feature_spec = None
+                cls._model_size = (None, 0)
+                cls.model_version += 1
+                logger.info("XGBoost model loaded successfully from %s", cls.MODEL_PATH)
             except Exception as e:
-                print(f"Error loading model from {cls.MODEL_PATH}: {e}")
+                logger.error("Error loading model from %s: %s", cls.MODEL_PATH, e)
                 cls.model = None
         return cls.model is not None
     
-    @staticmethod
-    def prepare_features(prediction_input: DemandPredictionInput) -> pd.DataFrame:
-        """Prepare features for XGBoost model prediction"""
-        # Create base dataframe with numerical features
-        data = {
-            'price_per_sales_unit': [prediction_input.price_per_sales_unit],
-            'is_weekend': [prediction_input.is_weekend],
-            'is_holiday': [prediction_input.is_holiday],
-            'month': [prediction_input.month],
-            'day_of_week': [prediction_input.day_of_week],
-            'day_of_month': [prediction_input.day_of_month],
-            'rolling_3day_mean': [prediction_input.rolling_3day_mean],
-            'rolling_7day_mean': [prediction_input.rolling_7day_mean],
-            'rolling_30day_mean': [prediction_input.rolling_30day_mean],
-            'rolling_3day_std': [prediction_input.rolling_3day_std],
-            'rolling_7day_std': [prediction_input.rolling_7day_std],
-            'rolling_30day_std': [prediction_input.rolling_30day_std],
-        }
-        
-        # Add categorical variables
-        categorical_data = {
-            'emirate': [prediction_input.emirate],
-            'store_type': [prediction_input.store_type],
-            'product_name': [prediction_input.product_name],
-            'category': [prediction_input.category]
-        }
-        
-        df = pd.DataFrame(data)
-        cat_df = pd.DataFrame(categorical_data)
-        
-        # One-hot encode categorical variables
-        cat_encoded = pd.get_dummies(cat_df, drop_first=True)
-        
-        # Combine numerical and encoded categorical features
-        result_df = pd.concat([df, cat_encoded], axis=1)
-        
-        # Ensure all expected columns exist
-        if hasattr(XGBoostAIService.model, 'feature_names_in_'):
-            expected_features = XGBoostAIService.model.feature_names_in_
+    @classmethod
+    def get_feature_spec(cls) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Column layout expected by the model as (feature, source column, one-hot value).
+        One-hot features carry the category value they encode; numerical features carry None.
+        """
+        if cls._feature_spec is None:
+            if hasattr(cls.model, 'feature_names_in_'):
+                expected_features = list(cls.model.feature_names_in_)
+            else:
+                expected_features = list(cls.NUMERICAL_FEATURES)
             
-            # Add missing columns with 0 values
+            spec = []
             for feature in expected_features:
-                if feature not in result_df.columns:
-                    result_df[feature] = 0
-            
-            # Reorder columns to match training
-            result_df = result_df[expected_features]
-        
-        return result_df
+                source = next(
+                    (col for col in cls.CATEGORICAL_FEATURES if feature.startswith(f"{col}_")),
+                    None
+                )
+                if feature in cls.NUMERICAL_FEATURES or source is None:
+                    spec.append((feature, feature, None))
+                else:
+                    spec.append((feature, source, feature[len(source) + 1:]))
+            cls._feature_spec = spec
+        return cls._feature_spec
+    
+    @staticmethod
+    @MetricsService.timed('feature_encoding')
+    def encode_features(frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Encode a frame of raw prediction inputs (one row per prediction) into the model's
+        feature matrix. One-hot columns are matched by name against the training features,
+        so a single row encodes exactly like a large batch.
+        """
+        spec = XGBoostAIService.get_feature_spec()
+        n_rows = len(frame)
+        matrix = np.zeros((n_rows, len(spec)), dtype=np.float64)
+        
+        categorical_values = {}
+        for j, (feature, source, value) in enumerate(spec):
+            if source not in frame.columns:
+                continue  # Missing columns stay 0, as in training
+            if value is None:
+                matrix[:, j] = frame[source].to_numpy(dtype=np.float64)
+            else:
+                if source not in categorical_values:
+                    categorical_values[source] = frame[source].to_numpy()
+                matrix[:, j] = categorical_values[source] == value
+        
+        return pd.DataFrame(matrix, columns=[feature for feature, _, _ in spec], index=frame.index)
+    
+    @staticmethod
+    def prepare_features(prediction_input: DemandPredictionInput) -> pd.DataFrame:
+        """
+        Prepare features for XGBoost model prediction. Uses the batch encoder, which
+        matches one-hot columns by name: get_dummies(drop_first=True) on a single row
+        dropped every categorical column, so single predictions used to ignore product,
+        category, emirate and store type (see test_catalog_optimization.py)
+        """
+        return XGBoostAIService.encode_features(pd.DataFrame([prediction_input.model_dump()]))
     
     @staticmethod
     def predict_demand(prediction_input: DemandPredictionInput) -> float:
@@ -95,11 +132,74 @@ class XGBoostAIService:
             raise Exception("Model not loaded")
         
         features_df = XGBoostAIService.prepare_features(prediction_input)
-        prediction = XGBoostAIService.model.predict(features_df)[0]
+        with MetricsService.stage('model_scoring'):
+            prediction = XGBoostAIService.model.predict(features_df)[0]
         
         # Ensure prediction is non-negative
         return max(0, float(prediction))
     
+    @staticmethod
+    def predict_demand_batch(frame: pd.DataFrame) -> np.ndarray:
+        """
+        Predict demand for every row of a frame of raw prediction inputs with a single
+        model call. Expects the DemandPredictionInput fields as columns.
+        """
+        if not XGBoostAIService.load_model():
+            raise Exception("Model not loaded")
+        
+        if frame.empty:
+            return np.zeros(0)
+        
+        features_df = XGBoostAIService.encode_features(frame)
+        MetricsService.observe('pricing_batch_size', len(frame), kind='model_scoring')
+        with MetricsService.stage('model_scoring'):
+            predictions = XGBoostAIService.model.predict(features_df)
+        
+        # Ensure predictions are non-negative
+        return np.maximum(0, predictions.astype(np.float64))
+    
+    @staticmethod
+    def fill_rolling_features(frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Copy of a frame of raw prediction inputs where missing rolling features are taken
+        from the segment's latest history (one lookup per distinct segment). Given values,
+        including 0, are kept.
+        """
+        rolling = XGBoostAIService.ROLLING_FEATURES
+        frame = frame.copy()
+        for column in rolling:
+            if column not in frame.columns:
+                frame[column] = np.nan
+        missing = frame[rolling].isna().any(axis=1)
+        if not missing.any():
+            return frame
+        
+        keys = DataService.SEGMENT_KEYS
+        segments = frame.loc[missing, keys].drop_duplicates()
+        history = pd.DataFrame([
+            {**dict(zip(keys, segment)), **XGBoostAIService.get_rolling_averages_for_prediction(*segment)}
+            for segment in segments.itertuples(index=False, name=None)
+        ])
+        # Left merge keeps the frame's row order
+        filled = frame[keys].merge(history, on=keys, how='left')
+        for column in rolling:
+            frame[column] = frame[column].fillna(pd.Series(filled[column].to_numpy(), index=frame.index))
+        return frame
+    
+    @staticmethod
+    def invalid_categorical_inputs(frame: pd.DataFrame) -> List[Tuple[int, str, str]]:
+        """
+        (row position, column, value) for every categorical input not seen in the data,
+        which the one-hot encoder would silently drop. Skipped when no data is loaded.
+        """
+        invalid = []
+        for column, values in DataService.get_categorical_values().items():
+            if not values:
+                continue
+            for position in np.flatnonzero(~frame[column].isin(values).to_numpy()):
+                invalid.append((int(position), column, frame[column].iat[position]))
+        return sorted(invalid)
+    
     @staticmethod
     def get_rolling_averages_for_prediction(
         product_name: str,
@@ -111,7 +211,7 @@ class XGBoostAIService:
             rolling_data = DataService.get_rolling_averages(product_name, emirate, store_type)
             return rolling_data
         except Exception as e:
-            print(f"Warning: Could not get rolling averages from data: {e}")
+            logger.warning("Could not get rolling averages from data: %s", e)
             # Return defaults if data loading fails
             return {
                 'rolling_3day_mean': 50.0,
@@ -269,27 +369,35 @@ class XGBoostAIService:
             max_price = current_price * 1.4
         
         price_step = (max_price - min_price) / (num_points - 1)
-        demand_curve = []
+        prices = [min_price + (i * price_step) for i in range(num_points)]
+        
+        # Smooth distilled curve when the segment and calendar are on the grid and distilled
+        # accurately, else interpolated from the demand cube; the remaining points are
+        # scored exactly (with real rolling averages) in one call
+        context = {
+            'product_name': product_name, 'category': category, 'emirate': emirate, 'store_type': store_type,
+            'month': month, 'day_of_week': day_of_week, 'day_of_month': day_of_month,
+            'is_weekend': is_weekend, 'is_holiday': is_holiday, 'rolling_data': rolling_data
+        }
+        demands = np.full(num_points, np.nan)
+        for source in (DistilledCurveService.predict, DemandCubeService.lookup_many):
+            if not np.isnan(demands).any():
+                break
+            values = source(context, prices)
+            if values is not None:
+                demands = np.where(np.isnan(demands), values, demands)
+        missing = np.flatnonzero(np.isnan(demands))
+        if len(missing):
+            frame = pd.DataFrame([{
+                **{key: value for key, value in context.items() if key != 'rolling_data'},
+                'price_per_sales_unit': prices[i],
+                **rolling_data
+            } for i in missing])
+            demands[missing] = XGBoostAIService.predict_demand_batch(frame)
         
-        for i in range(num_points):
-            price = min_price + (i * price_step)
-            
-            # Predict demand at this price using real rolling averages
-            prediction_input = DemandPredictionInput(
-                product_name=product_name,
-                category=category,
-                emirate=emirate,
-                store_type=store_type,
-                price_per_sales_unit=price,
-                month=month,
-                day_of_week=day_of_week,
-                day_of_month=day_of_month,
-                is_weekend=is_weekend,
-                is_holiday=is_holiday,
-                **rolling_data  # Use real rolling averages
-            )
-            
-            demand = XGBoostAIService.predict_demand(prediction_input)
+        demand_curve = []
+        for price, demand in zip(prices, demands):
+            demand = float(demand)
             revenue = price * demand
             
             demand_curve.append(DemandPrediction(
@@ -336,6 +444,7 @@ class XGBoostAIService:
         )
     
     @staticmethod
+    @single_flight
     def optimize_price(
         product_name: str,
         category: str,
@@ -348,11 +457,15 @@ class XGBoostAIService:
         is_weekend: int = 0,
         is_holiday: int = 0,
         min_price: Optional[float] = None,
-        max_price: Optional[float] = None
+        max_price: Optional[float] = None,
+        use_price_ladder: bool = False,
+        currency_rate: float = 1.0
     ) -> OptimizationResponse:
         """
         Main optimization function combining XGBoost predictions, 
         elasticity-based profit optimization using EconML model.
+        With use_price_ladder the recommendation is restricted to valid shelf prices;
+        currency_rate converts prices into the ladder's shelf currency.
         """
         # Get current demand prediction using XGBoost
         rolling_data = XGBoostAIService.get_rolling_averages_for_prediction(
@@ -374,6 +487,8 @@ class XGBoostAIService:
         )
         
         current_demand = XGBoostAIService.predict_demand(current_input)
+        if DecisionTrace.active():
+            DecisionTrace.record('optimize.baseline', current_price=round(current_price, 4), demand=round(current_demand, 1))
         
         # Use elasticity-based profit optimization
         optimization_result = ElasticityService.optimize_price_for_profit(
@@ -385,7 +500,9 @@ class XGBoostAIService:
             month=month,
             day_of_week=day_of_week,
             is_weekend=is_weekend,
-            is_holiday=is_holiday
+            is_holiday=is_holiday,
+            use_price_ladder=use_price_ladder,
+            currency_rate=currency_rate
         )
         
         # Build response using optimization result
@@ -410,6 +527,22 @@ class XGBoostAIService:
                 revenue=round(revenue, 2)
             ))
         
+        # Monte Carlo over elasticity and cost uncertainty across the search range: a smaller
+        # run seeded by the request context, so identical requests get the same confidence.
+        # /api/profit-uncertainty runs the full analysis
+        uncertainty = UncertaintyService.simulate_profit(
+            base_elasticity=optimization_result['base_elasticity'],
+            estimated_cost=optimization_result['estimated_cost'],
+            current_price=current_price,
+            current_demand=current_demand,
+            prices=np.linspace(curve_min, curve_max, UncertaintyService.INLINE_GRID_POINTS),
+            recommended_price=optimal_price,
+            n_draws=UncertaintyService.INLINE_DRAWS,
+            seed=UncertaintyService.context_seed(
+                product_name, emirate, store_type, month, day_of_week, day_of_month, is_weekend, is_holiday, current_price
+            )
+        )
+        
         # Create recommendation
         recommendation = PriceRecommendation(
             recommended_price=optimal_price,
@@ -417,7 +550,7 @@ class XGBoostAIService:
             price_change_percentage=optimization_result['price_change_percentage'],
             expected_demand=optimization_result['optimal_metrics']['demand'],
             expected_revenue=optimization_result['optimal_metrics']['revenue'],
-            confidence_score=85.0,  # High confidence with econml model
+            confidence_score=UncertaintyService.confidence_score(uncertainty),
             reasoning=optimization_result['reasoning']
         )
         
@@ -454,11 +587,13 @@ class XGBoostAIService:
             recommendation=recommendation,
             elasticity=elasticity_data,
             demand_curve=demand_curve,
+            uncertainty=UncertaintyService.summarize(uncertainty),
+            price_ladder=optimization_result['price_ladder'],
             timestamp=datetime.now().isoformat()
         )
     
     @staticmethod
-    def simulate_price_scenario(
+    def predict_segment_demand(
         product_name: str,
         category: str,
         emirate: str,
@@ -469,65 +604,230 @@ class XGBoostAIService:
         day_of_month: int,
         is_weekend: int = 0,
         is_holiday: int = 0
-    ) -> SimulationResponse:
-        """Simulate a specific price scenario using dynamic elasticity based on demand trends"""
-        
-        # Get rolling averages from historical data
+    ) -> float:
+        """Predict demand for a segment at a price using its latest rolling averages"""
         rolling_data = XGBoostAIService.get_rolling_averages_for_prediction(
             product_name, emirate, store_type
         )
-        
-        # Get current/baseline price from data
-        try:
-            current_price = DataService.get_latest_price(product_name)
-        except:
-            current_price = price  # Fallback if no data
-        
-        # Predict demand at CURRENT price (baseline)
-        baseline_input = DemandPredictionInput(
+        return XGBoostAIService.predict_demand(DemandPredictionInput(
             product_name=product_name,
             category=category,
             emirate=emirate,
             store_type=store_type,
-            price_per_sales_unit=current_price,
+            price_per_sales_unit=price,
             month=month,
             day_of_week=day_of_week,
             day_of_month=day_of_month,
             is_weekend=is_weekend,
             is_holiday=is_holiday,
             **rolling_data
+        ))
+    
+    @staticmethod
+    def analyze_profit_uncertainty(
+        product_name: str,
+        category: str,
+        emirate: str,
+        store_type: str,
+        current_price: float,
+        month: int,
+        day_of_week: int,
+        day_of_month: int,
+        is_weekend: int = 0,
+        is_holiday: int = 0,
+        recommended_price: Optional[float] = None,
+        n_draws: int = UncertaintyService.DEFAULT_DRAWS,
+        num_price_points: int = UncertaintyService.GRID_POINTS,
+        elasticity_sd: float = UncertaintyService.ELASTICITY_SD,
+        cost_sd_pct: float = UncertaintyService.COST_SD_PCT,
+        seed: Optional[int] = None
+    ) -> dict:
+        """
+        Full Monte Carlo profit distribution for a segment. Without an explicit
+        recommended_price the profit-optimal price from ElasticityService is assessed.
+        """
+        current_demand = XGBoostAIService.predict_segment_demand(
+            product_name, category, emirate, store_type, current_price,
+            month, day_of_week, day_of_month, is_weekend, is_holiday
         )
-        baseline_demand = XGBoostAIService.predict_demand(baseline_input)
         
-        # Predict demand at SIMULATED price
-        prediction_input = DemandPredictionInput(
+        optimization_result = ElasticityService.optimize_price_for_profit(
             product_name=product_name,
-            category=category,
             emirate=emirate,
             store_type=store_type,
-            price_per_sales_unit=price,
+            current_price=current_price,
+            current_demand=current_demand,
             month=month,
             day_of_week=day_of_week,
-            day_of_month=day_of_month,
             is_weekend=is_weekend,
-            is_holiday=is_holiday,
-            **rolling_data
+            is_holiday=is_holiday
         )
+        if recommended_price is None:
+            recommended_price = optimization_result['optimal_price']
         
-        simulated_demand = XGBoostAIService.predict_demand(prediction_input)
-        revenue = price * simulated_demand
+        simulation = UncertaintyService.simulate_profit(
+            base_elasticity=optimization_result['base_elasticity'],
+            estimated_cost=optimization_result['estimated_cost'],
+            current_price=current_price,
+            current_demand=current_demand,
+            prices=np.linspace(
+                optimization_result['constraints']['min_price'],
+                optimization_result['constraints']['max_price'],
+                num_price_points
+            ),
+            recommended_price=recommended_price,
+            n_draws=n_draws,
+            elasticity_sd=elasticity_sd,
+            cost_sd_pct=cost_sd_pct,
+            seed=seed
+        )
+        simulation['confidence_score'] = UncertaintyService.confidence_score(simulation)
+        return simulation
+    
+    @staticmethod
+    @single_flight
+    def simulate_price_scenario(
+        product_name: str,
+        category: str,
+        emirate: str,
+        store_type: str,
+        price: float,
+        month: int,
+        day_of_week: int,
+        day_of_month: int,
+        is_weekend: int = 0,
+        is_holiday: int = 0
+    ) -> SimulationResponse:
+        """Simulate a specific price scenario using dynamic elasticity based on demand trends"""
+        context = XGBoostAIService.build_simulation_context(
+            product_name, category, emirate, store_type,
+            month, day_of_week, day_of_month, is_weekend, is_holiday
+        )
+        return XGBoostAIService.simulate_with_context(context, price)
+    
+    @staticmethod
+    def build_simulation_context(
+        product_name: str,
+        category: str,
+        emirate: str,
+        store_type: str,
+        month: int,
+        day_of_week: int,
+        day_of_month: int,
+        is_weekend: int = 0,
+        is_holiday: int = 0
+    ) -> dict:
+        """
+        Resolve everything a simulation needs that does not depend on the simulated price:
+        rolling averages, baseline price and demand, base elasticity and the encoded
+        feature row. Live simulation sessions build this once per segment.
+        """
+        # Get rolling averages from historical data
+        rolling_data = XGBoostAIService.get_rolling_averages_for_prediction(
+            product_name, emirate, store_type
+        )
         
-        # Get base elasticity from category (more reliable than numerical calculation)
-        base_elasticity = ElasticityService.get_product_elasticity(
+        # Get current/baseline price from data
+        try:
+            current_price = DataService.get_latest_price(product_name)
+        except:
+            current_price = None  # Fallback to the simulated price (per simulation) if no data
+        
+        baseline_input = DemandPredictionInput(
             product_name=product_name,
+            category=category,
             emirate=emirate,
             store_type=store_type,
-            current_price=current_price,
+            price_per_sales_unit=current_price or 0.0,
             month=month,
             day_of_week=day_of_week,
+            day_of_month=day_of_month,
             is_weekend=is_weekend,
-            is_holiday=is_holiday
+            is_holiday=is_holiday,
+            **rolling_data
+        )
+        
+        context = {
+            'product_name': product_name,
+            'category': category,
+            'emirate': emirate,
+            'store_type': store_type,
+            'month': month,
+            'day_of_week': day_of_week,
+            'day_of_month': day_of_month,
+            'is_weekend': is_weekend,
+            'is_holiday': is_holiday,
+            'rolling_data': rolling_data,
+            'current_price': current_price,
+            # Encoded once; only the price column changes between simulations
+            'features': XGBoostAIService.prepare_features(baseline_input),
+            'baseline_demand': None,
+            'base_elasticity': None
+        }
+        if current_price is not None:
+            XGBoostAIService._resolve_baseline(context, current_price)
+        return context
+    
+    @staticmethod
+    def _resolve_baseline(context: dict, current_price: float):
+        """Baseline demand at the current price and the segment's base elasticity"""
+        # Predict demand at CURRENT price (baseline)
+        context['baseline_demand'] = XGBoostAIService._predict_in_context(context, current_price)
+        
+        # Get base elasticity from category (more reliable than numerical calculation)
+        context['base_elasticity'] = ElasticityService.get_product_elasticity(
+            product_name=context['product_name'],
+            emirate=context['emirate'],
+            store_type=context['store_type'],
+            current_price=current_price,
+            month=context['month'],
+            day_of_week=context['day_of_week'],
+            is_weekend=context['is_weekend'],
+            is_holiday=context['is_holiday']
         )
+    
+    @staticmethod
+    def _predict_from_features(features: pd.DataFrame, price: float) -> float:
+        """Predict demand for a pre-encoded feature row at a different price"""
+        if not XGBoostAIService.load_model():
+            raise Exception("Model not loaded")
+        row = features.copy()
+        if 'price_per_sales_unit' in row.columns:
+            row['price_per_sales_unit'] = price
+        with MetricsService.stage('model_scoring'):
+            return max(0, float(XGBoostAIService.model.predict(row)[0]))
+    
+    @staticmethod
+    def _predict_in_context(context: dict, price: float) -> float:
+        """Demand at a price for a simulation context: from the demand cube when on its grid, else the model"""
+        demand = DemandCubeService.lookup(context, price)
+        if demand is None:
+            demand = XGBoostAIService._predict_from_features(context['features'], price)
+        return demand
+    
+    @staticmethod
+    def simulate_with_context(context: dict, price: float) -> SimulationResponse:
+        """Simulate one price for a segment context from build_simulation_context"""
+        if context['current_price'] is None:
+            # No historical price: the simulated price is its own baseline
+            context = {**context, 'current_price': price}
+            XGBoostAIService._resolve_baseline(context, price)
+        
+        current_price = context['current_price']
+        baseline_demand = context['baseline_demand']
+        base_elasticity = context['base_elasticity']
+        rolling_data = context['rolling_data']
+        product_name = context['product_name']
+        emirate = context['emirate']
+        store_type = context['store_type']
+        month = context['month']
+        day_of_week = context['day_of_week']
+        is_weekend = context['is_weekend']
+        is_holiday = context['is_holiday']
+        
+        # Predict demand at SIMULATED price
+        simulated_demand = XGBoostAIService._predict_in_context(context, price)
+        revenue = price * simulated_demand
         
         # Calculate price change percentage
         price_change_percent = ((price - current_price) / current_price * 100) if current_price > 0 else 0
@@ -549,9 +849,21 @@ class XGBoostAIService:
                 new_price=price
             )
             # Blend AI prediction with elasticity-adjusted demand (60% AI, 40% elasticity)
-            final_demand = simulated_demand * 0.6 + adjusted_demand * 0.4
+            final_demand = (
+                simulated_demand * XGBoostAIService.AI_BLEND_WEIGHT
+                + adjusted_demand * (1 - XGBoostAIService.AI_BLEND_WEIGHT)
+            )
         else:
+            adjusted_demand = None
             final_demand = simulated_demand
+        if DecisionTrace.active():
+            DecisionTrace.record(
+                'simulate.demand',
+                baseline_demand=round(baseline_demand, 1),
+                model_demand=round(simulated_demand, 1),
+                elasticity_demand=None if adjusted_demand is None else round(adjusted_demand, 1),
+                final_demand=round(final_demand, 1)
+            )
         
         final_revenue = price * final_demand
         
@@ -594,3 +906,23 @@ class XGBoostAIService:
             demand_level=demand_level,
             timestamp=datetime.now().isoformat()
         )
+
+    @classmethod
+    def model_memory(cls) -> int:
+        """
+        Serialized size of the loaded booster, a lower bound on its resident size; the
+        trees live in native memory that tracemalloc does not see
+        """
+        model = cls.model
+        if model is None:
+            return 0
+        if cls._model_size[0] != id(model):
+            booster = model.get_booster() if hasattr(model, 'get_booster') else model
+            size = len(booster.save_raw()) if hasattr(booster, 'save_raw') else MemoryService.deep_sizeof(model)
+            cls._model_size = (id(model), size)
+        return cls._model_size[1]
+
+
+MemoryService.register(
+    'model', 'XGBoost demand model', XGBoostAIService.model_memory, owners=[XGBoostAIService.load_model]
+)
@@ -0,0 +1,107 @@
+"""
+Batch price optimization with incremental result streaming
+Items are optimized one at a time and each result is serialized as soon as it is
+computed, so memory stays bounded by a single result regardless of batch size
+"""
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from services.data_service import DataService
+from services.serialization_service import SerializationService
+from services.metrics_service import MetricsService
+
+
+class BatchOptimizationService:
+    """Service for running and serializing long optimization batches"""
+
+    FORMATS = ('json', 'ndjson', 'sse')
+    MEDIA_TYPES = {
+        'json': 'application/json',
+        'ndjson': 'application/x-ndjson',
+        'sse': 'text/event-stream'
+    }
+
+    @staticmethod
+    def iter_segments(
+        product_names: Optional[List[str]] = None,
+        emirates: Optional[List[str]] = None,
+        store_types: Optional[List[str]] = None
+    ) -> Iterator[Dict]:
+        """
+        Lazily yield every historical segment matching the filters with its category
+        and latest price (data currency)
+        """
+        snapshot = DataService.get_segment_snapshot()
+        if snapshot.empty:
+            return
+        mask = snapshot['price_per_sales_unit'] > 0
+        if product_names:
+            mask &= snapshot['product_name'].isin(product_names)
+        if emirates:
+            mask &= snapshot['emirate'].isin(emirates)
+        if store_types:
+            mask &= snapshot['store_type'].isin(store_types)
+        columns = ['product_name', 'category', 'emirate', 'store_type', 'price_per_sales_unit']
+        for row in snapshot.loc[mask, columns].itertuples(index=False):
+            yield {
+                'product_name': row.product_name,
+                'category': row.category,
+                'emirate': row.emirate,
+                'store_type': row.store_type,
+                'current_price': float(row.price_per_sales_unit)
+            }
+
+    @staticmethod
+    def iter_results(items: Iterable, optimize: Callable) -> Iterator[Dict]:
+        """
+        Run optimize on each item in order and yield one record per item.
+        A failing item yields an error record instead of aborting the batch; the
+        final record is a summary.
+        """
+        started = time.perf_counter()
+        succeeded = failed = 0
+        for index, item in enumerate(items):
+            item_started = time.perf_counter()
+            segment = {key: getattr(item, key, None) for key in ('product_name', 'emirate', 'store_type')}
+            try:
+                result = optimize(item)
+                record = {'type': 'result', 'index': index, 'segment': segment, 'result': result}
+                succeeded += 1
+            except Exception as e:
+                record = {'type': 'error', 'index': index, 'segment': segment, 'error': str(e)}
+                failed += 1
+            record['elapsed_ms'] = round((time.perf_counter() - item_started) * 1000, 2)
+            yield record
+        MetricsService.observe('pricing_batch_size', succeeded + failed, kind='optimize_batch')
+        yield {
+            'type': 'summary',
+            'total': succeeded + failed,
+            'succeeded': succeeded,
+            'failed': failed,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    @classmethod
+    def ndjson_lines(cls, records: Iterable[Dict]) -> Iterator[bytes]:
+        """One JSON document per line"""
+        for record in records:
+            yield SerializationService.dumps(record) + b"\n"
+
+    @classmethod
+    def sse_events(cls, records: Iterable[Dict]) -> Iterator[bytes]:
+        """Server-sent events: 'result' / 'error' per item and a final 'done' with the summary"""
+        for record in records:
+            event = 'done' if record['type'] == 'summary' else record['type']
+            identifier = f"id: {record['index']}\n" if 'index' in record else ""
+            yield f"event: {event}\n{identifier}data: ".encode() + SerializationService.dumps(record) + b"\n\n"
+
+    @classmethod
+    def collect(cls, records: Iterable[Dict]) -> Dict:
+        """Buffered form for plain JSON clients: all item records plus the summary"""
+        results = []
+        summary = None
+        for record in records:
+            if record['type'] == 'summary':
+                summary = record
+            else:
+                results.append(record)
+        return {'results': results, 'summary': summary}
@@ -0,0 +1,484 @@
+"""
+Catalog-wide price optimization under global business constraints
+Solves per-segment price choices jointly with category price-index caps and
+discount-spend budgets using Lagrangian relaxation over discretized price ladders
+"""
+import numpy as np
+from typing import Dict, List, Optional
+from services.data_service import DataService
+from services.elasticity_service import ElasticityService
+from services.ai_service import XGBoostAIService
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+
+class CatalogOptimizationService:
+    """Service for constrained, catalog-level profit optimization"""
+
+    MAX_SWEEPS = 20  # Block-coordinate passes over the constraint families
+    BISECTION_STEPS = 50  # Maximum bisection steps per family when solving its multipliers
+    TOLERANCE = 1e-4  # Relative multiplier precision for bisection and sweep convergence
+
+    @classmethod
+    def build_segment_curves(
+        cls,
+        month: int,
+        day_of_week: int,
+        day_of_month: int,
+        is_weekend: int = 0,
+        is_holiday: int = 0,
+        product_names: Optional[List[str]] = None,
+        emirates: Optional[List[str]] = None,
+        store_types: Optional[List[str]] = None,
+        num_points: int = ElasticityService.PRICE_GRID_POINTS
+    ) -> Dict:
+        """
+        Build profit curves for every matching segment in one batch.
+
+        Current demand for all segments is scored with a single XGBoost call and the
+        candidate grids are evaluated with ElasticityService's vectorized candidate
+        evaluation. The last column of every curve is the segment's current price,
+        so holding all prices is always an available choice.
+
+        Returns:
+            Dict with the segments frame and (S, K+1) arrays price, demand, revenue, profit
+        """
+        segments = DataService.get_segment_snapshot()
+        if product_names:
+            segments = segments[segments['product_name'].isin(product_names)]
+        if emirates:
+            segments = segments[segments['emirate'].isin(emirates)]
+        if store_types:
+            segments = segments[segments['store_type'].isin(store_types)]
+        segments = segments.reset_index(drop=True)
+
+        if segments.empty:
+            raise ValueError("No segments match the requested filters")
+
+        # Score current demand for every segment under the requested calendar context
+        features = segments[XGBoostAIService.NUMERICAL_FEATURES + XGBoostAIService.CATEGORICAL_FEATURES].copy()
+        features['month'] = month
+        features['day_of_week'] = day_of_week
+        features['day_of_month'] = day_of_month
+        features['is_weekend'] = is_weekend
+        features['is_holiday'] = is_holiday
+        current_demand = XGBoostAIService.predict_demand_batch(features)
+
+        current_price = segments['price_per_sales_unit'].to_numpy(dtype=float)
+        base_elasticity = ElasticityService.get_base_elasticities(
+            segments['product_name'], segments['category'], segments['emirate'], segments['store_type']
+        )
+        product_costs = {
+            name: ElasticityService.estimate_cost(name, price)
+            for name, price in segments.groupby('product_name')['price_per_sales_unit'].last().items()
+        }
+        estimated_cost = segments['product_name'].map(product_costs).to_numpy(dtype=float)
+
+        bounds = ElasticityService.compute_price_bounds(current_price, current_demand, estimated_cost)
+        steps = np.linspace(0, 1, num_points)
+        grid = bounds['min_price'][:, None] + (bounds['max_price'] - bounds['min_price'])[:, None] * steps
+        prices = np.hstack([grid, current_price[:, None]])
+
+        evaluation = ElasticityService.evaluate_price_candidates(
+            base_elasticity[:, None], current_price[:, None], current_demand[:, None],
+            estimated_cost[:, None], prices
+        )
+
+        segments = segments[['product_name', 'category', 'emirate', 'store_type']].copy()
+        segments['current_price'] = current_price
+        segments['current_demand'] = current_demand
+        segments['estimated_cost'] = estimated_cost
+        segments['base_elasticity'] = base_elasticity
+
+        return {
+            'segments': segments,
+            'price': prices,
+            'demand': evaluation['demand'],
+            'revenue': evaluation['revenue'],
+            'profit': evaluation['profit'],
+            'current_index': prices.shape[1] - 1
+        }
+
+    @classmethod
+    def price_index_constraints(cls, curves: Dict, max_increase_pct: float, group_by: str = 'category') -> Dict:
+        """
+        Revenue-weighted shelf price index per group (100 = current prices) may not
+        exceed 100 + max_increase_pct.
+        """
+        segments = curves['segments']
+        labels, groups = np.unique(segments[group_by].to_numpy(), return_inverse=True)
+
+        # Weight each segment by its share of the group's current revenue
+        weights = (segments['current_price'] * segments['current_demand']).to_numpy(dtype=float)
+        weights = np.where(weights > 0, weights, 1e-9)
+        group_totals = np.bincount(groups, weights=weights)
+        shares = weights / group_totals[groups]
+
+        relative_price = curves['price'] / segments['current_price'].to_numpy(dtype=float)[:, None]
+        return {
+            'name': f'price_index_by_{group_by}',
+            'coefficients': 100.0 * shares[:, None] * relative_price,
+            'groups': groups,
+            'labels': [str(label) for label in labels],
+            'limits': np.full(len(labels), 100.0 + max_increase_pct)
+        }
+
+    @classmethod
+    def discount_spend_constraints(cls, curves: Dict, budgets: Dict[str, float], group_by: str = 'emirate') -> Dict:
+        """
+        Discount spend (units sold x price reduction below current price) per group may
+        not exceed its budget. Segments in groups without a budget are unconstrained.
+        """
+        segments = curves['segments']
+        labels = list(budgets.keys())
+        lookup = {label: i for i, label in enumerate(labels)}
+        groups = segments[group_by].map(lookup).fillna(-1).to_numpy(dtype=int)
+
+        discount = np.maximum(0, segments['current_price'].to_numpy(dtype=float)[:, None] - curves['price'])
+        return {
+            'name': f'discount_spend_by_{group_by}',
+            'coefficients': discount * curves['demand'],
+            'groups': groups,
+            'labels': labels,
+            'limits': np.array([budgets[label] for label in labels], dtype=float)
+        }
+
+    @classmethod
+    def total_discount_spend_constraint(cls, curves: Dict, budget: float) -> Dict:
+        """Catalog-wide discount spend budget"""
+        segments = curves['segments']
+        discount = np.maximum(0, segments['current_price'].to_numpy(dtype=float)[:, None] - curves['price'])
+        return {
+            'name': 'discount_spend_total',
+            'coefficients': discount * curves['demand'],
+            'groups': np.zeros(len(segments), dtype=int),
+            'labels': ['ALL'],
+            'limits': np.array([budget], dtype=float)
+        }
+
+    @classmethod
+    def solve(
+        cls,
+        profit: np.ndarray,
+        constraints: List[Dict],
+        initial_choice: Optional[np.ndarray] = None,
+        max_sweeps: int = MAX_SWEEPS,
+        bisection_steps: int = BISECTION_STEPS
+    ) -> Dict:
+        """
+        Maximize total profit over one price choice per segment subject to grouped
+        linear constraints sum_s A[s, k_s] <= limit[group], via Lagrangian relaxation.
+
+        The relaxed problem separates into independent per-segment argmax operations
+        over the penalized profit matrix, so every evaluation is a handful of vectorized
+        array operations regardless of the number of segments. Groups inside one
+        constraint family are disjoint, so each family's multipliers are found exactly
+        by simultaneous per-group bisection; overlapping families are coordinated with
+        block sweeps. The best feasible choice seen (after greedy repair) is kept.
+
+        Args:
+            profit: (S, K) profit of each candidate price per segment
+            constraints: Constraint families with (S, K) coefficients, (S,) group index
+                         (-1 = not constrained), group labels and (G,) limits
+            initial_choice: Optional known-feasible choice per segment (e.g. current prices)
+
+        Returns:
+            Dict with chosen candidate index per segment, multipliers (shadow prices) per
+            constraint family, constraint usage, dual bound and solver statistics
+        """
+        n_segments = profit.shape[0]
+        rows = np.arange(n_segments)
+
+        # Normalize every constraint by its limit so all families share one scale
+        families = []
+        for family in constraints:
+            limits = np.asarray(family['limits'], dtype=float)
+            groups = np.asarray(family['groups'], dtype=int)
+            scale = np.where(np.abs(limits) > 0, np.abs(limits), 1.0)
+            active = groups >= 0
+            segment_scale = np.where(active, scale[np.where(active, groups, 0)], 1.0)
+            families.append({
+                'coefficients': np.where(active[:, None], family['coefficients'] / segment_scale[:, None], 0.0),
+                'groups': groups,
+                'active': active,
+                'limits': limits / scale,
+                'scale': scale,
+                'multipliers': np.zeros(len(limits))
+            })
+
+        def penalty(family, multipliers):
+            # Appended zero makes group -1 (unconstrained) contribute no penalty
+            return np.append(multipliers, 0.0)[family['groups']][:, None] * family['coefficients']
+
+        def usage(family, choice):
+            used = family['coefficients'][rows, choice]
+            return np.bincount(
+                family['groups'][family['active']],
+                weights=used[family['active']],
+                minlength=len(family['limits'])
+            )
+
+        def evaluate(choice):
+            usages = [usage(family, choice) for family in families]
+            feasible = all(
+                np.all(used <= family['limits'] + 1e-9) for used, family in zip(usages, families)
+            )
+            return float(profit[rows, choice].sum()), usages, feasible
+
+        best_choice = None
+        best_profit = -np.inf
+
+        def consider(choice, repair=False):
+            nonlocal best_choice, best_profit
+            if repair and initial_choice is not None:
+                choice = cls._repair(profit, families, choice, initial_choice)
+            total, _, feasible = evaluate(choice)
+            if feasible and total > best_profit:
+                best_choice, best_profit = choice, total
+
+        if initial_choice is not None:
+            consider(initial_choice)
+
+        sweeps = 0
+        evaluations = 0
+        profit_span = float(np.ptp(profit, axis=1).max()) if profit.size else 0.0
+        for sweeps in range(1, max_sweeps + 1):
+            if not families:
+                break
+            previous = [family['multipliers'].copy() for family in families]
+
+            for family in families:
+                others = profit.copy()
+                for other in families:
+                    if other is not family:
+                        others -= penalty(other, other['multipliers'])
+
+                def relaxed_usage(multipliers):
+                    choice = np.argmax(others - penalty(family, multipliers), axis=1)
+                    return usage(family, choice)
+
+                n_groups = len(family['limits'])
+                low = np.zeros(n_groups)
+                high = np.zeros(n_groups)
+                evaluations += 1
+                violated = relaxed_usage(low) > family['limits'] + 1e-9
+
+                # Grow the upper bracket until every violated group becomes feasible
+                high = np.where(violated, max(profit_span, 1e-9), 0.0)
+                for _ in range(60):
+                    evaluations += 1
+                    still = violated & (relaxed_usage(high) > family['limits'] + 1e-9)
+                    if not np.any(still):
+                        break
+                    high = np.where(still, high * 4, high)
+
+                # Simultaneous bisection of all violated groups in this family
+                for _ in range(bisection_steps):
+                    if np.all(high - low <= cls.TOLERANCE * np.maximum(high, 1e-12)):
+                        break
+                    mid = (low + high) / 2
+                    evaluations += 1
+                    feasible_mid = relaxed_usage(mid) <= family['limits'] + 1e-9
+                    high = np.where(violated & feasible_mid, mid, high)
+                    low = np.where(violated & ~feasible_mid, mid, low)
+
+                family['multipliers'] = high
+                consider(np.argmax(others - penalty(family, high), axis=1))
+
+            change = max(
+                float(np.max(np.abs(family['multipliers'] - old), initial=0.0))
+                for family, old in zip(families, previous)
+            )
+            magnitude = max(float(np.max(family['multipliers'], initial=0.0)) for family in families)
+            if change <= cls.TOLERANCE * max(magnitude, 1e-12):
+                break
+
+        penalized = profit.copy()
+        for family in families:
+            penalized -= penalty(family, family['multipliers'])
+        relaxed_choice = np.argmax(penalized, axis=1)
+        dual_bound = float(penalized[rows, relaxed_choice].sum()) + sum(
+            float(family['multipliers'] @ family['limits']) for family in families
+        )
+        consider(relaxed_choice, repair=True)
+
+        if best_choice is None:
+            # No feasible combination found - report the relaxed solution
+            best_choice = relaxed_choice
+            best_profit = float(profit[rows, relaxed_choice].sum())
+
+        _, usages, feasible = evaluate(best_choice)
+        return {
+            'choice': best_choice,
+            'total_profit': best_profit,
+            'dual_bound': dual_bound,
+            'feasible': feasible,
+            'iterations': sweeps,
+            'evaluations': evaluations,
+            'constraints': [
+                {
+                    'shadow_prices': family['multipliers'] / family['scale'],
+                    'usage': used * family['scale'],
+                    'limits': family['limits'] * family['scale']
+                }
+                for family, used in zip(families, usages)
+            ]
+        }
+
+    @classmethod
+    def _repair(
+        cls,
+        profit: np.ndarray,
+        families: List[Dict],
+        choice: np.ndarray,
+        fallback_choice: np.ndarray
+    ) -> np.ndarray:
+        """
+        Greedy primal repair: while any constraint group is violated, move the segment
+        with the best violation reduction per unit of lost profit back to its fallback
+        (known-feasible) choice.
+        """
+        rows = np.arange(profit.shape[0])
+        choice = choice.copy()
+        profit_loss = np.maximum(profit[rows, choice] - profit[rows, fallback_choice], 1e-12)
+        reverted = choice == fallback_choice
+
+        deltas, usages = [], []
+        for family in families:
+            coefficients = family['coefficients']
+            deltas.append(coefficients[rows, choice] - coefficients[rows, fallback_choice])
+            usages.append(np.bincount(
+                family['groups'][family['active']],
+                weights=coefficients[rows, choice][family['active']],
+                minlength=len(family['limits'])
+            ))
+
+        while True:
+            benefit = np.zeros(len(rows))
+            violated_any = False
+            for family, delta, usage in zip(families, deltas, usages):
+                violation = np.maximum(0.0, usage - family['limits'])
+                if np.any(violation > 1e-9):
+                    violated_any = True
+                    group_violation = np.append(violation, 0.0)[family['groups']]
+                    benefit += np.where(group_violation > 1e-9, np.minimum(delta, group_violation), 0.0)
+            if not violated_any:
+                return choice
+
+            score = np.where(~reverted & (benefit > 0), benefit / profit_loss, -np.inf)
+            s = int(np.argmax(score))
+            if not np.isfinite(score[s]):
+                return choice  # Nothing left that reduces the violation
+
+            choice[s] = fallback_choice[s]
+            reverted[s] = True
+            for family, delta, usage in zip(families, deltas, usages):
+                if family['active'][s]:
+                    usage[family['groups'][s]] -= delta[s]
+
+    @classmethod
+    def optimize_catalog(
+        cls,
+        month: int,
+        day_of_week: int,
+        day_of_month: int,
+        is_weekend: int = 0,
+        is_holiday: int = 0,
+        product_names: Optional[List[str]] = None,
+        emirates: Optional[List[str]] = None,
+        store_types: Optional[List[str]] = None,
+        max_price_index_increase_pct: Optional[float] = None,
+        max_discount_spend: Optional[Dict[str, float]] = None,
+        max_total_discount_spend: Optional[float] = None,
+        num_points: int = ElasticityService.PRICE_GRID_POINTS
+    ) -> Dict:
+        """
+        Jointly optimize prices for all matching segments under global constraints.
+        Prices and budgets are in the data currency (USD).
+        """
+        curves = cls.build_segment_curves(
+            month, day_of_week, day_of_month, is_weekend, is_holiday,
+            product_names, emirates, store_types, num_points
+        )
+
+        constraints = []
+        if max_price_index_increase_pct is not None:
+            constraints.append(cls.price_index_constraints(curves, max_price_index_increase_pct))
+        if max_discount_spend:
+            constraints.append(cls.discount_spend_constraints(curves, max_discount_spend))
+        if max_total_discount_spend is not None:
+            constraints.append(cls.total_discount_spend_constraint(curves, max_total_discount_spend))
+
+        segments = curves['segments']
+        n_segments = len(segments)
+        current_choice = np.full(n_segments, curves['current_index'])
+        solution = cls.solve(curves['profit'], constraints, initial_choice=current_choice)
+
+        rows = np.arange(n_segments)
+        choice = solution['choice']
+        prices = curves['price'][rows, choice]
+        demand = curves['demand'][rows, choice]
+        profit = curves['profit'][rows, choice]
+        current_profit = curves['profit'][:, curves['current_index']]
+        current_price = segments['current_price'].to_numpy()
+
+        segment_results = [
+            {
+                'product_name': seg.product_name,
+                'category': seg.category,
+                'emirate': seg.emirate,
+                'store_type': seg.store_type,
+                'current_price': round(float(current_price[i]), 2),
+                'recommended_price': round(float(prices[i]), 2),
+                'price_change_percentage': round(float((prices[i] - current_price[i]) / current_price[i] * 100), 2),
+                'expected_demand': round(float(demand[i]), 1),
+                'expected_profit': round(float(profit[i]), 2),
+                'current_profit': round(float(current_profit[i]), 2)
+            }
+            for i, seg in enumerate(segments.itertuples(index=False))
+        ]
+
+        constraint_results = []
+        for family, result in zip(constraints, solution['constraints']):
+            for g, label in enumerate(family['labels']):
+                slack = float(result['limits'][g] - result['usage'][g])
+                constraint_results.append({
+                    'constraint': family['name'],
+                    'group': label,
+                    'limit': round(float(result['limits'][g]), 4),
+                    'value': round(float(result['usage'][g]), 4),
+                    'slack': round(slack, 4),
+                    'shadow_price': round(float(result['shadow_prices'][g]), 6),
+                    'binding': bool(slack <= 1e-6 * max(1.0, abs(result['limits'][g])) or result['shadow_prices'][g] > 0)
+                })
+
+        total_profit = float(profit.sum())
+        dual_bound = float(solution['dual_bound'])
+        logger.info("Catalog optimization: %s segments, %s constraints, %s sweeps",
+                    n_segments, len(constraint_results), solution['iterations'])
+
+        return {
+            'segments': segment_results,
+            'constraints': constraint_results,
+            'totals': {
+                'current_profit': round(float(current_profit.sum()), 2),
+                'optimized_profit': round(total_profit, 2),
+                'unconstrained_profit': round(float(curves['profit'].max(axis=1).sum()), 2),
+                'current_revenue': round(float((current_price * segments['current_demand']).sum()), 2),
+                'optimized_revenue': round(float((prices * demand).sum()), 2)
+            },
+            'solver': {
+                'method': 'lagrangian_relaxation',
+                'segments': n_segments,
+                'price_points': int(curves['price'].shape[1]),
+                'iterations': solution['iterations'],
+                'relaxed_evaluations': solution['evaluations'],
+                'feasible': solution['feasible'],
+                'dual_bound': round(dual_bound, 2),
+                'duality_gap_pct': (
+                    round((dual_bound - total_profit) / abs(dual_bound) * 100, 4)
+                    if solution['feasible'] and dual_bound else None
+                )
+            }
+        }
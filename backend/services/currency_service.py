@@ -0,0 +1,128 @@
+"""
+Currency layer
+Data, costs and models stay in one canonical data currency (USD); requests and
+responses use any configured currency. Rates are versioned, and derived per-currency
+views (e.g. the product catalog) are computed once per data and rates version
+"""
+import os
+import json
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+from services.data_service import DataService
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+
+class CurrencyService:
+    """Service for exchange rates and per-currency views of canonical data"""
+
+    rates_cache = None
+    rates_version = 0  # Bumped whenever rates change; part of HTTP cache validators
+    views = {}
+    lock = threading.Lock()
+    RATES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'currency_rates.json')
+    DEFAULT_RATES = {
+        'version': 'builtin',
+        'data_currency': 'USD',
+        'default_currency': 'AED',
+        'rates': {'USD': 1.0, 'AED': 3.7}
+    }
+
+    @classmethod
+    def load_rates(cls) -> Dict:
+        """Load rates (units of each currency per one unit of data currency)"""
+        if cls.rates_cache is None:
+            try:
+                with open(cls.RATES_PATH, 'r') as f:
+                    rates = json.load(f)
+                cls._validate(rates)
+                logger.info("Loaded %s currency rates (version %s)", len(rates['rates']), rates.get('version'))
+            except Exception as e:
+                logger.warning("Could not load currency rates: %s. Using USD/AED only.", e)
+                rates = cls.DEFAULT_RATES
+            cls.rates_cache = rates
+        return cls.rates_cache
+
+    @staticmethod
+    def _validate(rates: Dict):
+        table = rates.get('rates') or {}
+        if table.get(rates.get('data_currency')) != 1.0:
+            raise ValueError("the data currency must have rate 1.0")
+        if rates.get('default_currency') not in table:
+            raise ValueError("the default currency needs a rate")
+        if any(not isinstance(v, (int, float)) or v <= 0 for v in table.values()):
+            raise ValueError("rates must be positive numbers")
+
+    @classmethod
+    def set_rates(cls, rates: Dict):
+        """Replace the rate table (e.g. a daily update), invalidating every currency view"""
+        cls._validate(rates)
+        with cls.lock:
+            cls.rates_cache = rates
+            cls.rates_version += 1
+            cls.views = {}
+
+    @classmethod
+    def default_currency(cls) -> str:
+        return cls.load_rates()['default_currency']
+
+    @classmethod
+    def data_currency(cls) -> str:
+        return cls.load_rates()['data_currency']
+
+    @classmethod
+    def normalize(cls, currency: Optional[str]) -> str:
+        """Upper-case ISO code; None means the default currency. Unknown codes raise ValueError."""
+        code = (currency or cls.default_currency()).strip().upper()
+        rates = cls.load_rates()['rates']
+        if code not in rates:
+            raise ValueError(f"Unsupported currency '{currency}'. Available: {', '.join(sorted(rates))}")
+        return code
+
+    @classmethod
+    def rate(cls, currency: Optional[str]) -> float:
+        """Units of currency per one unit of data currency"""
+        return float(cls.load_rates()['rates'][cls.normalize(currency)])
+
+    @classmethod
+    def to_data(cls, amount: Optional[float], currency: Optional[str]) -> Optional[float]:
+        """Amount in a request currency -> data currency"""
+        return None if amount is None else amount / cls.rate(currency)
+
+    @classmethod
+    def from_data(cls, amount: Optional[float], currency: Optional[str], digits: int = 2) -> Optional[float]:
+        """Amount in data currency -> request currency, rounded for display"""
+        return None if amount is None else round(amount * cls.rate(currency), digits)
+
+    @classmethod
+    def convert_fields(cls, record: Dict, keys: Iterable[str], currency: Optional[str], digits: int = 2) -> Dict:
+        """Convert the given money fields of a data-currency dict in place (missing / None skipped)"""
+        rate = cls.rate(currency)
+        for key in keys:
+            if record.get(key) is not None:
+                record[key] = round(record[key] * rate, digits)
+        return record
+
+    @classmethod
+    def view(cls, name: str, currency: Optional[str], build: Callable[[str, float], object]):
+        """
+        Per-currency view of canonical data, built once per (data version, rates version).
+        build(currency, rate) must not be mutated by callers.
+        """
+        code = cls.normalize(currency)
+        key = (name, code, DataService.data_version, cls.rates_version)
+        with cls.lock:
+            if key in cls.views:
+                return cls.views[key]
+        value = build(code, cls.rate(code))
+        with cls.lock:
+            # Views of older versions are dropped with the first build of a new one
+            cls.views = {k: v for k, v in cls.views.items() if k[2:] == key[2:]}
+            cls.views[key] = value
+        return value
+
+    @classmethod
+    def available(cls) -> List[Dict]:
+        rates = cls.load_rates()
+        return [{'code': code, 'rate': rate} for code, rate in sorted(rates['rates'].items())]
@@ -3,6 +3,12 @@ import os
 import json
 from typing import Dict, List, Tuple
 from datetime import datetime
+from services.single_flight import single_flight
+from services.metrics_service import MetricsService
+from services.memory_service import MemoryService
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
 
 class DataService:
     """Service to load and process historical sales data"""
@@ -10,7 +16,12 @@ class DataService:
     data_cache = None
     products_cache = None
     costs_cache = None
-    DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'last_month_data (2).csv')
+    segments_cache = None
+    categorical_cache = None
+    data_size = (None, 0)  # (id of the sized frame, its deep size); the dataset is replaced, never mutated
+    data_version = 0  # Bumped whenever the dataset changes; part of HTTP cache validators
+    SEGMENT_KEYS = ['product_name', 'emirate', 'store_type']
+    DATA_PATH = os.getenv('DATA_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'last_month_data (2).csv'))
     COSTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'product_costs.json')
     
     @classmethod
@@ -20,12 +31,29 @@ class DataService:
             try:
                 cls.data_cache = pd.read_csv(cls.DATA_PATH)
                 cls.data_cache['period_normalized_date'] = pd.to_datetime(cls.data_cache['period_normalized_date'])
-                print(f"✓ Loaded {len(cls.data_cache)} rows of historical data")
+                logger.info("Loaded %s rows of historical data", len(cls.data_cache))
             except Exception as e:
-                print(f"Error loading data: {e}")
+                logger.error("Error loading data: %s", e)
                 cls.data_cache = pd.DataFrame()
         return cls.data_cache
     
+    @classmethod
+    def set_data(cls, df: pd.DataFrame):
+        """Replace the dataset in memory, drop everything derived from it and bump the version"""
+        cls.data_cache = df
+        cls.products_cache = None
+        cls.costs_cache = None
+        cls.segments_cache = None
+        cls.categorical_cache = None
+        cls.data_size = (None, 0)
+        cls.data_version += 1
+    
+    @classmethod
+    def reload_data(cls) -> pd.DataFrame:
+        """Re-read the CSV and cost files from disk (e.g. after a data refresh)"""
+        cls.set_data(None)
+        return cls.load_data()
+    
     @classmethod
     def load_costs(cls) -> Dict:
         """Load product costs from JSON file"""
@@ -33,9 +61,9 @@ class DataService:
             try:
                 with open(cls.COSTS_PATH, 'r') as f:
                     cls.costs_cache = json.load(f)
-                print(f"✓ Loaded costs for {len(cls.costs_cache)} products")
+                logger.info("Loaded costs for %s products", len(cls.costs_cache))
             except Exception as e:
-                print(f"⚠ Warning: Could not load product costs: {e}")
+                logger.warning("Could not load product costs: %s", e)
                 cls.costs_cache = {}
         return cls.costs_cache
     
@@ -52,7 +80,7 @@ class DataService:
     
     @classmethod
     def get_products_from_data(cls) -> List[Dict]:
-        """Extract unique products with their latest prices from the data (prices in USD, will be converted to AED by caller)"""
+        """Extract unique products with their latest prices from the data (prices in data currency; per-currency views live in CurrencyService)"""
         if cls.products_cache is None:
             df = cls.load_data()
             if df.empty:
@@ -92,11 +120,12 @@ class DataService:
                 })
             
             cls.products_cache = products
-            print(f"✓ Extracted {len(products)} unique products from data")
+            logger.info("Extracted %s unique products from data", len(products))
         
         return cls.products_cache
     
     @classmethod
+    @MetricsService.timed('data_lookup')
     def get_product_data(cls, product_name: str) -> pd.DataFrame:
         """Get all data for a specific product"""
         df = cls.load_data()
@@ -151,6 +180,41 @@ class DataService:
             'rolling_30day_std': float(latest_row.get('rolling_30day_std', 5.0))
         }
     
+    @classmethod
+    @MetricsService.timed('data_lookup')
+    def get_segment_snapshot(cls) -> pd.DataFrame:
+        """
+        Latest record for every (product, emirate, store_type) segment, with category,
+        latest price and rolling demand features. Computed once and cached.
+        """
+        if cls.segments_cache is None:
+            df = cls.load_data()
+            if df.empty:
+                return pd.DataFrame(columns=cls.SEGMENT_KEYS)
+            
+            cls.segments_cache = (
+                df.sort_values('period_normalized_date')
+                .groupby(cls.SEGMENT_KEYS, sort=True)
+                .tail(1)
+                .sort_values(cls.SEGMENT_KEYS)
+                .reset_index(drop=True)
+            )
+        return cls.segments_cache
+    
+    @classmethod
+    def get_categorical_values(cls) -> Dict[str, frozenset]:
+        """
+        Values seen in the data for each categorical model input (product_name, category,
+        emirate, store_type), as sets for constant-time validation. Empty without data.
+        """
+        if cls.categorical_cache is None:
+            df = cls.load_data()
+            columns = ['product_name', 'category', 'emirate', 'store_type']
+            if df.empty:
+                return {column: frozenset() for column in columns}
+            cls.categorical_cache = {column: frozenset(df[column].unique().tolist()) for column in columns}
+        return cls.categorical_cache
+    
     @classmethod
     def get_available_locations(cls, product_name: str = None) -> Tuple[List[str], List[str]]:
         """Get available emirates and store types from the data"""
@@ -172,6 +236,7 @@ class DataService:
         return emirates, store_types
     
     @classmethod
+    @single_flight
     def get_product_stats(cls, product_name: str) -> Dict:
         """Get comprehensive statistics for a product"""
         df = cls.get_product_data(product_name)
@@ -202,3 +267,36 @@ class DataService:
                 "store_types": sorted(df['store_type'].unique().tolist())
             }
         }
+
+    @classmethod
+    def data_memory(cls) -> int:
+        """Deep size of the dataset, measured once per loaded frame"""
+        df = cls.data_cache
+        if df is None:
+            return 0
+        if cls.data_size[0] != id(df):
+            cls.data_size = (id(df), MemoryService.deep_sizeof(df))
+        return cls.data_size[1]
+    
+    @classmethod
+    def derived_memory(cls) -> int:
+        return MemoryService.deep_sizeof([cls.products_cache, cls.segments_cache, cls.costs_cache, cls.categorical_cache])
+    
+    @classmethod
+    def drop_derived(cls, target_bytes: int = 0):
+        """Release the product list, segment snapshot and value sets; all are rebuilt on next use"""
+        cls.products_cache = None
+        cls.segments_cache = None
+        cls.categorical_cache = None
+
+
+MemoryService.register(
+    'data', 'Historical sales DataFrame', DataService.data_memory,
+    owners=[DataService.load_data]
+)
+MemoryService.register(
+    'derived_data', 'Product list, segment snapshot, costs and valid input values derived from the dataset',
+    DataService.derived_memory, shrink=DataService.drop_derived,
+    owners=[DataService.get_products_from_data, DataService.get_segment_snapshot, DataService.load_costs,
+            DataService.get_categorical_values]
+)
@@ -0,0 +1,452 @@
+"""
+Precomputed demand cube for interactive price lookups
+The demand model is scored offline over a dense grid: every segment x month x day of month
+x day of week x holiday flag x relative price level, in one batched model call per segment.
+The result is a float32 .npy file that serving memory-maps (pages are shared between
+workers and only touched slices become resident). Lookups interpolate linearly between
+price levels; anything off the grid returns None so callers score the model exactly.
+The cube records the model and data inputs it was built from and is rebuilt in the
+background when either changes
+"""
+import os
+import json
+import pickle
+import math
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from services.data_service import DataService
+from services.metrics_service import MetricsService
+from services.memory_service import MemoryService
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class DemandCubeService:
+    """Service for building, loading and interpolating the precomputed demand cube"""
+
+    ENABLED = os.getenv('DEMAND_CUBE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    CUBE_DIR = os.getenv('DEMAND_CUBE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'demand_cube'))
+    PRICE_LEVELS = int(os.getenv('DEMAND_CUBE_PRICE_LEVELS', '21'))
+    MIN_PRICE_RATIO = float(os.getenv('DEMAND_CUBE_MIN_PRICE_RATIO', '0.5'))  # Of the product's latest price
+    MAX_PRICE_RATIO = float(os.getenv('DEMAND_CUBE_MAX_PRICE_RATIO', '1.5'))
+
+    # Calendar axes, in cube order after the segment axis; weekend follows day_of_week as in the data
+    MONTHS = 12
+    DAYS_OF_MONTH = 31
+    DAYS_OF_WEEK = 7
+    HOLIDAY_FLAGS = 2
+    DEFAULT_WEEKEND_DAYS = (4, 5)  # Friday and Saturday, when the data has no calendar rows
+
+    # (cube, meta, index), published together under lock and read once per lookup so a
+    # background load cannot pair one build's index with another's values. cube is an
+    # np.memmap of shape (segments, 12, 31, 7, 2, price levels); index maps
+    # (product_name, emirate, store_type) -> (cube row, category, rolling feature tuple)
+    loaded = None
+    checked_versions = None  # (model_version, data_version) the loaded cube was last validated against
+    lock = threading.Lock()
+    build_lock = threading.Lock()  # One build at a time, across the rebuild thread, jobs and distillation
+    builder = None
+    stop_event = threading.Event()
+
+    @classmethod
+    def paths(cls) -> Tuple[str, str]:
+        return os.path.join(cls.CUBE_DIR, 'demand_cube.npy'), os.path.join(cls.CUBE_DIR, 'demand_cube.json')
+
+    # ------------------------------------------------------------------ inputs
+
+    @staticmethod
+    def model_fingerprint() -> Optional[str]:
+        """Digest of the loaded booster, so a retrained model with the same file name is detected"""
+        from services.ai_service import XGBoostAIService
+        if not XGBoostAIService.load_model():
+            return None
+        model = XGBoostAIService.model
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        raw = bytes(booster.save_raw()) if hasattr(booster, 'save_raw') else pickle.dumps(model)
+        return hashlib.sha256(raw).hexdigest()[:16]
+
+    @classmethod
+    def segment_inputs(cls, segments: Optional[Sequence[Tuple[str, str, str]]] = None) -> Dict:
+        """
+        Everything from the data that cube values depend on: per segment its category, the
+        product's latest price (the price levels' reference) and rolling features, plus
+        the weekend flag of each day of week
+        """
+        from services.ai_service import XGBoostAIService
+        snapshot = DataService.get_segment_snapshot()
+        if segments is not None:
+            wanted = set(map(tuple, segments))
+            keys = list(zip(*(snapshot[key] for key in DataService.SEGMENT_KEYS)))
+            snapshot = snapshot[[key in wanted for key in keys]]
+
+        reference_prices = {}
+        rows = []
+        for row in snapshot.itertuples(index=False):
+            if row.product_name not in reference_prices:
+                reference_prices[row.product_name] = DataService.get_latest_price(row.product_name)
+            rows.append({
+                'product_name': row.product_name,
+                'emirate': row.emirate,
+                'store_type': row.store_type,
+                'category': row.category,
+                'reference_price': reference_prices[row.product_name],
+                'rolling': [float(getattr(row, feature)) for feature in XGBoostAIService.ROLLING_FEATURES]
+            })
+
+        df = DataService.load_data()
+        weekend_by_dow = [int(day in cls.DEFAULT_WEEKEND_DAYS) for day in range(cls.DAYS_OF_WEEK)]
+        if not df.empty and 'is_weekend' in df.columns:
+            observed = df.groupby('day_of_week')['is_weekend'].agg(lambda flags: int(flags.mode().iloc[0]))
+            for day, flag in observed.items():
+                if 0 <= int(day) < cls.DAYS_OF_WEEK:
+                    weekend_by_dow[int(day)] = int(flag)
+        return {'segments': rows, 'weekend_by_dow': weekend_by_dow}
+
+    @classmethod
+    def price_ratios(cls) -> np.ndarray:
+        return np.linspace(cls.MIN_PRICE_RATIO, cls.MAX_PRICE_RATIO, cls.PRICE_LEVELS)
+
+    @staticmethod
+    def inputs_fingerprint(inputs: Dict, ratios: Sequence[float]) -> str:
+        payload = json.dumps({'inputs': inputs, 'ratios': [float(r) for r in ratios]}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    # ------------------------------------------------------------------ building
+
+    @classmethod
+    def build(
+        cls,
+        segments: Optional[Sequence[Tuple[str, str, str]]] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Score the model over the grid and write the cube and its metadata to CUBE_DIR
+        (atomically, so serving workers never map a partial file). Without segments every
+        segment in the data is covered. Returns the metadata
+        """
+        from services.ai_service import XGBoostAIService
+        started = time.time()
+        model_fingerprint = cls.model_fingerprint()
+        if model_fingerprint is None:
+            raise RuntimeError("Model not loaded")
+        inputs = cls.segment_inputs(segments)
+        ratios = cls.price_ratios()
+        shape = (len(inputs['segments']), cls.MONTHS, cls.DAYS_OF_MONTH, cls.DAYS_OF_WEEK,
+                 cls.HOLIDAY_FLAGS, len(ratios))
+
+        # One slab per segment: every calendar context at every price level, in cube order
+        month, day_of_month, day_of_week, is_holiday, level = (
+            axis.ravel() for axis in np.meshgrid(
+                np.arange(1, cls.MONTHS + 1), np.arange(1, cls.DAYS_OF_MONTH + 1),
+                np.arange(cls.DAYS_OF_WEEK), np.arange(cls.HOLIDAY_FLAGS), np.arange(len(ratios)),
+                indexing='ij'
+            )
+        )
+        calendar = {
+            'month': month,
+            'day_of_month': day_of_month,
+            'day_of_week': day_of_week,
+            'is_weekend': np.asarray(inputs['weekend_by_dow'])[day_of_week],
+            'is_holiday': is_holiday
+        }
+
+        cube_path, meta_path = cls.paths()
+        os.makedirs(cls.CUBE_DIR, exist_ok=True)
+        tmp_cube = f"{cube_path}.{os.getpid()}.tmp"
+        cube = np.lib.format.open_memmap(tmp_cube, mode='w+', dtype=np.float32, shape=shape)
+        try:
+            for i, segment in enumerate(inputs['segments']):
+                if cls.stop_event.is_set():
+                    raise RuntimeError("Demand cube build stopped")
+                frame = pd.DataFrame({
+                    'product_name': segment['product_name'],
+                    'category': segment['category'],
+                    'emirate': segment['emirate'],
+                    'store_type': segment['store_type'],
+                    'price_per_sales_unit': segment['reference_price'] * ratios[level],
+                    **calendar,
+                    **dict(zip(XGBoostAIService.ROLLING_FEATURES, segment['rolling']))
+                })
+                cube[i] = XGBoostAIService.predict_demand_batch(frame).reshape(shape[1:])
+                if progress:
+                    progress(i + 1, len(inputs['segments']))
+            cube.flush()
+            del cube
+            os.replace(tmp_cube, cube_path)
+        finally:
+            if os.path.exists(tmp_cube):
+                os.remove(tmp_cube)
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'model_fingerprint': model_fingerprint,
+            'inputs_fingerprint': cls.inputs_fingerprint(inputs, ratios),
+            'complete': segments is None,
+            'shape': list(shape),
+            'price_ratios': ratios.tolist(),
+            'rolling_features': list(XGBoostAIService.ROLLING_FEATURES),
+            'built_at': datetime.now().isoformat(),
+            'build_seconds': round(time.time() - started, 2),
+            **inputs
+        }
+        tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+        logger.info("Built demand cube: %s segments, %.1f MB in %.1fs", shape[0],
+                    np.prod(shape) * 4 / (1024 * 1024), meta['build_seconds'])
+        return meta
+
+    # ------------------------------------------------------------------ loading and staleness
+
+    @classmethod
+    def open_cube(cls) -> Tuple[np.memmap, Dict]:
+        """Map the cube on disk with its metadata (FileNotFoundError when not built)"""
+        cube_path, meta_path = cls.paths()
+        with open(meta_path) as f:
+            meta = json.load(f)
+        cube = np.load(cube_path, mmap_mode='r')
+        if meta.get('format_version') != FORMAT_VERSION or list(cube.shape) != meta['shape']:
+            raise ValueError("cube and metadata do not match")
+        return cube, meta
+
+    @staticmethod
+    def segment_index(meta: Dict) -> Dict:
+        """(product_name, emirate, store_type) -> (row, category, rolling feature tuple) for grid_cell"""
+        return {
+            (s['product_name'], s['emirate'], s['store_type']): (i, s['category'], tuple(s['rolling']))
+            for i, s in enumerate(meta['segments'])
+        }
+
+    @classmethod
+    def load(cls) -> bool:
+        """Map the cube on disk; False when there is none (or it is unreadable)"""
+        try:
+            cube, meta = cls.open_cube()
+        except FileNotFoundError:
+            cls.unload()
+            return False
+        except Exception as e:
+            logger.warning("Could not load demand cube from %s: %s", cls.CUBE_DIR, e)
+            cls.unload()
+            return False
+
+        index = cls.segment_index(meta)
+        with cls.lock:
+            cls.loaded = (cube, meta, index)
+            cls.checked_versions = None
+        logger.info("Loaded demand cube for %s segments (built %s)", len(index), meta['built_at'])
+        return True
+
+    @classmethod
+    def unload(cls):
+        with cls.lock:
+            cls.loaded = None
+            cls.checked_versions = None
+
+    @classmethod
+    def is_stale(cls, meta: Dict) -> bool:
+        """Whether the current model or data would produce different cube values"""
+        if meta['model_fingerprint'] != cls.model_fingerprint():
+            return True
+        inputs = cls.segment_inputs(cls.grid_segments(meta))
+        return cls.inputs_fingerprint(inputs, meta['price_ratios']) != meta['inputs_fingerprint']
+
+    @staticmethod
+    def grid_segments(meta: Dict) -> Optional[List[Tuple[str, str, str]]]:
+        """Segments a partial build covers; None for a build over every segment"""
+        if meta['complete']:
+            return None
+        return [(s['product_name'], s['emirate'], s['store_type']) for s in meta['segments']]
+
+    @classmethod
+    def ensure_built(cls, segments: Optional[Sequence[Tuple[str, str, str]]] = None) -> Dict:
+        """
+        Metadata of a cube on disk that covers the segments and matches the current model
+        and data, building it first when there is none (another caller's build is waited for)
+        """
+        with cls.build_lock:
+            try:
+                _, meta = cls.open_cube()
+                covers = meta['complete'] or (
+                    segments is not None and set(map(tuple, segments)) <= set(cls.grid_segments(meta))
+                )
+                if covers and not cls.is_stale(meta):
+                    return meta
+            except (OSError, ValueError, KeyError):
+                pass
+            return cls.build(segments)
+
+    @classmethod
+    def current(cls) -> Optional[Tuple[np.memmap, Dict, Dict]]:
+        """
+        The loaded (cube, meta, index) when it matches the current model and data, else
+        None. Validated once per model/data version; a stale cube is dropped and a rebuild
+        scheduled
+        """
+        from services.ai_service import XGBoostAIService
+        loaded = cls.loaded
+        if loaded is None:
+            return None
+        meta = loaded[1]
+        versions = (XGBoostAIService.model_version, DataService.data_version)
+        if cls.checked_versions == versions:
+            return loaded
+        with cls.lock:
+            if cls.loaded is not loaded:
+                return cls.loaded if cls.checked_versions == versions else None
+            stale = cls.is_stale(meta)
+            if not stale:
+                cls.checked_versions = versions
+        if stale:
+            logger.info("Demand cube is out of date with the model or data")
+            cls.unload()
+            cls.schedule_rebuild(cls.grid_segments(meta))
+            return None
+        return loaded
+
+    @classmethod
+    def schedule_rebuild(cls, segments: Optional[Sequence[Tuple[str, str, str]]] = None) -> bool:
+        """Rebuild and load the cube in a background thread (one at a time); False if one is running"""
+        with cls.lock:
+            if cls.builder is not None and cls.builder.is_alive():
+                return False
+
+            def run():
+                try:
+                    cls.ensure_built(segments)
+                    cls.load()
+                except Exception as e:
+                    logger.warning("Demand cube rebuild failed: %s", e)
+
+            cls.builder = threading.Thread(target=run, name='demand-cube-build', daemon=True)
+            cls.builder.start()
+        return True
+
+    # ------------------------------------------------------------------ lookups
+
+    @classmethod
+    def grid_cell(cls, meta: Dict, index: Dict, context: Dict) -> Optional[Tuple[int, int, int, int, int]]:
+        """
+        Cube coordinates (segment row, month, day of month, day of week, holiday) of a context
+        with the fields of XGBoostAIService.build_simulation_context, or None when it is not
+        on the grid: unknown segment, other category or rolling features, calendar values
+        out of range, a weekend flag that disagrees with the day of week
+        """
+        entry = index.get((context['product_name'], context['emirate'], context['store_type']))
+        month, day_of_month = context['month'], context['day_of_month']
+        day_of_week, is_holiday = context['day_of_week'], context['is_holiday']
+        rolling = context['rolling_data']
+        if (
+            entry is None
+            or entry[1] != context['category']
+            or not (1 <= month <= cls.MONTHS and 1 <= day_of_month <= cls.DAYS_OF_MONTH)
+            or not 0 <= day_of_week < cls.DAYS_OF_WEEK
+            or is_holiday not in (0, 1)
+            or context['is_weekend'] != meta['weekend_by_dow'][day_of_week]
+            or entry[2] != tuple(rolling.get(feature) for feature in meta['rolling_features'])
+        ):
+            return None
+        return entry[0], month - 1, day_of_month - 1, day_of_week, is_holiday
+
+    @classmethod
+    def _slab(cls, context: Dict):
+        """Price-level values, reference price and price ratios for a context; None off the grid"""
+        loaded = cls.current() if cls.ENABLED else None
+        if loaded is None:
+            return None
+        cube, meta, index = loaded
+        cell = cls.grid_cell(meta, index, context)
+        if cell is None:
+            MetricsService.inc('pricing_demand_cube_lookups_total', result='off_grid')
+            return None
+        return cube[cell], meta['segments'][cell[0]]['reference_price'], meta['price_ratios']
+
+    @classmethod
+    def lookup(cls, context: Dict, price: float) -> Optional[float]:
+        """
+        Interpolated model demand at a price for a context with the fields of
+        XGBoostAIService.build_simulation_context; None when the query is off the grid
+        """
+        slab = cls._slab(context)
+        if slab is None:
+            return None
+        values, reference_price, ratios = slab
+        position = (price / reference_price - ratios[0]) / (ratios[1] - ratios[0])
+        if not -1e-9 <= position <= len(ratios) - 1 + 1e-9:
+            MetricsService.inc('pricing_demand_cube_lookups_total', result='off_grid')
+            return None
+        k = min(max(int(math.floor(position)), 0), len(ratios) - 2)
+        weight = position - k
+        MetricsService.inc('pricing_demand_cube_lookups_total', result='hit')
+        return float(values[k]) * (1 - weight) + float(values[k + 1]) * weight
+
+    @classmethod
+    def lookup_many(cls, context: Dict, prices: Sequence[float]) -> Optional[np.ndarray]:
+        """Vector form of lookup: NaN where a price is outside the cube's price range"""
+        slab = cls._slab(context)
+        if slab is None:
+            return None
+        values, reference_price, ratios = slab
+        ratios = np.asarray(ratios)
+        position = (np.asarray(prices, dtype=np.float64) / reference_price - ratios[0]) / (ratios[1] - ratios[0])
+        inside = (position >= -1e-9) & (position <= len(ratios) - 1 + 1e-9)
+        k = np.clip(np.floor(position), 0, len(ratios) - 2).astype(int)
+        weight = position - k
+        values = np.asarray(values, dtype=np.float64)
+        result = np.where(inside, values[k] * (1 - weight) + values[np.minimum(k + 1, len(ratios) - 1)] * weight, np.nan)
+        hits = int(inside.sum())
+        MetricsService.inc('pricing_demand_cube_lookups_total', hits, result='hit')
+        if hits < len(inside):
+            MetricsService.inc('pricing_demand_cube_lookups_total', len(inside) - hits, result='off_grid')
+        return result
+
+    # ------------------------------------------------------------------ lifecycle
+
+    @classmethod
+    def start(cls):
+        """Map the cube when enabled; build it in the background if it is missing or stale"""
+        if not cls.ENABLED:
+            return
+        if not cls.load():
+            cls.schedule_rebuild()
+        else:
+            cls.current()  # Validates, and schedules a rebuild when the model or data changed
+
+    @classmethod
+    def shutdown(cls):
+        builder, cls.builder = cls.builder, None
+        cls.stop_background_build(builder)
+
+    @classmethod
+    def stop_background_build(cls, builder: Optional[threading.Thread]):
+        """Stop a background build at its next segment; later builds run normally"""
+        if builder is None:
+            return
+        cls.stop_event.set()
+        builder.join(timeout=5)
+        if not builder.is_alive():
+            cls.stop_event.clear()
+
+    @classmethod
+    def index_memory(cls) -> int:
+        """Heap held for lookups; the cube itself is a shared file mapping"""
+        loaded = cls.loaded
+        return MemoryService.deep_sizeof(list(loaded[1:]) if loaded is not None else [])
+
+
+MetricsService.define('pricing_demand_cube_lookups_total', 'counter', 'Demand cube lookups by result (hit, off_grid)')
+MetricsService.define_ratio('pricing_demand_cube_hit_ratio', 'Share of demand cube lookups answered from the cube',
+                            'pricing_demand_cube_lookups_total', 'result', ('hit',))
+MemoryService.register(
+    'demand_cube', 'Demand cube metadata and segment index (the cube is memory-mapped)',
+    DemandCubeService.index_memory, owners=[DemandCubeService.load]
+)
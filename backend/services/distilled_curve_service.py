@@ -0,0 +1,284 @@
+"""
+Distilled per-segment price-response curves
+The XGBoost model is piecewise constant in price, so curves sampled from it are jagged and
+cost a model call. Distillation fits a smooth log-polynomial response
+
+    log(1 + demand) = c0 + c1 * x + c2 * x^2 + ...,   x = log(price / reference price)
+
+to the demand cube (batched model outputs at every price level) for every segment and
+calendar context. All contexts share the price levels, so the least-squares fit is one
+matrix product per segment. Coefficients and each context's worst relative error over
+the price levels are stored as memory-mapped arrays; contexts whose error exceeds
+DISTILLED_CURVE_MAX_ERROR are left to the model
+"""
+import os
+import json
+import time
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from services.data_service import DataService
+from services.demand_cube_service import DemandCubeService
+from services.metrics_service import MetricsService
+from services.memory_service import MemoryService
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class DistilledCurveService:
+    """Service for fitting, loading and evaluating distilled price-response curves"""
+
+    ENABLED = os.getenv('DISTILLED_CURVES_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    DEGREE = int(os.getenv('DISTILLED_CURVE_DEGREE', '2'))  # 1 is a constant-elasticity curve
+    MAX_ERROR = float(os.getenv('DISTILLED_CURVE_MAX_ERROR', '0.05'))  # Worst relative error served
+
+    # (coefficients, errors, meta, index), published together under lock and read once per
+    # prediction, as for the demand cube. coefficients is an np.memmap of shape
+    # (segments, 12, 31, 7, 2, degree + 1), errors of shape (segments, 12, 31, 7, 2)
+    loaded = None
+    checked_versions = None
+    lock = threading.Lock()
+    builder = None
+
+    @classmethod
+    def paths(cls) -> Tuple[str, str, str]:
+        directory = DemandCubeService.CUBE_DIR
+        return (os.path.join(directory, 'curve_coefficients.npy'), os.path.join(directory, 'curve_errors.npy'),
+                os.path.join(directory, 'curves.json'))
+
+    @staticmethod
+    def relative_error(fitted: np.ndarray, demand: np.ndarray) -> np.ndarray:
+        """Error relative to demand, with demand below one unit counted as one"""
+        return np.abs(fitted - demand) / np.maximum(demand, 1.0)
+
+    @classmethod
+    def error_summary(cls, errors: np.ndarray) -> Dict:
+        """Distillation error of one segment over its calendar contexts"""
+        flat = np.asarray(errors, dtype=np.float64).ravel()
+        return {
+            'median_error': round(float(np.median(flat)), 5),
+            'p95_error': round(float(np.percentile(flat, 95)), 5),
+            'max_error': round(float(flat.max()), 5),
+            'fallback_share': round(float((flat > cls.MAX_ERROR).mean()), 4)
+        }
+
+    # ------------------------------------------------------------------ distillation
+
+    @classmethod
+    def distill(
+        cls,
+        segments: Optional[Sequence[Tuple[str, str, str]]] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Fit curves for every segment and calendar context of a current demand cube (built
+        first when missing or stale) and write them next to it. Returns the metadata,
+        including each segment's error summary
+        """
+        started = time.time()
+        DemandCubeService.ensure_built(segments)
+        cube, cube_meta = DemandCubeService.open_cube()
+
+        x = np.log(np.asarray(cube_meta['price_ratios']))
+        design = np.vander(x, cls.DEGREE + 1, increasing=True)  # (levels, degree + 1)
+        solve = np.linalg.pinv(design).T  # log demand (..., levels) @ solve -> coefficients
+        shape = tuple(cube.shape[:-1])
+
+        coefficients_path, errors_path, meta_path = cls.paths()
+        tmp = f".{os.getpid()}.tmp"
+        coefficients = np.lib.format.open_memmap(coefficients_path + tmp, mode='w+', dtype=np.float32,
+                                                 shape=shape + (cls.DEGREE + 1,))
+        errors = np.lib.format.open_memmap(errors_path + tmp, mode='w+', dtype=np.float32, shape=shape)
+        segment_meta = []
+        try:
+            for i, segment in enumerate(cube_meta['segments']):
+                if DemandCubeService.stop_event.is_set():
+                    raise RuntimeError("Curve distillation stopped")
+                demand = np.asarray(cube[i], dtype=np.float64)
+                fit = np.log1p(demand) @ solve
+                fitted = np.maximum(np.expm1(fit @ design.T), 0.0)
+                coefficients[i] = fit
+                errors[i] = cls.relative_error(fitted, demand).max(axis=-1)
+                segment_meta.append({**segment, 'error': cls.error_summary(errors[i])})
+                if progress:
+                    progress(i + 1, len(cube_meta['segments']))
+            coefficients.flush()
+            errors.flush()
+            del coefficients, errors
+            os.replace(coefficients_path + tmp, coefficients_path)
+            os.replace(errors_path + tmp, errors_path)
+        finally:
+            for path in (coefficients_path + tmp, errors_path + tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'degree': cls.DEGREE,
+            'shape': list(shape),
+            'built_at': datetime.now().isoformat(),
+            'build_seconds': round(time.time() - started, 2),
+            'max_error_at_build': cls.MAX_ERROR,
+            **{key: cube_meta[key] for key in (
+                'model_fingerprint', 'inputs_fingerprint', 'complete', 'price_ratios', 'rolling_features',
+                'weekend_by_dow'
+            )},
+            'segments': segment_meta
+        }
+        with open(meta_path + tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + tmp, meta_path)
+        logger.info("Distilled demand curves for %s segments in %.1fs", len(segment_meta), meta['build_seconds'])
+        return meta
+
+    # ------------------------------------------------------------------ loading and staleness
+
+    @classmethod
+    def load(cls) -> bool:
+        """Map the distilled curves on disk; False when there are none (or they are unreadable)"""
+        coefficients_path, errors_path, meta_path = cls.paths()
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            coefficients = np.load(coefficients_path, mmap_mode='r')
+            errors = np.load(errors_path, mmap_mode='r')
+            if meta.get('format_version') != FORMAT_VERSION or list(errors.shape) != meta['shape']:
+                raise ValueError("curve files and metadata do not match")
+        except FileNotFoundError:
+            cls.unload()
+            return False
+        except Exception as e:
+            logger.warning("Could not load distilled curves from %s: %s", DemandCubeService.CUBE_DIR, e)
+            cls.unload()
+            return False
+        index = DemandCubeService.segment_index(meta)
+        with cls.lock:
+            cls.loaded = (coefficients, errors, meta, index)
+            cls.checked_versions = None
+        logger.info("Loaded distilled demand curves for %s segments (built %s)", len(meta['segments']), meta['built_at'])
+        return True
+
+    @classmethod
+    def unload(cls):
+        with cls.lock:
+            cls.loaded = None
+            cls.checked_versions = None
+
+    @classmethod
+    def current(cls) -> Optional[Tuple[np.memmap, np.memmap, Dict, Dict]]:
+        """
+        The loaded (coefficients, errors, meta, index) when they match the current model and
+        data, else None. Validated once per model/data version; stale curves are dropped
+        and redistilled
+        """
+        from services.ai_service import XGBoostAIService
+        loaded = cls.loaded
+        if loaded is None:
+            return None
+        meta = loaded[2]
+        versions = (XGBoostAIService.model_version, DataService.data_version)
+        if cls.checked_versions == versions:
+            return loaded
+        with cls.lock:
+            if cls.loaded is not loaded:
+                return cls.loaded if cls.checked_versions == versions else None
+            stale = DemandCubeService.is_stale(meta)
+            if not stale:
+                cls.checked_versions = versions
+        if stale:
+            logger.info("Distilled demand curves are out of date with the model or data")
+            cls.unload()
+            cls.schedule_rebuild(DemandCubeService.grid_segments(meta))
+            return None
+        return loaded
+
+    @classmethod
+    def schedule_rebuild(cls, segments: Optional[Sequence[Tuple[str, str, str]]] = None) -> bool:
+        """Redistill (rebuilding the cube if needed) and load in a background thread; False if one is running"""
+        with cls.lock:
+            if cls.builder is not None and cls.builder.is_alive():
+                return False
+
+            def run():
+                try:
+                    cls.distill(segments)
+                    cls.load()
+                except Exception as e:
+                    logger.warning("Demand curve distillation failed: %s", e)
+
+            cls.builder = threading.Thread(target=run, name='demand-curve-distill', daemon=True)
+            cls.builder.start()
+        return True
+
+    # ------------------------------------------------------------------ serving
+
+    @classmethod
+    def predict(cls, context: Dict, prices: Sequence[float]) -> Optional[np.ndarray]:
+        """
+        Distilled demand at prices for a context with the fields of
+        XGBoostAIService.build_simulation_context: NaN outside the fitted price range, None
+        when the context is off the grid or its distillation error is above MAX_ERROR
+        """
+        loaded = cls.current() if cls.ENABLED else None
+        if loaded is None:
+            return None
+        coefficients, errors, meta, index = loaded
+        cell = DemandCubeService.grid_cell(meta, index, context)
+        if cell is None:
+            MetricsService.inc('pricing_distilled_curve_lookups_total', result='off_grid')
+            return None
+        if errors[cell] > cls.MAX_ERROR:
+            MetricsService.inc('pricing_distilled_curve_lookups_total', result='fallback')
+            return None
+
+        ratios = meta['price_ratios']
+        x = np.log(np.asarray(prices, dtype=np.float64) / meta['segments'][cell[0]]['reference_price'])
+        fit = np.zeros_like(x)
+        for coefficient in np.asarray(coefficients[cell], dtype=np.float64)[::-1]:  # Horner
+            fit = fit * x + coefficient
+        inside = (x >= np.log(ratios[0]) - 1e-9) & (x <= np.log(ratios[-1]) + 1e-9)
+        MetricsService.inc('pricing_distilled_curve_lookups_total', result='hit')
+        return np.where(inside, np.maximum(np.expm1(fit), 0.0), np.nan)
+
+    @classmethod
+    def error_report(cls) -> Dict[str, Dict]:
+        """Distillation error summary per segment ('product|emirate|store_type') of the loaded curves"""
+        loaded = cls.loaded
+        if loaded is None:
+            return {}
+        return {f"{s['product_name']}|{s['emirate']}|{s['store_type']}": s['error'] for s in loaded[2]['segments']}
+
+    # ------------------------------------------------------------------ lifecycle
+
+    @classmethod
+    def start(cls):
+        """Map the curves when enabled; distill them in the background if missing or stale"""
+        if not cls.ENABLED:
+            return
+        if not cls.load():
+            cls.schedule_rebuild()
+        else:
+            cls.current()
+
+    @classmethod
+    def shutdown(cls):
+        builder, cls.builder = cls.builder, None
+        DemandCubeService.stop_background_build(builder)
+
+    @classmethod
+    def index_memory(cls) -> int:
+        """Heap held for lookups; coefficients and errors are shared file mappings"""
+        loaded = cls.loaded
+        return MemoryService.deep_sizeof(list(loaded[2:]) if loaded is not None else [])
+
+
+MetricsService.define('pricing_distilled_curve_lookups_total', 'counter',
+                      'Distilled curve lookups by result (hit, fallback to the model, off_grid)')
+MemoryService.register(
+    'distilled_curves', 'Distilled curve metadata and segment index (coefficients are memory-mapped)',
+    DistilledCurveService.index_memory, owners=[DistilledCurveService.load]
+)
@@ -0,0 +1,182 @@
+"""
+Data-driven per-segment price elasticity estimation
+Fits log-log price-response regressions for every (product, emirate, store_type)
+segment in one grouped least-squares pass and shrinks them toward category means
+"""
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+
+class ElasticityEstimationService:
+    """Service for estimating and persisting the segment elasticity table"""
+
+    SEGMENT_KEYS = ['product_name', 'emirate', 'store_type']
+    CONTROLS = ['is_weekend', 'is_holiday']
+    RIDGE = 1e-6  # Keeps control columns without variation from making the system singular
+    PRIOR_SD = 0.5  # Uncertainty of the category elasticity prior
+    MIN_OBSERVATIONS = 5
+    MAX_LEVERAGE = 0.5  # A slope driven by one observation (e.g. a single off-price day) is not used
+    MAX_BETWEEN_SEGMENT_SD = 0.5  # Cap on the spread of true elasticities within a category
+
+    @staticmethod
+    def segment_key(product_name: str, emirate: str, store_type: str) -> str:
+        return f"{product_name}|{emirate}|{store_type}"
+
+    @classmethod
+    def fit_segments(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per-segment OLS of log(units) on log(price) plus calendar controls.
+
+        All segments are solved at once: the normal equations X'X and X'y are
+        accumulated per segment with bincount and solved as a stacked (G, k, k) system.
+
+        Returns:
+            One row per segment with the raw elasticity, its standard error and the
+            number of observations
+        """
+        data = df[(df['price_per_sales_unit'] > 0) & (df['sales_units'] >= 0)]
+        grouped = data.groupby(cls.SEGMENT_KEYS, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        n_groups = grouped.ngroups
+
+        X = np.column_stack([
+            np.ones(len(data)),
+            np.log(data['price_per_sales_unit'].to_numpy(dtype=float)),
+            data[cls.CONTROLS].fillna(0).to_numpy(dtype=float)
+        ])
+        y = np.log1p(data['sales_units'].to_numpy(dtype=float))
+        n_params = X.shape[1]
+
+        # Center within segment so the price column is well conditioned (prices barely move)
+        counts = np.bincount(codes, minlength=n_groups).astype(float)
+
+        def group_mean(values):
+            return np.bincount(codes, weights=values, minlength=n_groups) / np.maximum(counts, 1)
+
+        Xc = X.copy()
+        for j in range(1, n_params):
+            Xc[:, j] -= group_mean(X[:, j])[codes]
+        yc = y - group_mean(y)[codes]
+
+        xtx = np.empty((n_groups, n_params, n_params))
+        xty = np.empty((n_groups, n_params))
+        for i in range(n_params):
+            xty[:, i] = np.bincount(codes, weights=Xc[:, i] * yc, minlength=n_groups)
+            for j in range(i, n_params):
+                xtx[:, i, j] = xtx[:, j, i] = np.bincount(codes, weights=Xc[:, i] * Xc[:, j], minlength=n_groups)
+        yty = np.bincount(codes, weights=yc * yc, minlength=n_groups)
+
+        # Intercept is absorbed by centering; ridge only the controls
+        xtx[:, 0, 0] = 1.0
+        xtx[:, 2:, 2:] += cls.RIDGE * np.eye(n_params - 2)
+
+        # Identification screen: enough observations, price variation, and no single
+        # observation with most of the leverage on the price slope
+        sxx = xtx[:, 1, 1].copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price_leverage = pd.Series(Xc[:, 1] ** 2 / sxx[codes]).groupby(codes).max().to_numpy()
+        identifiable = (sxx > 1e-12) & (counts >= cls.MIN_OBSERVATIONS) & (price_leverage <= cls.MAX_LEVERAGE)
+        xtx[~identifiable, 1, 1] = 1.0
+        beta = np.linalg.solve(xtx, xty[:, :, None])[:, :, 0]
+        inverse = np.linalg.inv(xtx)
+
+        rss = np.maximum(yty - np.einsum('gi,gi->g', beta, xty), 0)
+        dof = np.maximum(counts - n_params, 1)
+        se = np.sqrt(rss / dof * inverse[:, 1, 1])
+
+        table = grouped['category'].first().reset_index()
+        table['n_obs'] = counts.astype(int)
+        table['raw_elasticity'] = np.where(identifiable, beta[:, 1], np.nan)
+        table['std_error'] = np.where(identifiable, se, np.inf)
+        table['price_leverage'] = price_leverage
+        return table
+
+    @classmethod
+    def shrink(cls, table: pd.DataFrame, category_priors: Dict[str, float], default_prior: float) -> pd.DataFrame:
+        """
+        Hierarchical (empirical Bayes) shrinkage.
+
+        Per category, the between-segment variance tau^2 is estimated with the
+        DerSimonian-Laird moment estimator (capped at MAX_BETWEEN_SEGMENT_SD^2) and
+        the random-effects mean is combined
+        with the category prior. Each segment is then pulled toward that mean by
+        se^2 / (se^2 + tau^2), so noisy or sparse segments end up near the category.
+        """
+        cat_codes, categories = pd.factorize(table['category'].fillna('DEFAULT'))
+        n_cats = len(categories)
+        raw = table['raw_elasticity'].fillna(0).to_numpy()
+        variance = table['std_error'].to_numpy() ** 2
+        w = np.where(np.isfinite(variance) & (variance > 0), 1 / variance, 0.0)
+
+        sum_w = np.bincount(cat_codes, weights=w, minlength=n_cats)
+        sum_w2 = np.bincount(cat_codes, weights=w * w, minlength=n_cats)
+        fixed_mean = np.bincount(cat_codes, weights=w * raw, minlength=n_cats) / np.maximum(sum_w, 1e-300)
+        q = np.bincount(cat_codes, weights=w * (raw - fixed_mean[cat_codes]) ** 2, minlength=n_cats)
+        n_valid = np.bincount(cat_codes, weights=(w > 0).astype(float), minlength=n_cats)
+        denominator = sum_w - sum_w2 / np.maximum(sum_w, 1e-300)
+        tau2 = np.where(denominator > 0, np.maximum(0, (q - (n_valid - 1)) / np.maximum(denominator, 1e-300)), 0.0)
+        tau2 = np.minimum(tau2, cls.MAX_BETWEEN_SEGMENT_SD ** 2)
+
+        w_re = np.where(w > 0, 1 / (variance + tau2[cat_codes]), 0.0)
+        sum_w_re = np.bincount(cat_codes, weights=w_re, minlength=n_cats)
+        re_mean = np.bincount(cat_codes, weights=w_re * raw, minlength=n_cats) / np.maximum(sum_w_re, 1e-300)
+
+        prior = np.array([category_priors.get(c, default_prior) for c in categories])
+        prior_precision = 1 / cls.PRIOR_SD ** 2
+        category_mean = (re_mean * sum_w_re + prior * prior_precision) / (sum_w_re + prior_precision)
+        category_se = np.sqrt(1 / (sum_w_re + prior_precision))
+
+        segment_tau2 = tau2[cat_codes]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(w > 0, segment_tau2 / (segment_tau2 + variance), 0.0)
+        table = table.copy()
+        table['shrinkage'] = 1 - weight
+        table['category_elasticity'] = category_mean[cat_codes]
+        table['elasticity'] = weight * raw + (1 - weight) * category_mean[cat_codes]
+
+        table.attrs['categories'] = {
+            str(c): {
+                'elasticity': round(float(category_mean[i]), 4),
+                'std_error': round(float(category_se[i]), 4),
+                'prior': float(prior[i]),
+                'between_segment_sd': round(float(np.sqrt(tau2[i])), 4),
+                'segments': int(np.sum(cat_codes == i))
+            }
+            for i, c in enumerate(categories)
+        }
+        return table
+
+    @classmethod
+    def estimate_table(cls, df: pd.DataFrame, category_priors: Dict[str, float], default_prior: float) -> Dict:
+        """Fit, shrink and package the elasticity table for persistence and O(1) lookups"""
+        table = cls.shrink(cls.fit_segments(df), category_priors, default_prior)
+        segments = {
+            cls.segment_key(row.product_name, row.emirate, row.store_type): {
+                'elasticity': round(float(row.elasticity), 4),
+                'raw_elasticity': None if np.isnan(row.raw_elasticity) else round(float(row.raw_elasticity), 4),
+                'std_error': None if np.isinf(row.std_error) else round(float(row.std_error), 4),
+                'shrinkage': round(float(row.shrinkage), 4),
+                'category': row.category,
+                'n_obs': int(row.n_obs)
+            }
+            for row in table.itertuples(index=False)
+        }
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'method': 'grouped log-log OLS with empirical Bayes shrinkage to category means',
+            'controls': cls.CONTROLS,
+            'categories': table.attrs['categories'],
+            'segments': segments
+        }
+
+    @staticmethod
+    def save_table(table: Dict, path: str):
+        with open(path, 'w') as f:
+            json.dump(table, f, indent=2)
+        logger.info("Saved elasticity table for %s segments to %s", len(table['segments']), path)
@@ -2,10 +2,21 @@
 Simple Profit Optimization Service using category-based price elasticity
 Provides realistic pricing recommendations based on product categories
 """
+import os
+import json
 import pandas as pd
 import numpy as np
 from typing import Dict, Tuple, Optional
 from services.data_service import DataService
+from services.elasticity_estimation_service import ElasticityEstimationService
+from services.online_elasticity_service import OnlineElasticityService
+from services.price_ladder_service import PriceLadderService
+from services.metrics_service import MetricsService
+from services.memory_service import MemoryService
+import logging
+from services.logging_service import get_logger, DecisionTrace
+
+logger = get_logger(__name__)
 
 class ElasticityService:
     """Service for category-based pricing optimization"""
@@ -14,6 +25,12 @@ class ElasticityService:
     MIN_MARGIN = 0.15  # Minimum 15% profit margin
     MAX_PRICE_CHANGE = 0.10  # Maximum 10% price increase (realistic business constraint)
     MIN_PRICE_CHANGE = -0.50  # Maximum 50% price decrease (reasonable floor)
+    BASELINE_DEMAND = 500  # Reference demand level for demand-responsive price caps
+    PRICE_GRID_POINTS = 50  # Candidate prices evaluated per optimization
+    
+    # Estimated per-segment elasticities (see estimate_elasticities.py)
+    elasticity_table = None
+    ELASTICITY_TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'segment_elasticities.json')
     
     # Realistic price elasticities by category (based on industry research)
     CATEGORY_ELASTICITIES = {
@@ -43,10 +60,81 @@ class ElasticityService:
     
     @classmethod
     def load_elasticity_model(cls):
-        """Compatibility method - no model loading needed"""
-        print("✓ Using category-based elasticity framework (no model file needed)")
+        """Load the per-segment elasticity table (category framework remains the fallback)"""
+        table = cls.load_elasticity_table()
+        if table.get('segments'):
+            logger.info("Using estimated elasticities for %s segments", len(table['segments']))
+        else:
+            logger.info("Using category-based elasticity framework")
         return True
     
+    @classmethod
+    def load_elasticity_table(cls) -> Dict:
+        """
+        Load the estimated elasticity table. If it has not been built yet, estimate it
+        from the historical data and persist it.
+        """
+        if cls.elasticity_table is None:
+            try:
+                with open(cls.ELASTICITY_TABLE_PATH, 'r') as f:
+                    cls.elasticity_table = json.load(f)
+                logger.info("Loaded elasticity table for %s segments", len(cls.elasticity_table['segments']))
+            except FileNotFoundError:
+                cls.elasticity_table = cls.rebuild_elasticity_table()
+            except Exception as e:
+                logger.warning("Could not load elasticity table: %s", e)
+                cls.elasticity_table = {'segments': {}}
+        return cls.elasticity_table
+    
+    @classmethod
+    def rebuild_elasticity_table(cls, save: bool = True) -> Dict:
+        """Re-estimate the elasticity table from the historical data (load or retrain time)"""
+        df = DataService.load_data()
+        if df.empty:
+            return {'segments': {}}
+        table = ElasticityEstimationService.estimate_table(
+            df,
+            {k: v for k, v in cls.CATEGORY_ELASTICITIES.items() if k != 'DEFAULT'},
+            cls.CATEGORY_ELASTICITIES['DEFAULT']
+        )
+        if save:
+            try:
+                ElasticityEstimationService.save_table(table, cls.ELASTICITY_TABLE_PATH)
+            except OSError as e:
+                logger.warning("Could not save elasticity table: %s", e)
+        cls.elasticity_table = table
+        return table
+    
+    @classmethod
+    def get_segment_elasticity(cls, product_name: str, emirate: str, store_type: str) -> Optional[float]:
+        """
+        Estimated elasticity for a segment: the online (streaming) estimate once it has
+        enough updates, else the table entry, else None
+        """
+        key = ElasticityEstimationService.segment_key(product_name, emirate, store_type)
+        online = OnlineElasticityService.get_estimate(key)
+        if online is not None:
+            return online['elasticity']
+        entry = cls.load_elasticity_table()['segments'].get(key)
+        return entry['elasticity'] if entry else None
+    
+    @classmethod
+    def ingest_sales(cls, observations) -> list:
+        """
+        Update online elasticities from new sales rows (dicts with product_name, emirate,
+        store_type, price, units and optionally is_weekend / is_holiday). Each segment
+        starts from its table elasticity (or category elasticity) as the prior.
+        """
+        table = cls.load_elasticity_table()['segments']
+        rows, priors = [], {}
+        for obs in observations:
+            key = ElasticityEstimationService.segment_key(obs['product_name'], obs['emirate'], obs['store_type'])
+            if key not in priors:
+                entry = table.get(key)
+                priors[key] = entry['elasticity'] if entry else cls._infer_elasticity_from_name(obs['product_name'])
+            rows.append({**obs, 'segment_key': key})
+        return OnlineElasticityService.update_many(rows, priors)
+    
     @classmethod
     def get_product_elasticity(
         cls,
@@ -61,18 +149,29 @@ class ElasticityService:
         promotion: str = "NO PROMO"
     ) -> float:
         """
-        Get price elasticity based on product category
+        Get price elasticity for a segment: the estimated table entry when available,
+        otherwise the product category
         Returns realistic elasticity coefficient (negative value)
         """
+        estimated = cls.get_segment_elasticity(product_name, emirate, store_type)
+        if estimated is not None:
+            elasticity = max(-2.0, min(-0.5, estimated))
+            if DecisionTrace.active():
+                DecisionTrace.record('elasticity.base', source='segment_estimate', elasticity=round(elasticity, 3))
+            logger.debug("%s: estimated segment elasticity %.3f", product_name, elasticity)
+            return elasticity
+        
         # Get product data to determine category
         df = DataService.get_product_data(product_name)
         
         if not df.empty and 'category' in df.columns:
             category = df['category'].iloc[0]
             elasticity = cls.CATEGORY_ELASTICITIES.get(category, cls.CATEGORY_ELASTICITIES['DEFAULT'])
+            source = 'category'
         else:
             # Fallback: infer from product name
             elasticity = cls._infer_elasticity_from_name(product_name)
+            source = 'product_name'
         
         # Add small random variation to make it more realistic
         variation = np.random.uniform(-0.05, 0.05)
@@ -81,9 +180,38 @@ class ElasticityService:
         # Ensure it's negative and within realistic bounds
         elasticity = max(-2.0, min(-0.5, elasticity))
         
-        print(f"Product: {product_name}, Category-based Elasticity: {elasticity:.3f}")
+        if DecisionTrace.active():
+            DecisionTrace.record('elasticity.base', source=source, elasticity=round(elasticity, 3))
+        logger.debug("%s: %s-based elasticity %.3f", product_name, source, elasticity)
         return elasticity
     
+    @classmethod
+    def get_base_elasticities(cls, product_names, categories, emirates=None, store_types=None) -> np.ndarray:
+        """
+        Batch version of get_product_elasticity for many segments at once.
+        Segments found in the estimated table use it; the rest use the category
+        elasticity (or name-based inference when the category is unknown) with the
+        same small variation. All values get the single-segment bounds.
+        """
+        fallback = np.array([
+            cls.CATEGORY_ELASTICITIES.get(category, cls.CATEGORY_ELASTICITIES['DEFAULT'])
+            if isinstance(category, str) else cls._infer_elasticity_from_name(name)
+            for name, category in zip(product_names, categories)
+        ], dtype=float)
+        
+        # Add small random variation to make it more realistic
+        elasticities = fallback + np.random.uniform(-0.05, 0.05, size=len(fallback))
+        
+        if emirates is not None and store_types is not None:
+            estimated = np.array([
+                cls.get_segment_elasticity(name, emirate, store_type)
+                for name, emirate, store_type in zip(product_names, emirates, store_types)
+            ], dtype=float)
+            elasticities = np.where(np.isnan(estimated), elasticities, estimated)
+        
+        # Ensure it's negative and within realistic bounds
+        return np.clip(elasticities, -2.0, -0.5)
+    
     @classmethod
     def get_dynamic_elasticity(
         cls,
@@ -129,43 +257,43 @@ class ElasticityService:
                 # DEVASTATING punishment: 15x to 25x more elastic (demand will COLLAPSE)
                 base_punishment = 1.0 + (abs_price_change / 8) ** 3.0
                 adjustment_factor = min(25.0, base_punishment)
-                adjustment_reason = f"CATASTROPHIC price increase (+{abs_price_change:.0f}%) - DEVASTATING exponential punishment (market will reject)"
+                adjustment_reason = "CATASTROPHIC price increase (+{change:.0f}%) - DEVASTATING exponential punishment (market will reject)"
                 
             elif abs_price_change > 15:  # 15-20% increase - EXTREME
                 # Massive punishment: 8x to 15x more elastic
                 base_punishment = 1.0 + (abs_price_change / 10) ** 2.8
                 adjustment_factor = min(15.0, base_punishment)
-                adjustment_reason = f"EXTREME price increase (+{abs_price_change:.0f}%) - massive exponential punishment"
+                adjustment_reason = "EXTREME price increase (+{change:.0f}%) - massive exponential punishment"
                 
             elif abs_price_change > 12:  # 12-15% increase - VERY AGGRESSIVE
                 # Very heavy punishment: 5x to 8x more elastic
                 base_punishment = 1.0 + (abs_price_change / 12) ** 2.6
                 adjustment_factor = min(8.0, base_punishment)
-                adjustment_reason = f"Very aggressive price increase (+{abs_price_change:.0f}%) - very heavy exponential punishment"
+                adjustment_reason = "Very aggressive price increase (+{change:.0f}%) - very heavy exponential punishment"
                 
             elif abs_price_change > 10:  # 10-12% increase - AGGRESSIVE (target threshold)
                 # Heavy exponential punishment: 3.5x to 5x more elastic
                 base_punishment = 1.0 + (abs_price_change / 14) ** 2.4
                 adjustment_factor = min(5.0, base_punishment)
-                adjustment_reason = f"Aggressive price increase (+{abs_price_change:.0f}%) - heavy exponential punishment (above 10% threshold)"
+                adjustment_reason = "Aggressive price increase (+{change:.0f}%) - heavy exponential punishment (above 10% threshold)"
                 
             elif abs_price_change > 8:  # 8-10% increase - MODERATE-HIGH
                 # Strong exponential punishment: 2.5x to 3.5x more elastic
                 base_punishment = 1.0 + (abs_price_change / 16) ** 2.2
                 adjustment_factor = min(3.5, base_punishment)
-                adjustment_reason = f"Moderate-high price increase (+{abs_price_change:.0f}%) - strong exponential punishment"
+                adjustment_reason = "Moderate-high price increase (+{change:.0f}%) - strong exponential punishment"
                 
             elif abs_price_change > 6:  # 6-8% increase - MODERATE
                 # Moderate exponential punishment: 1.8x to 2.5x more elastic
                 base_punishment = 1.0 + (abs_price_change / 20) ** 2.0
                 adjustment_factor = min(2.5, base_punishment)
-                adjustment_reason = f"Moderate price increase (+{abs_price_change:.0f}%) - moderate exponential punishment"
+                adjustment_reason = "Moderate price increase (+{change:.0f}%) - moderate exponential punishment"
                 
             elif abs_price_change > 4:  # 4-6% increase - LOW-MODERATE
                 # Noticeable exponential punishment: 1.5x to 1.8x more elastic
                 base_punishment = 1.0 + (abs_price_change / 25) ** 1.8
                 adjustment_factor = min(1.8, base_punishment)
-                adjustment_reason = f"Low-moderate price increase (+{abs_price_change:.0f}%) - noticeable exponential punishment"
+                adjustment_reason = "Low-moderate price increase (+{change:.0f}%) - noticeable exponential punishment"
                 
             else:  # <4% increase - SMALL
                 # Quadratic punishment even for small increases
@@ -175,12 +303,12 @@ class ElasticityService:
                 # Minor modulation based on demand trend
                 if demand_change_percent > 8:
                     adjustment_factor *= 0.85  # Strong demand = slight relief
-                    adjustment_reason = f"Small increase (+{abs_price_change:.0f}%) with very strong demand - reduced punishment"
+                    adjustment_reason = "Small increase (+{change:.0f}%) with very strong demand - reduced punishment"
                 elif demand_change_percent > 3:
                     adjustment_factor *= 0.95  # Some demand = minimal relief
-                    adjustment_reason = f"Small increase (+{abs_price_change:.0f}%) with good demand - slight punishment"
+                    adjustment_reason = "Small increase (+{change:.0f}%) with good demand - slight punishment"
                 else:
-                    adjustment_reason = f"Small increase (+{abs_price_change:.0f}%) - quadratic punishment"
+                    adjustment_reason = "Small increase (+{change:.0f}%) - quadratic punishment"
             
             # Modulate based on demand trend for ALL price increases
             if abs_price_change > 4:  # Only modulate for increases above 4%
@@ -206,35 +334,35 @@ class ElasticityService:
                 # EXPLOSIVE demand influx: 5-10x MORE responsive
                 reward_factor = (abs_price_change / 40) ** 1.8
                 adjustment_factor = max(0.15, 1.0 - reward_factor)
-                adjustment_reason = f"FIRE SALE discount (-{abs_price_change:.0f}%) - EXPLOSIVE demand influx (customers rushing in)"
+                adjustment_reason = "FIRE SALE discount (-{change:.0f}%) - EXPLOSIVE demand influx (customers rushing in)"
                 
             elif abs_price_change > 40:  # 40-60% decrease - MEGA SALE
                 # Massive demand influx: 3-5x more responsive
                 reward_factor = (abs_price_change / 50) ** 1.6
                 adjustment_factor = max(0.25, 1.0 - reward_factor)
-                adjustment_reason = f"MEGA SALE discount (-{abs_price_change:.0f}%) - massive demand influx (exponential)"
+                adjustment_reason = "MEGA SALE discount (-{change:.0f}%) - massive demand influx (exponential)"
                 
             elif abs_price_change > 30:  # 30-40% decrease - BIG SALE
                 # Very strong demand influx: 2-3x more responsive
                 reward_factor = (abs_price_change / 60) ** 1.5
                 adjustment_factor = max(0.35, 1.0 - reward_factor)
-                adjustment_reason = f"Big discount (-{abs_price_change:.0f}%) - very strong demand influx (exponential)"
+                adjustment_reason = "Big discount (-{change:.0f}%) - very strong demand influx (exponential)"
                 
             elif abs_price_change > 20:  # 20-30% decrease - SALE
                 # Strong demand response: 1.5-2x more responsive
                 reward_factor = (abs_price_change / 80) ** 1.4
                 adjustment_factor = max(0.5, 1.0 - reward_factor)
-                adjustment_reason = f"Good discount (-{abs_price_change:.0f}%) - strong demand response"
+                adjustment_reason = "Good discount (-{change:.0f}%) - strong demand response"
                 
             elif abs_price_change > 10:  # 10-20% decrease
                 # Moderate response
                 adjustment_factor = 0.8
-                adjustment_reason = f"Small discount (-{abs_price_change:.0f}%) - moderate demand response"
+                adjustment_reason = "Small discount (-{change:.0f}%) - moderate demand response"
                 
             else:  # <10% decrease
                 # Minimal response
                 adjustment_factor = 0.95
-                adjustment_reason = f"Minor discount (-{abs_price_change:.0f}%) - slight demand response"
+                adjustment_reason = "Minor discount (-{change:.0f}%) - slight demand response"
             
             # Modulate based on demand trend for price cuts
             if abs_price_change > 15:
@@ -259,16 +387,23 @@ class ElasticityService:
         # Ensure realistic bounds (increased upper bound for extreme punishments)
         adjusted_elasticity = max(-15.0, min(-0.2, adjusted_elasticity))
         
-        # Calculate effective multiplier for logging
-        elasticity_multiplier = abs(adjusted_elasticity / base_elasticity) if base_elasticity != 0 else 1.0
-        
-        print(f"  🎯 Dynamic Elasticity Adjustment (Exponential):")
-        print(f"    📊 Demand trend: {demand_change_percent:+.1f}%")
-        print(f"    💰 Price change: {price_change_percent:+.1f}%")
-        print(f"    📉 Base elasticity: {base_elasticity:.3f}")
-        print(f"    ⚡ Adjustment: {adjustment_factor:.2f}x")
-        print(f"    🎪 Result: {adjusted_elasticity:.3f} ({elasticity_multiplier:.1f}x sensitivity)")
-        print(f"    💡 Reason: {adjustment_reason}")
+        # Reasons are templates: formatted only when a trace or debug log will show them
+        if DecisionTrace.active() or logger.isEnabledFor(logging.DEBUG):
+            reason = adjustment_reason.format(change=abs_price_change)
+            DecisionTrace.record(
+                'elasticity.adjustment',
+                base_elasticity=round(base_elasticity, 3),
+                demand_change_pct=round(demand_change_percent, 1),
+                price_change_pct=round(price_change_percent, 1),
+                adjustment_factor=round(adjustment_factor, 2),
+                adjusted_elasticity=round(adjusted_elasticity, 3),
+                reason=reason
+            )
+            logger.debug(
+                "Dynamic elasticity %.3f x %.2f -> %.3f (demand %+.1f%%, price %+.1f%%): %s",
+                base_elasticity, adjustment_factor, adjusted_elasticity,
+                demand_change_percent, price_change_percent, reason
+            )
         
         return adjusted_elasticity
     
@@ -333,6 +468,198 @@ class ElasticityService:
         return max(0, new_demand)  # Demand can't be negative
     
     @classmethod
+    def get_dynamic_elasticity_array(
+        cls,
+        base_elasticity,
+        price_change_percent,
+        demand_change_percent: float = 0.0
+    ) -> np.ndarray:
+        """
+        Vectorized counterpart of get_dynamic_elasticity.
+        
+        Applies the same exponential punishment/reward tiers to a whole array of
+        price changes at once (no per-candidate Python loop, no logging), so it can
+        be used to evaluate full price grids for one or many segments.
+        
+        Args:
+            base_elasticity: Base elasticity coefficient(s), broadcastable against price_change_percent
+            price_change_percent: Array of intended price changes in percent (positive = increase)
+            demand_change_percent: Demand trend in percent (scalar)
+        
+        Returns:
+            Array of adjusted elasticity coefficients with the broadcast shape of the inputs
+        """
+        adjustment_factor = cls.get_dynamic_adjustment_factors(price_change_percent, demand_change_percent)
+        return np.clip(np.asarray(base_elasticity, dtype=float) * adjustment_factor, -15.0, -0.2)
+    
+    @classmethod
+    def get_dynamic_adjustment_factors(
+        cls,
+        price_change_percent,
+        demand_change_percent: float = 0.0
+    ) -> np.ndarray:
+        """
+        Elasticity multipliers of the dynamic adjustment for an array of price changes
+        (before the realistic-bounds clipping applied in get_dynamic_elasticity_array)
+        """
+        pct = np.asarray(price_change_percent, dtype=float)
+        a = np.abs(pct)
+        dc = demand_change_percent
+        
+        # Price INCREASE tiers: factor = min(cap, 1 + (change/divisor)^exponent)
+        increase = np.select(
+            [a > 20, a > 15, a > 12, a > 10, a > 8, a > 6, a > 4],
+            [
+                np.minimum(25.0, 1.0 + (a / 8) ** 3.0),
+                np.minimum(15.0, 1.0 + (a / 10) ** 2.8),
+                np.minimum(8.0, 1.0 + (a / 12) ** 2.6),
+                np.minimum(5.0, 1.0 + (a / 14) ** 2.4),
+                np.minimum(3.5, 1.0 + (a / 16) ** 2.2),
+                np.minimum(2.5, 1.0 + (a / 20) ** 2.0),
+                np.minimum(1.8, 1.0 + (a / 25) ** 1.8),
+            ],
+            default=np.minimum(1.4, 1.0 + (a / 30) ** 1.6)
+        )
+        if dc > 8:
+            small_relief = 0.85
+        elif dc > 3:
+            small_relief = 0.95
+        else:
+            small_relief = 1.0
+        if dc > 10:
+            trend = 0.75
+        elif dc > 5:
+            trend = 0.90
+        elif dc < -10:
+            trend = 1.5
+        elif dc < -5:
+            trend = 1.25
+        else:
+            trend = 1.0
+        increase = increase * np.where(a > 4, trend, small_relief)
+        
+        # Price DECREASE tiers: factor = max(floor, 1 - (change/divisor)^exponent)
+        decrease = np.select(
+            [a > 60, a > 40, a > 30, a > 20, a > 10],
+            [
+                np.maximum(0.15, 1.0 - (a / 40) ** 1.8),
+                np.maximum(0.25, 1.0 - (a / 50) ** 1.6),
+                np.maximum(0.35, 1.0 - (a / 60) ** 1.5),
+                np.maximum(0.5, 1.0 - (a / 80) ** 1.4),
+                0.8,
+            ],
+            default=0.95
+        )
+        if dc < -10:
+            cut_trend = 0.8
+        elif dc < -5:
+            cut_trend = 0.9
+        elif dc > 5:
+            cut_trend = 1.1
+        else:
+            cut_trend = 1.0
+        decrease = decrease * np.where(a > 15, cut_trend, 1.0)
+        
+        return np.where(pct > 0, increase, np.where(pct < 0, decrease, 1.0))
+    
+    @classmethod
+    def describe_demand_level(cls, demand_ratio: float) -> str:
+        """Descriptive demand context for a demand ratio (current demand / baseline demand)"""
+        if demand_ratio >= 2.0:
+            return "EXCEPTIONAL"
+        if demand_ratio < 0.4:
+            return "VERY LOW"
+        if demand_ratio >= 1.5:
+            return "VERY HIGH"
+        if demand_ratio >= 1.2:
+            return "HIGH"
+        if demand_ratio >= 0.9:
+            return "ABOVE AVERAGE"
+        if demand_ratio >= 0.7:
+            return "AVERAGE"
+        if demand_ratio >= 0.5:
+            return "BELOW AVERAGE"
+        return "LOW"
+    
+    @classmethod
+    def compute_price_bounds(cls, current_price, current_demand, estimated_cost) -> Dict:
+        """
+        Demand-responsive price search range.
+        
+        Accepts scalars or equally shaped arrays (one entry per segment) and returns
+        a dict of arrays with min_price, max_price, max_price_increase, demand_ratio
+        and margin_conflict.
+        """
+        current_price = np.asarray(current_price, dtype=float)
+        estimated_cost = np.asarray(estimated_cost, dtype=float)
+        
+        # Calculate demand level relative to a baseline (500 units as reference)
+        demand_ratio = np.asarray(current_demand, dtype=float) / cls.BASELINE_DEMAND
+        
+        # CONTINUOUS SCALING between 0.4x and 2.0x demand: 2% (very low) to 10% (exceptional)
+        # with a slight curve (power of 0.9 for gradual acceleration)
+        normalized_ratio = np.clip((demand_ratio - 0.4) / (2.0 - 0.4), 0, 1)
+        max_price_increase = np.where(
+            demand_ratio >= 2.0, 0.10,
+            np.where(demand_ratio >= 0.4, 0.02 + (0.10 - 0.02) * normalized_ratio ** 0.9, 0.02)
+        )
+        
+        min_price = np.maximum(
+            estimated_cost * (1 + cls.MIN_MARGIN),  # Must maintain minimum margin
+            current_price * (1 + cls.MIN_PRICE_CHANGE)  # Can't drop more than 50%
+        )
+        max_price = current_price * (1 + max_price_increase)
+        
+        # If minimum margin requirement conflicts with demand-adjusted cap, prioritize demand cap
+        margin_conflict = min_price > max_price
+        min_price = np.where(margin_conflict, current_price * 0.95, min_price)
+        
+        return {
+            'min_price': min_price,
+            'max_price': max_price,
+            'max_price_increase': max_price_increase,
+            'demand_ratio': demand_ratio,
+            'margin_conflict': margin_conflict
+        }
+    
+    @classmethod
+    def evaluate_price_candidates(
+        cls,
+        base_elasticity,
+        current_price,
+        current_demand,
+        estimated_cost,
+        price_candidates
+    ) -> Dict[str, np.ndarray]:
+        """
+        Evaluate demand, revenue and profit for a grid of candidate prices in one pass.
+        
+        Scalars evaluate a single segment over a 1-D grid. For a batch of segments pass
+        per-segment values with shape (S, 1) and candidates with shape (S, K).
+        """
+        prices = np.asarray(price_candidates, dtype=float)
+        current_price = np.asarray(current_price, dtype=float)
+        current_demand = np.asarray(current_demand, dtype=float)
+        
+        price_change_pct = (prices - current_price) / current_price * 100
+        adjusted_elasticity = cls.get_dynamic_elasticity_array(base_elasticity, price_change_pct)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            demand = current_demand * (prices / current_price) ** adjusted_elasticity
+        valid = (current_price > 0) & (prices > 0)
+        demand = np.maximum(0, np.where(valid, demand, current_demand))
+        
+        return {
+            'price': prices,
+            'demand': demand,
+            'revenue': prices * demand,
+            'profit': (prices - estimated_cost) * demand,
+            'adjusted_elasticity': adjusted_elasticity,
+            'price_change_pct': price_change_pct
+        }
+    
+    @classmethod
+    @MetricsService.timed('elasticity_search')
     def optimize_price_for_profit(
         cls,
         product_name: str,
@@ -343,12 +670,18 @@ class ElasticityService:
         month: int,
         day_of_week: int,
         is_weekend: int = 0,
-        is_holiday: int = 0
+        is_holiday: int = 0,
+        use_price_ladder: bool = False,
+        currency_rate: float = 1.0
     ) -> Dict:
         """
         Find the profit-maximizing price using ADJUSTED elasticity
         Uses iterative optimization that accounts for dynamic elasticity changes
         DEMAND-RESPONSIVE: Higher demand locations allow higher price increases
+        
+        With use_price_ladder the candidates are the segment's valid shelf prices
+        (PriceLadderService, defined in shelf currency = price * currency_rate) and the
+        best of them is returned even if it does not beat holding the current price.
         """
         # Get BASE elasticity for this product category
         base_elasticity = cls.get_product_elasticity(
@@ -360,125 +693,93 @@ class ElasticityService:
         estimated_cost = cls.estimate_cost(product_name, current_price)
         
         # DYNAMIC DEMAND-BASED PRICING FLEXIBILITY
-        # Calculate demand level relative to a baseline (500 units as reference)
-        baseline_demand = 500
-        demand_ratio = current_demand / baseline_demand
-        
-        # CONTINUOUS SCALING: Price increase allowance grows smoothly with demand
-        # Formula: max_increase = min_rate + (demand_ratio - min_ratio) * scale_factor
-        # This creates a smooth curve instead of rigid tiers
-        
-        if demand_ratio >= 2.0:
-            # Exceptional demand (1000+ units): Allow up to 10% increase
-            max_price_increase = 0.10
-            demand_context = "EXCEPTIONAL"
-        elif demand_ratio >= 0.4:
-            # Dynamic scaling between 0.4x and 2.0x demand
-            # Range: 2% (very low) to 10% (exceptional)
-            # Linear interpolation for smooth transitions
-            min_increase = 0.02  # Floor at 2% for very low demand
-            max_increase = 0.10  # Ceiling at 10% for exceptional demand
-            
-            # Normalize demand_ratio to 0-1 range
-            normalized_ratio = (demand_ratio - 0.4) / (2.0 - 0.4)
-            normalized_ratio = max(0, min(1, normalized_ratio))  # Clamp to [0,1]
-            
-            # Apply smooth scaling with slight curve (power of 0.9 for gradual acceleration)
-            max_price_increase = min_increase + (max_increase - min_increase) * (normalized_ratio ** 0.9)
-            
-            # Descriptive context based on ratio
-            if demand_ratio >= 1.5:
-                demand_context = "VERY HIGH"
-            elif demand_ratio >= 1.2:
-                demand_context = "HIGH"
-            elif demand_ratio >= 0.9:
-                demand_context = "ABOVE AVERAGE"
-            elif demand_ratio >= 0.7:
-                demand_context = "AVERAGE"
-            elif demand_ratio >= 0.5:
-                demand_context = "BELOW AVERAGE"
-            else:
-                demand_context = "LOW"
-        else:
-            # Extremely low demand (<200 units): Severely restrict to 2%
-            max_price_increase = 0.02
-            demand_context = "VERY LOW"
-        
-        # Define price search range with DEMAND-ADJUSTED maximum increase
-        strict_max_price = current_price * (1 + max_price_increase)
-        
-        min_price = max(
-            estimated_cost * (1 + cls.MIN_MARGIN),  # Must maintain minimum margin
-            current_price * (1 + cls.MIN_PRICE_CHANGE)  # Can't drop more than 50%
-        )
-        max_price = strict_max_price
+        bounds = cls.compute_price_bounds(current_price, current_demand, estimated_cost)
+        demand_ratio = float(bounds['demand_ratio'])
+        max_price_increase = float(bounds['max_price_increase'])
+        min_price = float(bounds['min_price'])
+        max_price = float(bounds['max_price'])
+        demand_context = cls.describe_demand_level(demand_ratio)
         
         # If minimum margin requirement conflicts with demand-adjusted cap, prioritize demand cap
-        if min_price > max_price:
-            print(f"  ⚠️ WARNING: Margin requirement conflicts with demand-adjusted cap.")
-            print(f"  ⚠️ Accepting lower margin to respect demand-based pricing constraint.")
-            min_price = current_price * 0.95  # At least search from -5% to adjusted max
-        
-        print(f"\n🎯 Starting DYNAMIC DEMAND-RESPONSIVE optimization for {product_name}")
-        print(f"  Location: {emirate} - {store_type}")
-        print(f"  Current demand: {current_demand:.0f} units (Demand level: {demand_context})")
-        print(f"  Demand ratio: {demand_ratio:.2f}x baseline")
-        print(f"  Max price increase allowed: +{max_price_increase*100:.1f}% (dynamically scaled)")
-        print(f"  Base elasticity: {base_elasticity:.3f}")
-        print(f"  Price range: AED {min_price:.2f} - {max_price:.2f}")
+        if bounds['margin_conflict']:
+            logger.debug("%s: margin requirement conflicts with the demand-adjusted cap; accepting lower margin",
+                         product_name)
+        
+        if DecisionTrace.active():
+            DecisionTrace.record(
+                'optimize.bounds',
+                current_demand=round(current_demand, 1),
+                demand_level=demand_context,
+                demand_ratio=round(demand_ratio, 2),
+                max_price_increase_pct=round(max_price_increase * 100, 1),
+                estimated_cost=round(estimated_cost, 4),
+                min_price=round(min_price, 4),
+                max_price=round(max_price, 4),
+                margin_conflict=bool(bounds['margin_conflict'])
+            )
+        logger.debug(
+            "Optimizing %s in %s / %s: demand %.0f (%s, %.2fx baseline), max increase +%.1f%%, "
+            "base elasticity %.3f, price range %.2f - %.2f",
+            product_name, emirate, store_type, current_demand, demand_context, demand_ratio,
+            max_price_increase * 100, base_elasticity, min_price, max_price
+        )
         
         # Grid search with ADJUSTED ELASTICITY for each price point
         # This is more accurate than using a single theoretical optimal
-        price_candidates = np.linspace(min_price, max_price, 50)  # More granular search
+        ladder = None
+        if use_price_ladder:
+            ladder = PriceLadderService.get_candidates(min_price, max_price, emirate, store_type, currency_rate)
+            price_candidates = ladder['prices']
+            logger.debug("Price ladder: %d shelf prices (%s endings %s)", len(price_candidates), ladder['currency'], ladder['endings'])
+        else:
+            price_candidates = np.linspace(min_price, max_price, cls.PRICE_GRID_POINTS)
+        evaluation = cls.evaluate_price_candidates(
+            base_elasticity, current_price, current_demand, estimated_cost, price_candidates
+        )
         best_price = current_price
         best_profit = (current_price - estimated_cost) * current_demand
         best_demand = current_demand
         best_adjusted_elasticity = base_elasticity
         
-        all_results = []
-        
-        for test_price in price_candidates:
-            # Calculate price change percentage
-            price_change_pct = ((test_price - current_price) / current_price) * 100
-            
-            # Get ADJUSTED elasticity for this specific price change
-            adjusted_elasticity = cls.get_dynamic_elasticity(
-                base_elasticity=base_elasticity,
-                current_demand=current_demand,
-                predicted_demand=current_demand,  # Use current as baseline
-                price_change_percent=price_change_pct
+        all_results = [
+            {
+                'price': evaluation['price'][i],
+                'demand': evaluation['demand'][i],
+                'profit': evaluation['profit'][i],
+                'revenue': evaluation['revenue'][i],
+                'adjusted_elasticity': evaluation['adjusted_elasticity'][i],
+                'price_change_pct': evaluation['price_change_pct'][i]
+            }
+            for i in range(len(price_candidates))
+        ]
+        
+        # Track best (first strictly better candidate than holding the current price;
+        # on a ladder the current price may not be a valid shelf price)
+        best_idx = int(np.argmax(evaluation['profit']))
+        if ladder is not None or evaluation['profit'][best_idx] > best_profit:
+            best_profit = float(evaluation['profit'][best_idx])
+            best_price = float(evaluation['price'][best_idx])
+            best_demand = float(evaluation['demand'][best_idx])
+            best_adjusted_elasticity = float(evaluation['adjusted_elasticity'][best_idx])
+        
+        if DecisionTrace.active():
+            DecisionTrace.record(
+                'optimize.candidates',
+                count=len(price_candidates),
+                price_ladder=ladder is not None,
+                best_index=best_idx,
+                best_candidate_profit=round(float(evaluation['profit'][best_idx]), 4),
+                holds_current_price=best_price == current_price
             )
-            
-            # Predict demand using ADJUSTED elasticity
-            test_demand = cls.predict_demand_at_price(
-                current_demand, adjusted_elasticity, current_price, test_price
+            DecisionTrace.record(
+                'optimize.result',
+                price=round(best_price, 4),
+                profit=round(best_profit, 4),
+                demand=round(best_demand, 1),
+                adjusted_elasticity=round(best_adjusted_elasticity, 3)
             )
-            
-            # Calculate profit
-            test_profit = (test_price - estimated_cost) * test_demand
-            test_revenue = test_price * test_demand
-            
-            all_results.append({
-                'price': test_price,
-                'demand': test_demand,
-                'profit': test_profit,
-                'revenue': test_revenue,
-                'adjusted_elasticity': adjusted_elasticity,
-                'price_change_pct': price_change_pct
-            })
-            
-            # Track best
-            if test_profit > best_profit:
-                best_profit = test_profit
-                best_price = test_price
-                best_demand = test_demand
-                best_adjusted_elasticity = adjusted_elasticity
-        
-        print(f"\n  ✅ Optimal price found: AED {best_price:.2f}")
-        print(f"  ✅ Using adjusted elasticity: {best_adjusted_elasticity:.3f}")
-        print(f"  ✅ Expected profit: AED {best_profit:.2f}")
-        
-        is_constrained = (abs(best_price - min_price) < 0.01) or (abs(best_price - max_price) < 0.01)
+        logger.debug("Optimal price %.2f (adjusted elasticity %.3f, expected profit %.2f)",
+                     best_price, best_adjusted_elasticity, best_profit)
         
         is_constrained = (abs(best_price - min_price) < 0.01) or (abs(best_price - max_price) < 0.01)
         
@@ -529,6 +830,16 @@ class ElasticityService:
         else:
             reasoning += f" (True optimum found within demand-adjusted range.)"
         
+        price_ladder = None
+        if ladder is not None:
+            price_ladder = {
+                'shelf_price': float(ladder['shelf_prices'][best_idx]),
+                'currency': ladder['currency'],
+                'endings': ladder['endings'],
+                'candidates': len(price_candidates)
+            }
+            reasoning += f" Shelf price on the {ladder['currency']} price ladder: {price_ladder['shelf_price']:.2f}."
+        
         # Prepare curve data (subsample for efficiency)
         curve_data = all_results[::2]  # Every other point
         
@@ -578,5 +889,13 @@ class ElasticityService:
                     'profit': round(r['profit'], 2)
                 }
                 for r in curve_data
-            ]
+            ],
+            'price_ladder': price_ladder
         }
+
+
+MemoryService.register(
+    'elasticity', 'Estimated per-segment elasticity table',
+    lambda: MemoryService.deep_sizeof(ElasticityService.elasticity_table),
+    owners=[ElasticityService.load_elasticity_table]
+)
@@ -0,0 +1,629 @@
+"""
+Background jobs for long-running optimization runs
+In-process worker pool with cancellation, a concurrency limit and on-disk results;
+no external broker. Set JOB_QUEUE_BACKEND=sqlite to also keep the queue in a local
+SQLite database so queued and interrupted jobs are resumed after a restart.
+
+The memory backend is per process: with several uvicorn workers a job is only visible
+to the worker that accepted it. Use the SQLite backend there; workers then claim jobs
+atomically and serve and cancel each other's jobs through the database
+"""
+import os
+import json
+import uuid
+import sqlite3
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from services.metrics_service import MetricsService
+from services.memory_service import MemoryService
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when the job has been cancelled"""
+
+
+class JobQueueFull(Exception):
+    """Raised on submit when too many jobs are waiting"""
+
+
+def worker_identity(pid: Optional[int] = None) -> str:
+    """
+    pid plus the process start time (where /proc has it), so a pid reused after a
+    restart is not mistaken for the worker that claimed a job
+    """
+    pid = pid or os.getpid()
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            started = f.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        started = ''
+    return f"{pid}:{started}"
+
+
+def worker_alive(owner: str) -> bool:
+    """Whether the worker identified by worker_identity() is still running"""
+    pid = int(owner.split(':', 1)[0])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return worker_identity(pid) == owner
+
+
+class JobContext:
+    """Handle passed to job handlers for progress, partial results and cancellation checks"""
+
+    def __init__(self, job: Dict):
+        self.job = job
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job['cancel_event'].is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None):
+        """Report progress; also a cancellation point, for cancels made on any worker"""
+        with JobService.lock:
+            self.job['progress'] = progress = {
+                'done': done,
+                'total': total if total is not None else self.job['progress'].get('total'),
+                'message': message
+            }
+        self.check_cancelled()
+        store = JobService.store
+        if store is not None and store.update_progress(self.job['id'], progress):
+            self.job['cancel_event'].set()
+        self.check_cancelled()
+
+    def add_partial(self, record: Dict):
+        """
+        Publish one partial result (e.g. a finished segment) before the job completes.
+        Memory holds the latest MAX_PARTIAL_RESULTS; the SQLite store keeps them all
+        """
+        with JobService.lock:
+            index = self.job['partial_results_count']
+            self.job['partial_results'].append(record)
+            self.job['partial_results_count'] += 1
+        store = JobService.store
+        if store is not None:
+            store.add_partial(self.job['id'], index, record)
+
+
+class SQLiteJobStore:
+    """
+    Durable queue shared by every worker: one row per job, updated on every state change,
+    plus the job's partial results. A queued row is claimed atomically before it runs, so
+    a job runs once however many workers have it queued
+    """
+
+    # Columns added for multi-worker serving; databases created before them gain them on open
+    EXTRA_COLUMNS = (
+        ('progress', "TEXT NOT NULL DEFAULT '{}'"),
+        ('error', 'TEXT'),
+        ('started_at', 'TEXT'),
+        ('finished_at', 'TEXT'),
+        ('owner', 'TEXT'),  # worker_identity() of the worker running the job
+        ('cancel_requested', 'INTEGER NOT NULL DEFAULT 0')
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # Readers in one worker do not block the writer in another
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )"""
+        )
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+        for column, definition in self.EXTRA_COLUMNS:
+            if column not in columns:
+                self.connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS job_partials (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            )"""
+        )
+        self.connection.commit()
+
+    def _update(self, sql: str, args: tuple) -> int:
+        with self.lock:
+            changed = self.connection.execute(sql, args).rowcount
+            self.connection.commit()
+        return changed
+
+    def save(self, job: Dict):
+        """Insert or update a job row; a pending cancel request is kept"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO jobs (id, job_type, params, status, progress, error, created_at, started_at, "
+                "finished_at, owner, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, progress = excluded.progress, "
+                "error = excluded.error, started_at = excluded.started_at, finished_at = excluded.finished_at, "
+                "owner = excluded.owner, updated_at = excluded.updated_at",
+                (job['id'], job['job_type'], json.dumps(job['params']), job['status'], json.dumps(job['progress']),
+                 job['error'], job['created_at'], job['started_at'], job['finished_at'], job['owner'],
+                 datetime.now().isoformat())
+            )
+            self.connection.commit()
+
+    def claim(self, job_id: str, owner: str, started_at: str) -> bool:
+        """Move a queued job to running for this worker; False if another worker got there first"""
+        return self._update(
+            "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'queued'",
+            (owner, started_at, started_at, job_id)
+        ) == 1
+
+    def requeue(self, job_id: str, owner: Optional[str]) -> bool:
+        """Queue a running job again if it is still held by the given (gone) worker"""
+        return self._update(
+            "UPDATE jobs SET status = 'queued', owner = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND owner IS ?",
+            (datetime.now().isoformat(), job_id, owner)
+        ) == 1
+
+    def cancel_queued(self, job_id: str) -> bool:
+        """Cancel a job that no worker has claimed yet"""
+        now = datetime.now().isoformat()
+        return self._update(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'queued'",
+            (now, now, job_id)
+        ) == 1
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Ask the worker running a job to stop at its next progress report"""
+        return self._update(
+            "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,)
+        ) == 1
+
+    def update_progress(self, job_id: str, progress: Dict) -> bool:
+        """Record progress; returns True when the job has been asked to cancel"""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(progress), datetime.now().isoformat(), job_id)
+            )
+            self.connection.commit()
+            row = self.connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def add_partial(self, job_id: str, index: int, record: Dict):
+        self._update(
+            "INSERT OR REPLACE INTO job_partials (job_id, seq, record) VALUES (?, ?, ?)",
+            (job_id, index, json.dumps(record, default=str))
+        )
+
+    def partials(self, job_id: str, since: int = 0) -> List[Dict]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT record FROM job_partials WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, since)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def status(self, job_id: str) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def load(self, job_id: str, include_results: bool = True, since: int = 0) -> Optional[Dict]:
+        """Public view of a job as stored (the final result is only in the results directory)"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id, job_type, params, status, progress, error, created_at, started_at, finished_at, "
+                "(SELECT COUNT(*) FROM job_partials WHERE job_id = jobs.id) FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        description = {
+            'id': row[0], 'job_type': row[1], 'params': json.loads(row[2]), 'status': row[3],
+            'progress': json.loads(row[4]), 'error': row[5], 'created_at': row[6],
+            'started_at': row[7], 'finished_at': row[8], 'partial_results_count': row[9]
+        }
+        if include_results:
+            description['partial_results'] = self.partials(job_id, since)
+            description['result'] = None
+        return description
+
+    def pending(self) -> List[Dict]:
+        """Jobs that are queued, or were running when their worker stopped, oldest first"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, job_type, params, created_at, status, owner FROM jobs "
+                "WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [
+            {'id': row[0], 'job_type': row[1], 'params': json.loads(row[2]), 'created_at': row[3],
+             'status': row[4], 'owner': row[5]}
+            for row in rows
+        ]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class JobService:
+    """Service for submitting, tracking and cancelling background jobs"""
+
+    handlers = {}
+    jobs = {}
+    lock = threading.RLock()
+    executor = None
+    store = None
+    shutting_down = False
+
+    MAX_CONCURRENT_JOBS = int(os.getenv('JOB_MAX_CONCURRENCY', '2'))
+    MAX_QUEUED_JOBS = int(os.getenv('JOB_MAX_QUEUED', '100'))
+    QUEUE_BACKEND = os.getenv('JOB_QUEUE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+    RESULTS_DIR = os.getenv('JOB_RESULTS_DIR', os.path.join(BACKEND_DIR, 'job_results'))
+    SQLITE_PATH = os.getenv('JOB_QUEUE_DB', os.path.join(BACKEND_DIR, 'jobs.db'))
+    MAX_STORED_RESULTS = 200  # Finished jobs kept in memory and on disk
+    MAX_PARTIAL_RESULTS = int(os.getenv('JOB_MAX_PARTIAL_RESULTS', '1000'))  # Latest partial results held per job
+    TERMINAL_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+    @classmethod
+    def register(cls, job_type: str, handler: Callable, params_model=None):
+        """
+        Register a job type. handler(params, context) runs in a worker thread and returns
+        a JSON-serializable result; params_model (pydantic) validates params on submit.
+        """
+        cls.handlers[job_type] = {'handler': handler, 'params_model': params_model}
+
+    @classmethod
+    def start(cls):
+        """Start the worker pool and, with the SQLite backend, resume unfinished jobs"""
+        with cls.lock:
+            if cls.executor is not None:
+                return
+            cls.shutting_down = False
+            cls.executor = ThreadPoolExecutor(max_workers=cls.MAX_CONCURRENT_JOBS, thread_name_prefix='job')
+            if cls.QUEUE_BACKEND == 'sqlite' and cls.store is None:
+                cls.store = SQLiteJobStore(cls.SQLITE_PATH)
+
+        resumed = 0
+        if cls.store is not None:
+            for pending in cls.store.pending():
+                if pending['job_type'] not in cls.handlers or pending['id'] in cls.jobs:
+                    continue
+                if pending['status'] == 'running':
+                    # Left running by a worker that is gone; jobs of live workers stay theirs
+                    owner = pending['owner']
+                    if owner is not None and owner != worker_identity() and worker_alive(owner):
+                        continue
+                    if not cls.store.requeue(pending['id'], owner):
+                        continue
+                # Other workers may queue the same job; whoever claims it first runs it
+                cls._enqueue(cls._new_job(pending['job_type'], pending['params'],
+                                          pending['id'], pending['created_at']))
+                resumed += 1
+        logger.info("Job workers started (%s concurrent, %s queue, %s resumed)",
+                    cls.MAX_CONCURRENT_JOBS, cls.QUEUE_BACKEND, resumed)
+
+    @classmethod
+    def shutdown(cls, wait: bool = False):
+        """
+        Stop the worker pool. Running jobs are interrupted; with the SQLite backend they
+        stay queued in the database and are resumed by the next start().
+        """
+        with cls.lock:
+            cls.shutting_down = True
+            executor, cls.executor = cls.executor, None
+            for job in cls.jobs.values():
+                if job['status'] in ('queued', 'running'):
+                    job['cancel_event'].set()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        store, cls.store = cls.store, None
+        if store is not None:
+            store.close()
+
+    @staticmethod
+    def _new_job(job_type: str, params: Dict, job_id: Optional[str] = None, created_at: Optional[str] = None) -> Dict:
+        return {
+            'id': job_id or uuid.uuid4().hex,
+            'job_type': job_type,
+            'params': params,
+            'status': 'queued',
+            'progress': {'done': 0, 'total': None, 'message': None},
+            'partial_results': deque(maxlen=JobService.MAX_PARTIAL_RESULTS),
+            'partial_results_count': 0,
+            'result': None,
+            'error': None,
+            'created_at': created_at or datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'owner': None,
+            'cancel_event': threading.Event()
+        }
+
+    @classmethod
+    def submit(cls, job_type: str, params: Optional[Dict] = None) -> Dict:
+        """Validate and queue a job; returns its public description"""
+        if job_type not in cls.handlers:
+            raise ValueError(f"Unknown job type '{job_type}'. Available: {', '.join(sorted(cls.handlers))}")
+        params = params or {}
+        params_model = cls.handlers[job_type]['params_model']
+        if params_model is not None:
+            params = params_model(**params).model_dump()
+
+        with cls.lock:
+            waiting = sum(1 for job in cls.jobs.values() if job['status'] == 'queued')
+            if waiting >= cls.MAX_QUEUED_JOBS:
+                raise JobQueueFull(f"{waiting} jobs already queued; try again later")
+            job = cls._new_job(job_type, params)
+            cls.jobs[job['id']] = job
+        if cls.store is not None:
+            cls.store.save(job)
+        cls._enqueue(job)
+        return cls.describe(job)
+
+    @classmethod
+    def _enqueue(cls, job: Dict):
+        with cls.lock:
+            cls.jobs[job['id']] = job
+            if cls.executor is None:
+                cls.start()
+            cls.executor.submit(cls._run, job['id'])
+
+    @classmethod
+    def _run(cls, job_id: str):
+        with cls.lock:
+            job = cls.jobs.get(job_id)
+            if job is None or job['status'] != 'queued':
+                return  # Cancelled while waiting
+            if job['cancel_event'].is_set():
+                if not cls.shutting_down:
+                    cls._finish(job, 'cancelled')
+                return
+            started_at = datetime.now().isoformat()
+            if cls.store is not None and not cls.store.claim(job_id, worker_identity(), started_at):
+                cls._sync_queued(job)  # Claimed or cancelled by another worker
+                return
+            job['status'] = 'running'
+            job['owner'] = worker_identity()
+            job['started_at'] = started_at
+
+        handler = cls.handlers[job['job_type']]['handler']
+        try:
+            result = handler(job['params'], JobContext(job))
+            JobContext(job).check_cancelled()  # Cancelled after its last progress report
+            cls._finish(job, 'succeeded', result=result)
+        except JobCancelled:
+            if cls.shutting_down:
+                # Interrupted by shutdown, not by a user: leave it queued for the next start
+                with cls.lock:
+                    job['status'] = 'queued'
+                    job['owner'] = None
+                store = cls.store
+                if store is not None:
+                    store.save(job)
+                return
+            cls._finish(job, 'cancelled')
+        except Exception as e:
+            logger.warning("Job %s (%s) failed: %s", job_id, job['job_type'], e)
+            cls._finish(job, 'failed', error=str(e))
+
+    @classmethod
+    def _finish(cls, job: Dict, status: str, result=None, error: Optional[str] = None):
+        with cls.lock:
+            job['status'] = status
+            job['result'] = result
+            job['error'] = error
+            job['finished_at'] = datetime.now().isoformat()
+            # Finished jobs beyond the retention limit are only kept on disk
+            finished = sorted(
+                (j for j in cls.jobs.values() if j['status'] in cls.TERMINAL_STATUSES),
+                key=lambda j: j['finished_at']
+            )
+            for old in finished[:max(0, len(finished) - cls.MAX_STORED_RESULTS)]:
+                del cls.jobs[old['id']]
+        try:
+            cls._persist_result(job)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not persist result of job %s: %s", job['id'], e)
+        if cls.store is not None:
+            cls.store.save(job)
+
+    @classmethod
+    def _result_path(cls, job_id: str) -> str:
+        return os.path.join(cls.RESULTS_DIR, f"{job_id}.json")
+
+    @classmethod
+    def _persist_result(cls, job: Dict):
+        """Write the finished job atomically, then prune the oldest stored results"""
+        os.makedirs(cls.RESULTS_DIR, exist_ok=True)
+        path = cls._result_path(job['id'])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            stored = cls.describe(job, include_results=True)
+            stored['partial_results_from'] = job['partial_results_count'] - len(job['partial_results'])
+            json.dump(stored, f, default=str)
+        os.replace(tmp_path, path)
+
+        stored = sorted(
+            (entry for entry in os.scandir(cls.RESULTS_DIR) if entry.name.endswith('.json')),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in stored[:max(0, len(stored) - cls.MAX_STORED_RESULTS)]:
+            os.remove(entry.path)
+
+    @staticmethod
+    def describe(job: Dict, include_results: bool = False, since: int = 0) -> Dict:
+        """Public view of a job; partial results from offset `since` when requested"""
+        description = {
+            key: job[key] for key in (
+                'id', 'job_type', 'params', 'status', 'progress', 'error',
+                'created_at', 'started_at', 'finished_at'
+            )
+        }
+        description['progress'] = dict(job['progress'])
+        description['partial_results_count'] = count = job['partial_results_count']
+        if include_results:
+            # Offsets count every partial result, including those no longer held in memory
+            held = job['partial_results']
+            first = count - len(held)
+            description['partial_results'] = list(itertools.islice(held, max(0, since - first), None))
+            description['result'] = job['result']
+        return description
+
+    @classmethod
+    def _sync_queued(cls, job: Dict) -> Optional[Dict]:
+        """
+        With the SQLite store, a job queued here may meanwhile have been claimed or
+        cancelled by another worker: a cancelled job is finished here, a claimed one is
+        no longer tracked here. Returns the job if this process still tracks it
+        """
+        if cls.store is None or job['status'] != 'queued':
+            return job
+        with cls.lock:
+            status = cls.store.status(job['id'])
+            if status == 'queued':
+                return job
+            if status == 'cancelled':
+                job['cancel_event'].set()
+                cls._finish(job, 'cancelled')
+                return job
+            cls.jobs.pop(job['id'], None)
+            return None
+
+    @classmethod
+    def get(cls, job_id: str, include_results: bool = True, since: int = 0) -> Optional[Dict]:
+        """
+        Live job if known to this process, else its persisted result from disk, else (with
+        the SQLite backend) its state as recorded by the worker running it
+        """
+        with cls.lock:
+            job = cls.jobs.get(job_id)
+            if job is not None:
+                job = cls._sync_queued(job)
+            if job is not None:
+                description = cls.describe(job, include_results=include_results, since=since)
+                first_held = job['partial_results_count'] - len(job['partial_results'])
+                if include_results and since < first_held and cls.store is not None:
+                    description['partial_results'] = cls.store.partials(job_id, since)
+                return description
+        if not (len(job_id) == 32 and job_id.isalnum()):
+            return None
+        path = cls._result_path(job_id)
+        if not os.path.exists(path):
+            return cls.store.load(job_id, include_results, since) if cls.store is not None else None
+        with open(path, 'r') as f:
+            stored = json.load(f)
+        first_stored = stored.pop('partial_results_from', 0)
+        if include_results:
+            stored['partial_results'] = stored.get('partial_results', [])[max(0, since - first_stored):]
+            if since < first_stored and cls.store is not None:
+                stored['partial_results'] = cls.store.partials(job_id, since)
+        else:
+            stored.pop('partial_results', None)
+            stored.pop('result', None)
+        return stored
+
+    @classmethod
+    def list_jobs(cls, status: Optional[str] = None) -> List[Dict]:
+        with cls.lock:
+            jobs = [cls.describe(job) for job in cls.jobs.values() if status is None or job['status'] == status]
+        return sorted(jobs, key=lambda job: job['created_at'], reverse=True)
+
+    @classmethod
+    def cancel(cls, job_id: str) -> Optional[Dict]:
+        """
+        Cancel a job. Queued jobs are cancelled immediately; running jobs stop at their
+        next progress report. Finished jobs are returned unchanged.
+        """
+        with cls.lock:
+            job = cls.jobs.get(job_id)
+            if job is not None:
+                job = cls._sync_queued(job)
+            if job is None:
+                return cls._cancel_in_store(job_id)
+            if job['status'] in cls.TERMINAL_STATUSES:
+                return cls.describe(job)
+            queued = job['status'] == 'queued'
+            if queued and cls.store is not None and not cls.store.cancel_queued(job_id):
+                # Claimed by another worker in the meantime
+                cls.jobs.pop(job_id, None)
+                return cls._cancel_in_store(job_id)
+            job['cancel_event'].set()
+        if queued:
+            cls._finish(job, 'cancelled')
+        return cls.describe(job)
+
+    @classmethod
+    def _cancel_in_store(cls, job_id: str) -> Optional[Dict]:
+        """Cancel a job held by another worker: queued at once, running at its next progress report"""
+        if cls.store is not None and not cls.store.cancel_queued(job_id):
+            cls.store.request_cancel(job_id)
+        return cls.get(job_id, include_results=False)
+
+    @classmethod
+    def forget(cls, job_id: str):
+        """Drop a finished job from memory (its result stays on disk)"""
+        with cls.lock:
+            job = cls.jobs.get(job_id)
+            if job is not None and job['status'] in cls.TERMINAL_STATUSES:
+                del cls.jobs[job_id]
+
+    @classmethod
+    def memory_usage(cls) -> int:
+        with cls.lock:
+            return MemoryService.deep_sizeof(cls.jobs)
+
+    @classmethod
+    def shrink(cls, target_bytes: int):
+        """Forget the oldest finished jobs until the rest fit in target_bytes (results stay on disk)"""
+        with cls.lock:
+            finished = sorted(
+                (j for j in cls.jobs.values() if j['status'] in cls.TERMINAL_STATUSES),
+                key=lambda j: j['finished_at']
+            )
+            sizes = {job['id']: MemoryService.deep_sizeof(job) for job in cls.jobs.values()}
+            total = sum(sizes.values())
+            for job in finished:
+                if total <= target_bytes:
+                    break
+                del cls.jobs[job['id']]
+                total -= sizes[job['id']]
+
+    @classmethod
+    def metric_samples(cls):
+        with cls.lock:
+            statuses = [job['status'] for job in cls.jobs.values()]
+        return [
+            ('pricing_job_queue_depth', {'status': status}, statuses.count(status))
+            for status in ('queued', 'running')
+        ]
+
+
+MetricsService.define('pricing_job_queue_depth', 'gauge', 'Background jobs waiting or running')
+MetricsService.register_collector(JobService.metric_samples)
+MemoryService.register(
+    'jobs', 'Background jobs held in memory, with partial and final results', JobService.memory_usage,
+    shrink=JobService.shrink, owners=[JobService._run], default_budget_mb=64
+)
@@ -0,0 +1,130 @@
+"""
+Structured logging and per-request decision traces
+Records are handed to a QueueHandler and written to stdout by a background listener,
+so logging never blocks a request on I/O. Decision traces are collected only for
+requests that ask for one (?trace=1); otherwise recording returns immediately
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; fields passed as extra={'fields': {...}} are merged in"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        payload.update(getattr(record, 'fields', None) or {})
+        return json.dumps(payload, default=str)
+
+
+class LoggingService:
+    """Service for the application's non-blocking log pipeline"""
+
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # 'text' or 'json'
+    ROOT_LOGGER = 'pricing'
+    TEXT_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+    listener = None
+
+    @classmethod
+    def configure(cls):
+        """Install the queue handler and start the writer thread (idempotent)"""
+        if cls.listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JSONFormatter() if cls.LOG_FORMAT == 'json' else logging.Formatter(cls.TEXT_FORMAT))
+        records = queue.SimpleQueue()
+        root = logging.getLogger(cls.ROOT_LOGGER)
+        root.setLevel(cls.LOG_LEVEL)
+        root.handlers = [QueueHandler(records)]
+        root.propagate = False
+        cls.listener = QueueListener(records, stream, respect_handler_level=True)
+        cls.listener.start()
+        atexit.register(cls.shutdown)
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the writer thread after it has written every queued record"""
+        listener, cls.listener = cls.listener, None
+        if listener is not None:
+            listener.stop()
+
+    @classmethod
+    def get_logger(cls, name: str) -> logging.Logger:
+        cls.configure()
+        return logging.getLogger(f"{cls.ROOT_LOGGER}.{name}")
+
+
+class DecisionTrace:
+    """
+    Decisions recorded while serving one request. The active trace lives in a context
+    variable, so it follows the request into run_in_threadpool workers.
+    """
+
+    MAX_EVENTS = 1000
+    current = contextvars.ContextVar('decision_trace', default=None)
+
+    __slots__ = ('events', 'started', 'dropped')
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self.started = time.perf_counter()
+        self.dropped = 0
+
+    @classmethod
+    def active(cls) -> bool:
+        """Guard for trace-only work (e.g. building a reason string) in hot paths"""
+        return cls.current.get() is not None
+
+    @classmethod
+    def record(cls, event: str, **fields):
+        trace = cls.current.get()
+        if trace is None:
+            return
+        if len(trace.events) >= cls.MAX_EVENTS:
+            trace.dropped += 1
+            return
+        trace.events.append({
+            'event': event,
+            't_ms': round((time.perf_counter() - trace.started) * 1000, 3),
+            **fields
+        })
+
+    @classmethod
+    @contextmanager
+    def capture(cls, enabled: bool = True):
+        """Collect a trace for the enclosed work; yields None when not enabled"""
+        if not enabled:
+            yield None
+            return
+        trace = cls()
+        token = cls.current.set(trace)
+        try:
+            yield trace
+        finally:
+            cls.current.reset(token)
+
+    def to_list(self) -> List[Dict]:
+        if self.dropped:
+            return self.events + [{'event': 'trace.truncated', 'dropped': self.dropped}]
+        return self.events
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the application's root logger (configured on first use)"""
+    return LoggingService.get_logger(name)
@@ -0,0 +1,317 @@
+"""
+Memory accounting and budgets for the in-process caches
+Each cache layer registers a subsystem with a size estimator and, when it can give
+memory back, a shrink function. Budgets (MEMORY_BUDGET_<NAME>_MB) are enforced by
+shrinking those layers; a periodic check covers layers that do not enforce their own
+budget on insert. With tracemalloc running, reports also attribute the traced Python
+heap to subsystems by the function that allocated it
+"""
+import os
+import sys
+import inspect
+import threading
+import tracemalloc
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from services.metrics_service import MetricsService
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+
+
+class MemoryService:
+    """Service for per-subsystem memory reports and cache budget enforcement"""
+
+    TRACING = os.getenv('MEMORY_TRACING', 'false').lower() in ('1', 'true', 'yes')
+    TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', '16'))  # Deep enough to reach the owning call
+    CHECK_INTERVAL = float(os.getenv('MEMORY_CHECK_SECONDS', '30'))  # 0 disables the periodic check
+    REPORT_ENABLED = os.getenv('MEMORY_REPORT_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    TOKEN = os.getenv('MEMORY_REPORT_TOKEN')  # When set, required in the X-Admin-Token header
+
+    subsystems = {}
+    lock = threading.Lock()
+    checker = None
+    stop_event = threading.Event()
+
+    @classmethod
+    def register(
+        cls,
+        name: str,
+        description: str,
+        size: Callable[[], int],
+        shrink: Optional[Callable[[int], None]] = None,
+        owners: Iterable[Callable] = (),
+        default_budget_mb: Optional[float] = None
+    ):
+        """
+        Declare a subsystem. size() estimates its resident bytes; shrink(target_bytes)
+        releases memory until the estimate is at most target_bytes. Traced allocations
+        made (directly or below) one of the owner functions are attributed to it
+        """
+        budget = os.getenv(f'MEMORY_BUDGET_{name.upper()}_MB')
+        budget_mb = float(budget) if budget else default_budget_mb
+        cls.subsystems[name] = {
+            'description': description,
+            'size': size,
+            'shrink': shrink,
+            'owners': tuple(owners),
+            'budget_bytes': int(budget_mb * MB) if budget_mb else None
+        }
+
+    @classmethod
+    def budget(cls, name: str) -> Optional[int]:
+        """Budget of a subsystem in bytes; None when unbounded"""
+        subsystem = cls.subsystems.get(name)
+        return subsystem['budget_bytes'] if subsystem else None
+
+    @classmethod
+    def set_budget(cls, name: str, budget_bytes: Optional[int]):
+        cls.subsystems[name]['budget_bytes'] = budget_bytes
+
+    # ------------------------------------------------------------------ sizing
+
+    @staticmethod
+    def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+        """Approximate resident bytes of a container tree (arrays and frames by their buffers)"""
+        if seen is None:
+            seen = set()
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        memory_usage = getattr(obj, 'memory_usage', None)
+        if memory_usage is not None and hasattr(obj, 'columns'):
+            return int(memory_usage(deep=True).sum())
+        nbytes = getattr(obj, 'nbytes', None)
+        if isinstance(nbytes, int):
+            return sys.getsizeof(obj) if getattr(obj, 'base', None) is not None else max(nbytes, sys.getsizeof(obj))
+        size = sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            size += sum(MemoryService.deep_sizeof(k, seen) + MemoryService.deep_sizeof(v, seen) for k, v in obj.items())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            size += sum(MemoryService.deep_sizeof(item, seen) for item in obj)
+        return size
+
+    @staticmethod
+    def process_memory() -> Dict:
+        """Current and peak resident set size of this process"""
+        rss = None
+        try:
+            with open('/proc/self/statm') as f:
+                rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            pass
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak = peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+        except (ImportError, OSError):
+            peak = None
+        return {'pid': os.getpid(), 'rss_bytes': rss, 'peak_rss_bytes': peak}
+
+    @classmethod
+    def estimates(cls) -> Dict[str, int]:
+        estimates = {}
+        for name, subsystem in list(cls.subsystems.items()):
+            try:
+                estimates[name] = int(subsystem['size']())
+            except Exception as e:
+                logger.warning("Could not size memory subsystem %s: %s", name, e)
+                estimates[name] = 0
+        return estimates
+
+    # ------------------------------------------------------------------ tracing
+
+    @classmethod
+    def start_tracing(cls, frames: Optional[int] = None):
+        """Start tracemalloc (allocations made before this are not traced)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or cls.TRACE_FRAMES)
+
+    @staticmethod
+    def _code_range(fn: Callable) -> Optional[Tuple[str, int, int]]:
+        fn = inspect.unwrap(getattr(fn, '__func__', fn))
+        try:
+            lines, start = inspect.getsourcelines(fn)
+        except (OSError, TypeError):
+            return None
+        return fn.__code__.co_filename, start, start + len(lines) - 1
+
+    @classmethod
+    def _owner_index(cls) -> Dict[str, List[Tuple[int, int, str]]]:
+        """filename -> [(first line, last line, subsystem)] of every owner function"""
+        index = {}
+        for name, subsystem in cls.subsystems.items():
+            for owner in subsystem['owners']:
+                code_range = cls._code_range(owner)
+                if code_range:
+                    filename, first, last = code_range
+                    index.setdefault(filename, []).append((first, last, name))
+        return index
+
+    @staticmethod
+    def frame_tuples(traceback: tracemalloc.Traceback) -> Tuple[Tuple[str, int], ...]:
+        """
+        (filename, lineno) of each frame, innermost last. Building the public Frame objects
+        takes longer than the whole attribution, so CPython's raw tuples are used when present
+        """
+        frames = getattr(traceback, '_frames', None)
+        if isinstance(frames, tuple) and (not frames or isinstance(frames[-1], tuple)):
+            return frames
+        return tuple((frame.filename, frame.lineno) for frame in traceback)
+
+    @classmethod
+    def traced(cls, top: int = 10) -> Optional[Dict]:
+        """
+        Live traced heap by subsystem: each allocation belongs to the innermost owner
+        function on its stack, else to 'app' (this backend) or 'other' (libraries, startup)
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        # Grouping by traceback is the slow part (seconds for a few hundred thousand traces);
+        # everything else is derived from those groups in one pass
+        statistics = tracemalloc.take_snapshot().statistics('traceback')
+        index = cls._owner_index()
+        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        by_subsystem = {name: 0 for name in cls.subsystems}
+        by_subsystem.update(app=0, other=0)
+        by_line = {}
+        frame_owner = {}  # (filename, lineno) -> subsystem, 'app' or None
+        for stat in statistics:
+            frames = cls.frame_tuples(stat.traceback)
+            innermost = frames[-1]
+            if innermost[0] == tracemalloc.__file__:
+                continue  # The snapshot's own bookkeeping
+            size, blocks = by_line.get(innermost, (0, 0))
+            by_line[innermost] = (size + stat.size, blocks + stat.count)
+
+            owner = None
+            for frame in reversed(frames):  # Innermost first
+                if frame not in frame_owner:
+                    filename, lineno = frame
+                    frame_owner[frame] = next(
+                        (name for first, last, name in index.get(filename, ()) if first <= lineno <= last),
+                        'app' if filename.startswith(app_dir) else None
+                    )
+                found = frame_owner[frame]
+                if found == 'app':
+                    owner = owner or 'app'
+                elif found:
+                    owner = found
+                    break
+            by_subsystem[owner or 'other'] += stat.size
+
+        current, peak = tracemalloc.get_traced_memory()
+        top_lines = sorted(by_line.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return {
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'frames': tracemalloc.get_traceback_limit(),
+            'by_subsystem': by_subsystem,
+            'top_lines': [
+                {'location': f"{filename}:{lineno}", 'bytes': size, 'blocks': blocks}
+                for (filename, lineno), (size, blocks) in top_lines
+            ]
+        }
+
+    # ------------------------------------------------------------------ reports and budgets
+
+    @classmethod
+    def report(cls, top: int = 10) -> Dict:
+        """Process RSS, per-subsystem estimates against budgets, and the traced breakdown"""
+        estimates = cls.estimates()
+        traced = cls.traced(top)
+        subsystems = {}
+        for name, subsystem in cls.subsystems.items():
+            budget = subsystem['budget_bytes']
+            subsystems[name] = {
+                'description': subsystem['description'],
+                'estimated_bytes': estimates[name],
+                'traced_bytes': traced['by_subsystem'][name] if traced else None,
+                'budget_bytes': budget,
+                'over_budget': budget is not None and estimates[name] > budget,
+                'shrinkable': subsystem['shrink'] is not None
+            }
+        return {
+            'process': cls.process_memory(),
+            'tracing': traced is not None,
+            'subsystems': subsystems,
+            'estimated_total_bytes': sum(estimates.values()),
+            'traced': traced
+        }
+
+    @classmethod
+    def enforce(cls) -> List[Dict]:
+        """Shrink every subsystem over its budget; returns what was done"""
+        actions = []
+        with cls.lock:
+            for name, subsystem in list(cls.subsystems.items()):
+                budget = subsystem['budget_bytes']
+                if budget is None:
+                    continue
+                before = int(subsystem['size']())
+                if before <= budget:
+                    continue
+                if subsystem['shrink'] is None:
+                    logger.warning("Memory subsystem %s uses %.1f MB, over its %.1f MB budget, and cannot shrink",
+                                   name, before / MB, budget / MB)
+                    actions.append({'subsystem': name, 'before_bytes': before, 'after_bytes': before,
+                                    'budget_bytes': budget, 'shrunk': False})
+                    continue
+                subsystem['shrink'](budget)
+                after = int(subsystem['size']())
+                MetricsService.inc('pricing_memory_shrinks_total', subsystem=name)
+                logger.info("Shrank memory subsystem %s from %.1f MB to %.1f MB (budget %.1f MB)",
+                            name, before / MB, after / MB, budget / MB)
+                actions.append({'subsystem': name, 'before_bytes': before, 'after_bytes': after,
+                                'budget_bytes': budget, 'shrunk': True})
+        return actions
+
+    @classmethod
+    def metric_samples(cls):
+        samples = []
+        for name, size in cls.estimates().items():
+            samples.append(('pricing_memory_subsystem_bytes', {'subsystem': name}, size))
+            budget = cls.budget(name)
+            if budget is not None:
+                samples.append(('pricing_memory_budget_bytes', {'subsystem': name}, budget))
+        rss = cls.process_memory()['rss_bytes']
+        if rss is not None:
+            samples.append(('pricing_memory_rss_bytes', {}, rss))
+        return samples
+
+    # ------------------------------------------------------------------ lifecycle
+
+    @classmethod
+    def start(cls):
+        """Start tracing when MEMORY_TRACING is set, and the periodic budget check"""
+        if cls.TRACING:
+            cls.start_tracing()
+        if cls.CHECK_INTERVAL <= 0 or cls.checker is not None:
+            return
+        cls.stop_event.clear()
+
+        def loop():
+            while not cls.stop_event.wait(cls.CHECK_INTERVAL):
+                try:
+                    cls.enforce()
+                except Exception as e:
+                    logger.warning("Memory budget check failed: %s", e)
+
+        cls.checker = threading.Thread(target=loop, name='memory-budget', daemon=True)
+        cls.checker.start()
+
+    @classmethod
+    def shutdown(cls):
+        cls.stop_event.set()
+        checker, cls.checker = cls.checker, None
+        if checker is not None:
+            checker.join(timeout=1)
+
+
+MetricsService.define('pricing_memory_subsystem_bytes', 'gauge', 'Estimated resident bytes per cache subsystem')
+MetricsService.define('pricing_memory_budget_bytes', 'gauge', 'Configured memory budget per cache subsystem')
+MetricsService.define('pricing_memory_rss_bytes', 'gauge', 'Resident set size of this worker')
+MetricsService.define('pricing_memory_shrinks_total', 'counter', 'Cache shrinks triggered by memory budgets')
+MetricsService.register_collector(MemoryService.metric_samples)
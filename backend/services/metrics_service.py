@@ -0,0 +1,362 @@
+"""
+Prometheus-style metrics without an external client or service
+Counters and histograms are recorded into per-thread shards, so the hot path takes no
+lock; a scrape sums the shards. With METRICS_DIR set, every uvicorn worker also
+snapshots its metrics there and /metrics aggregates all workers
+"""
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from services.logging_service import get_logger
+from services.timing_service import RequestTiming
+
+logger = get_logger(__name__)
+
+
+class MetricsService:
+    """Service for recording metrics and rendering the text exposition format"""
+
+    LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+    METRICS_DIR = os.getenv('METRICS_DIR')  # Shared by all workers; emptied before the server starts (see Dockerfile)
+    FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+    CONTENT_TYPE = 'text/plain; version=0.0.4'  # Starlette appends the charset
+
+    definitions = {}
+    buckets = {}  # Histogram name -> bucket bounds
+    collectors = []
+    ratios = {}
+    shards = []  # (owning thread, shard); each shard is only written by its thread
+    retired = {}  # Shards of finished threads, merged
+    local = threading.local()
+    lock = threading.Lock()
+    flusher = None
+    stop_event = threading.Event()
+
+    @classmethod
+    def define(cls, name: str, kind: str, help_text: str, buckets: Optional[Tuple] = None):
+        """Declare a metric: kind is 'counter', 'gauge' or 'histogram'"""
+        cls.definitions[name] = {
+            'kind': kind,
+            'help': help_text,
+            'buckets': tuple(buckets or cls.LATENCY_BUCKETS) if kind == 'histogram' else None
+        }
+        if kind == 'histogram':
+            cls.buckets[name] = cls.definitions[name]['buckets']
+
+    @classmethod
+    def define_ratio(cls, name: str, help_text: str, counter: str, label: str, hits: Tuple[str, ...]):
+        """Gauge derived at scrape time from a counter: share of samples whose label is in hits"""
+        cls.define(name, 'gauge', help_text)
+        cls.ratios[name] = (counter, label, hits)
+
+    @classmethod
+    def register_collector(cls, collector: Callable[[], Iterable[Tuple[str, Dict, float]]]):
+        """collector() returns (metric name, labels, value) samples read at scrape time"""
+        cls.collectors.append(collector)
+
+    # ------------------------------------------------------------------ recording
+
+    @classmethod
+    def _shard(cls) -> Dict:
+        shard = getattr(cls.local, 'shard', None)
+        if shard is None:
+            shard = cls.local.shard = {}
+            with cls.lock:
+                cls._retire_finished()
+                cls.shards.append((threading.current_thread(), shard))
+        return shard
+
+    @classmethod
+    def _retire_finished(cls):
+        # Caller holds the lock. Finished threads no longer write, so their shards can be merged
+        alive = []
+        for thread, shard in cls.shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                cls._merge(cls.retired, shard.items())
+        cls.shards = alive
+
+    @staticmethod
+    def _merge(target: Dict, items: Iterable):
+        for key, values in items:
+            current = target.get(key)
+            if current is None:
+                target[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    current[i] += value
+
+    @classmethod
+    def inc(cls, name: str, amount: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())) if len(labels) > 1 else tuple(labels.items()))
+        shard = cls.local.__dict__.get('shard') or cls._shard()
+        cell = shard.get(key)
+        if cell is None:
+            shard[key] = [amount]
+        else:
+            cell[0] += amount
+
+    @classmethod
+    def observe(cls, name: str, value: float, **labels):
+        """Histogram observation; the cell holds per-bucket counts, the +Inf count and the sum"""
+        key = (name, tuple(sorted(labels.items())) if len(labels) > 1 else tuple(labels.items()))
+        shard = cls.local.__dict__.get('shard') or cls._shard()
+        cell = shard.get(key)
+        buckets = cls.buckets[name]
+        if cell is None:
+            cell = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        cell[bisect_left(buckets, value)] += 1
+        cell[-1] += value
+
+    @classmethod
+    def stage(cls, name: str) -> 'StageTimer':
+        """Context manager timing one pipeline stage"""
+        return StageTimer(name)
+
+    @classmethod
+    def record_stage(cls, stage: str, seconds: float):
+        """One stage duration: into the histogram and the current request's Server-Timing"""
+        cls.observe('pricing_stage_duration_seconds', seconds, stage=stage)
+        RequestTiming.add(stage, seconds)
+
+    @classmethod
+    def timed(cls, stage: str) -> Callable:
+        """Decorator timing every call of a function as a pipeline stage (inclusive of nested stages)"""
+        def decorator(fn: Callable) -> Callable:
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    cls.record_stage(stage, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    # ------------------------------------------------------------------ collection
+
+    @classmethod
+    def collect_local(cls) -> Dict:
+        """This process's metrics as {'samples': [[name, labels, values], ...]}"""
+        with cls.lock:
+            cls._retire_finished()
+            shards = [shard for _, shard in cls.shards]
+            merged = {key: list(values) for key, values in cls.retired.items()}
+        for shard in shards:
+            # Another thread may add a key while we copy; retry until the copy is consistent
+            while True:
+                try:
+                    items = list(shard.items())
+                    break
+                except RuntimeError:
+                    continue
+            cls._merge(merged, items)
+
+        for collector in cls.collectors:
+            try:
+                for name, labels, value in collector():
+                    merged[(name, tuple(sorted(labels.items())))] = [value]
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", e)
+        return {
+            'pid': os.getpid(),
+            'samples': [[name, list(labels), values] for (name, labels), values in merged.items()]
+        }
+
+    @classmethod
+    def flush(cls, snapshot: Optional[Dict] = None):
+        """Write this worker's snapshot to METRICS_DIR (atomic replace)"""
+        if not cls.METRICS_DIR:
+            return
+        os.makedirs(cls.METRICS_DIR, exist_ok=True)
+        path = os.path.join(cls.METRICS_DIR, f"metrics-{os.getpid()}.json")
+        with open(path + '.tmp', 'w') as f:
+            json.dump(snapshot or cls.collect_local(), f)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    @classmethod
+    def collect(cls) -> Tuple[Dict, int]:
+        """
+        Metrics of all workers. Counters and histograms of exited workers are kept so
+        totals stay monotonic; their gauges are dropped.
+        """
+        local = cls.collect_local()
+        snapshots = [local]
+        if cls.METRICS_DIR and os.path.isdir(cls.METRICS_DIR):
+            cls.flush(local)
+            for filename in os.listdir(cls.METRICS_DIR):
+                if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                    continue
+                try:
+                    with open(os.path.join(cls.METRICS_DIR, filename)) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if snapshot['pid'] != os.getpid():
+                    snapshots.append(snapshot)
+
+        merged = {}
+        workers = 0
+        for snapshot in snapshots:
+            alive = snapshot['pid'] == os.getpid() or cls._pid_alive(snapshot['pid'])
+            workers += alive
+            for name, labels, values in snapshot['samples']:
+                definition = cls.definitions.get(name)
+                if definition is None or (definition['kind'] == 'gauge' and not alive):
+                    continue
+                cls._merge(merged, [((name, tuple(map(tuple, labels))), values)])
+        return merged, workers
+
+    # ------------------------------------------------------------------ exposition
+
+    @staticmethod
+    def _labels(labels: Iterable[Tuple[str, str]]) -> str:
+        if not labels:
+            return ''
+        escaped = (
+            '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+            for key, value in labels
+        )
+        return '{' + ','.join(escaped) + '}'
+
+    @staticmethod
+    def _number(value: float) -> str:
+        return repr(float(value)) if isinstance(value, float) and not float(value).is_integer() else str(int(value))
+
+    @classmethod
+    def render(cls) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        merged, workers = cls.collect()
+        merged[('pricing_metrics_workers', ())] = [workers]
+        for name, (counter, label, hits) in cls.ratios.items():
+            total = hit = 0
+            for (sample_name, labels), values in merged.items():
+                if sample_name == counter:
+                    total += values[0]
+                    hit += values[0] if dict(labels).get(label) in hits else 0
+            merged[(name, ())] = [hit / total if total else 0.0]
+
+        by_name = {}
+        for (name, labels), values in merged.items():
+            by_name.setdefault(name, []).append((labels, values))
+
+        lines = []
+        for name in sorted(by_name):
+            definition = cls.definitions[name]
+            lines.append(f"# HELP {name} {definition['help']}")
+            lines.append(f"# TYPE {name} {definition['kind']}")
+            for labels, values in sorted(by_name[name]):
+                if definition['kind'] != 'histogram':
+                    lines.append(f"{name}{cls._labels(labels)} {cls._number(values[0])}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(definition['buckets'] + ('+Inf',), values[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else cls._number(bound)
+                    lines.append(f"{name}_bucket{cls._labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{cls._labels(labels)} {cls._number(values[-1])}")
+                lines.append(f"{name}_count{cls._labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+    # ------------------------------------------------------------------ lifecycle
+
+    @classmethod
+    def start(cls):
+        """With METRICS_DIR set, snapshot this worker periodically so any worker can serve /metrics"""
+        if not cls.METRICS_DIR or cls.flusher is not None:
+            return
+        cls.stop_event.clear()
+
+        def loop():
+            while not cls.stop_event.wait(cls.FLUSH_INTERVAL):
+                try:
+                    cls.flush()
+                except OSError as e:
+                    logger.warning("Could not write metrics snapshot: %s", e)
+
+        cls.flusher = threading.Thread(target=loop, name='metrics-flush', daemon=True)
+        cls.flusher.start()
+        logger.info("Metrics snapshots every %gs in %s", cls.FLUSH_INTERVAL, cls.METRICS_DIR)
+
+    @classmethod
+    def shutdown(cls):
+        cls.stop_event.set()
+        flusher, cls.flusher = cls.flusher, None
+        if flusher is not None:
+            flusher.join(timeout=1)
+            try:
+                cls.flush()
+            except OSError as e:
+                logger.warning("Could not write metrics snapshot: %s", e)
+
+
+class StageTimer:
+    """Context manager recording the duration of a pipeline stage"""
+
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        MetricsService.record_stage(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting HTTP requests and their latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {'code': 500}
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Route templates (not raw paths) keep label cardinality bounded
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            MetricsService.inc('pricing_http_requests_total', method=scope['method'], route=route, status=str(status['code']))
+            MetricsService.observe(
+                'pricing_http_request_duration_seconds', time.perf_counter() - started,
+                method=scope['method'], route=route
+            )
+
+
+MetricsService.define('pricing_stage_duration_seconds', 'histogram',
+                      'Time spent per pipeline stage (data_lookup, feature_encoding, model_scoring, elasticity_search, serialization)')
+MetricsService.define('pricing_http_requests_total', 'counter', 'HTTP requests by method, route template and status')
+MetricsService.define('pricing_http_request_duration_seconds', 'histogram', 'HTTP request latency by route template')
+MetricsService.define('pricing_batch_size', 'histogram', 'Items per batch (optimize_batch, model_scoring, sales_ingest)',
+                      MetricsService.SIZE_BUCKETS)
+MetricsService.define('pricing_metrics_workers', 'gauge', 'Live worker processes included in this scrape')
@@ -0,0 +1,220 @@
+"""
+Online elasticity updates from streaming sales
+Recursive least squares with a forgetting factor on log(units) ~ log(price) +
+calendar controls, one small fixed-size state per segment
+"""
+import os
+import json
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional
+from services.logging_service import get_logger
+from services.memory_service import MemoryService
+
+logger = get_logger(__name__)
+
+
+class OnlineElasticityService:
+    """Service for per-segment recursive least-squares elasticity estimates"""
+
+    states = {}
+    lock = threading.Lock()
+    snapshot_lock = threading.Lock()  # One merge-and-write at a time per process
+    FEATURES = ['intercept', 'log_price', 'is_weekend', 'is_holiday']
+    FORGETTING_FACTOR = 0.98  # Effective memory of about 1 / (1 - 0.98) = 50 observations
+    PRIOR_SD = 0.5  # Prior uncertainty of the elasticity (matches the table shrinkage prior)
+    DIFFUSE_VARIANCE = 1e4  # Prior variance for the intercept and controls
+    NOISE_VARIANCE = 0.04  # Assumed log-demand noise; RLS covariance is in units of it
+    MIN_UPDATES = 10  # Observations before an online estimate is served
+    SNAPSHOT_VERSION = 1
+    SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'online_elasticity_state.json')
+
+    @classmethod
+    def _prior_variances(cls) -> np.ndarray:
+        variances = np.full(len(cls.FEATURES), cls.DIFFUSE_VARIANCE)
+        variances[1] = cls.PRIOR_SD ** 2 / cls.NOISE_VARIANCE
+        return variances
+
+    @classmethod
+    def _new_state(cls, prior_elasticity: float, reference_price: float) -> Dict:
+        """Fresh segment state centred on the prior elasticity and the first observed price"""
+        variances = cls._prior_variances()
+        theta = np.zeros(len(cls.FEATURES))
+        theta[1] = prior_elasticity
+        return {
+            'theta': theta,
+            'P': np.diag(variances),
+            'reference_log_price': float(np.log(reference_price)),
+            'prior_elasticity': float(prior_elasticity),
+            'residual_variance': cls.NOISE_VARIANCE,
+            'n_updates': 0,
+            'updated_at': None
+        }
+
+    @classmethod
+    def update(
+        cls,
+        segment_key: str,
+        price: float,
+        units: float,
+        is_weekend: int = 0,
+        is_holiday: int = 0,
+        prior_elasticity: float = -1.0,
+        forgetting_factor: Optional[float] = None
+    ) -> Dict:
+        """
+        One RLS step for a segment: O(k^2) with k = 4 features, independent of history.
+
+        Log price is measured relative to the segment's first observed price so the
+        intercept and slope stay well conditioned when prices barely move.
+        """
+        lam = forgetting_factor or cls.FORGETTING_FACTOR
+        with cls.lock:
+            state = cls.states.get(segment_key)
+            if state is None:
+                state = cls.states[segment_key] = cls._new_state(prior_elasticity, price)
+
+            x = np.array([1.0, np.log(price) - state['reference_log_price'], is_weekend, is_holiday])
+            y = np.log1p(max(units, 0.0))
+            theta, P = state['theta'], state['P']
+
+            Px = P @ x
+            gain = Px / (lam + x @ Px)
+            error = y - x @ theta
+            state['theta'] = theta + gain * error
+            P = (P - np.outer(gain, Px)) / lam
+            P = (P + P.T) / 2
+            # Directions without excitation (constant price, no holidays) would blow up
+            # as 1 / lam^n; bound each variance by its prior, keeping P positive definite
+            scale = np.sqrt(np.minimum(1.0, cls._prior_variances() / np.maximum(np.diag(P), 1e-300)))
+            state['P'] = P * scale[:, None] * scale[None, :]
+
+            # Exponentially weighted residual variance for the standard error
+            state['residual_variance'] = lam * state['residual_variance'] + (1 - lam) * error ** 2
+            state['n_updates'] += 1
+            state['updated_at'] = datetime.now().isoformat()
+            return cls._describe(segment_key, state)
+
+    @classmethod
+    def update_many(cls, observations: List[Dict], priors: Dict[str, float]) -> List[Dict]:
+        """
+        Apply observations in arrival order. Each needs segment_key, price, units and
+        optionally is_weekend / is_holiday; priors maps segment_key to the prior elasticity.
+        Returns the latest estimate for every touched segment.
+        """
+        latest = {}
+        for obs in observations:
+            key = obs['segment_key']
+            latest[key] = cls.update(
+                key, obs['price'], obs['units'], obs.get('is_weekend', 0), obs.get('is_holiday', 0),
+                prior_elasticity=priors.get(key, -1.0)
+            )
+        return list(latest.values())
+
+    @classmethod
+    def _describe(cls, segment_key: str, state: Dict) -> Dict:
+        return {
+            'segment_key': segment_key,
+            'elasticity': float(state['theta'][1]),
+            'std_error': float(np.sqrt(max(state['P'][1, 1], 0.0) * state['residual_variance'])),
+            'prior_elasticity': state['prior_elasticity'],
+            'n_updates': state['n_updates'],
+            'updated_at': state['updated_at']
+        }
+
+    @classmethod
+    def get_estimate(cls, segment_key: str) -> Optional[Dict]:
+        """Current estimate for a segment, or None if it has too few updates to serve"""
+        state = cls.states.get(segment_key)
+        if state is None or state['n_updates'] < cls.MIN_UPDATES:
+            return None
+        return cls._describe(segment_key, state)
+
+    @classmethod
+    def get_all_estimates(cls) -> List[Dict]:
+        with cls.lock:
+            return [cls._describe(key, state) for key, state in cls.states.items()]
+
+    @classmethod
+    def _read_snapshot(cls, path: str) -> Dict:
+        """Segment states from a snapshot file, with numpy arrays restored"""
+        with open(path, 'r') as f:
+            payload = json.load(f)
+        if payload.get('version') != cls.SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {payload.get('version')}")
+        return {
+            key: {
+                **state,
+                'theta': np.array(state['theta'], dtype=float),
+                'P': np.array(state['P'], dtype=float)
+            }
+            for key, state in payload['segments'].items()
+        }
+
+    @classmethod
+    def snapshot(cls, path: Optional[str] = None) -> str:
+        """
+        Persist all segment states atomically (write to a per-process temp file, then
+        rename). Every uvicorn worker keeps its own states and snapshots to the same
+        file, so the file is merged first: per segment the most recently updated state
+        wins, and newer states written by other workers are adopted here too.
+        """
+        path = path or cls.SNAPSHOT_PATH
+        with cls.snapshot_lock:
+            try:
+                on_disk = cls._read_snapshot(path) if os.path.exists(path) else {}
+            except Exception as e:
+                logger.warning("Ignoring unreadable online elasticity snapshot: %s", e)
+                on_disk = {}
+            with cls.lock:
+                for key, state in on_disk.items():
+                    current = cls.states.get(key)
+                    if current is None or (state['updated_at'] or '') > (current['updated_at'] or ''):
+                        cls.states[key] = state
+                payload = {
+                    'version': cls.SNAPSHOT_VERSION,
+                    'saved_at': datetime.now().isoformat(),
+                    'forgetting_factor': cls.FORGETTING_FACTOR,
+                    'segments': {
+                        key: {
+                            **state,
+                            'theta': state['theta'].tolist(),
+                            'P': state['P'].tolist()
+                        }
+                        for key, state in cls.states.items()
+                    }
+                }
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def restore(cls, path: Optional[str] = None) -> int:
+        """Load segment states from a snapshot; returns the number of segments restored"""
+        path = path or cls.SNAPSHOT_PATH
+        if not os.path.exists(path):
+            return 0
+        try:
+            states = cls._read_snapshot(path)
+        except Exception as e:
+            logger.warning("Could not restore online elasticity state: %s", e)
+            return 0
+        with cls.lock:
+            cls.states = states
+        logger.info("Restored online elasticity state for %s segments", len(states))
+        return len(states)
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.states = {}
+
+
+MemoryService.register(
+    'online_elasticity', 'Recursive least-squares state per segment',
+    lambda: MemoryService.deep_sizeof(OnlineElasticityService.states),
+    owners=[OnlineElasticityService.update, OnlineElasticityService.restore]
+)
@@ -0,0 +1,273 @@
+"""
+Pareto frontiers for profit vs. volume trade-offs
+Finds non-dominated price points per segment and the aggregate trade-off curve
+across a catalog with sort-based, fully vectorized frontier filters
+"""
+import numpy as np
+from typing import Dict, List, Optional
+from services.ai_service import XGBoostAIService
+from services.catalog_optimization_service import CatalogOptimizationService
+from services.elasticity_service import ElasticityService
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+
+class ParetoService:
+    """Service for profit / demand / revenue trade-off frontiers"""
+
+    OBJECTIVES = ('profit', 'demand', 'revenue')
+    CHUNK_SIZE = 4096  # Candidates compared per block in the 3+ objective filter
+    BATCH_ELEMENTS = 4_000_000  # Pairwise comparisons per block in the batched filter
+    FRONTIER_POINTS = 25
+
+    @classmethod
+    def frontier_mask(cls, objectives: np.ndarray) -> np.ndarray:
+        """
+        Non-dominated mask (all objectives maximized) for an (N, M) array.
+
+        Candidates are sorted lexicographically in descending order, so any dominating
+        point precedes the points it dominates. With two objectives a candidate is on
+        the frontier iff its second objective beats the running maximum of everything
+        before it (O(N log N)). With more objectives sorted blocks are checked against
+        the frontier found so far. Exact duplicates keep a single representative.
+        """
+        values = np.asarray(objectives, dtype=float)
+        n_points, n_objectives = values.shape
+        mask = np.zeros(n_points, dtype=bool)
+        if n_points == 0:
+            return mask
+
+        order = np.lexsort(tuple(-values[:, j] for j in range(n_objectives - 1, -1, -1)))
+        ordered = values[order]
+
+        if n_objectives == 1:
+            keep = np.zeros(n_points, dtype=bool)
+            keep[0] = True
+        elif n_objectives == 2:
+            running_best = np.maximum.accumulate(ordered[:, 1])
+            keep = ordered[:, 1] > np.concatenate([[-np.inf], running_best[:-1]])
+        else:
+            keep = np.zeros(n_points, dtype=bool)
+            frontier = np.empty((0, n_objectives))
+            for start in range(0, n_points, cls.CHUNK_SIZE):
+                block = ordered[start:start + cls.CHUNK_SIZE]
+                # Dominated (or duplicated) by the frontier of earlier blocks
+                survivors = np.arange(len(block))
+                if len(frontier):
+                    dominated = cls._weakly_dominates(frontier, block).any(axis=1)
+                    survivors = survivors[~dominated]
+                # Dominated by an earlier surviving point of the same block
+                candidates = block[survivors]
+                within = cls._weakly_dominates(candidates, candidates)
+                survivors = survivors[~np.tril(within, k=-1).any(axis=1)]
+                keep[start + survivors] = True
+                frontier = np.vstack([frontier, block[survivors]])
+
+        mask[order] = keep
+        return mask
+
+    @staticmethod
+    def _weakly_dominates(sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """
+        [..., i, j] is True when sources[..., j, :] >= targets[..., i, :] in every objective.
+        Compared one objective at a time, which is much faster than reducing over a
+        short trailing axis.
+        """
+        result = None
+        for j in range(sources.shape[-1]):
+            ge = sources[..., None, :, j] >= targets[..., :, None, j]
+            result = ge if result is None else np.logical_and(result, ge, out=result)
+        return result
+
+    @classmethod
+    def batched_frontier_mask(cls, objectives: np.ndarray) -> np.ndarray:
+        """
+        Per-row non-dominated masks for an (S, K, M) array of S independent candidate sets
+        (e.g. every segment's price grid), without a Python loop over segments.
+        """
+        values = np.asarray(objectives, dtype=float)
+        n_rows, n_points, n_objectives = values.shape
+        if n_objectives == 2:
+            order = np.lexsort((-values[:, :, 1], -values[:, :, 0]), axis=-1)
+            second = np.take_along_axis(values[:, :, 1], order, axis=1)
+            running_best = np.maximum.accumulate(second, axis=1)
+            previous_best = np.hstack([np.full((n_rows, 1), -np.inf), running_best[:, :-1]])
+            mask = np.empty((n_rows, n_points), dtype=bool)
+            np.put_along_axis(mask, order, second > previous_best, axis=1)
+            return mask
+
+        # Pairwise dominance within each row, in blocks of rows to bound memory
+        mask = np.empty((n_rows, n_points), dtype=bool)
+        earlier = np.tri(n_points, k=-1, dtype=bool)  # [i, j]: j precedes i
+        rows_per_block = max(1, cls.BATCH_ELEMENTS // (n_points * n_points * n_objectives))
+        for start in range(0, n_rows, rows_per_block):
+            block = values[start:start + rows_per_block]
+            weakly = cls._weakly_dominates(block, block)
+            strictly = np.zeros_like(weakly)
+            for j in range(n_objectives):
+                strictly |= block[:, None, :, j] > block[:, :, None, j]
+            # Equal points: only the first occurrence survives
+            mask[start:start + rows_per_block] = ~np.any(weakly & (strictly | earlier[None]), axis=2)
+        return mask
+
+    @classmethod
+    def segment_frontier(
+        cls,
+        product_name: str,
+        category: str,
+        emirate: str,
+        store_type: str,
+        current_price: float,
+        month: int,
+        day_of_week: int,
+        day_of_month: int,
+        is_weekend: int = 0,
+        is_holiday: int = 0,
+        objectives: Optional[List[str]] = None,
+        num_points: int = ElasticityService.PRICE_GRID_POINTS
+    ) -> Dict:
+        """
+        Non-dominated price points for one segment over the candidate grid that
+        optimize_price_for_profit searches (plus the current price).
+        Prices are in the data currency (USD).
+        """
+        objectives = list(objectives or cls.OBJECTIVES)
+        unknown = set(objectives) - set(cls.OBJECTIVES)
+        if unknown:
+            raise ValueError(f"Unknown objectives: {sorted(unknown)}. Valid: {list(cls.OBJECTIVES)}")
+        current_demand = XGBoostAIService.predict_segment_demand(
+            product_name, category, emirate, store_type, current_price,
+            month, day_of_week, day_of_month, is_weekend, is_holiday
+        )
+        base_elasticity = ElasticityService.get_product_elasticity(
+            product_name, emirate, store_type, current_price,
+            month, day_of_week, is_weekend, is_holiday
+        )
+        estimated_cost = ElasticityService.estimate_cost(product_name, current_price)
+        bounds = ElasticityService.compute_price_bounds(current_price, current_demand, estimated_cost)
+        prices = np.unique(np.append(
+            np.linspace(float(bounds['min_price']), float(bounds['max_price']), num_points),
+            current_price
+        ))
+        evaluation = ElasticityService.evaluate_price_candidates(
+            base_elasticity, current_price, current_demand, estimated_cost, prices
+        )
+
+        mask = cls.frontier_mask(np.column_stack([evaluation[name] for name in objectives]))
+        frontier = np.flatnonzero(mask)
+        frontier = frontier[np.argsort(evaluation['price'][frontier])]
+        max_profit = int(np.argmax(evaluation['profit']))
+
+        points = [
+            {
+                'price': round(float(evaluation['price'][i]), 2),
+                'price_change_percentage': round(float(evaluation['price_change_pct'][i]), 2),
+                'demand': round(float(evaluation['demand'][i]), 1),
+                'revenue': round(float(evaluation['revenue'][i]), 2),
+                'profit': round(float(evaluation['profit'][i]), 2),
+                'is_current_price': bool(np.isclose(evaluation['price'][i], current_price)),
+                'is_max_profit': bool(i == max_profit)
+            }
+            for i in frontier
+        ]
+
+        return {
+            'product_name': product_name,
+            'emirate': emirate,
+            'store_type': store_type,
+            'current_price': round(current_price, 2),
+            'estimated_cost': round(estimated_cost, 2),
+            'objectives': objectives,
+            'candidates_evaluated': len(prices),
+            'frontier': points
+        }
+
+    @classmethod
+    def catalog_frontier(
+        cls,
+        month: int,
+        day_of_week: int,
+        day_of_month: int,
+        is_weekend: int = 0,
+        is_holiday: int = 0,
+        product_names: Optional[List[str]] = None,
+        emirates: Optional[List[str]] = None,
+        store_types: Optional[List[str]] = None,
+        num_points: int = ElasticityService.PRICE_GRID_POINTS,
+        frontier_points: int = FRONTIER_POINTS
+    ) -> Dict:
+        """
+        Aggregate profit vs. volume frontier across all matching segments.
+
+        Each segment's candidates are first reduced to its own (profit, demand) frontier.
+        The catalog trade-off is then traced by maximizing profit + w * demand per
+        segment for a sweep of volume weights w (profit given up per extra unit),
+        taken from quantiles of the per-segment switching rates, from the pure profit
+        optimum (w = 0) to maximum volume. Prices are in the data currency (USD).
+        """
+        curves = CatalogOptimizationService.build_segment_curves(
+            month, day_of_week, day_of_month, is_weekend, is_holiday,
+            product_names, emirates, store_types, num_points
+        )
+        profit, demand, revenue = curves['profit'], curves['demand'], curves['revenue']
+        n_segments = profit.shape[0]
+        rows = np.arange(n_segments)
+
+        on_frontier = cls.batched_frontier_mask(np.stack([profit, demand], axis=2))
+        masked_profit = np.where(on_frontier, profit, -np.inf)
+
+        # Rate at which each frontier point would replace its segment's profit optimum
+        best = np.argmax(masked_profit, axis=1)
+        profit_gap = profit[rows, best][:, None] - profit
+        demand_gain = demand - demand[rows, best][:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.where(on_frontier & (demand_gain > 0), profit_gap / demand_gain, np.nan)
+        rates = rates[np.isfinite(rates)]
+        weights = np.unique(np.concatenate([
+            [0.0], np.quantile(rates, np.linspace(0, 1, max(frontier_points - 2, 1))) if len(rates) else []
+        ]))
+
+        choices = [np.argmax(masked_profit + w * np.where(on_frontier, demand, 0), axis=1) for w in weights]
+        # Maximum volume end point (ties towards higher profit)
+        max_demand = np.where(on_frontier, demand, -np.inf)
+        choices.append(np.argmax(
+            np.where(max_demand == max_demand.max(axis=1, keepdims=True), masked_profit, -np.inf), axis=1
+        ))
+        weights = np.append(weights, np.inf)
+
+        totals = np.array([
+            [profit[rows, c].sum(), demand[rows, c].sum(), revenue[rows, c].sum()] for c in choices
+        ])
+        keep = np.flatnonzero(cls.frontier_mask(totals[:, :2]))
+        keep = keep[np.argsort(totals[keep, 1])]
+
+        current = curves['current_index']
+        max_profit_total = totals[0, 0]
+        points = [
+            {
+                'volume_weight': None if np.isinf(weights[i]) else round(float(weights[i]), 4),
+                'total_profit': round(float(totals[i, 0]), 2),
+                'total_demand': round(float(totals[i, 1]), 1),
+                'total_revenue': round(float(totals[i, 2]), 2),
+                'profit_vs_max_pct': round(float((totals[i, 0] - max_profit_total) / abs(max_profit_total) * 100), 2)
+                if max_profit_total else 0.0,
+                'segments_changed': int(np.sum(choices[i] != current))
+            }
+            for i in keep
+        ]
+
+        logger.info("Catalog frontier: %s segments, %s frontier candidates, %s trade-off points",
+                    n_segments, int(on_frontier.sum()), len(points))
+
+        return {
+            'segments': n_segments,
+            'candidates_evaluated': int(profit.size),
+            'segment_frontier_candidates': int(on_frontier.sum()),
+            'current': {
+                'total_profit': round(float(profit[:, current].sum()), 2),
+                'total_demand': round(float(demand[:, current].sum()), 1),
+                'total_revenue': round(float(revenue[:, current].sum()), 2)
+            },
+            'frontier': points
+        }
@@ -0,0 +1,258 @@
+"""
+Multi-period price calendar planning
+Optimizes a day-by-day price plan over a horizon with dynamic programming over a
+discrete price ladder, limiting how often the price may change
+"""
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from services.ai_service import XGBoostAIService
+from services.elasticity_service import ElasticityService
+
+
+class PriceCalendarService:
+    """Service for horizon-wide price calendar optimization"""
+
+    WEEKEND_DAYS = (4, 5)  # Friday and Saturday (day_of_week 0 = Monday), as in the historical data
+    MAX_HORIZON_DAYS = 366
+
+    @classmethod
+    def build_calendar(
+        cls,
+        start_date: date,
+        horizon_days: int,
+        holidays: Optional[List[date]] = None
+    ) -> pd.DataFrame:
+        """Calendar features (month, day_of_week, day_of_month, is_weekend, is_holiday) per day"""
+        dates = pd.date_range(start_date, periods=horizon_days, freq='D')
+        holiday_set = set(pd.to_datetime(holidays).normalize()) if holidays else set()
+        return pd.DataFrame({
+            'date': dates,
+            'month': dates.month,
+            'day_of_week': dates.dayofweek,
+            'day_of_month': dates.day,
+            'is_weekend': dates.dayofweek.isin(cls.WEEKEND_DAYS).astype(int),
+            'is_holiday': dates.isin(holiday_set).astype(int)
+        })
+
+    @classmethod
+    def score_demand_grid(
+        cls,
+        product_name: str,
+        category: str,
+        emirate: str,
+        store_type: str,
+        calendar: pd.DataFrame,
+        price_levels: np.ndarray,
+        rolling_data: Optional[Dict] = None
+    ) -> np.ndarray:
+        """
+        Model demand for every (day, price level) pair with a single batched XGBoost call.
+        Rolling features are looked up from history unless given.
+
+        Returns:
+            (D, L) array of predicted demand
+        """
+        if rolling_data is None:
+            rolling_data = XGBoostAIService.get_rolling_averages_for_prediction(
+                product_name, emirate, store_type
+            )
+        n_days, n_levels = len(calendar), len(price_levels)
+
+        frame = calendar.drop(columns=['date']).loc[calendar.index.repeat(n_levels)].reset_index(drop=True)
+        frame['price_per_sales_unit'] = np.tile(price_levels, n_days)
+        frame['product_name'] = product_name
+        frame['category'] = category
+        frame['emirate'] = emirate
+        frame['store_type'] = store_type
+        for feature, value in rolling_data.items():
+            frame[feature] = value
+
+        return XGBoostAIService.predict_demand_batch(frame).reshape(n_days, n_levels)
+
+    @classmethod
+    def solve_schedule(
+        cls,
+        profit: np.ndarray,
+        start_level: int,
+        max_price_changes: int,
+        min_days_between_changes: int
+    ) -> Dict:
+        """
+        Dynamic program over (changes used, price level, days since last change).
+
+        The price starts at start_level (held long enough to change on day one). A change
+        to another level consumes one of max_price_changes and is only allowed once the
+        current price has been held for min_days_between_changes days.
+
+        Args:
+            profit: (D, L) expected profit per day and price level
+
+        Returns:
+            Dict with the chosen level per day and the total expected profit
+        """
+        n_days, n_levels = profit.shape
+        n_changes = max_price_changes + 1
+        hold = max(1, min_days_between_changes)
+        levels = np.arange(n_levels)
+
+        # value[c, k, h]: best profit so far with c changes used, at level k,
+        # held for h+1 days (the last slot means "held long enough to change")
+        value = np.full((n_changes, n_levels, hold), -np.inf)
+        value[0, start_level, hold - 1] = 0.0
+
+        # Backpointers per day: flat index of the predecessor state
+        backpointers = np.zeros((n_days, n_changes, n_levels, hold), dtype=np.int64)
+        state_index = np.arange(value.size).reshape(value.shape)
+
+        for day in range(n_days):
+            # Keep the current level: the hold counter advances (saturating)
+            stay = np.full_like(value, -np.inf)
+            stay_from = np.zeros(value.shape, dtype=np.int64)
+            if hold > 1:
+                stay[:, :, 1:] = value[:, :, :-1]
+                stay_from[:, :, 1:] = state_index[:, :, :-1]
+                saturated = value[:, :, -1] >= value[:, :, -2]
+                stay[:, :, -1] = np.where(saturated, value[:, :, -1], value[:, :, -2])
+                stay_from[:, :, -1] = np.where(saturated, state_index[:, :, -1], state_index[:, :, -2])
+            else:
+                stay[:] = value
+                stay_from[:] = state_index
+
+            # Change level: only from states held long enough, best source level j != k
+            change = np.full_like(value, -np.inf)
+            change_from = np.zeros(value.shape, dtype=np.int64)
+            if n_changes > 1:
+                source = value[:-1, :, -1]  # (C, L)
+                order = np.argsort(source, axis=1)
+                top = order[:, -1]
+                second = order[:, -2] if n_levels > 1 else top
+                best_other = np.where(levels[None, :] == top[:, None], second[:, None], top[:, None])
+                change[1:, :, 0] = np.take_along_axis(source, best_other, axis=1)
+                change[1:, :, 0] = np.where(best_other == levels[None, :], -np.inf, change[1:, :, 0])
+                change_from[1:, :, 0] = state_index[np.arange(n_changes - 1)[:, None], best_other, hold - 1]
+
+            take_change = change > stay
+            value = np.where(take_change, change, stay) + profit[day][None, :, None]
+            backpointers[day] = np.where(take_change, change_from, stay_from)
+
+        # Backtrack from the best final state
+        state = int(np.argmax(value))
+        total_profit = float(value.flat[state])
+        schedule = np.zeros(n_days, dtype=int)
+        for day in range(n_days - 1, -1, -1):
+            _, level, _ = np.unravel_index(state, value.shape)
+            schedule[day] = level
+            state = int(backpointers[day].flat[state])
+
+        return {'levels': schedule, 'total_profit': total_profit}
+
+    @classmethod
+    def plan_calendar(
+        cls,
+        product_name: str,
+        category: str,
+        emirate: str,
+        store_type: str,
+        current_price: float,
+        start_date: Optional[date] = None,
+        horizon_days: int = 30,
+        num_price_levels: int = 15,
+        max_price_changes: int = 4,
+        min_days_between_changes: int = 3,
+        holidays: Optional[List[date]] = None
+    ) -> Dict:
+        """
+        Build a day-by-day price plan that maximizes expected profit over the horizon.
+
+        Demand for every day x price level is scored in one batch by the XGBoost model
+        with that day's calendar features, then blended with the elasticity response
+        around the day's demand at the current price, as in simulate_price_scenario.
+        The ladder spans ElasticityService's demand-responsive price bounds and always
+        contains the current price.
+        """
+        if start_date is None:
+            start_date = datetime.now().date() + timedelta(days=1)
+        horizon_days = max(1, min(horizon_days, cls.MAX_HORIZON_DAYS))
+        calendar = cls.build_calendar(start_date, horizon_days, holidays)
+
+        rolling_data = XGBoostAIService.get_rolling_averages_for_prediction(product_name, emirate, store_type)
+
+        # Demand at the current price for every day sets the bounds and the elasticity baseline
+        baseline_demand = cls.score_demand_grid(
+            product_name, category, emirate, store_type, calendar, np.array([current_price]), rolling_data
+        )[:, 0]
+
+        estimated_cost = ElasticityService.estimate_cost(product_name, current_price)
+        bounds = ElasticityService.compute_price_bounds(current_price, baseline_demand.mean(), estimated_cost)
+        price_levels = np.unique(np.append(
+            np.linspace(float(bounds['min_price']), float(bounds['max_price']), num_price_levels),
+            current_price
+        ))
+        start_level = int(np.searchsorted(price_levels, current_price))
+
+        # The current price is a ladder level: its column is the baseline already scored
+        model_demand = np.insert(cls.score_demand_grid(
+            product_name, category, emirate, store_type, calendar, np.delete(price_levels, start_level), rolling_data
+        ), start_level, baseline_demand, axis=1)
+
+        base_elasticity = ElasticityService.get_product_elasticity(
+            product_name, emirate, store_type, current_price,
+            int(calendar['month'].iloc[0]), int(calendar['day_of_week'].iloc[0])
+        )
+        elasticity_demand = ElasticityService.evaluate_price_candidates(
+            base_elasticity, current_price, baseline_demand[:, None], estimated_cost, price_levels[None, :]
+        )['demand']
+
+        weight = XGBoostAIService.AI_BLEND_WEIGHT
+        demand = model_demand * weight + elasticity_demand * (1 - weight)
+        profit = (price_levels[None, :] - estimated_cost) * demand
+
+        solution = cls.solve_schedule(profit, start_level, max_price_changes, min_days_between_changes)
+        schedule = solution['levels']
+
+        days = np.arange(horizon_days)
+        plan_prices = price_levels[schedule]
+        plan_demand = demand[days, schedule]
+        plan_profit = profit[days, schedule]
+        baseline_profit = float(profit[:, start_level].sum())
+        previous_levels = np.concatenate([[start_level], schedule[:-1]])
+
+        plan = [
+            {
+                'date': calendar['date'].iloc[d].strftime('%Y-%m-%d'),
+                'day_of_week': int(calendar['day_of_week'].iloc[d]),
+                'is_weekend': int(calendar['is_weekend'].iloc[d]),
+                'is_holiday': int(calendar['is_holiday'].iloc[d]),
+                'price': round(float(plan_prices[d]), 2),
+                'expected_demand': round(float(plan_demand[d]), 1),
+                'expected_revenue': round(float(plan_prices[d] * plan_demand[d]), 2),
+                'expected_profit': round(float(plan_profit[d]), 2),
+                'price_changed': bool(schedule[d] != previous_levels[d])
+            }
+            for d in days
+        ]
+
+        total_profit = solution['total_profit']
+        return {
+            'product_name': product_name,
+            'emirate': emirate,
+            'store_type': store_type,
+            'current_price': round(current_price, 2),
+            'estimated_cost': round(estimated_cost, 2),
+            'price_levels': [round(float(p), 2) for p in price_levels],
+            'plan': plan,
+            'summary': {
+                'horizon_days': horizon_days,
+                'expected_profit': round(total_profit, 2),
+                'expected_revenue': round(float((plan_prices * plan_demand).sum()), 2),
+                'baseline_profit': round(baseline_profit, 2),
+                'profit_improvement_pct': round(
+                    (total_profit - baseline_profit) / baseline_profit * 100, 1
+                ) if baseline_profit > 0 else 0.0,
+                'price_changes': int(sum(day['price_changed'] for day in plan)),
+                'max_price_changes': max_price_changes,
+                'min_days_between_changes': min_days_between_changes
+            }
+        }
@@ -0,0 +1,101 @@
+"""
+Psychological price ladders
+Shelf prices are restricted to configured endings (e.g. x.49 / x.95 / x.99 in AED),
+defined per emirate, store type or emirate/store type pair in price_ladders.json
+"""
+import os
+import json
+import numpy as np
+from typing import Dict, List
+from services.logging_service import get_logger
+
+logger = get_logger(__name__)
+
+
+class PriceLadderService:
+    """Service for generating valid shelf-price candidates"""
+
+    ladders_cache = None
+    LADDERS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'price_ladders.json')
+    DEFAULT_LADDER = [{'max_price': None, 'endings': [0.49, 0.95, 0.99]}]
+
+    @classmethod
+    def load_ladders(cls) -> Dict:
+        """Load ladder definitions from JSON file"""
+        if cls.ladders_cache is None:
+            try:
+                with open(cls.LADDERS_PATH, 'r') as f:
+                    cls.ladders_cache = json.load(f)
+                logger.info("Loaded price ladders (%s store types, %s emirates)",
+                            len(cls.ladders_cache.get('store_types', {})), len(cls.ladders_cache.get('emirates', {})))
+            except Exception as e:
+                logger.warning("Could not load price ladders: %s", e)
+                cls.ladders_cache = {'default': cls.DEFAULT_LADDER}
+        return cls.ladders_cache
+
+    @classmethod
+    def get_ladder(cls, emirate: str, store_type: str) -> List[Dict]:
+        """
+        Ladder tiers for a segment. The most specific definition wins:
+        "Emirate/Store type" segment override, then store type, then emirate, then default.
+        """
+        ladders = cls.load_ladders()
+        for key, scope in (
+            (f"{emirate}/{store_type}", 'segments'),
+            (store_type, 'store_types'),
+            (emirate, 'emirates')
+        ):
+            if key in ladders.get(scope, {}):
+                return ladders[scope][key]
+        return ladders.get('default', cls.DEFAULT_LADDER)
+
+    @staticmethod
+    def ladder_points(min_price: float, max_price: float, tiers: List[Dict]) -> np.ndarray:
+        """
+        Every ladder price in [min_price, max_price] (shelf currency), generated in one pass.
+
+        Each tier applies its endings to prices up to its max_price (None = no upper limit).
+        When the range holds no valid price, the ladder point closest to the range is
+        returned so a shelf price always exists.
+        """
+        limits = np.array([np.inf if t['max_price'] is None else t['max_price'] for t in tiers])
+        endings = np.unique(np.concatenate([t['endings'] for t in tiers]))
+        # allowed[t, e]: tier t uses ending e
+        allowed = np.array([np.isin(endings, t['endings']) for t in tiers])
+
+        units = np.arange(np.floor(min_price) - 1, np.ceil(max_price) + 1)
+        points = (units[:, None] + endings[None, :]).ravel()
+        ending_index = np.tile(np.arange(len(endings)), len(units))
+        tier = np.minimum(np.searchsorted(limits, points), len(tiers) - 1)
+        points = np.round(points[(points > 0) & allowed[tier, ending_index]], 2)
+
+        in_range = points[(points >= min_price - 1e-9) & (points <= max_price + 1e-9)]
+        if len(in_range):
+            return np.unique(in_range)
+        distance = np.maximum(min_price - points, points - max_price)
+        return points[[np.argmin(distance)]]
+
+    @classmethod
+    def get_candidates(
+        cls,
+        min_price: float,
+        max_price: float,
+        emirate: str,
+        store_type: str,
+        currency_rate: float = 1.0
+    ) -> Dict:
+        """
+        Valid shelf prices for a segment's price range.
+
+        Ladders are defined in shelf currency (AED); currency_rate converts data-currency
+        prices into it (CurrencyService.rate of the shelf currency). Returns shelf prices and the same candidates
+        in data currency for evaluation.
+        """
+        tiers = cls.get_ladder(emirate, store_type)
+        shelf_prices = cls.ladder_points(min_price * currency_rate, max_price * currency_rate, tiers)
+        return {
+            'shelf_prices': shelf_prices,
+            'prices': shelf_prices / currency_rate,
+            'currency': cls.load_ladders().get('currency', 'AED'),
+            'endings': sorted({e for t in tiers for e in t['endings']})
+        }
@@ -0,0 +1,130 @@
+"""
+On-demand stack-sampling profiler for a running worker
+A background thread snapshots the Python stacks of every thread at a fixed interval
+and counts identical stacks. Output is collapsed-stack text (flamegraph.pl, speedscope)
+or JSON. Memory is bounded by a cap on distinct stacks and on stack depth
+"""
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running in this worker"""
+
+
+class SamplingProfiler:
+    """Service for sampling every thread's stack of this process for a bounded time"""
+
+    ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    TOKEN = os.getenv('PROFILER_TOKEN')  # When set, required in the X-Profiler-Token header
+    MAX_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', '60'))
+    MAX_STACKS = int(os.getenv('PROFILER_MAX_STACKS', '10000'))
+    MAX_DEPTH = 128
+    MIN_INTERVAL = 0.001
+    OVERFLOW_STACK = '[other stacks]'
+    TRUNCATED_FRAME = '[truncated]'
+
+    # Leaf frames of threads that are parked, not working
+    IDLE_LEAVES = {
+        ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'), ('queue.py', 'get'),
+        ('selectors.py', 'select'), ('base_events.py', '_run_once'), ('socket.py', 'accept'),
+        ('concurrent/futures/thread.py', '_worker'),
+        ('logging/handlers.py', 'dequeue')  # QueueListener blocked in SimpleQueue.get (C, no Python frame)
+    }
+
+    lock = threading.Lock()
+
+    @classmethod
+    def profile(cls, seconds: float, interval: float = 0.01, include_idle: bool = False) -> Dict:
+        """
+        Sample all threads for `seconds` (clamped to MAX_SECONDS). Blocks the calling
+        thread, which is itself excluded from the samples
+        """
+        if not cls.lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        try:
+            return cls._run(min(seconds, cls.MAX_SECONDS), max(interval, cls.MIN_INTERVAL), include_idle)
+        finally:
+            cls.lock.release()
+
+    @classmethod
+    def _run(cls, seconds: float, interval: float, include_idle: bool) -> Dict:
+        stacks = Counter()
+        labels = {}  # Code object -> frame label, shared across samples
+        own_ident = threading.get_ident()
+        samples = idle = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        sampling_time = 0.0
+        next_sample = started
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if not include_idle and cls._is_idle(frame):
+                    idle += 1
+                    continue
+                stack = cls._collapse(frame, names.get(ident, f'thread-{ident}'), labels)
+                if stack not in stacks and len(stacks) >= cls.MAX_STACKS:
+                    stack = cls.OVERFLOW_STACK
+                stacks[stack] += 1
+                samples += 1
+            sampling_time += time.perf_counter() - now
+            next_sample += interval
+            time.sleep(max(0.0, next_sample - time.perf_counter()))
+
+        elapsed = time.perf_counter() - started
+        return {
+            'pid': os.getpid(),
+            'duration_seconds': round(elapsed, 3),
+            'interval_ms': round(interval * 1000, 3),
+            'samples': samples,
+            'idle_samples_skipped': idle,
+            'distinct_stacks': len(stacks),
+            'truncated': cls.OVERFLOW_STACK in stacks,
+            'overhead_ratio': round(sampling_time / elapsed, 4) if elapsed else 0.0,
+            'stacks': stacks
+        }
+
+    @classmethod
+    def _is_idle(cls, frame) -> bool:
+        code = frame.f_code
+        return any(code.co_filename.endswith(file) and code.co_name == name for file, name in cls.IDLE_LEAVES)
+
+    @classmethod
+    def _collapse(cls, frame, thread_name: str, labels: Dict) -> str:
+        """'thread;root frame;...;leaf frame' with at most MAX_DEPTH frames (leaf side kept)"""
+        frames = []
+        while frame is not None and len(frames) < cls.MAX_DEPTH:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            frames.append(label)
+            frame = frame.f_back
+        if frame is not None:
+            frames.append(cls.TRUNCATED_FRAME)
+        frames.append(thread_name)
+        # Frame labels must not contain the collapsed format's separators
+        return ';'.join(reversed(frames)).replace('\n', ' ')
+
+    @staticmethod
+    def collapsed(result: Dict) -> str:
+        """Collapsed-stack text: one 'frame;frame;... count' line per distinct stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in result['stacks'].most_common())
+
+    @staticmethod
+    def to_json(result: Dict, top: Optional[int] = None) -> Dict:
+        stacks = result['stacks'].most_common(top)
+        return {
+            **{key: value for key, value in result.items() if key != 'stacks'},
+            'stacks': [{'stack': stack.split(';'), 'count': count} for stack, count in stacks]
+        }
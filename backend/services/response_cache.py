@@ -0,0 +1,121 @@
+"""
+Versioned response cache for read-only endpoints
+Serialized response bodies are kept per (resource, version) so repeated reads skip
+both the computation and the JSON encoding; ETags are derived from the version so
+revalidation (304) needs neither. The LRU is bounded by entry count and by its
+memory budget (MEMORY_BUDGET_RESPONSE_CACHE_MB)
+"""
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+from services.serialization_service import SerializationService
+from services.metrics_service import MetricsService
+from services.memory_service import MemoryService
+
+
+class ResponseCache:
+    """Service for ETag validators and an LRU of serialized response bodies"""
+
+    entries = OrderedDict()
+    lock = threading.Lock()
+    MAX_ENTRIES = 512
+    counters = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0}
+    total_bytes = 0
+
+    @staticmethod
+    def etag(resource: str, version: str) -> str:
+        """Strong validator: dataset/model version plus a digest of the resource key"""
+        digest = hashlib.sha1(resource.encode()).hexdigest()[:12]
+        return f'"{version}-{digest}"'
+
+    @staticmethod
+    def matches(if_none_match: Optional[str], etag: str) -> bool:
+        """If-None-Match comparison (weak comparison, as RFC 9110 requires for GET)"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return any(tag.removeprefix('W/') == etag for tag in candidates)
+
+    @classmethod
+    def get_body(cls, resource: str, version: str, build: Callable) -> bytes:
+        """Serialized body for a resource at a version, built (and cached) on first use"""
+        key = (resource, version)
+        with cls.lock:
+            body = cls.entries.get(key)
+            if body is not None:
+                cls.entries.move_to_end(key)
+                cls.counters['hits'] += 1
+                return body
+            cls.counters['misses'] += 1
+
+        body = SerializationService.dumps(build())
+        with cls.lock:
+            previous = cls.entries.pop(key, None)
+            cls.total_bytes += len(body) - (len(previous) if previous is not None else 0)
+            cls.entries[key] = body
+            max_bytes = MemoryService.budget('response_cache')
+            while len(cls.entries) > cls.MAX_ENTRIES or (max_bytes is not None and cls.total_bytes > max_bytes):
+                cls._evict_oldest()
+        return body
+
+    @classmethod
+    def _evict_oldest(cls):
+        # Caller holds the lock
+        _, body = cls.entries.popitem(last=False)
+        cls.total_bytes -= len(body)
+        cls.counters['evictions'] += 1
+
+    @classmethod
+    def shrink(cls, target_bytes: int):
+        """Evict least recently used bodies until at most target_bytes are held"""
+        with cls.lock:
+            while cls.entries and cls.total_bytes > target_bytes:
+                cls._evict_oldest()
+
+    @classmethod
+    def memory_usage(cls) -> int:
+        with cls.lock:
+            return cls.total_bytes + MemoryService.deep_sizeof(list(cls.entries)) + sys.getsizeof(cls.entries)
+
+    @classmethod
+    def record_not_modified(cls):
+        with cls.lock:
+            cls.counters['not_modified'] += 1
+
+    @classmethod
+    def clear(cls):
+        with cls.lock:
+            cls.entries.clear()
+            cls.total_bytes = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls.lock:
+            return {**cls.counters, 'entries': len(cls.entries), 'bytes': cls.total_bytes}
+
+    @classmethod
+    def metric_samples(cls):
+        stats = cls.stats()
+        samples = [('pricing_response_cache_requests_total', {'result': key}, stats[key])
+                   for key in ('hits', 'misses', 'not_modified')]
+        samples.append(('pricing_response_cache_evictions_total', {}, stats['evictions']))
+        samples.append(('pricing_response_cache_entries', {}, stats['entries']))
+        samples.append(('pricing_response_cache_bytes', {}, stats['bytes']))
+        return samples
+
+
+MetricsService.define('pricing_response_cache_requests_total', 'counter', 'Read-endpoint cache lookups by result (hits, misses, not_modified)')
+MetricsService.define('pricing_response_cache_evictions_total', 'counter', 'Bodies evicted by the entry limit or memory budget')
+MetricsService.define('pricing_response_cache_entries', 'gauge', 'Serialized response bodies held in memory')
+MetricsService.define('pricing_response_cache_bytes', 'gauge', 'Bytes of serialized response bodies held in memory')
+MetricsService.define_ratio('pricing_response_cache_hit_ratio', 'Share of read-endpoint requests served without rebuilding the body',
+                            'pricing_response_cache_requests_total', 'result', ('hits', 'not_modified'))
+MetricsService.register_collector(ResponseCache.metric_samples)
+MemoryService.register(
+    'response_cache', 'Serialized bodies of read-only endpoints (LRU)', ResponseCache.memory_usage,
+    shrink=ResponseCache.shrink, owners=[ResponseCache.get_body], default_budget_mb=64
+)
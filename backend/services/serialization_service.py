@@ -0,0 +1,65 @@
+"""
+Fast JSON serialization for API responses
+Serializes trusted internal dicts straight to bytes with orjson (numpy-aware) when it
+is installed, falling back to the standard library encoder otherwise
+"""
+import json
+import math
+from typing import Any
+from fastapi.responses import JSONResponse
+from services.metrics_service import MetricsService
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib path produces the same JSON
+    orjson = None
+
+
+class SerializationService:
+    """Service for encoding response payloads to JSON bytes"""
+
+    ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    @staticmethod
+    def _default(value: Any):
+        """Types neither encoder handles natively: numpy scalars/arrays, pydantic models, dates"""
+        if hasattr(value, 'model_dump'):
+            return value.model_dump()
+        if hasattr(value, 'tolist'):
+            return value.tolist()
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+    @classmethod
+    @MetricsService.timed('serialization')
+    def dumps(cls, payload: Any) -> bytes:
+        """Compact JSON bytes; NaN and infinity become null with either encoder"""
+        if orjson is not None:
+            return orjson.dumps(payload, default=cls._default, option=cls.ORJSON_OPTIONS)
+        return json.dumps(
+            cls._finite(payload), default=cls._default, separators=(',', ':'), allow_nan=False
+        ).encode()
+
+    @classmethod
+    def _finite(cls, value: Any):
+        # Mirror orjson: non-finite floats are serialized as null
+        if isinstance(value, float):
+            return value if math.isfinite(value) else None
+        if isinstance(value, dict):
+            return {k: cls._finite(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [cls._finite(v) for v in value]
+        return value
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for payloads built from trusted internal data: encoded in one pass,
+    without FastAPI's response-model validation and jsonable_encoder walk
+    """
+
+    def render(self, content: Any) -> bytes:
+        return SerializationService.dumps(content)
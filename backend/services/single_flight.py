@@ -0,0 +1,106 @@
+"""
+Single-flight deduplication of identical in-flight calls
+Concurrent calls with the same canonical key share one computation: the first
+caller runs it, later callers wait for its result (or its exception)
+"""
+import copy
+import json
+import inspect
+import threading
+from functools import wraps
+from typing import Callable, Dict
+from services.metrics_service import MetricsService
+from services.logging_service import DecisionTrace
+
+
+class SingleFlight:
+    """Per-key in-flight call registry shared by all decorated functions"""
+
+    lock = threading.Lock()
+    calls = {}
+    counters = {'executions': 0, 'shared': 0}
+
+    @staticmethod
+    def canonical_key(fn: Callable, signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+        """
+        Function name plus its bound arguments with defaults applied, serialized with
+        sorted keys, so positional / keyword / defaulted spellings of a call match
+        """
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return f"{fn.__module__}.{fn.__qualname__}:" + json.dumps(
+            bound.arguments, sort_keys=True, default=repr, separators=(',', ':')
+        )
+
+    @classmethod
+    def do(cls, key: str, fn: Callable, *args, **kwargs):
+        """
+        Run fn once per key at a time. Every caller gets its own deep copy of a shared
+        result (the leader keeps the original only when nobody joined), so callers that
+        post-process it cannot affect each other; an exception raised by the leader is
+        re-raised in every waiter.
+        """
+        with cls.lock:
+            call = cls.calls.get(key)
+            leader = call is None
+            if leader:
+                call = cls.calls[key] = {'done': threading.Event(), 'result': None, 'error': None, 'waiters': 0}
+                cls.counters['executions'] += 1
+            else:
+                call['waiters'] += 1
+                cls.counters['shared'] += 1
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return copy.deepcopy(call['result'])
+
+        try:
+            call['result'] = fn(*args, **kwargs)
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            # Unregister before waking waiters so calls arriving later start a fresh flight
+            with cls.lock:
+                del cls.calls[key]
+            call['done'].set()
+        # No one can join once unregistered, so the waiter count is final here
+        return copy.deepcopy(call['result']) if call['waiters'] else call['result']
+
+    @classmethod
+    def stats(cls) -> Dict:
+        with cls.lock:
+            return {**cls.counters, 'in_flight': len(cls.calls)}
+
+    @classmethod
+    def metric_samples(cls):
+        stats = cls.stats()
+        return [
+            ('pricing_single_flight_calls_total', {'result': 'executed'}, stats['executions']),
+            ('pricing_single_flight_calls_total', {'result': 'shared'}, stats['shared']),
+            ('pricing_single_flight_in_flight', {}, stats['in_flight'])
+        ]
+
+
+def single_flight(fn: Callable) -> Callable:
+    """Decorator: deduplicate concurrent identical calls of fn (see SingleFlight.do)"""
+    signature = inspect.signature(fn)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        # A traced call must record its own decisions, so it never joins a shared one
+        if DecisionTrace.active():
+            return fn(*args, **kwargs)
+        key = SingleFlight.canonical_key(fn, signature, args, kwargs)
+        return SingleFlight.do(key, fn, *args, **kwargs)
+
+    return wrapper
+
+
+MetricsService.define('pricing_single_flight_calls_total', 'counter', 'Deduplicated calls by result (executed, shared with an identical in-flight call)')
+MetricsService.define('pricing_single_flight_in_flight', 'gauge', 'Computations currently in flight')
+MetricsService.define_ratio('pricing_single_flight_shared_ratio', 'Share of calls answered by an identical in-flight computation',
+                            'pricing_single_flight_calls_total', 'result', ('shared',))
+MetricsService.register_collector(SingleFlight.metric_samples)
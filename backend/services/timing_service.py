@@ -0,0 +1,195 @@
+"""
+Per-request latency breakdown
+Pipeline stage timings of a request are summed into a Server-Timing response header.
+With X-Request-Profile (enabled by REQUEST_PROFILING) a single request runs under
+cProfile and the response is replaced by its profile summary. The profile covers the
+request's threadpool calls; the event loop is profiled separately, because while the
+request awaits, the loop also runs the coroutines of other requests
+"""
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+import contextvars
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool as starlette_run_in_threadpool
+
+
+class RequestTiming:
+    """Stage durations of the request being served (follows it into threadpool workers)"""
+
+    current = contextvars.ContextVar('request_timing', default=None)
+
+    __slots__ = ('started', 'stages')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @classmethod
+    def add(cls, stage: str, seconds: float):
+        timing = cls.current.get()
+        if timing is not None:
+            timing.stages[stage] = timing.stages.get(stage, 0.0) + seconds
+
+    def header(self) -> str:
+        """Server-Timing value: one metric per stage plus the total, durations in ms"""
+        metrics = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items()]
+        metrics.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.3f}")
+        return ", ".join(metrics)
+
+
+class RequestProfile:
+    """cProfile data of one request's threadpool calls, plus the event loop while it was served"""
+
+    current = contextvars.ContextVar('request_profile', default=None)
+    TOP_FUNCTIONS = int(os.getenv('REQUEST_PROFILE_TOP', '40'))
+
+    # One profiled request at a time: cProfile takes over the thread's profile hook
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []  # One per threadpool call of the request
+        self.loop = cProfile.Profile()
+
+    def wrap(self, fn: Callable) -> Callable:
+        """fn profiled in whichever thread runs it"""
+        @wraps(fn)
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            self.profiles.append(profile)
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+        return profiled
+
+    def summary(self) -> Dict:
+        """Top functions by cumulative time across the request's threadpool calls"""
+        return self.summarize(self.profiles) if self.profiles else {
+            'total_calls': 0, 'total_ms': 0.0, 'threads': 0, 'functions': []
+        }
+
+    @classmethod
+    def summarize(cls, profiles: List[cProfile.Profile]) -> Dict:
+        """Top functions by cumulative time across profiles"""
+        stats = pstats.Stats(*profiles)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return {
+            'total_calls': stats.total_calls,
+            'total_ms': round(stats.total_tt * 1000, 3),
+            'threads': len(profiles),
+            'functions': [
+                {
+                    'function': pstats.func_std_string(func),
+                    'calls': calls,
+                    'primitive_calls': primitive,
+                    'tottime_ms': round(tottime * 1000, 3),
+                    'cumtime_ms': round(cumtime * 1000, 3)
+                }
+                for func, (primitive, calls, tottime, cumtime, _) in rows[:cls.TOP_FUNCTIONS]
+            ]
+        }
+
+
+async def run_in_threadpool(func: Callable, *args, **kwargs):
+    """Starlette's run_in_threadpool; under X-Request-Profile the call is profiled in its worker"""
+    profile = RequestProfile.current.get()
+    if profile is not None:
+        func = profile.wrap(func)
+    return await starlette_run_in_threadpool(func, *args, **kwargs)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding Server-Timing headers and serving X-Request-Profile requests"""
+
+    ENABLED = os.getenv('SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes')
+    PROFILING = os.getenv('REQUEST_PROFILING', 'false').lower() in ('1', 'true', 'yes')
+    PROFILE_HEADER = b'x-request-profile'
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not (self.ENABLED or self.PROFILING):
+            await self.app(scope, receive, send)
+            return
+        if self.PROFILING and any(name == self.PROFILE_HEADER for name, _ in scope['headers']):
+            await self.profile(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = RequestTiming.current.set(timing)
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                # Streamed responses report the stages finished before their first byte
+                message['headers'] = list(message.get('headers', [])) + [
+                    (b'server-timing', timing.header().encode()),
+                    (b'timing-allow-origin', b'*')
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            RequestTiming.current.reset(token)
+
+    async def profile(self, scope, receive, send):
+        """
+        Run the request under cProfile and answer with the profile instead of its body.
+        'profile' covers only the request's threadpool calls. 'event_loop' is the loop
+        thread while the request was in flight: besides this request's coroutines it
+        includes the coroutine work of any request served concurrently
+        """
+        if not RequestProfile.lock.acquire(blocking=False):
+            await self.send_json(send, 429, {'detail': 'Another request is being profiled'})
+            return
+        timing, profile = RequestTiming(), RequestProfile()
+        tokens = RequestTiming.current.set(timing), RequestProfile.current.set(profile)
+        response = {'status': 500, 'bytes': 0}
+
+        async def capture(message):
+            # The original response is measured, not sent
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['bytes'] += len(message.get('body', b''))
+
+        try:
+            profile.loop.enable()
+            try:
+                await self.app(scope, receive, capture)
+            finally:
+                profile.loop.disable()
+            report = {
+                'path': scope['path'],
+                'status': response['status'],
+                'response_bytes': response['bytes'],
+                'server_timing': timing.header(),
+                'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in timing.stages.items()},
+                'profile': profile.summary(),
+                'event_loop': {
+                    'note': 'Event loop thread while the request was in flight, including other requests',
+                    **RequestProfile.summarize([profile.loop])
+                }
+            }
+        finally:
+            RequestProfile.current.reset(tokens[1])
+            RequestTiming.current.reset(tokens[0])
+            RequestProfile.lock.release()
+        await self.send_json(send, 200, report, [(b'server-timing', report['server_timing'].encode())])
+
+    @staticmethod
+    async def send_json(send, status: int, payload: dict, headers: Optional[list] = None):
+        body = json.dumps(payload).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())] + (headers or [])
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,153 @@
+"""
+Monte Carlo uncertainty engine for profit recommendations
+Samples elasticity and cost uncertainty and evaluates the whole price grid for
+every draw in a single NumPy broadcast
+"""
+import hashlib
+import numpy as np
+from typing import Dict, Optional
+from services.elasticity_service import ElasticityService
+
+
+class UncertaintyService:
+    """Service for profit distributions under elasticity and cost uncertainty"""
+
+    DEFAULT_DRAWS = 10000
+    INLINE_DRAWS = 2000  # Draws and prices for the confidence score embedded in every optimization
+    INLINE_GRID_POINTS = 50
+    GRID_POINTS = 200
+    ELASTICITY_SD = 0.15  # Absolute standard deviation of the base elasticity
+    COST_SD_PCT = 0.05  # Relative standard deviation of unit cost
+    QUANTILES = (5, 25, 50, 75, 95)
+    HISTOGRAM_BINS = 30
+    BAND_DRAWS = 2000  # Draws used for the per-price quantile bands
+
+    @classmethod
+    def simulate_profit(
+        cls,
+        base_elasticity: float,
+        estimated_cost: float,
+        current_price: float,
+        current_demand: float,
+        prices: np.ndarray,
+        recommended_price: float,
+        n_draws: int = DEFAULT_DRAWS,
+        elasticity_sd: float = ELASTICITY_SD,
+        cost_sd_pct: float = COST_SD_PCT,
+        seed: Optional[int] = None
+    ) -> Dict:
+        """
+        Draw elasticity and cost samples and evaluate profit for every (draw, price).
+
+        The dynamic elasticity adjustment depends only on the price change, so it is
+        computed once per price and broadcast against the elasticity draws. Work is
+        done in float32 on an (n_draws, n_prices) matrix.
+
+        Returns:
+            Dict with the recommended-price profit distribution (quantiles, histogram,
+            probability of improving on the current price) and per-price quantile bands
+        """
+        rng = np.random.default_rng(seed)
+        prices = np.unique(np.append(np.asarray(prices, dtype=float), [current_price, recommended_price]))
+        current_idx = int(np.searchsorted(prices, current_price))
+        recommended_idx = int(np.searchsorted(prices, recommended_price))
+
+        # Elasticity stays negative; cost stays positive
+        elasticity_draws = np.minimum(
+            rng.normal(base_elasticity, elasticity_sd, n_draws), -0.05
+        ).astype(np.float32)
+        cost_draws = (estimated_cost * np.maximum(
+            1 + rng.normal(0, cost_sd_pct, n_draws), 0.01
+        )).astype(np.float32)
+
+        price_change_pct = (prices - current_price) / current_price * 100
+        factors = ElasticityService.get_dynamic_adjustment_factors(price_change_pct).astype(np.float32)
+        log_ratio = np.log(prices / current_price).astype(np.float32)
+        prices32 = prices.astype(np.float32)
+
+        # (n_draws, n_prices) in one broadcast
+        elasticity = np.clip(elasticity_draws[:, None] * factors[None, :], -15.0, -0.2)
+        demand = np.float32(current_demand) * np.exp(elasticity * log_ratio[None, :])
+        profit = (prices32[None, :] - cost_draws[:, None]) * demand
+
+        current_profit = profit[:, current_idx]
+        recommended_profit = profit[:, recommended_idx]
+        improvement = recommended_profit - current_profit
+
+        # Per-price bands from a subsample: partitioning the full matrix column-wise
+        # would dominate the latency budget while barely moving the quantiles
+        band_sample = np.ascontiguousarray(profit[:cls.BAND_DRAWS].T)
+        bands = np.percentile(band_sample, [cls.QUANTILES[0], 50, cls.QUANTILES[-1]], axis=1)
+        beats_current = np.mean(band_sample > band_sample[current_idx], axis=1)
+        beats_current[current_idx] = 0.0
+        mean_profit = profit.mean(axis=0)
+        optimal_share = np.bincount(np.argmax(profit, axis=1), minlength=len(prices)) / n_draws
+        counts, edges = np.histogram(recommended_profit, bins=cls.HISTOGRAM_BINS)
+
+        return {
+            'n_draws': n_draws,
+            'n_prices': len(prices),
+            'recommended_price': float(prices[recommended_idx]),
+            'current_price': float(prices[current_idx]),
+            'probability_of_improvement': float(np.mean(improvement > 0)) if recommended_idx != current_idx else 0.0,
+            'probability_not_worse': float(np.mean(improvement >= 0)),
+            'probability_alternative_better': float(beats_current.max()),
+            'expected_improvement': float(improvement.mean()),
+            'recommended_profit': {
+                'mean': float(recommended_profit.mean()),
+                'std': float(recommended_profit.std()),
+                'quantiles': {
+                    f'p{q}': float(v)
+                    for q, v in zip(cls.QUANTILES, np.percentile(recommended_profit, cls.QUANTILES))
+                },
+                'histogram': {
+                    'counts': counts.tolist(),
+                    'bin_edges': edges.tolist()
+                }
+            },
+            'current_profit': {
+                'mean': float(current_profit.mean()),
+                'std': float(current_profit.std())
+            },
+            'expected_profit_maximizing_price': float(prices[int(np.argmax(mean_profit))]),
+            'price_bands': {
+                'price': prices.tolist(),
+                'mean_profit': mean_profit.tolist(),
+                f'p{cls.QUANTILES[0]}': bands[0].tolist(),
+                'p50': bands[1].tolist(),
+                f'p{cls.QUANTILES[-1]}': bands[2].tolist(),
+                'probability_optimal': optimal_share.tolist()
+            }
+        }
+
+    @staticmethod
+    def context_seed(*parts) -> int:
+        """Stable seed for a request context, so identical requests draw identical samples"""
+        digest = hashlib.sha256('|'.join(map(str, parts)).encode()).digest()
+        return int.from_bytes(digest[:8], 'little')
+
+    @classmethod
+    def confidence_score(cls, simulation: Dict) -> float:
+        """
+        Confidence (0-100) in the recommendation from a Monte Carlo simulation: the
+        probability that a price move improves on holding, or for a hold the probability
+        that the strongest alternative price does not beat it
+        """
+        if simulation['recommended_price'] != simulation['current_price']:
+            return round(simulation['probability_of_improvement'] * 100, 1)
+        return round((1 - simulation['probability_alternative_better']) * 100, 1)
+
+    @classmethod
+    def summarize(cls, simulation: Dict) -> Dict:
+        """Compact view of a simulation for embedding in optimization responses"""
+        return {
+            'n_draws': simulation['n_draws'],
+            'probability_of_improvement': round(simulation['probability_of_improvement'], 4),
+            'probability_not_worse': round(simulation['probability_not_worse'], 4),
+            'expected_improvement': round(simulation['expected_improvement'], 2),
+            'expected_profit': round(simulation['recommended_profit']['mean'], 2),
+            'profit_quantiles': {
+                key: round(value, 2) for key, value in simulation['recommended_profit']['quantiles'].items()
+            },
+            'expected_profit_maximizing_price': round(simulation['expected_profit_maximizing_price'], 2)
+        }
@@ -1,6 +1,7 @@
 """
 Test script for the Demand Prediction API
-Run this after starting the FastAPI server to test predictions
+Run this after starting the FastAPI server (main.py, or app.py which serves the same app)
+to test predictions. Prices are in USD, the data currency and the default for /predict
 """
 
 import requests
@@ -78,7 +79,7 @@ if __name__ == "__main__":
     print("TEST CASE 1: Dubai Hypermarket - Weekday")
     test_prediction({
         "product_name": "NESTLE NESQUIK 330GR(C) BOX",
-        "category": "Breakfast Cereals",
+        "category": "BREAKFAST CEREAL",
         "emirate": "Dubai",
         "store_type": "Hypermarket",
         "price_per_sales_unit": 15.5,
@@ -99,7 +100,7 @@ if __name__ == "__main__":
     print("TEST CASE 2: Dubai Hypermarket - Weekend")
     test_prediction({
         "product_name": "NESTLE NESQUIK 330GR(C) BOX",
-        "category": "Breakfast Cereals",
+        "category": "BREAKFAST CEREAL",
         "emirate": "Dubai",
         "store_type": "Hypermarket",
         "price_per_sales_unit": 15.5,
@@ -120,7 +121,7 @@ if __name__ == "__main__":
     print("TEST CASE 3: Abu Dhabi Supermarket")
     test_prediction({
         "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)",
-        "category": "Hot Beverages",
+        "category": "TOTAL COFFEE",
         "emirate": "Abu Dhabi",
         "store_type": "Supermarket",
         "price_per_sales_unit": 25.0,
@@ -140,8 +141,8 @@ if __name__ == "__main__":
     # Test Case 4: Holiday Effect
     print("TEST CASE 4: Holiday Effect - Dubai")
     test_prediction({
-        "product_name": "MAGGI BBQ & GRILLS SEASONING 150G TUB",
-        "category": "Culinary",
+        "product_name": "NESCAFE LATTE 240ML TIN",
+        "category": "ICE COFFEE",
         "emirate": "Dubai",
         "store_type": "Hypermarket",
         "price_per_sales_unit": 12.0,
@@ -162,7 +163,7 @@ if __name__ == "__main__":
     print("TEST CASE 5: Online Store - Sharjah")
     test_prediction({
         "product_name": "PURINA FRISK.CHICKEN IN GRAVY JUNI.85G S",
-        "category": "Pet Care",
+        "category": "PET CARE",
         "emirate": "Sharjah",
         "store_type": "Online",
         "price_per_sales_unit": 8.5,
@@ -185,7 +186,7 @@ if __name__ == "__main__":
     print("\nLower Price (10.0):")
     test_prediction({
         "product_name": "NESTLE NESQUIK 330GR(C) BOX",
-        "category": "Breakfast Cereals",
+        "category": "BREAKFAST CEREAL",
         "emirate": "Dubai",
         "store_type": "Hypermarket",
         "price_per_sales_unit": 10.0,  # Lower price
@@ -205,7 +206,7 @@ if __name__ == "__main__":
     print("Higher Price (20.0):")
     test_prediction({
         "product_name": "NESTLE NESQUIK 330GR(C) BOX",
-        "category": "Breakfast Cereals",
+        "category": "BREAKFAST CEREAL",
         "emirate": "Dubai",
         "store_type": "Hypermarket",
         "price_per_sales_unit": 20.0,  # Higher price
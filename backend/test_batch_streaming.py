@@ -0,0 +1,106 @@
+"""
+Test script for streamed batch price optimization
+Checks NDJSON / SSE framing, per-item error records and incremental production
+"""
+import sys
+import json
+from fastapi.testclient import TestClient
+from main import app
+from services.batch_optimization_service import BatchOptimizationService
+
+client = TestClient(app)
+
+BATCH = {
+    "month": 12, "day_of_week": 2, "day_of_month": 10,
+    "emirates": ["Dubai"], "store_types": ["Hypermarket", "Online"]
+}
+
+
+def test_ndjson_stream():
+    print("=" * 80)
+    print("TEST: NDJSON stream has one record per segment plus a summary")
+    print("=" * 80)
+    segments = list(BatchOptimizationService.iter_segments(emirates=["Dubai"], store_types=["Hypermarket", "Online"]))
+    with client.stream("POST", "/api/optimize-batch", json=BATCH) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert len(records) == len(segments) + 1
+    assert [r["index"] for r in records[:-1]] == list(range(len(segments)))
+    assert all(r["type"] == "result" for r in records[:-1])
+    summary = records[-1]
+    assert summary["type"] == "summary" and summary["succeeded"] == len(segments)
+    first = records[0]["result"]
+    assert first["recommendation"]["recommended_price"] > 0
+    assert first["uncertainty"]["n_draws"] > 0
+    print(f"✓ {summary['succeeded']} segments in {summary['elapsed_ms']:.0f} ms")
+
+
+def test_results_are_produced_incrementally():
+    print("=" * 80)
+    print("TEST: Each record is produced before the next item is optimized")
+    print("=" * 80)
+    calls = []
+
+    def optimize(item):
+        calls.append(item)
+        return {"value": item}
+
+    # An unbounded input stream: only what has been consumed is ever materialized
+    def items():
+        n = 0
+        while True:
+            yield n
+            n += 1
+
+    lines = BatchOptimizationService.ndjson_lines(BatchOptimizationService.iter_results(items(), optimize))
+    first = json.loads(next(lines))
+    assert first["result"] == {"value": 0} and len(calls) == 1
+    for _ in range(99):
+        next(lines)
+    assert len(calls) == 100
+    print("✓ 100 records from an endless batch with 100 optimizations")
+
+
+def test_sse_and_error_records():
+    print("=" * 80)
+    print("TEST: SSE framing and per-item errors do not abort the batch")
+    print("=" * 80)
+    item = {
+        "product_id": "x", "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages",
+        "emirate": "Dubai", "store_type": "Hypermarket", "current_price": 23.4,
+        "month": 12, "day_of_week": 2, "day_of_month": 10
+    }
+    payload = {"items": [item, {**item, "current_price": -1.0}, item]}
+    response = client.post("/api/optimize-batch?format=sse", json=payload)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in response.text.split("\n\n") if block]
+    names = [block.split("\n")[0] for block in events]
+    assert names == ["event: result", "event: error", "event: result", "event: done"], names
+    done = json.loads(events[-1].split("data: ", 1)[1])
+    assert done["succeeded"] == 2 and done["failed"] == 1
+
+    buffered = client.post("/api/optimize-batch?format=json", json=payload).json()
+    assert [r["type"] for r in buffered["results"]] == ["result", "error", "result"]
+    assert client.post("/api/optimize-batch?format=xml", json=payload).status_code == 400
+    assert client.post("/api/optimize-batch", json={}).status_code == 400
+    print("✓ result / error / result / done")
+
+
+def main():
+    tests = [test_ndjson_stream, test_results_are_produced_incrementally, test_sse_and_error_records]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
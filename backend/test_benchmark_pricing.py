@@ -0,0 +1,77 @@
+"""
+Test script for the pricing benchmark suite (benchmark_pricing.py)
+Checks that scaled datasets keep lookups stable, that results are written as JSON,
+and that the baseline comparison fails only on regressions beyond the allowed limit
+"""
+import os
+import sys
+import json
+import tempfile
+import benchmark_pricing
+from services.data_service import DataService
+
+CASES = "prepare_features,data.get_product_data"
+
+
+def test_scaled_dataset_keeps_latest_rows():
+    print("=" * 80)
+    print("TEST: Scaled datasets add older history without changing lookups")
+    print("=" * 80)
+    original = DataService.load_data()
+    segment = benchmark_pricing.SEGMENT
+    before = DataService.get_rolling_averages(segment['product_name'], segment['emirate'], segment['store_type'])
+    scaled = benchmark_pricing.scale_dataset(original, 3)
+    try:
+        DataService.set_data(scaled)
+        after = DataService.get_rolling_averages(segment['product_name'], segment['emirate'], segment['store_type'])
+    finally:
+        DataService.set_data(original)
+    assert len(scaled) == 3 * len(original)
+    assert scaled['period_normalized_date'].max() == original['period_normalized_date'].max()
+    assert before == after
+    print(f"✓ {len(scaled)} rows, identical rolling features")
+
+
+def test_run_and_compare():
+    print("=" * 80)
+    print("TEST: Results are saved as JSON and compared against the baseline")
+    print("=" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        output, baseline = os.path.join(tmp, 'latest.json'), os.path.join(tmp, 'baseline.json')
+        common = ['--sizes', '1,2', '--repeats', '3', '--warmup', '1', '--cases', CASES,
+                  '--output', output, '--baseline', baseline]
+        assert benchmark_pricing.main(common + ['--save-baseline']) == 0
+        with open(baseline) as f:
+            saved = json.load(f)
+        assert set(saved['results']) == {f'{case}@{size}x' for case in CASES.split(',') for size in (1, 2)}
+        assert saved['results']['data.get_product_data@2x']['rows'] == 2 * len(DataService.load_data())
+
+        # A baseline 10x faster than reality is a regression; a generous limit or noise floor is not
+        for result in saved['results'].values():
+            result['median_us'] /= 10
+        with open(baseline, 'w') as f:
+            json.dump(saved, f)
+        assert benchmark_pricing.main(common) == 1
+        with open(output) as f:
+            assert all(row['regressed'] for row in json.load(f)['comparison']['results'])
+        limits = [arg for case in CASES.split(',') for arg in ('--case-limit', f'{case}=20')]
+        assert benchmark_pricing.main(common + limits) == 0
+        assert benchmark_pricing.main(common + ['--min-delta-us', '1e9']) == 0
+    print("✓ Baseline saved, 10x slowdown flagged, limits respected")
+
+
+def main():
+    tests = [test_scaled_dataset_keeps_latest_rows, test_run_and_compare]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
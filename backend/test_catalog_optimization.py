@@ -0,0 +1,157 @@
+"""
+Test script for constrained catalog optimization
+Checks the Lagrangian solver on synthetic profit curves and on the real catalog, and
+that the shared feature encoder reproduces the model's training layout
+"""
+import sys
+import numpy as np
+import pandas as pd
+from models.schemas import DemandPredictionInput
+from services.ai_service import XGBoostAIService
+from services.catalog_optimization_service import CatalogOptimizationService
+from services.data_service import DataService
+
+
+def make_curves(n_segments=400, n_points=31, seed=0):
+    """Synthetic constant-elasticity profit curves; last column is the current price"""
+    rng = np.random.default_rng(seed)
+    current_price = rng.uniform(1, 10, n_segments)
+    grid = current_price[:, None] * np.linspace(0.8, 1.1, n_points)
+    price = np.hstack([grid, current_price[:, None]])
+    elasticity = rng.uniform(-2.0, -0.5, n_segments)[:, None]
+    demand = 100 * (price / current_price[:, None]) ** elasticity
+    profit = (price - 0.7 * current_price[:, None]) * demand
+    categories = rng.integers(0, 4, n_segments)
+    return current_price, price, demand, profit, categories
+
+
+def price_index_family(current_price, price, demand, categories, max_increase_pct):
+    weights = current_price * demand[:, -1]
+    shares = weights / np.bincount(categories, weights=weights)[categories]
+    n_groups = categories.max() + 1
+    return {
+        'name': 'price_index_by_category',
+        'coefficients': 100.0 * shares[:, None] * price / current_price[:, None],
+        'groups': categories,
+        'labels': [str(g) for g in range(n_groups)],
+        'limits': np.full(n_groups, 100.0 + max_increase_pct)
+    }
+
+
+def test_unconstrained_matches_argmax():
+    """Without constraints every segment takes its own profit-maximizing price"""
+    print("=" * 80)
+    print("TEST: Unconstrained solve equals per-segment argmax")
+    print("=" * 80)
+    _, _, _, profit, _ = make_curves()
+    result = CatalogOptimizationService.solve(profit, [])
+    assert np.array_equal(result['choice'], np.argmax(profit, axis=1))
+    print(f"✓ Total profit: {result['total_profit']:.2f}")
+
+
+def test_price_index_cap_respected():
+    """Binding price-index caps are satisfied and carry positive shadow prices"""
+    print("=" * 80)
+    print("TEST: Price index cap")
+    print("=" * 80)
+    current_price, price, demand, profit, categories = make_curves()
+    family = price_index_family(current_price, price, demand, categories, max_increase_pct=1.0)
+    current_index = np.full(len(current_price), price.shape[1] - 1)
+
+    result = CatalogOptimizationService.solve(profit, [family], initial_choice=current_index)
+    constraint = result['constraints'][0]
+
+    assert result['feasible']
+    assert np.all(constraint['usage'] <= constraint['limits'] + 1e-6)
+    assert np.all(constraint['shadow_prices'] > 0)
+    assert result['total_profit'] <= result['dual_bound'] + 1e-6
+    gap = (result['dual_bound'] - result['total_profit']) / result['dual_bound']
+    assert gap < 0.01
+    print(f"✓ Index values: {np.round(constraint['usage'], 3)}")
+    print(f"✓ Shadow prices: {np.round(constraint['shadow_prices'], 3)}")
+    print(f"✓ Duality gap: {gap * 100:.4f}%")
+
+
+def test_slack_constraint_has_zero_shadow_price():
+    """A cap looser than the unconstrained optimum does not change the solution"""
+    print("=" * 80)
+    print("TEST: Slack constraint")
+    print("=" * 80)
+    current_price, price, demand, profit, categories = make_curves()
+    family = price_index_family(current_price, price, demand, categories, max_increase_pct=50.0)
+    result = CatalogOptimizationService.solve(profit, [family])
+    assert np.all(result['constraints'][0]['shadow_prices'] == 0)
+    assert np.isclose(result['total_profit'], profit.max(axis=1).sum())
+    print("✓ Shadow prices are zero and profit equals the unconstrained optimum")
+
+
+def test_catalog_with_real_data():
+    """End-to-end run over the historical segments with a category price-index cap"""
+    print("=" * 80)
+    print("TEST: Catalog optimization on historical data")
+    print("=" * 80)
+    result = CatalogOptimizationService.optimize_catalog(
+        month=12, day_of_week=2, day_of_month=10,
+        max_price_index_increase_pct=1.0,
+        max_discount_spend={'Dubai': 5.0}
+    )
+    assert result['solver']['feasible']
+    assert len(result['segments']) > 0
+    for constraint in result['constraints']:
+        assert constraint['value'] <= constraint['limit'] + 1e-6
+    print(f"✓ {len(result['segments'])} segments, profit {result['totals']['optimized_profit']:.2f} "
+          f"(unconstrained {result['totals']['unconstrained_profit']:.2f})")
+
+
+def test_encoding_matches_training_layout():
+    """
+    encode_features equals get_dummies(drop_first=True) over the full dataset, as used in
+    training, for single rows and batches alike. The former per-row get_dummies dropped
+    every one-hot column (a single row has one category per column), so single
+    predictions ignored product, category, emirate and store type.
+    """
+    print("=" * 80)
+    print("TEST: Feature encoding matches the trained model's columns")
+    print("=" * 80)
+    XGBoostAIService.load_model()
+    data = DataService.load_data()
+    columns = XGBoostAIService.NUMERICAL_FEATURES + XGBoostAIService.CATEGORICAL_FEATURES
+    expected = list(XGBoostAIService.model.feature_names_in_)
+    training = pd.get_dummies(data[columns], columns=XGBoostAIService.CATEGORICAL_FEATURES, drop_first=True)
+    # Categories unseen in training have no column and encode as all zeros
+    assert set(expected) <= set(training.columns)
+    training = training[expected]
+
+    encoded = XGBoostAIService.encode_features(data)
+    assert list(encoded.columns) == list(training.columns)
+    assert np.array_equal(encoded.to_numpy(), training.to_numpy(dtype=np.float64))
+
+    rows = data.drop_duplicates(XGBoostAIService.CATEGORICAL_FEATURES)
+    for index, row in rows.iterrows():
+        single = XGBoostAIService.prepare_features(DemandPredictionInput(**row[columns].to_dict()))
+        assert np.array_equal(single.to_numpy()[0], encoded.loc[index].to_numpy())
+    assert pd.get_dummies(rows[XGBoostAIService.CATEGORICAL_FEATURES].iloc[:1], drop_first=True).shape[1] == 0
+    print(f"✓ {len(training.columns)} columns match training for {len(data)} rows and {len(rows)} single rows")
+
+
+def main():
+    tests = [
+        test_unconstrained_matches_argmax,
+        test_price_index_cap_respected,
+        test_slack_constraint_has_zero_shadow_price,
+        test_catalog_with_real_data,
+        test_encoding_matches_training_layout
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,111 @@
+"""
+Test script for the currency layer
+Checks that USD / AED / SAR requests and responses agree, that unknown currencies are
+rejected, and that cached read endpoints are keyed by currency and rates version
+"""
+import sys
+from fastapi.testclient import TestClient
+from main import app
+from services.currency_service import CurrencyService
+
+client = TestClient(app)
+
+SEGMENT = {
+    "product_id": "NES002", "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages",
+    "emirate": "Dubai", "store_type": "Hypermarket", "month": 12, "day_of_week": 2, "day_of_month": 10
+}
+PRICE_AED = 92.5
+
+
+def test_products_per_currency():
+    print("=" * 80)
+    print("TEST: Product prices are served in the requested currency")
+    print("=" * 80)
+    default = client.get("/api/products")
+    aed = client.get("/api/products?currency=aed")
+    assert default.content == aed.content and default.headers["etag"] == aed.headers["etag"]
+
+    etags = {default.headers["etag"]}
+    for code in ("USD", "SAR"):
+        response = client.get(f"/api/products?currency={code}")
+        assert response.status_code == 200
+        etags.add(response.headers["etag"])
+        ratio = CurrencyService.rate(code) / CurrencyService.rate("AED")
+        for product, converted in zip(default.json(), response.json()):
+            assert product["id"] == converted["id"]
+            assert abs(converted["current_price"] - product["current_price"] * ratio) < 0.02
+    assert len(etags) == 3
+
+    stats = client.get(f"/api/product-stats/{default.json()[0]['id']}?currency=USD").json()
+    assert stats["currency"] == "USD"
+    assert client.get("/api/products?currency=XYZ").status_code == 400
+    assert client.get("/api/currencies").json()["default_currency"] == "AED"
+    print("✓ AED / USD / SAR catalogs consistent, distinct ETags")
+
+
+def test_optimization_currency_round_trip():
+    print("=" * 80)
+    print("TEST: The same segment optimized in AED and USD gives the same recommendation")
+    print("=" * 80)
+    aed = client.post("/api/optimize-price", json={**SEGMENT, "current_price": PRICE_AED})
+    explicit = client.post("/api/optimize-price", json={**SEGMENT, "current_price": PRICE_AED, "currency": "AED"})
+    usd = client.post("/api/optimize-price", json={
+        **SEGMENT, "current_price": PRICE_AED / CurrencyService.rate("AED"), "currency": "usd"
+    })
+    assert aed.status_code == usd.status_code == 200
+    aed, usd = aed.json(), usd.json()
+    assert aed["currency"] == "AED" and usd["currency"] == "USD"
+    assert aed["recommendation"]["recommended_price"] == explicit.json()["recommendation"]["recommended_price"]
+
+    rate = CurrencyService.rate("AED")
+    assert abs(usd["recommendation"]["recommended_price"] * rate - aed["recommendation"]["recommended_price"]) < 0.05
+    assert abs(usd["recommendation"]["expected_revenue"] * rate - aed["recommendation"]["expected_revenue"]) < 0.5
+    assert abs(usd["elasticity"]["price_range"]["max"] * rate - aed["elasticity"]["price_range"]["max"]) < 0.05
+
+    simulated = {
+        code: client.post("/api/simulate", json={**SEGMENT, "price": PRICE_AED * CurrencyService.rate(code) / rate, "currency": code}).json()
+        for code in ("AED", "SAR")
+    }
+    assert simulated["AED"]["predicted_demand"] == simulated["SAR"]["predicted_demand"]
+    assert simulated["SAR"]["currency"] == "SAR"
+
+    rejected = client.post("/api/optimize-price", json={**SEGMENT, "current_price": PRICE_AED, "currency": "XYZ"})
+    assert rejected.status_code == 400 and "XYZ" in rejected.json()["detail"]
+    print(f"✓ {aed['recommendation']['recommended_price']} AED == {usd['recommendation']['recommended_price']} USD")
+
+
+def test_rates_update_invalidates():
+    print("=" * 80)
+    print("TEST: A new rates version changes ETags and converted prices")
+    print("=" * 80)
+    original = CurrencyService.load_rates()
+    old = client.get("/api/products?currency=SAR")
+    try:
+        CurrencyService.set_rates({**original, 'rates': {**original['rates'], 'SAR': original['rates']['SAR'] * 2}})
+        new = client.get("/api/products?currency=SAR")
+        assert new.headers["etag"] != old.headers["etag"]
+        assert abs(new.json()[0]["current_price"] - 2 * old.json()[0]["current_price"]) < 0.02
+        # Unchanged currencies still get a fresh validator: the rates version is global
+        assert client.get("/api/products").status_code == 200
+    finally:
+        CurrencyService.set_rates(original)
+    restored = client.get("/api/products?currency=SAR")
+    assert restored.json() == old.json()
+    print("✓ ETag and prices follow the rates version")
+
+
+def main():
+    tests = [test_products_per_currency, test_optimization_currency_round_trip, test_rates_update_invalidates]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
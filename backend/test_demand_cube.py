@@ -0,0 +1,220 @@
+"""
+Test script for the precomputed demand cube (DemandCubeService)
+Checks that the memory-mapped cube reproduces the model at grid points and interpolates
+between them, that off-grid queries fall back to the exact model, that simulations and
+demand curves are served from it, that lookups stay consistent while another cube is
+loaded, and that it is rebuilt when the data changes
+"""
+import sys
+import time
+import tempfile
+import contextlib
+import numpy as np
+from services.ai_service import XGBoostAIService
+from services.data_service import DataService
+from services.demand_cube_service import DemandCubeService
+
+DemandCubeService.CUBE_DIR = tempfile.mkdtemp(prefix="demand_cube_")
+DemandCubeService.PRICE_LEVELS = 11  # 0.5x .. 1.5x of the latest price in steps of 0.1
+SNAPSHOT = DataService.get_segment_snapshot()
+SEGMENTS = list(zip(SNAPSHOT['product_name'], SNAPSHOT['emirate'], SNAPSHOT['store_type']))[:3]
+CALENDAR = {'month': 10, 'day_of_week': 1, 'day_of_month': 27, 'is_weekend': 0, 'is_holiday': 0}
+
+
+@contextlib.contextmanager
+def enabled_cube():
+    """Build the cube for SEGMENTS and serve from it for the duration of a test"""
+    meta = DemandCubeService.build(SEGMENTS)
+    DemandCubeService.ENABLED = True
+    try:
+        assert DemandCubeService.load()
+        yield meta
+    finally:
+        DemandCubeService.ENABLED = False
+
+
+def context_for(segment_meta, **calendar):
+    product_name, emirate, store_type = (segment_meta[key] for key in ('product_name', 'emirate', 'store_type'))
+    return XGBoostAIService.build_simulation_context(
+        product_name, segment_meta['category'], emirate, store_type, **{**CALENDAR, **calendar}
+    )
+
+
+def test_grid_points_and_interpolation():
+    print("=" * 80)
+    print("TEST: The cube matches the model at grid prices and interpolates linearly between them")
+    print("=" * 80)
+    with enabled_cube() as meta:
+        cube, _, index = DemandCubeService.loaded
+        assert isinstance(cube, np.memmap)
+        assert cube.shape == (len(SEGMENTS), 12, 31, 7, 2, 11) and len(index) == len(SEGMENTS)
+
+        segment = meta['segments'][1]
+        for calendar in (CALENDAR, {'month': 2, 'day_of_week': 4, 'day_of_month': 9, 'is_weekend': 1, 'is_holiday': 1}):
+            context = context_for(segment, **calendar)
+            grid_prices = [segment['reference_price'] * ratio for ratio in meta['price_ratios']]
+            exact = [XGBoostAIService._predict_from_features(context['features'], price) for price in grid_prices]
+            cubed = [DemandCubeService.lookup(context, price) for price in grid_prices]
+            assert np.allclose(cubed, exact, rtol=1e-6), (cubed, exact)
+
+            middle = (grid_prices[3] + grid_prices[4]) / 2
+            assert abs(DemandCubeService.lookup(context, middle) - (exact[3] + exact[4]) / 2) < 1e-4
+            many = DemandCubeService.lookup_many(context, [grid_prices[0], middle, grid_prices[-1] * 1.01])
+            assert abs(many[0] - exact[0]) < 1e-4 and abs(many[1] - (exact[3] + exact[4]) / 2) < 1e-4
+            assert np.isnan(many[2])
+
+        timings = []
+        for i in range(2000):
+            start = time.perf_counter()
+            DemandCubeService.lookup(context, middle)
+            timings.append(time.perf_counter() - start)
+        median_us = float(np.median(timings)) * 1e6
+        assert median_us < 200, median_us
+        print(f"✓ Exact at {len(grid_prices)} grid prices, midpoint interpolated, median lookup {median_us:.1f} µs")
+
+
+def test_off_grid_falls_back_to_model():
+    print("=" * 80)
+    print("TEST: Queries off the grid return None and are scored by the model")
+    print("=" * 80)
+    with enabled_cube() as meta:
+        segment = meta['segments'][0]
+        context = context_for(segment)
+        price = segment['reference_price']
+        assert DemandCubeService.lookup(context, price) is not None
+        assert DemandCubeService.lookup(context, price * 1.6) is None  # Above the price levels
+        assert DemandCubeService.lookup({**context, 'is_weekend': 1}, price) is None  # Disagrees with day_of_week
+        assert DemandCubeService.lookup({**context, 'category': 'PET CARE'}, price) is None
+        rolling = {**context['rolling_data'], 'rolling_7day_mean': context['rolling_data']['rolling_7day_mean'] + 1}
+        assert DemandCubeService.lookup({**context, 'rolling_data': rolling}, price) is None
+        other = next(key for key in zip(SNAPSHOT['product_name'], SNAPSHOT['emirate'], SNAPSHOT['store_type'])
+                     if key not in SEGMENTS)
+        assert DemandCubeService.lookup({**context, 'emirate': other[1], 'store_type': other[2]}, price) is None
+
+        with_cube = XGBoostAIService.simulate_with_context(context, price * 1.6)
+        DemandCubeService.ENABLED = False
+        without_cube = XGBoostAIService.simulate_with_context(context, price * 1.6)
+        assert with_cube.predicted_demand == without_cube.predicted_demand
+        print("✓ Out-of-range price, inconsistent calendar, other category/rolling/segment all fall back")
+
+
+def test_simulation_and_curve_served_from_cube():
+    print("=" * 80)
+    print("TEST: Simulations and demand curves on the grid need no model call")
+    print("=" * 80)
+    with enabled_cube() as meta:
+        segment = meta['segments'][2]
+        args = (segment['product_name'], segment['category'], segment['emirate'], segment['store_type'])
+        reference = segment['reference_price']
+        curve_args = dict(current_price=reference, min_price=reference * 0.5, max_price=reference * 1.5, num_points=11,
+                          **CALENDAR)
+
+        DemandCubeService.ENABLED = False
+        exact_simulation = XGBoostAIService.simulate_price_scenario(*args, price=round(reference * 0.8, 6), **CALENDAR)
+        exact_curve = XGBoostAIService.generate_demand_curve(*args, **curve_args)
+
+        DemandCubeService.ENABLED = True
+        model_predict = XGBoostAIService.model.predict
+        calls = []
+        XGBoostAIService.model.predict = lambda features: calls.append(len(features)) or model_predict(features)
+        try:
+            cubed_simulation = XGBoostAIService.simulate_price_scenario(*args, price=round(reference * 0.8, 6), **CALENDAR)
+            cubed_curve = XGBoostAIService.generate_demand_curve(*args, **curve_args)
+            off_grid_curve = XGBoostAIService.generate_demand_curve(*args, current_price=reference, num_points=5,
+                                                                    min_price=reference * 1.2, max_price=reference * 1.8,
+                                                                    **CALENDAR)
+        finally:
+            del XGBoostAIService.model.predict
+        assert calls == [2], calls  # Only the off-grid half of the last curve, in one batch
+        assert cubed_simulation.predicted_demand == exact_simulation.predicted_demand
+        assert cubed_simulation.scenario == exact_simulation.scenario
+        assert [p.predicted_demand for p in cubed_curve] == [p.predicted_demand for p in exact_curve]
+        assert len(off_grid_curve) == 5
+        print(f"✓ Simulation and {len(cubed_curve)}-point curve identical to the model, no model calls on the grid")
+
+
+def test_lookups_consistent_during_reload():
+    print("=" * 80)
+    print("TEST: A cube loaded in the middle of a lookup does not mix its index with the old values")
+    print("=" * 80)
+    with enabled_cube() as meta:
+        first_dir = DemandCubeService.CUBE_DIR
+        second_dir = tempfile.mkdtemp(prefix="demand_cube_")
+        DemandCubeService.CUBE_DIR = second_dir
+        original, current = DemandCubeService.__dict__['current'], DemandCubeService.current
+        try:
+            DemandCubeService.build(SEGMENTS[1:])  # Same segments on other rows
+            segment = meta['segments'][2]
+            context = context_for(segment)
+            price = segment['reference_price']
+            expected = XGBoostAIService._predict_from_features(context['features'], price)
+
+            def current_then_swap():
+                loaded = current()
+                DemandCubeService.CUBE_DIR = second_dir if DemandCubeService.CUBE_DIR == first_dir else first_dir
+                assert DemandCubeService.load()  # As a background rebuild would, mid-lookup
+                return loaded
+
+            DemandCubeService.CUBE_DIR = first_dir
+            assert DemandCubeService.load()
+            DemandCubeService.current = current_then_swap
+            values = [DemandCubeService.lookup(context, price) for _ in range(4)]
+            assert all(abs(value - expected) < 1e-4 for value in values), (values, expected)
+        finally:
+            DemandCubeService.current = original
+            DemandCubeService.CUBE_DIR = first_dir
+        print(f"✓ {len(values)} lookups across reloads, each from one consistent cube")
+
+
+def test_rebuilt_when_data_changes():
+    print("=" * 80)
+    print("TEST: A data change that alters cube inputs drops the cube and rebuilds it in the background")
+    print("=" * 80)
+    with enabled_cube() as meta:
+        XGBoostAIService.model_version += 1  # Same booster reloaded: validated, not rebuilt
+        assert DemandCubeService.current() is not None and DemandCubeService.loaded[1]['built_at'] == meta['built_at']
+
+        original = DataService.load_data()
+        product_name, emirate, store_type = SEGMENTS[0]
+        changed = original.copy()
+        latest = changed[(changed['product_name'] == product_name) & (changed['emirate'] == emirate)
+                         & (changed['store_type'] == store_type)]['period_normalized_date'].idxmax()
+        changed.loc[latest, 'rolling_7day_mean'] += 25
+        DataService.set_data(changed)
+        try:
+            assert DemandCubeService.current() is None  # Stale: dropped, rebuild scheduled
+            DemandCubeService.builder.join(timeout=120)
+            assert DemandCubeService.loaded is not None
+            rebuilt_meta = DemandCubeService.loaded[1]
+            assert rebuilt_meta['built_at'] != meta['built_at']
+            rebuilt = rebuilt_meta['segments'][0]
+            assert abs(rebuilt['rolling'][1] - (meta['segments'][0]['rolling'][1] + 25)) < 1e-9
+            context = context_for(rebuilt)
+            price = rebuilt['reference_price']
+            expected = XGBoostAIService._predict_from_features(context['features'], price)
+            assert abs(DemandCubeService.lookup(context, price) - expected) < 1e-4
+        finally:
+            DataService.set_data(original)
+        DemandCubeService.current()
+        DemandCubeService.builder.join(timeout=120)
+        assert DemandCubeService.loaded[1]['inputs_fingerprint'] == meta['inputs_fingerprint']
+        print("✓ Stale cube dropped, rebuilt for the new data and again after the revert")
+
+
+def main():
+    tests = [test_grid_points_and_interpolation, test_off_grid_falls_back_to_model,
+             test_simulation_and_curve_served_from_cube, test_lookups_consistent_during_reload,
+             test_rebuilt_when_data_changes]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,189 @@
+"""
+Test script for distilled price-response curves (DistilledCurveService)
+Checks the least-squares fit and per-segment error report against the demand cube, that
+demand curves are evaluated from the coefficients without model calls, that contexts
+distilled worse than the error limit fall back to the model, that curves loaded mid-prediction
+are not mixed with the old ones, and redistillation on data changes
+"""
+import sys
+import tempfile
+import contextlib
+import numpy as np
+from services.ai_service import XGBoostAIService
+from services.data_service import DataService
+from services.demand_cube_service import DemandCubeService
+from services.distilled_curve_service import DistilledCurveService
+
+DemandCubeService.CUBE_DIR = tempfile.mkdtemp(prefix="distilled_curves_")
+DemandCubeService.PRICE_LEVELS = 11
+SNAPSHOT = DataService.get_segment_snapshot()
+SEGMENTS = list(zip(SNAPSHOT['product_name'], SNAPSHOT['emirate'], SNAPSHOT['store_type']))[3:5]
+CALENDAR = {'month': 10, 'day_of_week': 1, 'day_of_month': 27, 'is_weekend': 0, 'is_holiday': 0}
+
+
+@contextlib.contextmanager
+def distilled_curves(max_error=1e9):
+    """Distill SEGMENTS and serve curves from them (cube lookups off) for the duration of a test"""
+    meta = DistilledCurveService.distill(SEGMENTS)
+    original = DistilledCurveService.MAX_ERROR
+    DistilledCurveService.ENABLED, DistilledCurveService.MAX_ERROR = True, max_error
+    try:
+        assert DistilledCurveService.load()
+        yield meta
+    finally:
+        DistilledCurveService.ENABLED, DistilledCurveService.MAX_ERROR = False, original
+
+
+def context_for(segment_meta, **calendar):
+    return XGBoostAIService.build_simulation_context(
+        segment_meta['product_name'], segment_meta['category'], segment_meta['emirate'], segment_meta['store_type'],
+        **{**CALENDAR, **calendar}
+    )
+
+
+def test_fit_and_error_report():
+    print("=" * 80)
+    print("TEST: Coefficients are the least-squares fit to the cube; errors are reported per segment")
+    print("=" * 80)
+    with distilled_curves() as meta:
+        cube, cube_meta = DemandCubeService.open_cube()
+        coefficients, errors, _, _ = DistilledCurveService.loaded
+        assert coefficients.shape == tuple(cube.shape[:-1]) + (DistilledCurveService.DEGREE + 1,)
+        assert isinstance(coefficients, np.memmap)
+
+        x = np.log(cube_meta['price_ratios'])
+        cell = (1, 9, 26, 1, 0)
+        demand = np.asarray(cube[cell], dtype=np.float64)
+        expected = np.polyfit(x, np.log1p(demand), DistilledCurveService.DEGREE)[::-1]
+        assert np.allclose(coefficients[cell], expected, rtol=1e-4, atol=1e-5)
+        fitted = np.expm1(np.polyval(expected[::-1], x))
+        error = np.max(np.abs(fitted - demand) / np.maximum(demand, 1.0))
+        assert abs(errors[cell] - error) < 1e-4
+
+        report = DistilledCurveService.error_report()
+        assert len(report) == len(SEGMENTS)
+        for summary in report.values():
+            assert 0 <= summary['median_error'] <= summary['p95_error'] <= summary['max_error']
+            assert 0 <= summary['fallback_share'] <= 1
+        segment_errors = np.asarray(errors[1]).ravel()
+        assert abs(meta['segments'][1]['error']['max_error'] - segment_errors.max()) < 1e-4
+    print(f"✓ Fit matches polyfit; median errors {[s['median_error'] for s in report.values()]}")
+
+
+def test_curves_served_from_coefficients():
+    print("=" * 80)
+    print("TEST: Demand curves come from the distilled coefficients without model calls")
+    print("=" * 80)
+    with distilled_curves() as meta:
+        segment = meta['segments'][0]
+        args = (segment['product_name'], segment['category'], segment['emirate'], segment['store_type'])
+        reference = segment['reference_price']
+        context = context_for(segment)
+        prices = np.linspace(reference * 0.6, reference * 1.4, 20)
+        coefficients = np.asarray(DistilledCurveService.loaded[0][0, 9, 26, 1, 0], dtype=np.float64)
+        expected = np.expm1(np.polyval(coefficients[::-1], np.log(prices / reference)))
+        assert np.allclose(DistilledCurveService.predict(context, prices), expected, rtol=1e-9)
+        assert np.isnan(DistilledCurveService.predict(context, [reference * 2.0])).all()  # Outside the fit
+
+        model_predict = XGBoostAIService.model.predict
+        calls = []
+        XGBoostAIService.model.predict = lambda features: calls.append(len(features)) or model_predict(features)
+        try:
+            curve = XGBoostAIService.generate_demand_curve(*args, current_price=reference, **CALENDAR)
+        finally:
+            del XGBoostAIService.model.predict
+        assert calls == [], calls
+        assert [p.predicted_demand for p in curve] == [round(float(d), 0) for d in expected]
+    print(f"✓ {len(curve)}-point curve from {len(coefficients)} coefficients, no model calls")
+
+
+def test_inaccurate_contexts_fall_back_to_model():
+    print("=" * 80)
+    print("TEST: Contexts distilled worse than the error limit are scored by the model")
+    print("=" * 80)
+    with distilled_curves(max_error=-1.0) as meta:  # Every context over the limit
+        segment = meta['segments'][1]
+        args = (segment['product_name'], segment['category'], segment['emirate'], segment['store_type'])
+        assert DistilledCurveService.predict(context_for(segment), [segment['reference_price']]) is None
+        served = XGBoostAIService.generate_demand_curve(*args, current_price=segment['reference_price'], **CALENDAR)
+    exact = XGBoostAIService.generate_demand_curve(*args, current_price=segment['reference_price'], **CALENDAR)
+    assert [p.predicted_demand for p in served] == [p.predicted_demand for p in exact]
+    print("✓ Fallback curve identical to the model's")
+
+
+def test_predictions_consistent_during_reload():
+    print("=" * 80)
+    print("TEST: Curves loaded in the middle of a prediction do not mix their index with the old coefficients")
+    print("=" * 80)
+    with distilled_curves() as meta:
+        first_dir = DemandCubeService.CUBE_DIR
+        second_dir = tempfile.mkdtemp(prefix="distilled_curves_")
+        segment = meta['segments'][1]
+        context = context_for(segment)
+        prices = [segment['reference_price']]
+        expected = DistilledCurveService.predict(context, prices)
+        original, current = DistilledCurveService.__dict__['current'], DistilledCurveService.current
+        try:
+            DemandCubeService.CUBE_DIR = second_dir
+            DistilledCurveService.distill(SEGMENTS[1:])  # Same segment on another row
+
+            def current_then_swap():
+                loaded = current()
+                DemandCubeService.CUBE_DIR = second_dir if DemandCubeService.CUBE_DIR == first_dir else first_dir
+                assert DistilledCurveService.load()  # As a background redistillation would, mid-prediction
+                return loaded
+
+            DemandCubeService.CUBE_DIR = first_dir
+            assert DistilledCurveService.load()
+            DistilledCurveService.current = current_then_swap
+            predictions = [DistilledCurveService.predict(context, prices) for _ in range(4)]
+        finally:
+            DistilledCurveService.current = original
+            DemandCubeService.CUBE_DIR = first_dir
+        assert all(np.allclose(p, expected, rtol=1e-4) for p in predictions), (predictions, expected)
+    print(f"✓ {len(predictions)} predictions across reloads, each from one consistent set of curves")
+
+
+def test_redistilled_when_data_changes():
+    print("=" * 80)
+    print("TEST: A data change that alters the inputs drops the curves and redistills them")
+    print("=" * 80)
+    with distilled_curves() as meta:
+        original = DataService.load_data()
+        product_name, emirate, store_type = SEGMENTS[1]
+        changed = original.copy()
+        latest = changed[(changed['product_name'] == product_name) & (changed['emirate'] == emirate)
+                         & (changed['store_type'] == store_type)]['period_normalized_date'].idxmax()
+        changed.loc[latest, 'rolling_3day_mean'] += 10
+        DataService.set_data(changed)
+        try:
+            assert DistilledCurveService.current() is None
+            DistilledCurveService.builder.join(timeout=120)
+            assert DistilledCurveService.loaded is not None
+            redistilled = DistilledCurveService.loaded[2]
+            assert redistilled['inputs_fingerprint'] != meta['inputs_fingerprint']
+            assert abs(redistilled['segments'][1]['rolling'][0] - meta['segments'][1]['rolling'][0] - 10) < 1e-9
+            _, cube_meta = DemandCubeService.open_cube()  # Rebuilt for the new data on the way
+            assert cube_meta['inputs_fingerprint'] == redistilled['inputs_fingerprint']
+        finally:
+            DataService.set_data(original)
+    print("✓ Stale curves dropped, cube rebuilt and curves redistilled for the new data")
+
+
+def main():
+    tests = [test_fit_and_error_report, test_curves_served_from_coefficients,
+             test_inaccurate_contexts_fall_back_to_model, test_predictions_consistent_during_reload,
+             test_redistilled_when_data_changes]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
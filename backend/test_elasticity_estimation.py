@@ -0,0 +1,119 @@
+"""
+Test script for data-driven segment elasticity estimation
+Checks the grouped least-squares fit, hierarchical shrinkage and table lookups
+"""
+import sys
+import numpy as np
+import pandas as pd
+from services.elasticity_estimation_service import ElasticityEstimationService
+from services.elasticity_service import ElasticityService
+
+
+def make_sales(seed=0):
+    """Synthetic log-log sales with known elasticities; the last 5 emirates are sparse"""
+    rng = np.random.default_rng(seed)
+    frames, truth = [], {}
+    for product, category in (('P0', 'C'), ('P1', 'C'), ('P2', 'D')):
+        for e in range(20):
+            n_obs = 40 if e < 15 else 6
+            elasticity = -1.0 + 0.2 * rng.normal()
+            price = np.exp(rng.normal(0, 0.1, n_obs))
+            weekend = rng.integers(0, 2, n_obs)
+            units = np.exp(np.log(100) + elasticity * np.log(price) + 0.1 * weekend + rng.normal(0, 0.1, n_obs)) - 1
+            frames.append(pd.DataFrame({
+                'product_name': product, 'emirate': f'E{e}', 'store_type': 'S', 'category': category,
+                'price_per_sales_unit': price, 'sales_units': units, 'is_weekend': weekend, 'is_holiday': 0
+            }))
+            truth[(product, f'E{e}')] = elasticity
+    return pd.concat(frames, ignore_index=True), truth
+
+
+def test_grouped_fit_matches_per_segment_ols():
+    print("=" * 80)
+    print("TEST: Grouped least squares equals per-segment OLS")
+    print("=" * 80)
+    sales, _ = make_sales()
+    table = ElasticityEstimationService.fit_segments(sales)
+    identified = table[table['raw_elasticity'].notna()]
+    assert (table['n_obs'] == 40).sum() <= len(identified)
+    for row in identified.itertuples(index=False):
+        segment = sales[(sales['product_name'] == row.product_name) & (sales['emirate'] == row.emirate)]
+        X = np.column_stack([
+            np.ones(len(segment)), np.log(segment['price_per_sales_unit']), segment['is_weekend']
+        ])
+        beta = np.linalg.lstsq(X, np.log1p(segment['sales_units']), rcond=None)[0]
+        assert np.isclose(row.raw_elasticity, beta[1], atol=1e-6), (row.raw_elasticity, beta[1])
+    print(f"✓ {len(identified)}/{len(table)} identified segments match")
+
+
+def test_shrinkage_toward_category():
+    print("=" * 80)
+    print("TEST: Sparse segments are shrunk more toward the category mean")
+    print("=" * 80)
+    sales, truth = make_sales()
+    table = ElasticityEstimationService.shrink(
+        ElasticityEstimationService.fit_segments(sales), {'C': -1.0, 'D': -1.0}, -1.0
+    )
+    dense = table['n_obs'] == 40
+    assert table.loc[~dense, 'shrinkage'].mean() > table.loc[dense, 'shrinkage'].mean()
+
+    true = np.array([truth[(p, e)] for p, e in zip(table['product_name'], table['emirate'])])
+    raw_error = np.mean((table['raw_elasticity'] - true) ** 2)
+    shrunk_error = np.mean((table['elasticity'] - true) ** 2)
+    assert shrunk_error <= raw_error
+    print(f"✓ MSE raw {raw_error:.4f} -> shrunk {shrunk_error:.4f}")
+
+
+def test_single_price_change_falls_back_to_prior():
+    print("=" * 80)
+    print("TEST: A slope carried by one observation is not trusted")
+    print("=" * 80)
+    sales = pd.DataFrame({
+        'product_name': 'P', 'emirate': 'E', 'store_type': 'S', 'category': 'C',
+        'price_per_sales_unit': [1.01] + [1.0] * 31, 'sales_units': [300.0] + [100.0] * 31,
+        'is_weekend': 0, 'is_holiday': 0
+    })
+    table = ElasticityEstimationService.estimate_table(sales, {'C': -0.8}, -1.0)
+    entry = table['segments']['P|E|S']
+    assert entry['raw_elasticity'] is None
+    assert entry['elasticity'] == -0.8
+    print("✓ Segment uses the category prior")
+
+
+def test_table_lookup():
+    print("=" * 80)
+    print("TEST: Request-time lookup reads the table")
+    print("=" * 80)
+    cached = ElasticityService.elasticity_table
+    ElasticityService.elasticity_table = {'segments': {'P|E|S': {'elasticity': -1.37}}}
+    try:
+        assert ElasticityService.get_segment_elasticity('P', 'E', 'S') == -1.37
+        assert ElasticityService.get_segment_elasticity('P', 'E', 'X') is None
+        assert ElasticityService.get_product_elasticity('P', 'E', 'S', 1.0, 12, 2) == -1.37
+        batch = ElasticityService.get_base_elasticities(['P', 'P'], ['C', 'C'], ['E', 'E'], ['S', 'X'])
+        assert batch[0] == -1.37 and -2.0 <= batch[1] <= -0.5
+    finally:
+        ElasticityService.elasticity_table = cached
+    print("✓ Table entries override the category framework")
+
+
+def main():
+    tests = [
+        test_grouped_fit_matches_per_segment_ols,
+        test_shrinkage_toward_category,
+        test_single_price_change_falls_back_to_prior,
+        test_table_lookup
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,87 @@
+"""
+Test script for ETag / 304 handling on read endpoints
+Checks validators, conditional requests, body reuse and invalidation on dataset changes
+"""
+import sys
+from fastapi.testclient import TestClient
+from main import app
+from services.data_service import DataService
+from services.response_cache import ResponseCache
+
+client = TestClient(app)
+
+
+def test_etag_and_not_modified():
+    print("=" * 80)
+    print("TEST: Read endpoints carry ETags and answer 304 on a match")
+    print("=" * 80)
+    product_id = client.get("/api/products").json()[0]["id"]
+    for path in ("/api/products", f"/api/products/{product_id}", "/api/valid-values", f"/api/product-stats/{product_id}"):
+        response = client.get(path)
+        assert response.status_code == 200, path
+        etag = response.headers["etag"]
+        assert etag.startswith('"') and not etag.startswith('W/')
+        assert "max-age" in response.headers["cache-control"]
+
+        for validator in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+            conditional = client.get(path, headers={"If-None-Match": validator})
+            assert conditional.status_code == 304, (path, validator)
+            assert conditional.content == b"" and conditional.headers["etag"] == etag
+        assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert client.get("/api/product-stats/NOPE").status_code == 404
+    print("✓ 4 endpoints validate")
+
+
+def test_serialized_body_is_reused():
+    print("=" * 80)
+    print("TEST: The serialized body is built once per version")
+    print("=" * 80)
+    first = client.get("/api/products")
+    before = ResponseCache.stats()
+    second = client.get("/api/products")
+    after = ResponseCache.stats()
+    assert second.content == first.content
+    assert after['hits'] == before['hits'] + 1 and after['misses'] == before['misses']
+    # The response model still applies: only Product fields are exposed
+    assert set(first.json()[0]) <= {"id", "name", "category", "current_price", "cost", "unit"}
+    print(f"✓ {len(first.content)} bytes served from memory")
+
+
+def test_dataset_change_invalidates():
+    print("=" * 80)
+    print("TEST: A new dataset version changes ETags and content")
+    print("=" * 80)
+    original = DataService.load_data()
+    old = client.get("/api/products")
+    product = old.json()[0]
+    try:
+        changed = original.copy()
+        changed.loc[changed['product_name'] == product["name"], 'price_per_sales_unit'] *= 2
+        DataService.set_data(changed)
+        new = client.get("/api/products", headers={"If-None-Match": old.headers["etag"]})
+        assert new.status_code == 200
+        assert new.headers["etag"] != old.headers["etag"]
+        updated = next(p for p in new.json() if p["id"] == product["id"])
+        assert abs(updated["current_price"] - 2 * product["current_price"]) < 0.02
+    finally:
+        DataService.set_data(original)
+    restored = next(p for p in client.get("/api/products").json() if p["id"] == product["id"])
+    assert restored["current_price"] == product["current_price"]
+    print("✓ ETag changed with the data version")
+
+
+def main():
+    tests = [test_etag_and_not_modified, test_serialized_body_is_reused, test_dataset_change_invalidates]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,275 @@
+"""
+Test script for the background job queue
+Checks progress and partial results, cancellation, the concurrency limit,
+on-disk results, SQLite resume after a restart, and that with the SQLite backend
+several workers run each job once and serve each other's jobs
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from fastapi.testclient import TestClient
+from main import app
+from services.job_service import JobService, SQLiteJobStore, worker_identity
+
+RESULTS_DIR = tempfile.mkdtemp(prefix="job_results_")
+JobService.RESULTS_DIR = RESULTS_DIR
+
+release = threading.Event()
+runs = []
+
+
+def counting_job(params, context):
+    for i in range(params['n']):
+        context.add_partial({'i': i})
+        context.progress(i + 1, params['n'])
+    return {'total': params['n']}
+
+
+def blocking_job(params, context):
+    runs.append(params.get('tag'))
+    while not release.wait(0.01):
+        context.progress(0, 1)
+    return {'tag': params.get('tag')}
+
+
+JobService.register('test_counting', counting_job)
+JobService.register('test_blocking', blocking_job)
+
+
+def wait_for(job_id, statuses=JobService.TERMINAL_STATUSES, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = JobService.get(job_id)
+        if job is not None and job['status'] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not reach {statuses}")
+
+
+def restart(concurrency=None, backend='memory'):
+    JobService.shutdown(wait=True)
+    JobService.MAX_CONCURRENT_JOBS = concurrency or 2
+    JobService.QUEUE_BACKEND = backend
+    JobService.start()
+
+
+def test_progress_partials_and_disk_result():
+    print("=" * 80)
+    print("TEST: Progress, partial results and persisted result")
+    print("=" * 80)
+    restart()
+    job = JobService.submit('test_counting', {'n': 5})
+    done = wait_for(job['id'])
+    assert done['status'] == 'succeeded' and done['result'] == {'total': 5}
+    assert done['progress']['done'] == 5 and done['partial_results_count'] == 5
+    assert [r['i'] for r in JobService.get(job['id'], since=3)['partial_results']] == [3, 4]
+
+    JobService.forget(job['id'])
+    assert job['id'] not in JobService.jobs
+    stored = JobService.get(job['id'])
+    assert stored['result'] == {'total': 5} and len(stored['partial_results']) == 5
+    print(f"✓ Result served from {os.path.join(RESULTS_DIR, job['id'] + '.json')}")
+
+
+def test_cancellation_and_concurrency_limit():
+    print("=" * 80)
+    print("TEST: Concurrency limit and cancellation of queued and running jobs")
+    print("=" * 80)
+    restart(concurrency=1)
+    release.clear()
+    runs.clear()
+    running = JobService.submit('test_blocking', {'tag': 'first'})
+    wait_for(running['id'], ('running',))
+    queued = JobService.submit('test_blocking', {'tag': 'second'})
+    time.sleep(0.1)
+    assert JobService.get(queued['id'])['status'] == 'queued'  # Only one worker
+
+    assert JobService.cancel(queued['id'])['status'] == 'cancelled'
+    JobService.cancel(running['id'])
+    assert wait_for(running['id'])['status'] == 'cancelled'
+    time.sleep(0.1)
+    assert runs == ['first'], runs
+    print("✓ Second job waited for the worker and never ran after cancellation")
+
+
+def test_sqlite_queue_survives_restart():
+    print("=" * 80)
+    print("TEST: SQLite queue resumes an interrupted job after restart")
+    print("=" * 80)
+    JobService.SQLITE_PATH = os.path.join(RESULTS_DIR, 'jobs.db')
+    release.clear()
+    restart(concurrency=1, backend='sqlite')
+    job = JobService.submit('test_blocking', {'tag': 'durable'})
+    wait_for(job['id'], ('running',))
+
+    # Simulate a process restart: in-memory state is gone, only the database remains
+    JobService.shutdown(wait=True)
+    JobService.jobs = {}
+    release.set()
+    JobService.start()
+    resumed = wait_for(job['id'])
+    assert resumed['status'] == 'succeeded' and resumed['result'] == {'tag': 'durable'}
+    JobService.QUEUE_BACKEND = 'memory'
+    print("✓ Job resumed with the same ID")
+
+
+def test_partial_results_window():
+    print("=" * 80)
+    print("TEST: Memory holds the latest partial results; SQLite serves them all")
+    print("=" * 80)
+    original = JobService.MAX_PARTIAL_RESULTS
+    JobService.MAX_PARTIAL_RESULTS = 3
+    try:
+        restart()
+        job = wait_for(JobService.submit('test_counting', {'n': 10})['id'])
+        assert job['partial_results_count'] == 10
+        assert [r['i'] for r in job['partial_results']] == [7, 8, 9]
+        assert [r['i'] for r in JobService.get(job['id'], since=8)['partial_results']] == [8, 9]
+
+        JobService.SQLITE_PATH = os.path.join(RESULTS_DIR, 'partials.db')
+        restart(backend='sqlite')
+        job = wait_for(JobService.submit('test_counting', {'n': 10})['id'])
+        assert [r['i'] for r in job['partial_results']] == list(range(10))
+        JobService.forget(job['id'])
+        assert [r['i'] for r in JobService.get(job['id'], since=2)['partial_results']] == list(range(2, 10))
+    finally:
+        JobService.MAX_PARTIAL_RESULTS = original
+        restart()
+    print("✓ 3 held in memory, all 10 served through the store")
+
+
+def test_workers_claim_jobs_once():
+    print("=" * 80)
+    print("TEST: Concurrent claims of a queued job succeed exactly once")
+    print("=" * 80)
+    path = os.path.join(RESULTS_DIR, 'claims.db')
+    stores = [SQLiteJobStore(path) for _ in range(4)]
+    job = JobService._new_job('test_counting', {'n': 1})
+    stores[0].save(job)
+    barrier = threading.Barrier(len(stores))
+    claims = []
+
+    def claim(store):
+        barrier.wait()
+        claims.append(store.claim(job['id'], worker_identity(), datetime.now().isoformat()))
+
+    threads = [threading.Thread(target=claim, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claims) == [False, False, False, True], claims
+    assert not stores[1].cancel_queued(job['id'])  # Already running
+    for store in stores:
+        store.close()
+    print("✓ 1 of 4 workers claimed the job")
+
+
+def test_jobs_served_across_workers():
+    print("=" * 80)
+    print("TEST: A job running in another worker is served and cancelled through the store")
+    print("=" * 80)
+    JobService.SQLITE_PATH = os.path.join(RESULTS_DIR, 'shared.db')
+    release.clear()
+    restart(backend='sqlite')
+    job = JobService.submit('test_blocking', {'tag': 'remote'})
+    wait_for(job['id'], ('running',))
+    time.sleep(0.1)  # Past its first progress report
+    try:
+        # Without an in-memory copy this process is just another worker for the job
+        JobService.jobs.pop(job['id'])
+        remote = JobService.get(job['id'])
+        assert remote['status'] == 'running' and remote['progress']['total'] == 1
+        assert JobService.cancel(job['id'])['status'] == 'running'  # Stops at its next progress report
+        assert wait_for(job['id'])['status'] == 'cancelled'
+    finally:
+        release.set()
+    print("✓ Status and cancellation went through the store")
+
+
+def test_resume_skips_jobs_of_live_workers():
+    print("=" * 80)
+    print("TEST: Start resumes jobs of exited workers only")
+    print("=" * 80)
+    JobService.SQLITE_PATH = os.path.join(RESULTS_DIR, 'resume.db')
+    store = SQLiteJobStore(JobService.SQLITE_PATH)
+    live_worker = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    exited_worker = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited_worker.wait()
+    try:
+        owned = JobService._new_job('test_blocking', {'tag': 'owned'})
+        orphan = JobService._new_job('test_blocking', {'tag': 'orphan'})
+        reused = JobService._new_job('test_blocking', {'tag': 'reused'})
+        owned.update(status='running', owner=worker_identity(live_worker.pid))
+        orphan.update(status='running', owner=f"{exited_worker.pid}:")
+        reused.update(status='running', owner=f"{live_worker.pid}:0")  # Same pid, other process
+        for job in (owned, orphan, reused):
+            store.save(job)
+        release.set()
+        restart(backend='sqlite')
+        assert owned['id'] not in JobService.jobs
+        assert wait_for(orphan['id'])['result'] == {'tag': 'orphan'}
+        assert wait_for(reused['id'])['result'] == {'tag': 'reused'}
+        assert store.status(owned['id']) == 'running'
+    finally:
+        live_worker.kill()
+        store.close()
+        restart()
+    print("✓ Jobs of exited workers ran here; the live worker's job was left alone")
+
+
+def test_api_batch_job():
+    print("=" * 80)
+    print("TEST: Batch optimization job through the API")
+    print("=" * 80)
+    restart()
+    client = TestClient(app)
+    item = {
+        "product_id": "x", "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages",
+        "emirate": "Dubai", "store_type": "Hypermarket", "current_price": 23.4,
+        "month": 12, "day_of_week": 2, "day_of_month": 10
+    }
+    response = client.post("/api/jobs", json={"job_type": "optimize_batch", "params": {"items": [item, item]}})
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    wait_for(job_id)
+    job = client.get(f"/api/jobs/{job_id}").json()
+    assert job["status"] == "succeeded", job
+    assert job["result"]["summary"]["succeeded"] == 2
+    assert job["partial_results"][0]["result"]["recommendation"]["recommended_price"] > 0
+
+    events = client.get(f"/api/jobs/{job_id}/events").text
+    assert events.count("event: partial") == 2 and "event: done" in events
+    assert client.post("/api/jobs", json={"job_type": "nope"}).status_code == 400
+    assert client.get("/api/jobs/0123456789abcdef0123456789abcdef").status_code == 404
+    print("✓ 2 partial results and a summary")
+
+
+def main():
+    tests = [
+        test_progress_partials_and_disk_result,
+        test_cancellation_and_concurrency_limit,
+        test_sqlite_queue_survives_restart,
+        test_partial_results_window,
+        test_workers_claim_jobs_once,
+        test_jobs_served_across_workers,
+        test_resume_skips_jobs_of_live_workers,
+        test_api_batch_job
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
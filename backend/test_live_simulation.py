@@ -0,0 +1,103 @@
+"""
+Test script for the live simulation WebSocket
+Checks that session results match POST /api/simulate, that stale price updates are
+coalesced, and that bad messages get error replies without closing the session
+"""
+import sys
+import time
+from fastapi.testclient import TestClient
+from main import app
+from services.ai_service import XGBoostAIService
+
+client = TestClient(app)
+
+SEGMENT = {
+    "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages",
+    "emirate": "Dubai", "store_type": "Hypermarket",
+    "month": 12, "day_of_week": 2, "day_of_month": 10, "is_weekend": 0, "is_holiday": 0
+}
+
+
+def test_session_matches_http_simulation():
+    print("=" * 80)
+    print("TEST: Session results equal POST /api/simulate")
+    print("=" * 80)
+    with client.websocket_connect("/api/ws/simulate") as ws:
+        ws.send_json({"type": "open", **SEGMENT})
+        session = ws.receive_json()
+        assert session["type"] == "session" and session["baseline_demand"] > 0
+        for seq, price in enumerate((20.0, 23.5, 27.0)):
+            ws.send_json({"type": "price", "price": price, "seq": seq})
+            reply = ws.receive_json()
+            assert reply["type"] == "simulation" and reply["seq"] == seq
+            expected = client.post("/api/simulate", json={**SEGMENT, "price": price}).json()
+            for key in ("predicted_demand", "predicted_revenue", "elasticity_coefficient", "demand_level"):
+                assert reply["result"][key] == expected[key], (key, reply["result"][key], expected[key])
+    print("✓ 3 streamed prices match the HTTP endpoint")
+
+
+def test_stale_updates_are_coalesced():
+    print("=" * 80)
+    print("TEST: Updates sent faster than the server answers are coalesced")
+    print("=" * 80)
+    simulate_with_context = XGBoostAIService.simulate_with_context
+
+    def slow_simulation(context, price):
+        time.sleep(0.05)
+        return simulate_with_context(context, price)
+
+    XGBoostAIService.simulate_with_context = staticmethod(slow_simulation)
+    try:
+        with client.websocket_connect("/api/ws/simulate") as ws:
+            ws.send_json({"type": "open", **SEGMENT})
+            assert ws.receive_json()["type"] == "session"
+            for seq in range(20):
+                ws.send_json({"type": "price", "price": 20.0 + seq * 0.5, "seq": seq})
+            replies = []
+            while not replies or replies[-1]["seq"] != 19:
+                replies.append(ws.receive_json())
+    finally:
+        XGBoostAIService.simulate_with_context = simulate_with_context
+
+    assert all(r["type"] == "simulation" for r in replies)
+    assert len(replies) < 20
+    assert len(replies) + sum(r["dropped"] for r in replies) == 20
+    assert replies[-1]["result"]["scenario"]["price"] == 29.5
+    print(f"✓ 20 updates answered with {len(replies)} simulations")
+
+
+def test_errors_keep_session_open():
+    print("=" * 80)
+    print("TEST: Invalid messages get error replies and the session continues")
+    print("=" * 80)
+    with client.websocket_connect("/api/ws/simulate") as ws:
+        ws.send_json({"type": "price", "price": 20.0, "seq": 1})
+        assert ws.receive_json()["type"] == "error"  # No session yet
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"type": "open", "product_name": "x"})
+        assert ws.receive_json()["type"] == "error"  # Missing segment fields
+        ws.send_json({"type": "open", **SEGMENT, "price": 21.0, "seq": 5})
+        assert ws.receive_json()["type"] == "session"
+        reply = ws.receive_json()
+        assert reply["type"] == "simulation" and reply["seq"] == 5
+        ws.send_json({"type": "price", "price": -3, "seq": 6})
+        assert ws.receive_json() == {"type": "error", "seq": 6, "detail": "Price must be a positive number"}
+    print("✓ Errors reported per message")
+
+
+def main():
+    tests = [test_session_matches_http_simulation, test_stale_updates_are_coalesced, test_errors_keep_session_open]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,67 @@
+"""
+Test script for the load-testing harness (load_test.py)
+Runs a short in-process (ASGI transport) load test and checks the report: requests
+per endpoint add up, every response succeeds, and the latency percentiles are ordered
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import load_test
+
+
+def test_parse_mix():
+    print("=" * 80)
+    print("TEST: Endpoint mixes parse and reject unknown endpoints")
+    print("=" * 80)
+    assert load_test.parse_mix('products=5,optimize=3,simulate=2') == load_test.DEFAULT_MIX
+    assert load_test.parse_mix('simulate=1') == {'simulate': 1.0}
+    for bad in ('checkout=1', 'products', 'products=1,optimize'):
+        try:
+            load_test.parse_mix(bad)
+            assert False, f"{bad!r} should be rejected"
+        except argparse.ArgumentTypeError:
+            pass
+    print("✓ Mixes parsed, bad entries rejected")
+
+
+def test_asgi_run_report():
+    print("=" * 80)
+    print("TEST: A short ASGI run reports throughput and percentiles per endpoint")
+    print("=" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'report.json')
+        report = load_test.main(['--mode', 'asgi', '--concurrency', '3', '--duration', '3', '--warmup', '0.5',
+                                 '--scenarios', '20', '--output', output])
+        with open(output) as f:
+            assert json.load(f) == report
+
+    assert report['mode'] == 'asgi' and report['workers'] == 1 and report['concurrency'] == 3
+    assert report['environment']['commit'] is None or isinstance(report['environment']['commit'], str)
+    assert set(report['endpoints']) == set(load_test.DEFAULT_MIX)
+    overall = report['overall']
+    assert overall['requests'] == sum(stats['requests'] for stats in report['endpoints'].values())
+    assert overall['errors'] == 0
+    for name, stats in [*report['endpoints'].items(), ('overall', overall)]:
+        assert stats['requests'] > 0, name
+        assert 0 < stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms'] <= stats['max_ms'], stats
+        assert stats['throughput_rps'] > 0
+    print(f"✓ {overall['requests']} requests, {overall['throughput_rps']} req/s, p99 {overall['p99_ms']} ms")
+
+
+def main():
+    tests = [test_parse_mix, test_asgi_run_report]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,109 @@
+"""
+Test script for structured logging and per-request decision traces
+Checks that the pricing hot path writes nothing to stdout, that ?trace=1 returns the
+elasticity and search decisions, and that log records go through the queue handler
+"""
+import io
+import sys
+import json
+import logging
+import contextlib
+from logging.handlers import QueueHandler
+from fastapi.testclient import TestClient
+from main import app
+from services.logging_service import LoggingService, DecisionTrace, JSONFormatter, get_logger
+
+client = TestClient(app)
+
+SEGMENT = {
+    "product_id": "NES002", "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages",
+    "emirate": "Dubai", "store_type": "Hypermarket", "month": 12, "day_of_week": 2, "day_of_month": 10
+}
+
+
+def test_hot_path_is_silent():
+    print("=" * 80)
+    print("TEST: Optimizations and simulations write nothing to stdout by default")
+    print("=" * 80)
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        optimized = client.post("/api/optimize-price", json={**SEGMENT, "current_price": 92.5})
+        simulated = client.post("/api/simulate", json={**SEGMENT, "price": 99.0})
+    assert optimized.status_code == simulated.status_code == 200
+    assert stdout.getvalue() == "", stdout.getvalue()[:200]
+    assert "trace" not in optimized.json() and "trace" not in simulated.json()
+    assert not DecisionTrace.active()
+    print("✓ No stdout output and no trace unless requested")
+
+
+def test_optimization_trace():
+    print("=" * 80)
+    print("TEST: ?trace=1 returns the decisions behind a recommendation")
+    print("=" * 80)
+    response = client.post("/api/optimize-price?trace=1", json={**SEGMENT, "current_price": 92.5})
+    assert response.status_code == 200
+    result = response.json()
+    events = [event["event"] for event in result["trace"]]
+    for name in ("optimize.baseline", "elasticity.base", "optimize.bounds", "optimize.candidates", "optimize.result"):
+        assert name in events, name
+    assert events.index("optimize.bounds") < events.index("optimize.result")
+    assert all(isinstance(event["t_ms"], float) for event in result["trace"])
+
+    # The traced answer is the untraced answer
+    plain = client.post("/api/optimize-price", json={**SEGMENT, "current_price": 92.5}).json()
+    assert plain["recommendation"]["recommended_price"] == result["recommendation"]["recommended_price"]
+
+    simulated = client.post("/api/simulate?trace=1", json={**SEGMENT, "price": 105.0}).json()
+    adjustment = next(event for event in simulated["trace"] if event["event"] == "elasticity.adjustment")
+    assert "%" in adjustment["reason"] and "{" not in adjustment["reason"]
+    assert "simulate.demand" in [event["event"] for event in simulated["trace"]]
+    print(f"✓ {len(events)} optimization events, simulation reason: {adjustment['reason'][:40]}...")
+
+
+def test_trace_bounds():
+    print("=" * 80)
+    print("TEST: Recording outside a trace is a no-op and traces are capped")
+    print("=" * 80)
+    DecisionTrace.record("outside", value=1)
+    with DecisionTrace.capture(False) as trace:
+        assert trace is None and not DecisionTrace.active()
+    with DecisionTrace.capture() as trace:
+        for i in range(DecisionTrace.MAX_EVENTS + 5):
+            DecisionTrace.record("step", i=i)
+    events = trace.to_list()
+    assert len(events) == DecisionTrace.MAX_EVENTS + 1
+    assert events[-1] == {"event": "trace.truncated", "dropped": 5}
+    assert not DecisionTrace.active()
+    print("✓ Capped at MAX_EVENTS with a truncation marker")
+
+
+def test_queue_handler_and_json_format():
+    print("=" * 80)
+    print("TEST: Records go through the queue handler; JSON format is one object per line")
+    print("=" * 80)
+    root = logging.getLogger(LoggingService.ROOT_LOGGER)
+    assert any(isinstance(handler, QueueHandler) for handler in root.handlers)
+    assert get_logger("services.elasticity_service").isEnabledFor(logging.DEBUG) == (root.level <= logging.DEBUG)
+
+    record = logging.LogRecord("pricing.test", logging.INFO, __file__, 1, "Loaded %s rows", (42,), None)
+    record.fields = {"segments": 3}
+    line = json.loads(JSONFormatter().format(record))
+    assert line["message"] == "Loaded 42 rows" and line["level"] == "INFO" and line["segments"] == 3
+    print("✓ QueueHandler installed, JSON lines carry message and fields")
+
+
+def main():
+    tests = [test_hot_path_is_silent, test_optimization_trace, test_trace_bounds, test_queue_handler_and_json_format]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,217 @@
+"""
+Test script for memory reporting and budgets (MemoryService)
+Checks the per-subsystem report, that the response cache and job results stay within
+their budgets under sustained synthetic load, that enforcement shrinks derived caches
+without changing results, tracemalloc attribution, and the admin endpoints
+"""
+import sys
+import time
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from main import app
+from services.memory_service import MemoryService
+from services.response_cache import ResponseCache
+from services.job_service import JobService
+from services.data_service import DataService
+
+JobService.RESULTS_DIR = tempfile.mkdtemp(prefix="job_results_")
+
+
+def bulky_job(params, context):
+    for i in range(params['n']):
+        context.add_partial({'i': i, 'payload': f"{i:04d}" * 250})
+    return {'n': params['n']}
+
+
+JobService.register('test_bulky', bulky_job)
+
+
+def wait_for(job_id, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = JobService.get(job_id, include_results=False)
+        if job is not None and job['status'] in JobService.TERMINAL_STATUSES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@contextmanager
+def fresh_tracing(frames):
+    """
+    A tracemalloc session owned by one test: tracing left on by earlier tests or the app
+    lifespan is restarted at the requested depth, and the periodic budget check is
+    stopped so it cannot shrink caches mid-measurement
+    """
+    MemoryService.shutdown()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    tracemalloc.start(frames)
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+
+def test_report_covers_every_cache():
+    print("=" * 80)
+    print("TEST: The report sizes every cache subsystem against its budget")
+    print("=" * 80)
+    with TestClient(app) as client:
+        client.get("/api/products")
+        report = MemoryService.report()
+    subsystems = report['subsystems']
+    for name in ('data', 'derived_data', 'model', 'elasticity', 'online_elasticity', 'response_cache', 'jobs'):
+        assert name in subsystems, name
+    assert subsystems['data']['estimated_bytes'] >= DataService.load_data().memory_usage().sum()
+    assert subsystems['model']['estimated_bytes'] > 1_000_000
+    assert subsystems['response_cache']['budget_bytes'] == 64 * 1024 * 1024
+    assert subsystems['derived_data']['shrinkable'] and not subsystems['data']['shrinkable']
+    assert report['estimated_total_bytes'] == sum(s['estimated_bytes'] for s in subsystems.values())
+    assert report['process']['rss_bytes'] > report['estimated_total_bytes']
+    print(f"✓ {len(subsystems)} subsystems, {report['estimated_total_bytes'] / 1e6:.1f} MB estimated, "
+          f"RSS {report['process']['rss_bytes'] / 1e6:.0f} MB")
+
+
+def test_response_cache_bounded_under_load():
+    print("=" * 80)
+    print("TEST: The response cache stays within its budget under sustained distinct reads")
+    print("=" * 80)
+    budget = 256 * 1024
+    original = MemoryService.budget('response_cache')
+    MemoryService.set_budget('response_cache', budget)
+    ResponseCache.clear()
+    try:
+        with fresh_tracing(1):
+            baseline = tracemalloc.get_traced_memory()[0]
+            evictions = ResponseCache.stats()['evictions']
+            peak_bytes = 0
+            for i in range(20000):
+                ResponseCache.get_body(f"synthetic/{i}", "v1", lambda: {'i': i, 'rows': list(range(200))})
+                peak_bytes = max(peak_bytes, ResponseCache.total_bytes)
+            growth = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        MemoryService.set_budget('response_cache', original)
+    stats = ResponseCache.stats()
+    assert peak_bytes <= budget, peak_bytes
+    assert stats['bytes'] == sum(len(body) for body in ResponseCache.entries.values())
+    assert stats['evictions'] - evictions > 19000
+    assert growth < 4 * budget, growth  # Bodies plus keys and LRU bookkeeping, not 20000 bodies
+    ResponseCache.clear()
+    print(f"✓ Peak {peak_bytes} bytes held (budget {budget}), heap growth {growth} bytes over 20000 inserts")
+
+
+def test_job_results_bounded_and_served_from_disk():
+    print("=" * 80)
+    print("TEST: Enforcement forgets finished jobs over budget; their results stay readable")
+    print("=" * 80)
+    with TestClient(app):  # Startup starts the job workers
+        job_ids = [JobService.submit('test_bulky', {'n': 200})['id'] for _ in range(10)]
+        for job_id in job_ids:
+            wait_for(job_id)
+    budget = 500_000
+    assert JobService.memory_usage() > budget
+    original = MemoryService.budget('jobs')
+    MemoryService.set_budget('jobs', budget)
+    try:
+        actions = {action['subsystem']: action for action in MemoryService.enforce()}
+    finally:
+        MemoryService.set_budget('jobs', original)
+    assert actions['jobs']['shrunk'] and actions['jobs']['after_bytes'] <= budget
+    assert JobService.memory_usage() <= budget
+    # Oldest finished first (two workers: jobs do not always finish in submission order)
+    by_finish = sorted(job_ids, key=lambda job_id: JobService.get(job_id, include_results=False)['finished_at'])
+    forgotten = [job_id for job_id in by_finish if job_id not in JobService.jobs]
+    assert forgotten and forgotten == by_finish[:len(forgotten)]
+    stored = JobService.get(forgotten[0])
+    assert stored['result'] == {'n': 200} and len(stored['partial_results']) == 200
+    print(f"✓ {len(forgotten)} of {len(job_ids)} jobs forgotten, results still served from disk")
+
+
+def test_enforce_drops_derived_data():
+    print("=" * 80)
+    print("TEST: Derived data over budget is dropped and rebuilt identically on next use")
+    print("=" * 80)
+    products = DataService.get_products_from_data()
+    snapshot = DataService.get_segment_snapshot()
+    original = MemoryService.budget('derived_data')
+    MemoryService.set_budget('derived_data', 1)
+    try:
+        actions = MemoryService.enforce()
+    finally:
+        MemoryService.set_budget('derived_data', original)
+    assert any(action['subsystem'] == 'derived_data' and action['shrunk'] for action in actions)
+    assert DataService.products_cache is None and DataService.segments_cache is None
+    assert DataService.get_products_from_data() == products
+    assert DataService.get_segment_snapshot().equals(snapshot)
+    print("✓ Dropped and rebuilt")
+
+
+def test_traced_attribution():
+    print("=" * 80)
+    print("TEST: tracemalloc attributes reloaded data and cached bodies to their subsystems")
+    print("=" * 80)
+    ResponseCache.clear()
+    try:
+        with fresh_tracing(MemoryService.TRACE_FRAMES):
+            DataService.reload_data()
+            for i in range(50):
+                ResponseCache.get_body(f"traced/{i}", "v1", lambda: {'values': list(range(1000))})
+            traced = MemoryService.report()['traced']
+            # Not the report dict: dicts reused from CPython's free list are never traced
+            probe = object()
+            traceback = tracemalloc.get_object_traceback(probe)
+    finally:
+        ResponseCache.clear()
+    assert traced is not None and traceback is not None
+    expected = tuple((frame.filename, frame.lineno) for frame in traceback)
+    assert MemoryService.frame_tuples(traceback) == expected
+    assert MemoryService.frame_tuples(list(traceback)) == expected  # Public Frame objects only
+    by_subsystem = traced['by_subsystem']
+    assert by_subsystem['data'] > 0.2 * MemoryService.estimates()['data'], by_subsystem
+    assert by_subsystem['response_cache'] >= sum(len(str(list(range(1000))).replace(' ', '')) for _ in range(50))
+    assert sum(by_subsystem.values()) <= traced['traced_bytes']
+    assert traced['top_lines'] and traced['top_lines'][0]['bytes'] >= traced['top_lines'][-1]['bytes']
+    print(f"✓ data {by_subsystem['data']} bytes, response_cache {by_subsystem['response_cache']} bytes traced")
+
+
+def test_admin_endpoints():
+    print("=" * 80)
+    print("TEST: /admin/memory is hidden unless enabled and requires the token when set")
+    print("=" * 80)
+    with TestClient(app) as client:
+        assert client.get("/admin/memory").status_code == 404
+        MemoryService.REPORT_ENABLED, MemoryService.TOKEN = True, "secret"
+        try:
+            assert client.get("/admin/memory").status_code == 403
+            response = client.get("/admin/memory", headers={"X-Admin-Token": "secret"})
+            assert response.status_code == 200
+            body = response.json()
+            assert body['tracing'] is False and body['traced'] is None
+            assert 'response_cache' in body['subsystems']
+            enforced = client.post("/admin/memory/enforce", headers={"X-Admin-Token": "secret"})
+            assert enforced.status_code == 200 and enforced.json() == {'actions': []}
+        finally:
+            MemoryService.REPORT_ENABLED, MemoryService.TOKEN = False, None
+    print("✓ 404 when disabled, 403 on a bad token, report and enforce with it")
+
+
+def main():
+    tests = [test_report_covers_every_cache, test_response_cache_bounded_under_load,
+             test_job_results_bounded_and_served_from_disk, test_enforce_drops_derived_data,
+             test_traced_attribution, test_admin_endpoints]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,165 @@
+"""
+Test script for the /metrics endpoint
+Checks the text exposition format, per-stage and per-route metrics, exact counts
+under concurrent writers and aggregation across worker processes
+"""
+import os
+import sys
+import tempfile
+import threading
+import subprocess
+from fastapi.testclient import TestClient
+from main import app
+from services.metrics_service import MetricsService
+
+client = TestClient(app)
+
+SEGMENT = {
+    "product_id": "NES002", "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages",
+    "emirate": "Dubai", "store_type": "Hypermarket", "month": 12, "day_of_week": 2, "day_of_month": 10
+}
+
+WORKER_SCRIPT = """
+import sys, time
+from services.metrics_service import MetricsService
+MetricsService.METRICS_DIR = sys.argv[1]
+MetricsService.inc('pricing_http_requests_total', 5, method='GET', route='/worker', status='200')
+MetricsService.register_collector(lambda: [('pricing_job_queue_depth', {'status': 'queued'}, 3)])
+MetricsService.flush()
+print('ready', flush=True)
+time.sleep(float(sys.argv[2]))
+"""
+
+
+def sample(text: str, line_prefix: str) -> float:
+    """Value of the first exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f"missing sample {line_prefix}")
+
+
+def test_exposition_format():
+    print("=" * 80)
+    print("TEST: Histograms and counters render in the Prometheus text format")
+    print("=" * 80)
+    for value in (0.0004, 0.003, 0.003, 42.0):
+        MetricsService.observe('pricing_stage_duration_seconds', value, stage='format_test')
+    MetricsService.inc('pricing_http_requests_total', method='GET', route='/a "quoted"\\path', status='200')
+    text = MetricsService.render()
+
+    assert '# TYPE pricing_stage_duration_seconds histogram' in text
+    assert '# TYPE pricing_http_requests_total counter' in text
+    prefix = 'pricing_stage_duration_seconds_bucket{stage="format_test",le='
+    assert sample(text, prefix + '"0.0005"}') == 1
+    assert sample(text, prefix + '"0.005"}') == 3  # Buckets are cumulative
+    assert sample(text, prefix + '"10"}') == 3
+    assert sample(text, prefix + '"+Inf"}') == 4
+    assert sample(text, 'pricing_stage_duration_seconds_count{stage="format_test"}') == 4
+    assert abs(sample(text, 'pricing_stage_duration_seconds_sum{stage="format_test"}') - 42.0064) < 1e-9
+    assert 'route="/a \\"quoted\\"\\\\path"' in text
+    print("✓ Cumulative buckets, sum / count and escaped labels")
+
+
+def test_pipeline_and_request_metrics():
+    print("=" * 80)
+    print("TEST: An optimization records every pipeline stage and its route")
+    print("=" * 80)
+    before = client.get("/metrics").text
+    response = client.post("/api/optimize-price", json={**SEGMENT, "current_price": 92.5})
+    assert response.status_code == 200
+    client.get("/api/products")
+    client.get("/api/products")
+    client.get("/api/does-not-exist")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    for stage in ('data_lookup', 'feature_encoding', 'model_scoring', 'elasticity_search', 'serialization'):
+        key = f'pricing_stage_duration_seconds_count{{stage="{stage}"}}'
+        previous = sample(before, key) if key in before else 0
+        assert sample(text, key) > previous, stage
+
+    route = 'pricing_http_requests_total{method="POST",route="/api/optimize-price",status="200"}'
+    assert sample(text, route) == (sample(before, route) if route in before else 0) + 1
+    assert 'route="unmatched",status="404"' in text
+    assert 0 < sample(text, 'pricing_response_cache_hit_ratio') <= 1
+    assert 'pricing_job_queue_depth{status="queued"}' in text
+    assert 'pricing_single_flight_calls_total{result="executed"}' in text
+    print("✓ 5 stages, route counters, cache ratio and queue depth exposed")
+
+
+def test_concurrent_counts_are_exact():
+    print("=" * 80)
+    print("TEST: Concurrent writers lose no increments, including after threads exit")
+    print("=" * 80)
+    n_threads, n_increments = 8, 20000
+
+    def work():
+        for _ in range(n_increments):
+            MetricsService.inc('pricing_http_requests_total', method='GET', route='/concurrency', status='200')
+
+    threads = [threading.Thread(target=work) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    text = MetricsService.render()
+    total = sample(text, 'pricing_http_requests_total{method="GET",route="/concurrency",status="200"}')
+    assert total == n_threads * n_increments, total
+    print(f"✓ {int(total)} increments from {n_threads} threads")
+
+
+def test_worker_aggregation():
+    print("=" * 80)
+    print("TEST: /metrics aggregates snapshots of every worker process")
+    print("=" * 80)
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    original_dir = MetricsService.METRICS_DIR
+    with tempfile.TemporaryDirectory() as metrics_dir:
+        MetricsService.METRICS_DIR = metrics_dir
+        try:
+            worker = subprocess.Popen(
+                [sys.executable, '-c', WORKER_SCRIPT, metrics_dir, '30'],
+                cwd=backend_dir, stdout=subprocess.PIPE, text=True
+            )
+            assert worker.stdout.readline().strip() == 'ready'
+            live = MetricsService.render()
+            worker.kill()
+            worker.wait()
+            exited = MetricsService.render()
+        finally:
+            MetricsService.METRICS_DIR = original_dir
+
+    route = 'pricing_http_requests_total{method="GET",route="/worker",status="200"}'
+    assert sample(live, 'pricing_metrics_workers') == 2
+    assert sample(live, route) == 5
+    assert sample(live, 'pricing_job_queue_depth{status="queued"}') == 3
+    # An exited worker keeps contributing its counters but not its gauges
+    assert sample(exited, 'pricing_metrics_workers') == 1
+    assert sample(exited, route) == 5
+    assert sample(exited, 'pricing_job_queue_depth{status="queued"}') == 0
+    print("✓ Counters summed across workers, gauges only from live ones")
+
+
+def main():
+    tests = [
+        test_exposition_format,
+        test_pipeline_and_request_metrics,
+        test_concurrent_counts_are_exact,
+        test_worker_aggregation
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,145 @@
+"""
+Test script for online recursive-least-squares elasticity updates
+Checks convergence, tracking with forgetting, snapshot/restore, and that snapshots from
+several workers merge per segment
+"""
+import os
+import sys
+import copy
+import tempfile
+import numpy as np
+from services.elasticity_service import ElasticityService
+from services.online_elasticity_service import OnlineElasticityService
+
+
+def stream(elasticity, n_obs, rng, base_price=5.0):
+    """Synthetic daily sales with log-normal price variation"""
+    price = base_price * np.exp(rng.normal(0, 0.2, n_obs))
+    weekend = rng.integers(0, 2, n_obs)
+    units = np.exp(np.log(200) + elasticity * np.log(price / base_price) + 0.15 * weekend + rng.normal(0, 0.1, n_obs))
+    return price, units, weekend
+
+
+def test_converges_to_true_elasticity():
+    print("=" * 80)
+    print("TEST: RLS converges from the prior to the true elasticity")
+    print("=" * 80)
+    OnlineElasticityService.reset()
+    rng = np.random.default_rng(0)
+    for price, units, weekend in zip(*stream(-1.6, 400, rng)):
+        estimate = OnlineElasticityService.update('seg', price, units, weekend, prior_elasticity=-0.8)
+    assert abs(estimate['elasticity'] - (-1.6)) < 0.15, estimate
+    assert estimate['n_updates'] == 400
+    print(f"✓ Estimate {estimate['elasticity']:.3f} ± {estimate['std_error']:.3f} (true -1.6, prior -0.8)")
+
+
+def test_forgetting_tracks_change():
+    print("=" * 80)
+    print("TEST: Forgetting factor tracks a shift in elasticity")
+    print("=" * 80)
+    OnlineElasticityService.reset()
+    rng = np.random.default_rng(1)
+    for true in (-0.8, -1.8):
+        for price, units, weekend in zip(*stream(true, 300, rng)):
+            estimate = OnlineElasticityService.update('seg', price, units, weekend, prior_elasticity=-1.0)
+    assert abs(estimate['elasticity'] - (-1.8)) < 0.25, estimate
+    print(f"✓ After the shift: {estimate['elasticity']:.3f} (true -1.8)")
+
+
+def test_snapshot_restore_round_trip():
+    print("=" * 80)
+    print("TEST: Snapshot / restore preserves state exactly")
+    print("=" * 80)
+    OnlineElasticityService.reset()
+    rng = np.random.default_rng(2)
+    prices, units, weekends = stream(-1.2, 60, rng)
+    for p, u, w in zip(prices[:30], units[:30], weekends[:30]):
+        OnlineElasticityService.update('seg', p, u, w)
+
+    path = os.path.join(tempfile.mkdtemp(), 'state.json')
+    OnlineElasticityService.snapshot(path)
+    for p, u, w in zip(prices[30:], units[30:], weekends[30:]):
+        expected = OnlineElasticityService.update('seg', p, u, w)
+
+    OnlineElasticityService.reset()
+    assert OnlineElasticityService.restore(path) == 1
+    for p, u, w in zip(prices[30:], units[30:], weekends[30:]):
+        restored = OnlineElasticityService.update('seg', p, u, w)
+    assert np.isclose(restored['elasticity'], expected['elasticity'])
+    assert restored['n_updates'] == expected['n_updates'] == 60
+    print(f"✓ Continued estimate identical: {restored['elasticity']:.4f}")
+
+
+def test_worker_snapshots_merge():
+    print("=" * 80)
+    print("TEST: Snapshots from two workers keep every segment's latest state")
+    print("=" * 80)
+    OnlineElasticityService.reset()
+    path = os.path.join(tempfile.mkdtemp(), 'state.json')
+    OnlineElasticityService.update('shared', 5.0, 100)
+    stale_worker = copy.deepcopy(OnlineElasticityService.states)
+
+    # Worker 1 moves 'shared' on and adds 'a'
+    OnlineElasticityService.update('shared', 5.5, 90)
+    OnlineElasticityService.update('a', 3.0, 50)
+    OnlineElasticityService.snapshot(path)
+
+    # Worker 2 still holds the older 'shared' and adds 'b'
+    OnlineElasticityService.states = stale_worker
+    OnlineElasticityService.update('b', 4.0, 70)
+    OnlineElasticityService.snapshot(path)
+    assert OnlineElasticityService.states['shared']['n_updates'] == 2  # Adopted from worker 1
+
+    OnlineElasticityService.reset()
+    assert OnlineElasticityService.restore(path) == 3
+    assert OnlineElasticityService.states['shared']['n_updates'] == 2
+    assert not any(name.endswith('.tmp') for name in os.listdir(os.path.dirname(path)))
+    OnlineElasticityService.reset()
+    print("✓ Merged snapshot holds a, b and the newer 'shared'")
+
+
+def test_ingest_feeds_request_time_elasticity():
+    print("=" * 80)
+    print("TEST: Ingested sales drive get_product_elasticity after MIN_UPDATES")
+    print("=" * 80)
+    OnlineElasticityService.reset()
+    rng = np.random.default_rng(3)
+    prices, units, _ = stream(-1.7, 200, rng, base_price=6.33)
+    rows = [
+        {'product_name': 'NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)', 'emirate': 'Dubai', 'store_type': 'Hypermarket',
+         'price': p, 'units': u}
+        for p, u in zip(prices, units)
+    ]
+    ElasticityService.ingest_sales(rows[:OnlineElasticityService.MIN_UPDATES - 1])
+    assert ElasticityService.get_segment_elasticity('NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)', 'Dubai', 'Hypermarket') == -0.8
+    updated = ElasticityService.ingest_sales(rows[OnlineElasticityService.MIN_UPDATES - 1:])
+    assert updated[0]['prior_elasticity'] == -0.8
+    served = ElasticityService.get_product_elasticity(
+        'NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)', 'Dubai', 'Hypermarket', 6.33, 12, 2
+    )
+    assert served < -1.4, served
+    OnlineElasticityService.reset()
+    print(f"✓ Served elasticity moved from the table's -0.8 to {served:.3f}")
+
+
+def main():
+    tests = [
+        test_converges_to_true_elasticity,
+        test_forgetting_tracks_change,
+        test_snapshot_restore_round_trip,
+        test_worker_snapshots_merge,
+        test_ingest_feeds_request_time_elasticity
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,80 @@
+"""
+Test script for profit vs. volume Pareto frontiers
+Checks the sort-based frontier filters against brute force and the catalog trade-off curve
+"""
+import sys
+import numpy as np
+from services.pareto_service import ParetoService
+
+
+def brute_force_frontier(values):
+    """Distinct non-dominated rows by pairwise comparison (small inputs only)"""
+    keep = []
+    for i, point in enumerate(values):
+        dominated = any(
+            np.all(other >= point) and (np.any(other > point) or j < i)
+            for j, other in enumerate(values) if j != i
+        )
+        if not dominated:
+            keep.append(tuple(point))
+    return sorted(keep)
+
+
+def test_frontier_matches_brute_force():
+    print("=" * 80)
+    print("TEST: Frontier filters equal brute force (2 and 3 objectives, with ties)")
+    print("=" * 80)
+    rng = np.random.default_rng(11)
+    chunk_size = ParetoService.CHUNK_SIZE
+    ParetoService.CHUNK_SIZE = 7  # Exercise the cross-block path on small inputs
+    try:
+        for _ in range(200):
+            n_points, n_objectives = rng.integers(1, 40), rng.integers(2, 4)
+            values = rng.integers(0, 5, (n_points, n_objectives)).astype(float)
+            mask = ParetoService.frontier_mask(values)
+            assert sorted(map(tuple, values[mask])) == brute_force_frontier(values)
+
+            batch = rng.integers(0, 5, (3, n_points, n_objectives)).astype(float)
+            batch_mask = ParetoService.batched_frontier_mask(batch)
+            for row, row_mask in zip(batch, batch_mask):
+                assert sorted(map(tuple, row[row_mask])) == brute_force_frontier(row)
+    finally:
+        ParetoService.CHUNK_SIZE = chunk_size
+    print("✓ 200 random problems match")
+
+
+def test_catalog_frontier_is_monotone():
+    print("=" * 80)
+    print("TEST: Catalog profit vs. volume frontier on historical data")
+    print("=" * 80)
+    result = ParetoService.catalog_frontier(month=12, day_of_week=2, day_of_month=10)
+    frontier = result['frontier']
+    demand = np.array([p['total_demand'] for p in frontier])
+    profit = np.array([p['total_profit'] for p in frontier])
+
+    assert len(frontier) >= 2
+    assert np.all(np.diff(demand) >= 0)
+    assert np.all(np.diff(profit) <= 0)
+    # The profit end of the curve beats holding current prices on profit,
+    # the volume end beats it on units
+    assert profit[0] >= result['current']['total_profit']
+    assert demand[-1] >= result['current']['total_demand']
+    print(f"✓ {len(frontier)} points from profit {profit[0]:.2f} @ {demand[0]:.1f} units "
+          f"to {profit[-1]:.2f} @ {demand[-1]:.1f} units")
+
+
+def main():
+    tests = [test_frontier_matches_brute_force, test_catalog_frontier_is_monotone]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,137 @@
+"""
+Test script for the demand prediction endpoints (/api/predict, /api/predict/batch)
+Checks that predictions match XGBoostAIService on the same inputs, rolling-feature
+defaults from history, batch order and currency handling, data-driven validation,
+and that app.py serves the same application
+"""
+import sys
+from fastapi.testclient import TestClient
+from main import app
+from models.schemas import DemandPredictionInput
+from routes import prediction_routes
+from services.ai_service import XGBoostAIService
+from services.currency_service import CurrencyService
+from services.data_service import DataService
+
+BASE = {
+    "product_name": "NESTLE NESQUIK 330GR(C) BOX", "category": "BREAKFAST CEREAL",
+    "emirate": "Dubai", "store_type": "Hypermarket",
+    "month": 10, "day_of_week": 1, "day_of_month": 27, "is_weekend": 0, "is_holiday": 0
+}
+ROLLING = {
+    "rolling_3day_mean": 40.0, "rolling_7day_mean": 42.0, "rolling_30day_mean": 45.0,
+    "rolling_3day_std": 4.0, "rolling_7day_std": 5.0, "rolling_30day_std": 6.0
+}
+
+
+def test_matches_pricing_engine():
+    print("=" * 80)
+    print("TEST: /api/predict matches XGBoostAIService; missing rolling features come from history")
+    print("=" * 80)
+    with TestClient(app) as client:
+        explicit = client.post("/api/predict", json={**BASE, **ROLLING, "price_per_sales_unit": 15.5, "currency": "USD"})
+        defaulted = client.post("/api/predict", json={**BASE, "price_per_sales_unit": 15.5, "currency": "USD"})
+        zero_mean = client.post("/api/predict", json={**BASE, **ROLLING, "rolling_3day_mean": 0.0,
+                                                        "price_per_sales_unit": 15.5, "currency": "USD"})
+    assert explicit.status_code == defaulted.status_code == zero_mean.status_code == 200
+
+    expected = XGBoostAIService.predict_demand(DemandPredictionInput(**BASE, **ROLLING, price_per_sales_unit=15.5))
+    assert abs(explicit.json()["predicted_demand"] - expected) < 1e-6
+
+    history = DataService.get_rolling_averages(BASE["product_name"], BASE["emirate"], BASE["store_type"])
+    used = defaulted.json()["input_features"]
+    assert all(abs(used[key] - value) < 1e-9 for key, value in history.items())
+    expected = XGBoostAIService.predict_demand(DemandPredictionInput(**BASE, **history, price_per_sales_unit=15.5))
+    assert abs(defaulted.json()["predicted_demand"] - expected) < 1e-6
+    assert zero_mean.json()["input_features"]["rolling_3day_mean"] == 0.0  # 0 is a value, not "missing"
+    print(f"✓ {explicit.json()['predicted_demand']:.2f} units, history defaults {used['rolling_7day_mean']:.1f}")
+
+
+def test_batch_order_and_currency():
+    print("=" * 80)
+    print("TEST: Batch predictions equal single ones, in item order, with prices in the batch currency")
+    print("=" * 80)
+    rate = CurrencyService.rate("AED")
+    items = []
+    for product in DataService.get_products_from_data():
+        for emirate, price_factor in (("Dubai", 0.9), ("Sharjah", 1.1)):
+            item = {**BASE, "product_name": product["name"], "category": product["category"], "emirate": emirate,
+                    "price_per_sales_unit": round(product["current_price"] * price_factor, 2)}
+            if emirate == "Sharjah":
+                item.update(ROLLING)
+            items.append(item)
+    with TestClient(app) as client:
+        singles = [client.post("/api/predict", json={**item, "currency": "USD"}).json()["predicted_demand"] for item in items]
+        usd = client.post("/api/predict/batch", json={"items": items, "currency": "USD"})
+        aed_items = [{**item, "price_per_sales_unit": item["price_per_sales_unit"] * rate} for item in items]
+        aed = client.post("/api/predict/batch", json={"items": aed_items, "currency": "AED"})
+    assert usd.status_code == aed.status_code == 200
+    assert usd.json()["count"] == len(items) and aed.json()["currency"] == "AED"
+    assert all(abs(a - b) < 1e-6 for a, b in zip(usd.json()["predicted_demand"], singles))
+    assert all(abs(a - b) < 1e-3 for a, b in zip(aed.json()["predicted_demand"], singles))
+    print(f"✓ {len(items)} items, identical to single predictions in USD and AED")
+
+
+def test_data_driven_validation():
+    print("=" * 80)
+    print("TEST: Categorical inputs are validated against the data; bad items are named")
+    print("=" * 80)
+    with TestClient(app) as client:
+        bad_emirate = client.post("/api/predict", json={**BASE, "emirate": "Atlantis", "price_per_sales_unit": 50})
+        assert bad_emirate.status_code == 400 and "Invalid emirate 'Atlantis'" in bad_emirate.json()["detail"]
+        assert client.post("/api/predict", json={**BASE, "month": 13, "price_per_sales_unit": 50}).status_code == 422
+        assert client.post("/api/predict", json={**BASE, "price_per_sales_unit": 50, "currency": "XYZ"}).status_code == 400
+
+        items = [{**BASE, "price_per_sales_unit": 50}] * 3 + [{**BASE, "store_type": "Kiosk", "price_per_sales_unit": 50}]
+        batch = client.post("/api/predict/batch", json={"items": items})
+        assert batch.status_code == 400 and batch.json()["detail"].startswith("items[3]: Invalid store_type 'Kiosk'")
+
+        original = prediction_routes.MAX_BATCH_ITEMS
+        prediction_routes.MAX_BATCH_ITEMS = 2
+        try:
+            assert client.post("/api/predict/batch", json={"items": items[:3]}).status_code == 400
+        finally:
+            prediction_routes.MAX_BATCH_ITEMS = original
+        assert client.post("/api/predict/batch", json={"items": []}).status_code == 422
+    assert DataService.get_categorical_values()["emirate"] >= {"Dubai", "Abu Dhabi", "Sharjah"}
+    print("✓ 400 on values not in the data, 422 on schema violations")
+
+
+def test_app_entry_point_shares_the_service():
+    print("=" * 80)
+    print("TEST: app.py serves the main application (one process, one model)")
+    print("=" * 80)
+    import app as legacy
+    assert legacy.app is app
+    with TestClient(legacy.app) as client:
+        info = client.get("/api/model-info")
+        assert info.status_code == 200
+        assert info.json()["features_count"] == len(XGBoostAIService.get_feature_spec())
+        assert "/api/predict/batch" in client.get("/").json()["endpoints"]
+
+        # Former standalone paths, prices in the data currency as before
+        legacy = client.post("/predict", json={**BASE, **ROLLING, "price_per_sales_unit": 15.5})
+        current = client.post("/api/predict", json={**BASE, **ROLLING, "price_per_sales_unit": 15.5, "currency": "USD"})
+        assert legacy.status_code == 200 and legacy.json()["currency"] == "USD"
+        assert legacy.json()["predicted_demand"] == current.json()["predicted_demand"]
+        assert client.get("/model-info").json() == info.json()
+        assert "Dubai" in client.get("/valid-values").json()["emirates"]
+    print("✓ Same app object, model info served, /predict, /model-info and /valid-values kept")
+
+
+def main():
+    tests = [test_matches_pricing_engine, test_batch_order_and_currency, test_data_driven_validation,
+             test_app_entry_point_shares_the_service]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
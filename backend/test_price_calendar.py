@@ -0,0 +1,89 @@
+"""
+Test script for the multi-period price calendar planner
+Verifies the dynamic program against brute force and checks change limits on real data
+"""
+import sys
+import itertools
+import numpy as np
+from datetime import date
+from services.price_calendar_service import PriceCalendarService
+
+
+def brute_force(profit, start_level, max_changes, min_hold):
+    """Best total profit over every feasible schedule (small problems only)"""
+    n_days, n_levels = profit.shape
+    best = -np.inf
+    for schedule in itertools.product(range(n_levels), repeat=n_days):
+        level, held, changes, total = start_level, min_hold, 0, 0.0
+        for day, k in enumerate(schedule):
+            if k != level:
+                if held < min_hold or changes >= max_changes:
+                    break
+                level, held, changes = k, 1, changes + 1
+            else:
+                held += 1
+            total += profit[day, k]
+        else:
+            best = max(best, total)
+    return best
+
+
+def test_dynamic_program_matches_brute_force():
+    print("=" * 80)
+    print("TEST: DP schedule equals brute-force optimum")
+    print("=" * 80)
+    rng = np.random.default_rng(7)
+    for _ in range(100):
+        n_days, n_levels = rng.integers(1, 6), rng.integers(1, 4)
+        max_changes, min_hold = rng.integers(0, 4), rng.integers(1, 4)
+        profit = rng.normal(size=(n_days, n_levels))
+        start = rng.integers(0, n_levels)
+
+        result = PriceCalendarService.solve_schedule(profit, start, max_changes, min_hold)
+        expected = brute_force(profit, start, max_changes, min_hold)
+        realized = profit[np.arange(n_days), result['levels']].sum()
+        assert np.isclose(result['total_profit'], expected)
+        assert np.isclose(realized, expected)
+    print("✓ 100 random problems solved optimally")
+
+
+def test_calendar_respects_change_limits():
+    print("=" * 80)
+    print("TEST: Calendar plan on historical data")
+    print("=" * 80)
+    result = PriceCalendarService.plan_calendar(
+        product_name="NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)",
+        category="TOTAL COFFEE",
+        emirate="Dubai",
+        store_type="Hypermarket",
+        current_price=6.33,
+        start_date=date(2025, 1, 1),
+        horizon_days=30,
+        max_price_changes=2,
+        min_days_between_changes=5
+    )
+    plan = result['plan']
+    assert len(plan) == 30
+    changes = [i for i, day in enumerate(plan) if day['price_changed']]
+    assert len(changes) <= 2
+    assert all(b - a >= 5 for a, b in zip(changes, changes[1:]))
+    assert result['summary']['expected_profit'] >= result['summary']['baseline_profit'] - 1e-6
+    print(f"✓ {len(changes)} price changes, profit {result['summary']['expected_profit']:.2f} "
+          f"vs baseline {result['summary']['baseline_profit']:.2f}")
+
+
+def main():
+    tests = [test_dynamic_program_matches_brute_force, test_calendar_respects_change_limits]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,93 @@
+"""
+Test script for psychological price-ladder optimization
+Checks ladder generation, per-segment configuration and ladder-constrained recommendations
+"""
+import sys
+import numpy as np
+from services.elasticity_service import ElasticityService
+from services.price_ladder_service import PriceLadderService
+
+USD_TO_AED = 3.7
+
+
+def test_ladder_points():
+    print("=" * 80)
+    print("TEST: Ladder generation with price tiers")
+    print("=" * 80)
+    tiers = [
+        {'max_price': 10.0, 'endings': [0.25, 0.49, 0.75, 0.95, 0.99]},
+        {'max_price': None, 'endings': [0.49, 0.95, 0.99]}
+    ]
+    points = PriceLadderService.ladder_points(9.0, 11.0, tiers)
+    expected = [9.25, 9.49, 9.75, 9.95, 9.99, 10.49, 10.95, 10.99]
+    assert np.allclose(points, expected), points
+
+    # No ladder point inside the range: the closest one is used
+    fallback = PriceLadderService.ladder_points(2.18, 2.29, [{'max_price': None, 'endings': [0.0, 0.5]}])
+    assert np.allclose(fallback, [2.0]), fallback
+    print(f"✓ {points.tolist()}")
+
+
+def test_ladder_resolution():
+    print("=" * 80)
+    print("TEST: Most specific ladder definition wins")
+    print("=" * 80)
+    cached = PriceLadderService.ladders_cache
+    PriceLadderService.ladders_cache = {
+        'default': [{'max_price': None, 'endings': [0.99]}],
+        'emirates': {'Dubai': [{'max_price': None, 'endings': [0.95]}]},
+        'store_types': {'Online': [{'max_price': None, 'endings': [0.49]}]},
+        'segments': {'Dubai/Online': [{'max_price': None, 'endings': [0.29]}]}
+    }
+    try:
+        assert PriceLadderService.get_ladder('Dubai', 'Online')[0]['endings'] == [0.29]
+        assert PriceLadderService.get_ladder('Sharjah', 'Online')[0]['endings'] == [0.49]
+        assert PriceLadderService.get_ladder('Dubai', 'Hypermarket')[0]['endings'] == [0.95]
+        assert PriceLadderService.get_ladder('Sharjah', 'Hypermarket')[0]['endings'] == [0.99]
+    finally:
+        PriceLadderService.ladders_cache = cached
+    print("✓ Segment > store type > emirate > default")
+
+
+def test_optimization_returns_shelf_price():
+    print("=" * 80)
+    print("TEST: Ladder mode returns the best valid shelf price")
+    print("=" * 80)
+    kwargs = dict(
+        product_name="NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", emirate="Dubai", store_type="Hypermarket",
+        current_price=6.33, current_demand=330.0, month=12, day_of_week=2
+    )
+    result = ElasticityService.optimize_price_for_profit(use_price_ladder=True, currency_rate=USD_TO_AED, **kwargs)
+    ladder = result['price_ladder']
+    shelf_price = ladder['shelf_price']
+    assert round(shelf_price % 1, 2) in ladder['endings']
+    assert result['constraints']['min_price'] * USD_TO_AED - 0.01 <= shelf_price
+    assert shelf_price <= result['constraints']['max_price'] * USD_TO_AED + 0.01
+
+    # The chosen shelf price is the profit-best of all ladder points in range
+    candidates = PriceLadderService.get_candidates(
+        result['constraints']['min_price'], result['constraints']['max_price'],
+        "Dubai", "Hypermarket", USD_TO_AED
+    )
+    profit = ElasticityService.evaluate_price_candidates(
+        result['base_elasticity'], 6.33, 330.0, result['estimated_cost'], candidates['prices']
+    )['profit']
+    assert np.isclose(candidates['shelf_prices'][np.argmax(profit)], shelf_price)
+    print(f"✓ Shelf price AED {shelf_price:.2f} out of {ladder['candidates']} ladder points")
+
+
+def main():
+    tests = [test_ladder_points, test_ladder_resolution, test_optimization_returns_shelf_price]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
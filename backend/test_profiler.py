@@ -0,0 +1,129 @@
+"""
+Test script for the on-demand sampling profiler (/admin/profile)
+Checks the config flag and token, collapsed-stack and JSON output, that a busy
+thread shows up in the samples, and the memory bound on distinct stacks
+"""
+import sys
+import threading
+from fastapi.testclient import TestClient
+from main import app
+from services.profiler_service import SamplingProfiler
+
+client = TestClient(app)
+
+
+def spin_for_profiler(stop: threading.Event):
+    """CPU-bound work the profiler should catch"""
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+    return total
+
+
+def with_busy_thread(test):
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_for_profiler, args=(stop,), name='busy-worker')
+    worker.start()
+    try:
+        return test()
+    finally:
+        stop.set()
+        worker.join()
+
+
+def test_disabled_and_token():
+    print("=" * 80)
+    print("TEST: The endpoint is hidden unless enabled and checks the token")
+    print("=" * 80)
+    assert not SamplingProfiler.ENABLED
+    assert client.get("/admin/profile?seconds=0.1").status_code == 404
+    SamplingProfiler.ENABLED, SamplingProfiler.TOKEN = True, "s3cret"
+    try:
+        assert client.get("/admin/profile?seconds=0.1").status_code == 403
+        assert client.get("/admin/profile?seconds=0.1", headers={"X-Profiler-Token": "wrong"}).status_code == 403
+        ok = client.get("/admin/profile?seconds=0.1", headers={"X-Profiler-Token": "s3cret"})
+        assert ok.status_code == 200
+        assert client.get("/admin/profile?seconds=0.1&format=svg", headers={"X-Profiler-Token": "s3cret"}).status_code == 400
+    finally:
+        SamplingProfiler.ENABLED, SamplingProfiler.TOKEN = False, None
+    print("✓ 404 when disabled, 403 on a bad token, 200 with it")
+
+
+def test_collapsed_output():
+    print("=" * 80)
+    print("TEST: Collapsed stacks include the busy thread, ready for flamegraph tools")
+    print("=" * 80)
+    SamplingProfiler.ENABLED = True
+    try:
+        response = with_busy_thread(lambda: client.get("/admin/profile?seconds=0.5&interval_ms=5"))
+    finally:
+        SamplingProfiler.ENABLED = False
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.strip().splitlines()
+    counts = {}
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        counts[stack] = int(count)
+    assert sum(counts.values()) == int(response.headers["x-profile-samples"])
+    busy = [stack for stack in counts if stack.startswith("busy-worker;") and "spin_for_profiler" in stack]
+    assert busy, lines[:5]
+    print(f"✓ {len(lines)} distinct stacks, {sum(counts[stack] for stack in busy)} samples in the busy thread")
+
+
+def test_json_output_and_overhead():
+    print("=" * 80)
+    print("TEST: JSON output lists the most frequent stacks with sampling overhead")
+    print("=" * 80)
+    SamplingProfiler.ENABLED = True
+    try:
+        response = with_busy_thread(lambda: client.get("/admin/profile?seconds=0.5&format=json&top=3"))
+    finally:
+        SamplingProfiler.ENABLED = False
+    result = response.json()
+    assert response.status_code == 200
+    assert 0 < len(result["stacks"]) <= 3
+    assert result["stacks"][0]["stack"][0] == "busy-worker"
+    assert result["samples"] > 0 and 0 <= result["overhead_ratio"] < 0.5
+    print(f"✓ {result['samples']} samples, overhead {result['overhead_ratio']:.1%}")
+
+
+def test_bounded_memory_and_single_run():
+    print("=" * 80)
+    print("TEST: Distinct stacks are capped and only one profile runs at a time")
+    print("=" * 80)
+    original = SamplingProfiler.MAX_STACKS
+    SamplingProfiler.MAX_STACKS = 1
+    try:
+        result = with_busy_thread(lambda: SamplingProfiler.profile(0.2, include_idle=True))
+    finally:
+        SamplingProfiler.MAX_STACKS = original
+    assert result["distinct_stacks"] <= 2 and result["truncated"]
+    assert result["stacks"][SamplingProfiler.OVERFLOW_STACK] > 0
+
+    SamplingProfiler.ENABLED = True
+    SamplingProfiler.lock.acquire()
+    try:
+        busy = client.get("/admin/profile?seconds=0.1")
+    finally:
+        SamplingProfiler.lock.release()
+        SamplingProfiler.ENABLED = False
+    assert busy.status_code == 409
+    print("✓ Overflow bucket used, concurrent profile refused")
+
+
+def main():
+    tests = [test_disabled_and_token, test_collapsed_output, test_json_output_and_overhead, test_bounded_memory_and_single_run]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,80 @@
+"""
+Test script for the single-pass response serialization
+Checks numpy-aware encoding, the stdlib fallback and that optimize / simulate
+responses still satisfy their response models
+"""
+import sys
+import json
+import numpy as np
+from fastapi.testclient import TestClient
+from main import app
+from models.schemas import OptimizationResponse, SimulationResponse, Product
+from services import serialization_service
+from services.serialization_service import SerializationService
+
+client = TestClient(app)
+
+SEGMENT = {
+    "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages",
+    "emirate": "Dubai", "store_type": "Hypermarket", "month": 12, "day_of_week": 2, "day_of_month": 10
+}
+
+
+def test_encoders_agree():
+    print("=" * 80)
+    print("TEST: orjson and stdlib paths produce the same JSON")
+    print("=" * 80)
+    payload = {
+        'f32': np.float32(1.5), 'f64': np.float64(2.25), 'i64': np.int64(7), 'array': np.arange(3),
+        'nan': float('nan'), 'inf': np.inf, 'nested': [{'x': np.float64(0.1)}],
+        'model': Product(id='a', name='b', category='c', current_price=1.0)
+    }
+    expected = {
+        'f32': 1.5, 'f64': 2.25, 'i64': 7, 'array': [0, 1, 2], 'nan': None, 'inf': None,
+        'nested': [{'x': 0.1}],
+        'model': {'id': 'a', 'name': 'b', 'category': 'c', 'current_price': 1.0, 'cost': None, 'unit': 'unit'}
+    }
+    fast = SerializationService.dumps(payload)
+    assert json.loads(fast) == expected
+
+    orjson = serialization_service.orjson
+    serialization_service.orjson = None
+    try:
+        fallback = SerializationService.dumps(payload)
+    finally:
+        serialization_service.orjson = orjson
+    assert json.loads(fallback) == expected
+    print(f"✓ {len(fast)} bytes from both encoders")
+
+
+def test_responses_match_response_models():
+    print("=" * 80)
+    print("TEST: Unvalidated fast responses still satisfy the response models")
+    print("=" * 80)
+    response = client.post("/api/optimize-price", json={"product_id": "x", "current_price": 23.4, **SEGMENT})
+    assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert OptimizationResponse(**body).model_dump(mode='json') == body
+
+    response = client.post("/api/simulate", json={"price": 22.0, **SEGMENT})
+    assert response.status_code == 200
+    body = response.json()
+    assert SimulationResponse(**body).model_dump(mode='json') == body
+    print("✓ optimize-price and simulate round-trip through their models")
+
+
+def main():
+    tests = [test_encoders_agree, test_responses_match_response_models]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
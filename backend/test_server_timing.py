@@ -0,0 +1,115 @@
+"""
+Test script for Server-Timing headers and single-request profiling
+Checks the per-stage breakdown on optimize / cached read responses and the
+X-Request-Profile mode (off unless REQUEST_PROFILING is set, one request at a time)
+"""
+import sys
+from fastapi.testclient import TestClient
+from main import app
+from services.timing_service import RequestProfile, RequestTiming, ServerTimingMiddleware
+
+client = TestClient(app)
+
+SEGMENT = {
+    "product_id": "NES002", "product_name": "NESCAFE 3IN1 CLASSIC 20GX24 BOX (CM)", "category": "Hot Beverages",
+    "emirate": "Dubai", "store_type": "Hypermarket", "month": 12, "day_of_week": 2, "day_of_month": 10
+}
+
+
+def parse_server_timing(header: str) -> dict:
+    """{metric name: duration in ms}"""
+    durations = {}
+    for metric in header.split(','):
+        name, _, duration = metric.strip().partition(';dur=')
+        durations[name] = float(duration)
+    return durations
+
+
+def test_stage_breakdown():
+    print("=" * 80)
+    print("TEST: Optimize responses carry a per-stage Server-Timing header")
+    print("=" * 80)
+    response = client.post("/api/optimize-price", json={**SEGMENT, "current_price": 92.5})
+    assert response.status_code == 200
+    assert response.headers["timing-allow-origin"] == "*"
+    durations = parse_server_timing(response.headers["server-timing"])
+    for stage in ("data_lookup", "feature_encoding", "model_scoring", "elasticity_search", "serialization", "total"):
+        assert stage in durations, stage
+    assert all(value >= 0 for value in durations.values())
+    assert durations["elasticity_search"] <= durations["total"]
+    assert RequestTiming.current.get() is None
+    print(f"✓ {response.headers['server-timing']}")
+
+
+def test_cached_and_error_responses():
+    print("=" * 80)
+    print("TEST: Cached reads, 304s and errors are timed too")
+    print("=" * 80)
+    first = client.get("/api/products")
+    revalidated = client.get("/api/products", headers={"If-None-Match": first.headers["etag"]})
+    missing = client.get("/api/does-not-exist")
+    assert revalidated.status_code == 304 and missing.status_code == 404
+    for response in (first, revalidated, missing):
+        assert "total" in parse_server_timing(response.headers["server-timing"])
+    print("✓ Server-Timing on 200, 304 and 404")
+
+
+def test_profile_disabled_by_default():
+    print("=" * 80)
+    print("TEST: X-Request-Profile is ignored unless REQUEST_PROFILING is enabled")
+    print("=" * 80)
+    assert not ServerTimingMiddleware.PROFILING
+    response = client.post("/api/simulate", json={**SEGMENT, "price": 95.0}, headers={"X-Request-Profile": "1"})
+    assert response.status_code == 200 and "predicted_demand" in response.json()
+    print("✓ Normal response returned")
+
+
+def test_request_profile():
+    print("=" * 80)
+    print("TEST: A profiled request returns its cProfile summary")
+    print("=" * 80)
+    ServerTimingMiddleware.PROFILING = True
+    try:
+        response = client.post(
+            "/api/optimize-price", json={**SEGMENT, "current_price": 92.5}, headers={"X-Request-Profile": "1"}
+        )
+        assert response.status_code == 200
+        report = response.json()
+        assert report["status"] == 200 and report["response_bytes"] > 0
+        assert report["path"] == "/api/optimize-price"
+        assert "elasticity_search" in report["stages_ms"]
+        profile = report["profile"]
+        assert profile["threads"] >= 1  # The request's threadpool calls only
+        assert any("run_price_optimization" in row["function"] for row in profile["functions"])
+        loop = report["event_loop"]  # Reported apart: the loop also serves other requests meanwhile
+        assert loop["threads"] == 1 and loop["total_calls"] > 0 and "other requests" in loop["note"]
+
+        # A second concurrent profile is refused rather than corrupting the first
+        RequestProfile.lock.acquire()
+        try:
+            busy = client.get("/api/products", headers={"X-Request-Profile": "1"})
+        finally:
+            RequestProfile.lock.release()
+        assert busy.status_code == 429
+        assert client.get("/api/products").status_code == 200
+    finally:
+        ServerTimingMiddleware.PROFILING = False
+    print(f"✓ {profile['total_calls']} calls in {profile['threads']} threadpool calls, "
+          f"{loop['total_calls']} on the event loop")
+
+
+def main():
+    tests = [test_stage_breakdown, test_cached_and_error_responses, test_profile_disabled_by_default, test_request_profile]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
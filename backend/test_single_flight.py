@@ -0,0 +1,133 @@
+"""
+Test script for single-flight request deduplication
+Checks that concurrent identical calls share one computation, that errors reach
+every waiter, and that identical concurrent API requests are computed once
+"""
+import sys
+import time
+import asyncio
+import threading
+import httpx
+from main import app
+from services.data_service import DataService
+from services.single_flight import SingleFlight, single_flight
+
+executions = []
+
+
+@single_flight
+def slow_lookup(name, scale=1.0, fail=False):
+    executions.append(name)
+    time.sleep(0.2)
+    if fail:
+        raise ValueError(f"lookup of {name} failed")
+    return {'name': name, 'value': scale}
+
+
+def run_concurrently(calls):
+    results = [None] * len(calls)
+
+    def run(i, call):
+        try:
+            results[i] = call()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_calls_share_one_computation():
+    print("=" * 80)
+    print("TEST: Identical concurrent calls run once")
+    print("=" * 80)
+    executions.clear()
+    calls = [lambda: slow_lookup('a'), lambda: slow_lookup('a', 1.0), lambda: slow_lookup(name='a', scale=1.0)] * 3
+    results = run_concurrently(calls + [lambda: slow_lookup('b')])
+    assert executions.count('a') == 1 and executions.count('b') == 1, executions
+    assert all(r == {'name': 'a', 'value': 1.0} for r in results[:-1])
+    assert results[-1] == {'name': 'b', 'value': 1.0}
+    # Every caller owns its result, the leader included
+    assert len({id(r) for r in results[:-1]}) == len(results) - 1
+
+    def lookup_and_scale():
+        result = slow_lookup('d')
+        result['value'] *= 2
+        return result
+
+    assert all(r['value'] == 2.0 for r in run_concurrently([lookup_and_scale] * 5))
+
+    slow_lookup('a')
+    assert executions.count('a') == 2  # Finished flights are not cached
+    print(f"✓ {len(calls)} callers, 1 computation")
+
+
+def test_errors_reach_every_waiter():
+    print("=" * 80)
+    print("TEST: The leader's exception is raised in every waiter")
+    print("=" * 80)
+    executions.clear()
+    results = run_concurrently([lambda: slow_lookup('c', fail=True)] * 5)
+    assert executions == ['c']
+    assert all(isinstance(r, ValueError) and str(r) == "lookup of c failed" for r in results)
+    assert SingleFlight.stats()['in_flight'] == 0
+    assert slow_lookup('c') == {'name': 'c', 'value': 1.0}
+    print("✓ 5 waiters saw the same ValueError; the next call starts fresh")
+
+
+def test_concurrent_api_requests_deduplicated():
+    print("=" * 80)
+    print("TEST: Concurrent identical product-stats requests compute once")
+    print("=" * 80)
+    get_product_data = DataService.get_product_data.__func__
+    calls = []
+
+    def slow_product_data(cls, product_name):
+        calls.append(product_name)
+        time.sleep(0.2)
+        return get_product_data(cls, product_name)
+
+    async def fire():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            product_id = (await client.get("/api/products")).json()[0]["id"]
+            return await asyncio.gather(*[client.get(f"/api/product-stats/{product_id}") for _ in range(6)])
+
+    DataService.get_product_data = classmethod(slow_product_data)
+    try:
+        before = SingleFlight.stats()
+        responses = asyncio.run(fire())
+        after = SingleFlight.stats()
+    finally:
+        DataService.get_product_data = classmethod(get_product_data)
+
+    assert all(r.status_code == 200 for r in responses)
+    assert all(r.json() == responses[0].json() for r in responses)
+    assert len(calls) == 1, calls
+    assert after['shared'] - before['shared'] == 5
+    print("✓ 6 requests, 1 computation")
+
+
+def main():
+    tests = [
+        test_identical_calls_share_one_computation,
+        test_errors_reach_every_waiter,
+        test_concurrent_api_requests_deduplicated
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
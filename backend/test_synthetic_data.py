@@ -0,0 +1,109 @@
+"""
+Test script for the synthetic sales-data generator (generate_synthetic_data.py)
+Checks the schema against the historical CSV, rolling features against the sales they
+summarize, the demand effects the generator models, and that the chunked / parallel
+output is deterministic and loadable by DataService
+"""
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+import generate_synthetic_data as generator
+from services.data_service import DataService
+
+SEGMENT_KEYS = ['product_name', 'emirate', 'store_type']
+
+
+def generate(tmp: str, name: str, *extra) -> pd.DataFrame:
+    path = os.path.join(tmp, name)
+    args = generator.parse_args(['--products', '8', '--days', '120', '--output', path, *extra])
+    rows = generator.generate(args)
+    frame = pd.read_csv(path)
+    assert rows == len(frame) == 8 * 7 * 6 * 120
+    return frame
+
+
+def test_schema_matches_history():
+    print("=" * 80)
+    print("TEST: Generated data has the historical CSV's columns and types")
+    print("=" * 80)
+    history = pd.read_csv(DataService.DATA_PATH, nrows=500)
+    with tempfile.TemporaryDirectory() as tmp:
+        frame = generate(tmp, 'synthetic.csv', '--workers', '1')
+    assert list(frame.columns) == list(history.columns)
+    assert (frame.dtypes == history.dtypes).all(), frame.dtypes[frame.dtypes != history.dtypes]
+    assert set(history['product_name']) <= set(frame['product_name'])
+    assert frame['sales_units'].gt(0).all() and frame['price_per_sales_unit'].gt(0).all()
+    assert frame.groupby(SEGMENT_KEYS).size().eq(120).all()
+    print(f"✓ {len(frame):,} rows, {frame['product_name'].nunique()} products, identical schema")
+
+
+def test_rolling_features_and_effects():
+    print("=" * 80)
+    print("TEST: Rolling features summarize previous days; weekend, holiday, promo and price effects")
+    print("=" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        frame = generate(tmp, 'synthetic.csv', '--workers', '1', '--start', '2024-11-01')
+    frame = frame.sort_values(SEGMENT_KEYS + ['period_normalized_date'])
+    units = frame.groupby(SEGMENT_KEYS)['sales_units']
+    for window in (3, 7, 30):
+        expected_mean = units.transform(lambda s: s.shift(1).rolling(window).mean())
+        expected_std = units.transform(lambda s: s.shift(1).rolling(window).std())
+        known = expected_mean.notna()
+        assert np.allclose(frame.loc[known, f'rolling_{window}day_mean'], expected_mean[known])
+        assert np.allclose(frame.loc[known, f'rolling_{window}day_std'], expected_std[known])
+    assert frame[[f'rolling_{w}day_std' for w in (3, 7, 30)]].notna().all().all()  # Burn-in fills day one
+
+    relative = frame['sales_units'] / units.transform('mean')
+    assert relative[frame['is_weekend'] == 1].mean() > relative[frame['is_weekend'] == 0].mean() * 1.1
+    assert relative[frame['is_holiday'] == 1].mean() > relative[frame['is_holiday'] == 0].mean() * 1.1
+    promo = frame['promotion'] == 'PROMO'
+    assert 0.02 < promo.mean() < 0.2
+    assert relative[promo].mean() > relative[~promo].mean()
+
+    # Price and demand move in opposite directions within segments (negative log-log slope)
+    log_price = np.log(frame['price_per_sales_unit']) - frame.groupby(SEGMENT_KEYS)['price_per_sales_unit'].transform(lambda s: np.log(s).mean())
+    log_units = np.log(frame['sales_units']) - units.transform(lambda s: np.log(s).mean())
+    slope = (log_price * log_units).sum() / (log_price ** 2).sum()
+    assert -2.0 < slope < -0.3, slope
+    print(f"✓ Rolling windows exact, pooled price slope {slope:.2f}")
+
+
+def test_deterministic_chunks_and_loading():
+    print("=" * 80)
+    print("TEST: Output does not depend on chunk workers; gzip output loads in DataService")
+    print("=" * 80)
+    with tempfile.TemporaryDirectory() as tmp:
+        serial = generate(tmp, 'serial.csv', '--workers', '1', '--chunk-rows', '5000')
+        parallel = generate(tmp, 'parallel.csv.gz', '--workers', '2', '--chunk-rows', '5000')
+    assert serial.equals(parallel)
+
+    original = DataService.load_data()
+    try:
+        parallel['period_normalized_date'] = pd.to_datetime(parallel['period_normalized_date'])
+        DataService.set_data(parallel)
+        product = parallel['product_name'].iloc[-1]
+        rolling = DataService.get_rolling_averages(product, 'Dubai', 'Hypermarket')
+        assert rolling['rolling_7day_mean'] > 0
+        assert len(DataService.get_segment_snapshot()) == 8 * 7 * 6
+    finally:
+        DataService.set_data(original)
+    print("✓ Identical across workers; synthetic product lookups work")
+
+
+def main():
+    tests = [test_schema_matches_history, test_rolling_features_and_effects, test_deterministic_chunks_and_loading]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
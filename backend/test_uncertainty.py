@@ -0,0 +1,134 @@
+"""
+Test script for the Monte Carlo profit uncertainty engine
+Checks the simulation against the deterministic optimizer, the latency budget, and that
+the confidence embedded in optimizations is reproducible
+"""
+import sys
+import time
+import numpy as np
+from services.ai_service import XGBoostAIService
+from services.data_service import DataService
+from services.elasticity_service import ElasticityService
+from services.uncertainty_service import UncertaintyService
+
+
+SEGMENT = dict(base_elasticity=-0.8, estimated_cost=5.38, current_price=6.33, current_demand=330.0)
+
+
+def test_zero_noise_matches_deterministic_profit():
+    """With no elasticity or cost noise every draw equals evaluate_price_candidates"""
+    print("=" * 80)
+    print("TEST: Zero-noise simulation equals deterministic profit")
+    print("=" * 80)
+    prices = np.linspace(5.9, 7.2, 50)
+    sim = UncertaintyService.simulate_profit(
+        prices=prices, recommended_price=6.8, n_draws=200,
+        elasticity_sd=0.0, cost_sd_pct=0.0, seed=1, **SEGMENT
+    )
+    expected = ElasticityService.evaluate_price_candidates(
+        SEGMENT['base_elasticity'], SEGMENT['current_price'], SEGMENT['current_demand'],
+        SEGMENT['estimated_cost'], np.array(sim['price_bands']['price'])
+    )['profit']
+    assert np.allclose(sim['price_bands']['mean_profit'], expected, rtol=1e-4)
+    assert np.allclose(sim['price_bands']['p5'], sim['price_bands']['p95'], rtol=1e-4)
+    assert sim['recommended_profit']['std'] < 1e-2
+    print(f"✓ Max relative error: {np.max(np.abs(np.array(sim['price_bands']['mean_profit']) / expected - 1)):.2e}")
+
+
+def test_distribution_is_consistent():
+    """Quantiles are ordered, probabilities are valid and seeds are reproducible"""
+    print("=" * 80)
+    print("TEST: Distribution consistency")
+    print("=" * 80)
+    prices = np.linspace(5.9, 7.2, UncertaintyService.GRID_POINTS)
+    sim = UncertaintyService.simulate_profit(prices=prices, recommended_price=6.8, seed=3, **SEGMENT)
+    again = UncertaintyService.simulate_profit(prices=prices, recommended_price=6.8, seed=3, **SEGMENT)
+
+    quantiles = list(sim['recommended_profit']['quantiles'].values())
+    assert quantiles == sorted(quantiles)
+    assert 0 <= sim['probability_of_improvement'] <= sim['probability_not_worse'] <= 1
+    assert np.isclose(sum(sim['price_bands']['probability_optimal']), 1.0)
+    assert sum(sim['recommended_profit']['histogram']['counts']) == UncertaintyService.DEFAULT_DRAWS
+    assert np.all(np.array(sim['price_bands']['p5']) <= np.array(sim['price_bands']['p95']))
+    assert sim['probability_of_improvement'] == again['probability_of_improvement']
+    print(f"✓ P(improvement) = {sim['probability_of_improvement']:.3f}, "
+          f"confidence {UncertaintyService.confidence_score(sim)}")
+
+
+def test_hold_confidence_is_not_trivially_certain():
+    """Holding the current price is scored against the strongest alternative, not against itself"""
+    print("=" * 80)
+    print("TEST: Confidence for a hold recommendation")
+    print("=" * 80)
+    prices = np.linspace(5.9, 7.2, UncertaintyService.GRID_POINTS)
+    hold = UncertaintyService.simulate_profit(prices=prices, recommended_price=SEGMENT['current_price'], seed=3, **SEGMENT)
+    move = UncertaintyService.simulate_profit(prices=prices, recommended_price=6.8, seed=3, **SEGMENT)
+
+    assert hold['probability_not_worse'] == 1.0
+    assert hold['probability_of_improvement'] == 0.0
+    assert 0 < hold['probability_alternative_better'] <= 1
+    assert UncertaintyService.confidence_score(hold) < 100
+    assert UncertaintyService.confidence_score(move) == round(move['probability_of_improvement'] * 100, 1)
+    print(f"✓ Hold confidence {UncertaintyService.confidence_score(hold)}, "
+          f"move confidence {UncertaintyService.confidence_score(move)}")
+
+
+def test_latency_budget():
+    """10k draws x 200 prices stays within the interactive budget (50 ms)"""
+    print("=" * 80)
+    print("TEST: Latency for 10k draws x 200 prices")
+    print("=" * 80)
+    prices = np.linspace(5.9, 7.2, 200)
+    UncertaintyService.simulate_profit(prices=prices, recommended_price=6.8, **SEGMENT)
+    timings = []
+    for seed in range(20):
+        start = time.perf_counter()
+        UncertaintyService.simulate_profit(prices=prices, recommended_price=6.8, seed=seed, **SEGMENT)
+        timings.append(time.perf_counter() - start)
+    median_ms = np.median(timings) * 1000
+    assert median_ms < 50, f"median {median_ms:.1f} ms"
+    print(f"✓ Median {median_ms:.1f} ms, max {max(timings) * 1000:.1f} ms")
+
+
+def test_optimization_confidence_is_reproducible():
+    """Identical optimizations draw the same (smaller) seeded sample"""
+    print("=" * 80)
+    print("TEST: Inline confidence score is deterministic per request context")
+    print("=" * 80)
+    XGBoostAIService.load_model()
+    product = DataService.get_products_from_data()[0]
+    request = dict(product_name=product['name'], category=product['category'], emirate='Dubai',
+                   store_type='Hypermarket', current_price=product['current_price'],
+                   month=10, day_of_week=1, day_of_month=27)
+    first = XGBoostAIService.optimize_price(**request)
+    second = XGBoostAIService.optimize_price(**request)
+    weekend = XGBoostAIService.optimize_price(**{**request, 'day_of_week': 5, 'is_weekend': 1})
+    assert first.recommendation.confidence_score == second.recommendation.confidence_score
+    assert first.uncertainty == second.uncertainty
+    assert first.uncertainty['n_draws'] == UncertaintyService.INLINE_DRAWS
+    assert UncertaintyService.context_seed('a', 1) != UncertaintyService.context_seed('a', 2)
+    print(f"✓ Confidence {first.recommendation.confidence_score} on both runs "
+          f"({weekend.recommendation.confidence_score} on a weekend)")
+
+
+def main():
+    tests = [
+        test_zero_noise_matches_deterministic_profit,
+        test_distribution_is_consistent,
+        test_hold_confidence_is_not_trivially_certain,
+        test_latency_budget,
+        test_optimization_confidence_is_reproducible
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {test.__name__} failed: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)